@@ -9,6 +9,10 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.market_data_loader import MarketDataLoader
 import yfinance as yf
 import requests
 from fredapi import Fred
@@ -50,6 +54,20 @@ class CommodityPricesFetcher:
             'SB=F': 'Zucker',
             'LBS=F': 'Holz'
         }
+        
+        # Gemeinsamer Yahoo Finance Cache
+        self.loader = MarketDataLoader(console=self.console)
+        
+        # Kennzahlen-Panel (vollständige Zeitreihe im Langformat)
+        self.panel_file = self.base_path / "commodity_metrics_panel.csv"
+        self.panel_fields = ['Close', 'High', 'Low', 'Volume']
+        self.panel_metrics = [
+            'close', 'high', 'low', 'volume',
+            'price_change_1d', 'price_change_1w', 'price_change_1m',
+            'volatility_1m', 'high_1m', 'low_1m'
+        ]
+        # Anzahl gespeicherter Zeilen zum Aufwärmen der 21-Tage-Fenster
+        self.panel_warmup = 22
     
     def fetch_yahoo_prices(self, symbols, start_date=None, end_date=None):
         """
@@ -68,13 +86,8 @@ class CommodityPricesFetcher:
                 if not start_date:
                     start_date = end_date - timedelta(days=365)
                 
-                # Hole Daten
-                data = yf.download(
-                    symbols,
-                    start=start_date,
-                    end=end_date,
-                    group_by='ticker'
-                )
+                # Hole Daten gebündelt aus dem gemeinsamen Cache
+                data = self.loader.get_panel(symbols, start_date, end_date)
                 
                 return data
                 
@@ -149,7 +162,149 @@ class CommodityPricesFetcher:
             self.console.print(f"[red]Fehler bei der Datenanalyse: {str(e)}[/red]")
             return None
     
-    def process_commodities(self, symbols=None, start_date=None, end_date=None):
+    def _to_field_frames(self, price_data, symbols):
+        """
+        Zerlegt den gruppierten yf.download Output in breite Frames (Datum × Symbol)
+        
+        Args:
+            price_data (pd.DataFrame): Ergebnis von fetch_yahoo_prices
+            symbols (list): Liste von Yahoo Finance Symbolen
+        """
+        if not isinstance(price_data.columns, pd.MultiIndex):
+            price_data = pd.concat({symbols[0]: price_data}, axis=1)
+        
+        symbols = [symbol for symbol in symbols if symbol in price_data.columns.get_level_values(0)]
+        
+        return {
+            field: price_data.xs(field, axis=1, level=1).reindex(columns=symbols).astype(float)
+            for field in self.panel_fields
+        }
+    
+    def compute_metrics_panel(self, fields):
+        """
+        Berechnet alle Kennzahlen für alle Rohstoffe gleichzeitig über die gesamte Historie
+        
+        Args:
+            fields (dict): Breite Frames (Datum × Symbol) für Close, High, Low, Volume
+        
+        Returns:
+            dict: Kennzahl -> breiter Frame (Datum × Symbol)
+        """
+        close = fields['Close']
+        returns = close / close.shift(1) - 1
+        
+        return {
+            'close': close,
+            'high': fields['High'],
+            'low': fields['Low'],
+            'volume': fields['Volume'],
+            'price_change_1d': returns,
+            'price_change_1w': close / close.shift(5) - 1,
+            'price_change_1m': close / close.shift(21) - 1,
+            'volatility_1m': returns.rolling(21).std(),
+            'high_1m': fields['High'].rolling(21).max(),
+            'low_1m': fields['Low'].rolling(21).min()
+        }
+    
+    def _panel_to_long(self, metrics):
+        """
+        Wandelt das Kennzahlen-Panel in das Langformat (date, symbol, Kennzahlen) um
+        
+        Args:
+            metrics (dict): Ergebnis von compute_metrics_panel
+        """
+        close = metrics['close']
+        n_dates, n_symbols = close.shape
+        
+        long_df = pd.DataFrame({
+            'date': np.repeat(close.index.values, n_symbols),
+            'symbol': np.tile(close.columns.values, n_dates),
+            **{name: metrics[name].to_numpy().ravel() for name in self.panel_metrics}
+        })
+        
+        return long_df.dropna(subset=['close'])
+    
+    def update_metrics_panel(self, symbols=None, start_date=None, end_date=None):
+        """
+        Aktualisiert das persistierte Kennzahlen-Panel inkrementell
+        
+        Bekannte Symbole werden ab ihrer jeweils letzten gespeicherten Zeile nachgeladen,
+        die Rolling-Fenster werden aus den gespeicherten Rohpreisen aufgewärmt. Neue
+        Symbole werden ab start_date vollständig geladen.
+        
+        Args:
+            symbols (list, optional): Liste von Yahoo Finance Symbolen
+            start_date (str, optional): Startdatum für neue Symbole im Format YYYY-MM-DD
+            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+        
+        Returns:
+            pd.DataFrame: Vollständiges Panel im Langformat
+        """
+        if not symbols:
+            symbols = list(self.default_commodities.keys())
+        
+        stored = None
+        if self.panel_file.exists():
+            stored = pd.read_csv(self.panel_file, parse_dates=['date'])
+        
+        known = set(stored['symbol'].unique()) if stored is not None else set()
+        new_symbols = [symbol for symbol in symbols if symbol not in known]
+        old_symbols = [symbol for symbol in symbols if symbol in known]
+        
+        new_rows = []
+        
+        # Neue Symbole: vollständige Historie
+        if new_symbols:
+            price_data = self.fetch_yahoo_prices(new_symbols, start_date, end_date)
+            if price_data is not None and not price_data.empty:
+                metrics = self.compute_metrics_panel(self._to_field_frames(price_data, new_symbols))
+                new_rows.append(self._panel_to_long(metrics))
+        
+        # Bekannte Symbole: nur neue Zeilen, Fenster aus den gespeicherten Rohpreisen aufwärmen.
+        # Jedes Symbol wird ab seinem eigenen letzten Tag nachgeladen, damit zurückliegende
+        # Symbole (z.B. nach einem fehlgeschlagenen Download) aufgefüllt werden
+        if old_symbols:
+            history = stored[stored['symbol'].isin(old_symbols)]
+            last_dates = history.groupby('symbol')['date'].max().reindex(old_symbols)
+            fetch_start = (last_dates.min() + timedelta(days=1)).strftime('%Y-%m-%d')
+            fetch_end = end_date or datetime.now().strftime('%Y-%m-%d')
+            
+            def is_new(frame):
+                return pd.DataFrame(
+                    frame.index.values[:, None] > last_dates.reindex(frame.columns).values[None, :],
+                    index=frame.index, columns=frame.columns
+                )
+            
+            if fetch_start < fetch_end:
+                price_data = self.fetch_yahoo_prices(old_symbols, fetch_start, fetch_end)
+                
+                if price_data is not None and not price_data.empty:
+                    fresh = self._to_field_frames(price_data, old_symbols)
+                    fresh = {field: frame.where(is_new(frame)) for field, frame in fresh.items()}
+                    
+                    # Aufwärmen ab dem am weitesten zurückliegenden Symbol
+                    dates = np.sort(history['date'].unique())
+                    warmup_dates = dates[max(np.searchsorted(dates, last_dates.min().to_datetime64(), side='right') - self.panel_warmup, 0):]
+                    warmup = history[history['date'].isin(warmup_dates)]
+                    
+                    fields = {}
+                    for field, column in zip(self.panel_fields, ['close', 'high', 'low', 'volume']):
+                        tail = warmup.pivot(index='date', columns='symbol', values=column)
+                        fields[field] = tail.combine_first(fresh[field]).reindex(columns=old_symbols)
+                    
+                    metrics = self.compute_metrics_panel(fields)
+                    metrics = {name: frame.where(is_new(frame)) for name, frame in metrics.items()}
+                    new_rows.append(self._panel_to_long(metrics))
+        
+        new_rows = [rows for rows in new_rows if not rows.empty]
+        if new_rows:
+            appended = pd.concat(new_rows, ignore_index=True).sort_values(['date', 'symbol'])
+            appended.to_csv(self.panel_file, mode='a', header=stored is None, index=False)
+            stored = appended if stored is None else pd.concat([stored, appended], ignore_index=True)
+        
+        return stored
+    
+    def process_commodities(self, symbols=None, start_date=None, end_date=None, update_panel=False):
         """
         Verarbeitet mehrere Rohstoffe
         
@@ -157,43 +312,45 @@ class CommodityPricesFetcher:
             symbols (list, optional): Liste von Yahoo Finance Symbolen
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            update_panel (bool, optional): Persistiertes Kennzahlen-Panel inkrementell aktualisieren
         """
         try:
             # Verwende Standard-Symbole, wenn keine angegeben wurden
             if not symbols:
                 symbols = list(self.default_commodities.keys())
             
-            # Hole Preisdaten
-            price_data = self.fetch_yahoo_prices(symbols, start_date, end_date)
+            # Berechne das Kennzahlen-Panel für alle Rohstoffe gleichzeitig
+            if update_panel:
+                panel = self.update_metrics_panel(symbols, start_date, end_date)
+            else:
+                panel = None
+                price_data = self.fetch_yahoo_prices(symbols, start_date, end_date)
+                if price_data is not None and not price_data.empty:
+                    panel = self._panel_to_long(self.compute_metrics_panel(self._to_field_frames(price_data, symbols)))
             
-            if price_data is not None:
-                results = []
+            if panel is not None and not panel.empty:
+                panel = panel[panel['symbol'].isin(symbols) & panel['symbol'].isin(list(self.default_commodities))]
                 
-                with Progress() as progress:
-                    task = progress.add_task("[cyan]Analysiere Rohstoffe...", total=len(symbols))
-                    
-                    for symbol in symbols:
-                        if symbol in self.default_commodities:
-                            commodity_name = self.default_commodities[symbol]
-                            
-                            # Extrahiere Daten für diesen Rohstoff
-                            if len(symbols) > 1:
-                                commodity_data = price_data[symbol]
-                            else:
-                                commodity_data = price_data
-                            
-                            # Analysiere die Daten
-                            metrics = self.analyze_commodity_prices(commodity_data, commodity_name)
-                            
-                            if metrics:
-                                results.append({
-                                    'symbol': symbol,
-                                    'name': commodity_name,
-                                    'date': datetime.now().strftime('%Y-%m-%d'),
-                                    **metrics
-                                })
-                        
-                        progress.update(task, advance=1)
+                # Momentaufnahme aus der letzten Zeile je Rohstoff
+                latest = panel.sort_values('date').groupby('symbol').tail(1).set_index('symbol')
+                volume_avg = panel.groupby('symbol')['volume'].mean()
+                
+                results = []
+                for symbol in [symbol for symbol in symbols if symbol in latest.index]:
+                    row = latest.loc[symbol]
+                    results.append({
+                        'symbol': symbol,
+                        'name': self.default_commodities[symbol],
+                        'date': datetime.now().strftime('%Y-%m-%d'),
+                        'current_price': row['close'],
+                        'price_change_1d': row['price_change_1d'],
+                        'price_change_1w': row['price_change_1w'],
+                        'price_change_1m': row['price_change_1m'],
+                        'volatility_1m': row['volatility_1m'],
+                        'volume_avg': volume_avg[symbol],
+                        'high_1m': row['high_1m'],
+                        'low_1m': row['low_1m']
+                    })
                 
                 # Konvertiere zu DataFrame
                 if results:
@@ -219,6 +376,8 @@ class CommodityPricesFetcher:
                         )
                     
                     table.add_row("Speicherort", str(output_file), "", "")
+                    if update_panel:
+                        table.add_row("Panel", str(self.panel_file), "", "")
                     
                     self.console.print(table)
                 
@@ -230,6 +389,7 @@ def main():
     parser.add_argument('--symbols', nargs='+', help='Liste von Yahoo Finance Symbolen')
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--update-panel', action='store_true', help='Kennzahlen-Panel inkrementell aktualisieren')
     
     args = parser.parse_args()
     
@@ -238,7 +398,8 @@ def main():
         fetcher.process_commodities(
             symbols=args.symbols,
             start_date=args.start_date,
-            end_date=args.end_date
+            end_date=args.end_date,
+            update_panel=args.update_panel
         )
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
@@ -10,18 +10,100 @@ from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
 import requests
-from planet import api
-from planet.api import filters
-import cv2
-from skimage import measure
 import rasterio
-from rasterio.plot import show
+from rasterio.windows import Window, intersect
+from rasterio.features import geometry_mask, geometry_window
+from rasterio.warp import transform_geom
+from rasterio.errors import WindowError
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.planet_assets import PlanetAssetManager, PLANET_API_URL, CACHE_LIMIT, point_aoi
+
+# Kacheln werden an der Blockstruktur der Datei ausgerichtet (ganze Blöcke pro Lesezugriff)
+TILE_SIZE = 1024
+TILES_PER_TASK = 16
+HISTOGRAM_BINS = 50
+
+# Fester Histogrammbereich für Float-Radianzen (z.B. VIIRS nW/cm²/sr), Werte darüber landen im letzten Bin
+FLOAT_HISTOGRAM_RANGE = (0.0, 500.0)
+VISUALIZATION_SIZE = 1024
+
+def histogram_range(dtype):
+    """
+    Fester Histogrammbereich eines Datentyps (Integer: voller Wertebereich)
+    
+    Args:
+        dtype (np.dtype): Datentyp des Rasters
+    """
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return (float(info.min), float(info.max) + 1)
+    return FLOAT_HISTOGRAM_RANGE
+
+def tile_windows(src, tile_size=TILE_SIZE, region=None):
+    """
+    Kachel-Fenster aus ganzen Blöcken, optional nur innerhalb einer Region
+    
+    Args:
+        src (rasterio.DatasetReader): Geöffnetes Raster
+        tile_size (int): Ungefähre Kantenlänge einer Kachel in Pixeln
+        region (Window, optional): Nur Kacheln, die dieses Fenster schneiden
+    """
+    block_height, block_width = src.block_shapes[0]
+    height = block_height * max(tile_size // block_height, 1)
+    width = block_width * max(tile_size // block_width, 1)
+    for row in range(0, src.height, height):
+        for col in range(0, src.width, width):
+            window = Window(col, row, min(width, src.width - col), min(height, src.height - row))
+            if region is None or intersect(window, region):
+                yield window
+
+def _tile_stats(task):
+    """
+    Streaming-Statistiken einer Gruppe von Kacheln (läuft im Worker-Prozess)
+    
+    Args:
+        task (tuple): Pfad, Fenster, Bänder, AOI-Geometrie (Raster-CRS), Histogrammbereich, Anzahl Bins
+    
+    Returns:
+        tuple: Anzahl Pixel, Summe, Maximum, Histogramm
+    """
+    path, windows, bands, aoi, value_range, bins = task
+    count, total, maximum = 0, 0.0, -np.inf
+    histogram = np.zeros(bins, dtype=np.int64)
+    low, high = value_range
+    
+    with rasterio.open(path) as src:
+        for window in windows:
+            data = src.read(bands, window=window, masked=True)
+            valid = ~np.ma.getmaskarray(data)
+            if aoi is not None:
+                valid &= geometry_mask([aoi], out_shape=(window.height, window.width), transform=src.window_transform(window), invert=True)
+            
+            values = data.data[valid]
+            if values.size == 0:
+                continue
+            
+            count += values.size
+            total += values.sum(dtype=np.float64)
+            maximum = max(maximum, float(values.max()))
+            bin_index = ((values.astype(np.float64) - low) * (bins / (high - low))).astype(np.int64)
+            histogram += np.bincount(np.clip(bin_index, 0, bins - 1), minlength=bins)
+    
+    return count, total, maximum, histogram
 
 class NightlightAnalyzer:
-    def __init__(self):
+    def __init__(self, stub_url=None, cache_limit=CACHE_LIMIT):
         """
         Initialisiert den Nightlight Analyzer
+        
+        Args:
+            stub_url (str, optional): Basis-URL eines Stub-Servers (common/planet_stub_server.py) statt der echten API
+            cache_limit (int): Maximale Größe des Szenen-Caches in Bytes
         """
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/alternative_data/nightlights")
@@ -30,14 +112,19 @@ class NightlightAnalyzer:
         
         # Lade Planet Labs API-Key
         self.api_key = os.getenv('PLANET_API_KEY')
-        if not self.api_key:
+        self.stub_url = stub_url
+        if not self.api_key and not stub_url:
             self.console.print("[yellow]Warnung: Kein PLANET_API_KEY in .env gefunden[/yellow]")
         
-        # Initialisiere Planet API Client
-        if self.api_key:
-            self.client = api.ClientV1(api_key=self.api_key)
+        # Such- und Szenen-Cache, gemeinsam mit den anderen Planet-Analyzern
+        self.assets = PlanetAssetManager(
+            api_key=self.api_key,
+            base_url=stub_url or PLANET_API_URL,
+            cache_limit=cache_limit,
+            console=self.console
+        )
     
-    def get_nightlight_images(self, location, start_date=None, end_date=None):
+    def get_nightlight_images(self, location, start_date=None, end_date=None, aoi=None):
         """
         Holt Nachtlicht-Satellitenbilder von Planet Labs
         
@@ -45,87 +132,175 @@ class NightlightAnalyzer:
             location (dict): Koordinaten des Gebiets {'lat': float, 'lon': float}
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            aoi (dict, optional): GeoJSON-Geometrie in WGS84 für die Suche (Standard: Standort)
+        
+        Returns:
+            list: Szenen mit id, acquired und lokalem path
         """
         try:
             with self.console.status("[bold blue]Lade Nachtlichtbilder..."):
-                if not self.api_key:
+                if not self.api_key and not self.stub_url:
                     self.console.print("[red]Fehler: Kein API-Key verfügbar[/red]")
                     return []
                 
-                # Setze Standardwerte
-                if not end_date:
-                    end_date = datetime.now()
-                if not start_date:
-                    start_date = end_date - timedelta(days=30)
-                
-                # Erstelle GeoJSON für das Gebiet
-                geojson = {
-                    "type": "Point",
-                    "coordinates": [location['lon'], location['lat']]
-                }
-                
-                # Erstelle Filter für die Suche
-                date_filter = filters.date_range('acquired', gte=start_date, lte=end_date)
-                cloud_filter = filters.range_filter('cloud_cover', lte=0.1)
-                geom_filter = filters.geom_filter(geojson)
-                night_filter = filters.range_filter('night', eq=True)
+                geometry = aoi or point_aoi(location['lat'], location['lon'])
                 
-                # Kombiniere Filter
-                combined_filter = filters.and_filter(date_filter, cloud_filter, geom_filter, night_filter)
+                # Nachtaufnahmen: Sonne unter dem Horizont
+                night_filter = {"type": "RangeFilter", "field_name": "sun_elevation", "config": {"lte": 0}}
                 
-                # Suche nach Bildern
-                search = self.client.quick_search(combined_filter, item_type='PSScene4Band')
-                
-                return list(search.items_iter())
+                return self.assets.get_scenes(geometry, start_date, end_date, cloud_cover=0.1, extra_filters=[night_filter], days=30)
                 
         except Exception as e:
             self.console.print(f"[red]Fehler beim Abrufen der Nachtlichtbilder: {str(e)}[/red]")
             return []
     
-    def analyze_nightlight(self, image_path):
+    def _image_tasks(self, image_path, aoi=None, bands=None, value_range=None, tile_size=TILE_SIZE):
+        """
+        Zerlegt ein Bild in Gruppen von Kacheln für den Prozess-Pool
+        
+        Args:
+            image_path (str): Pfad zum Satellitenbild
+            aoi (dict, optional): GeoJSON-Geometrie in WGS84, nur Pixel innerhalb zählen
+            bands (list, optional): Bänder (Standard: alle)
+            value_range (tuple, optional): Histogrammbereich (Standard: nach Datentyp)
+            tile_size (int): Ungefähre Kantenlänge einer Kachel in Pixeln
+        
+        Returns:
+            tuple: Tasks und Histogrammbereich
+        """
+        with rasterio.open(image_path) as src:
+            bands = bands or list(src.indexes)
+            value_range = value_range or histogram_range(np.dtype(src.dtypes[0]))
+            region = None
+            if aoi is not None:
+                aoi = transform_geom('EPSG:4326', src.crs, aoi)
+                try:
+                    region = geometry_window(src, [aoi])
+                except WindowError:
+                    return [], value_range
+            windows = list(tile_windows(src, tile_size, region))
+        
+        tasks = [
+            (str(image_path), windows[i:i + TILES_PER_TASK], bands, aoi, value_range, HISTOGRAM_BINS)
+            for i in range(0, len(windows), TILES_PER_TASK)
+        ]
+        return tasks, value_range
+    
+    def visualize_nightlight(self, image_path, band=1):
+        """
+        Speichert eine verkleinerte Darstellung eines Bildes (Übersicht statt Vollauflösung)
+        
+        Args:
+            image_path (str): Pfad zum Satellitenbild
+            band (int): Dargestelltes Band
+        """
+        with rasterio.open(image_path) as src:
+            scale = max(src.width, src.height) / VISUALIZATION_SIZE
+            out_shape = (max(int(src.height / max(scale, 1)), 1), max(int(src.width / max(scale, 1)), 1))
+            image = src.read(band, out_shape=out_shape, masked=True)
+        
+        plt.figure(figsize=(10, 6))
+        plt.imshow(image, cmap='inferno')
+        plt.title('Nachtlichtintensität')
+        plt.colorbar(label='Intensität')
+        
+        vis_path = self.base_path / f"nightlight_visualization_{Path(image_path).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        plt.savefig(vis_path)
+        plt.close()
+        return str(vis_path)
+    
+    def analyze_images(self, image_paths, aoi=None, bands=None, value_range=None, visualize=False, max_workers=None, tile_size=TILE_SIZE):
+        """
+        Analysiert mehrere Bilder kachelweise in einem Prozess-Pool
+        
+        Jede Kachel wird einzeln gelesen und in Anzahl, Summe, Maximum und ein
+        Histogramm mit festen Bins verdichtet. Der Speicherbedarf hängt nur von
+        der Kachelgröße ab, nicht von der Bildgröße. Bilder mit einer
+        fehlgeschlagenen Kachel fehlen im Ergebnis, statt mit unvollständigen
+        Statistiken zurückgegeben zu werden.
+        
+        Args:
+            image_paths (list): Pfade zu Satellitenbildern
+            aoi (dict, optional): GeoJSON-Geometrie in WGS84, nur Pixel innerhalb zählen
+            bands (list, optional): Bänder (Standard: alle)
+            value_range (tuple, optional): Histogrammbereich (Standard: nach Datentyp)
+            visualize (bool): PNG-Darstellung je Bild speichern
+            max_workers (int, optional): Anzahl Prozesse
+            tile_size (int): Ungefähre Kantenlänge einer Kachel in Pixeln
+        
+        Returns:
+            dict: Pfad -> Analyse (wie analyze_nightlight)
+        """
+        tasks, ranges, results = [], {}, {}
+        # Gemeinsam genutzte Szenen nur einmal zählen (Reihenfolge bleibt erhalten)
+        for image_path in dict.fromkeys(image_paths):
+            try:
+                image_tasks, ranges[image_path] = self._image_tasks(image_path, aoi, bands, value_range, tile_size)
+                tasks += [(image_path, task) for task in image_tasks]
+            except Exception as e:
+                self.console.print(f"[red]Fehler bei der Bildanalyse von {image_path}: {str(e)}[/red]")
+        
+        totals = {image_path: [0, 0.0, -np.inf, np.zeros(HISTOGRAM_BINS, dtype=np.int64)] for image_path in ranges}
+        failed = set()
+        
+        def combine(image_path, stats):
+            total = totals[image_path]
+            total[0] += stats[0]
+            total[1] += stats[1]
+            total[2] = max(total[2], stats[2])
+            total[3] += stats[3]
+        
+        # Kleine Aufträge ohne Prozess-Overhead
+        if len(tasks) <= 1:
+            for image_path, task in tasks:
+                try:
+                    combine(image_path, _tile_stats(task))
+                except Exception as e:
+                    failed.add(image_path)
+                    self.console.print(f"[red]Fehler bei der Bildanalyse von {image_path}: {str(e)}[/red]")
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(_tile_stats, task): image_path for image_path, task in tasks}
+                for future in as_completed(futures):
+                    image_path = futures[future]
+                    try:
+                        combine(image_path, future.result())
+                    except Exception as e:
+                        failed.add(image_path)
+                        self.console.print(f"[red]Fehler bei der Bildanalyse von {image_path}: {str(e)}[/red]")
+        
+        for image_path, (count, total, maximum, histogram) in totals.items():
+            if image_path in failed:
+                self.console.print(f"[yellow]Warnung: {image_path} wegen fehlgeschlagener Kacheln übersprungen[/yellow]")
+                continue
+            if count == 0:
+                self.console.print(f"[yellow]Warnung: Keine gültigen Pixel in {image_path}[/yellow]")
+                continue
+            results[image_path] = {
+                'avg_intensity': total / count,
+                'max_intensity': maximum,
+                'pixel_count': count,
+                'intensity_distribution': (histogram, np.linspace(*ranges[image_path], HISTOGRAM_BINS + 1)),
+                'visualization_path': self.visualize_nightlight(image_path) if visualize else None
+            }
+        return results
+    
+    def analyze_nightlight(self, image_path, aoi=None, visualize=False):
         """
         Analysiert die Nachtlichtintensität in einem Satellitenbild
         
         Args:
             image_path (str): Pfad zum Satellitenbild
+            aoi (dict, optional): GeoJSON-Geometrie in WGS84, nur Pixel innerhalb zählen
+            visualize (bool): PNG-Darstellung speichern
         """
         try:
-            # Lade und verarbeite das Bild
-            with rasterio.open(image_path) as src:
-                image = src.read()
-                
-                # Berechne Durchschnittsintensität
-                avg_intensity = np.mean(image)
-                
-                # Berechne maximale Intensität
-                max_intensity = np.max(image)
-                
-                # Berechne Intensitätsverteilung
-                intensity_distribution = np.histogram(image.flatten(), bins=50)
-                
-                # Erstelle Visualisierung
-                plt.figure(figsize=(10, 6))
-                show(image)
-                plt.title('Nachtlichtintensität')
-                plt.colorbar(label='Intensität')
-                
-                # Speichere Visualisierung
-                vis_path = self.base_path / f"nightlight_visualization_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                plt.savefig(vis_path)
-                plt.close()
-                
-                return {
-                    'avg_intensity': avg_intensity,
-                    'max_intensity': max_intensity,
-                    'intensity_distribution': intensity_distribution,
-                    'visualization_path': str(vis_path)
-                }
-                
+            return self.analyze_images([image_path], aoi=aoi, visualize=visualize).get(image_path)
         except Exception as e:
             self.console.print(f"[red]Fehler bei der Bildanalyse: {str(e)}[/red]")
             return None
     
-    def process_locations(self, locations, start_date=None, end_date=None):
+    def process_locations(self, locations, start_date=None, end_date=None, aoi=None, visualize=False, max_workers=None):
         """
         Verarbeitet mehrere Standorte
         
@@ -133,36 +308,43 @@ class NightlightAnalyzer:
             locations (list): Liste von Standort-Koordinaten
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            aoi (dict, optional): GeoJSON-Geometrie in WGS84, nur Pixel innerhalb zählen
+            visualize (bool): PNG-Darstellung je Bild speichern
+            max_workers (int, optional): Anzahl Prozesse
         """
         try:
-            results = []
+            images = []
             
             with Progress() as progress:
-                task = progress.add_task("[cyan]Analysiere Standorte...", total=len(locations))
+                task = progress.add_task("[cyan]Suche Bilder je Standort...", total=len(locations))
                 
                 for location in locations:
                     # Hole Nachtlichtbilder
-                    images = self.get_nightlight_images(location, start_date, end_date)
-                    
-                    if images:
-                        # Analysiere jedes Bild
-                        for image in images:
-                            analysis = self.analyze_nightlight(image['path'])
-                            
-                            if analysis:
-                                results.append({
-                                    'date': image['acquired'],
-                                    'location': f"{location['lat']}, {location['lon']}",
-                                    'avg_intensity': analysis['avg_intensity'],
-                                    'max_intensity': analysis['max_intensity'],
-                                    'visualization_path': analysis['visualization_path']
-                                })
-                    
+                    for image in self.get_nightlight_images(location, start_date, end_date, aoi):
+                        images.append((location, image))
                     progress.update(task, advance=1)
             
+            # Alle Kacheln aller Bilder in einem Prozess-Pool
+            with self.console.status(f"[bold blue]Analysiere {len(images)} Bilder kachelweise..."):
+                analyses = self.analyze_images([image['path'] for _, image in images], aoi=aoi, visualize=visualize, max_workers=max_workers)
+            
+            results = []
+            for location, image in images:
+                analysis = analyses.get(image['path'])
+                if analysis:
+                    results.append({
+                        'date': image['acquired'],
+                        'location': f"{location['lat']}, {location['lon']}",
+                        'avg_intensity': analysis['avg_intensity'],
+                        'max_intensity': analysis['max_intensity'],
+                        'pixel_count': analysis['pixel_count'],
+                        'visualization_path': analysis['visualization_path']
+                    })
+            
             # Konvertiere zu DataFrame
             if results:
                 df = pd.DataFrame(results)
+                df['date'] = pd.to_datetime(df['date'])
                 
                 # Speichere die Daten
                 output_file = self.base_path / f"nightlight_analysis_{start_date}_{end_date}.csv"
@@ -189,6 +371,12 @@ def main():
     parser.add_argument('--locations', nargs='+', help='Liste von Standort-Koordinaten (lat,lon)')
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--aoi', help='GeoJSON-Datei mit dem Analysegebiet (WGS84)')
+    parser.add_argument('--visualize', action='store_true', help='PNG-Darstellung je Bild speichern')
+    parser.add_argument('--max-workers', type=int, help='Anzahl Prozesse')
+    parser.add_argument('--cache-limit', type=float, default=CACHE_LIMIT / 1024 ** 3, help='Maximale Größe des Szenen-Caches in GB')
+    parser.add_argument('--stub', action='store_true', help='Lokalen Stub-Server statt der echten Planet API verwenden')
+    parser.add_argument('--stub-url', help='Basis-URL eines bereits laufenden Stub-Servers')
     
     args = parser.parse_args()
     
@@ -200,14 +388,36 @@ def main():
                 lat, lon = map(float, loc.split(','))
                 locations.append({'lat': lat, 'lon': lon})
         
-        analyzer = NightlightAnalyzer()
+        # GeoJSON-Datei: Geometrie, Feature oder erste Geometrie einer FeatureCollection
+        aoi = None
+        if args.aoi:
+            with open(args.aoi) as f:
+                aoi = json.load(f)
+            if aoi.get('type') == 'FeatureCollection':
+                aoi = aoi['features'][0]
+            aoi = aoi.get('geometry', aoi)
+        
+        stub_server = None
+        stub_url = args.stub_url
+        if args.stub and not stub_url:
+            from common.planet_stub_server import PlanetStubServer
+            stub_server = PlanetStubServer(activation_delay=2.0, latency=0.05).start()
+            stub_url = stub_server.url
+        
+        analyzer = NightlightAnalyzer(stub_url=stub_url, cache_limit=int(args.cache_limit * 1024 ** 3))
         analyzer.process_locations(
             locations=locations,
             start_date=args.start_date,
-            end_date=args.end_date
+            end_date=args.end_date,
+            aoi=aoi,
+            visualize=args.visualize,
+            max_workers=args.max_workers
         )
+        
+        if stub_server:
+            stub_server.stop()
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
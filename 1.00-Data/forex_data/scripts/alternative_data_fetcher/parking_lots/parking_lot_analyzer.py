@@ -10,15 +10,119 @@ from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
 import requests
-from planet import api
-from planet.api import filters
 import cv2
-from skimage import measure
+import json
+import hashlib
+from collections import deque
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.planet_assets import PlanetAssetManager, PLANET_API_URL, CACHE_LIMIT, point_aoi
+
+SCENE_EXTENSIONS = ('.tif', '.tiff', '.png', '.jpg', '.jpeg')
+
+# Zusammenhängende Flächen unter dieser Pixelanzahl gelten als Rauschen
+MIN_OBJECT_AREA = 4
+
+# Szenen je Worker, die gleichzeitig dekodiert im Shared Memory liegen dürfen
+SCENES_PER_WORKER = 2
+
+# Worker per spawn starten: fork aus einem Prozess mit laufenden Lade-Threads
+# (cv2.imread hält interne Locks) kann unter Linux hängen bleiben
+POOL_START_METHOD = 'spawn'
+
+# Halbe Kantenlänge des Ausschnitts um einen Parkplatz in Metern
+PARKING_LOT_RADIUS = 250
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    SHA-256 einer Datei, blockweise gelesen
+    
+    Args:
+        path (str): Pfad zur Datei
+        chunk_size (int): Blockgröße in Bytes
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def occupancy_counts(gray, threshold=0.5, min_area=MIN_OBJECT_AREA):
+    """
+    Belegte Fläche und Objekte eines Graustufenbilds in einem Durchlauf
+    
+    Ein Connected-Component-Labelling liefert die Fläche jedes hellen Objekts,
+    jedes Pixel wird genau einmal gezählt (keine doppelt gezählten Konturen).
+    
+    Args:
+        gray (np.ndarray): Graustufenbild (uint8)
+        threshold (float): Schwellenwert für die Erkennung (Anteil von 255)
+        min_area (int): Mindestfläche eines Objekts in Pixeln
+    
+    Returns:
+        dict: Belegte Pixel, Gesamtpixel, Anzahl Objekte und Auslastung
+    """
+    binary = (gray > int(255 * threshold)).view(np.uint8)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    
+    # Label 0 ist der Hintergrund
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    areas = areas[areas >= min_area]
+    occupied, total = int(areas.sum()), int(gray.size)
+    return {
+        'occupied_pixels': occupied,
+        'total_pixels': total,
+        'object_count': int(areas.size),
+        'occupancy_rate': occupied / total if total else np.nan
+    }
+
+def _load_scene(path):
+    """
+    Dekodiert eine Szene als Graustufenbild in ein Shared-Memory-Segment
+    
+    Args:
+        path (str): Pfad zur Szene
+    
+    Returns:
+        tuple: Shared-Memory-Segment, Bildform
+    """
+    gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError(f"Bild konnte nicht gelesen werden: {path}")
+    
+    shm = shared_memory.SharedMemory(create=True, size=max(gray.nbytes, 1))
+    np.ndarray(gray.shape, dtype=np.uint8, buffer=shm.buf)[:] = gray
+    return shm, gray.shape
+
+def _scene_occupancy(task):
+    """
+    Auslastung einer Szene aus dem Shared Memory (läuft im Worker-Prozess)
+    
+    Args:
+        task (tuple): Segmentname, Bildform, Schwellenwert, Mindestfläche
+    """
+    name, shape, threshold, min_area = task
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        gray = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        counts = occupancy_counts(gray, threshold, min_area)
+        del gray
+        return counts
+    finally:
+        shm.close()
 
 class ParkingLotAnalyzer:
-    def __init__(self):
+    def __init__(self, stub_url=None, cache_limit=CACHE_LIMIT):
         """
         Initialisiert den Parking Lot Analyzer
+        
+        Args:
+            stub_url (str, optional): Basis-URL eines Stub-Servers (common/planet_stub_server.py) statt der echten API
+            cache_limit (int): Maximale Größe des Szenen-Caches in Bytes
         """
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/alternative_data/parking_lots")
@@ -27,57 +131,197 @@ class ParkingLotAnalyzer:
         
         # Lade Planet Labs API-Key
         self.api_key = os.getenv('PLANET_API_KEY')
-        if not self.api_key:
+        self.stub_url = stub_url
+        if not self.api_key and not stub_url:
             self.console.print("[yellow]Warnung: Kein PLANET_API_KEY in .env gefunden[/yellow]")
         
-        # Initialisiere Planet API Client
-        if self.api_key:
-            self.client = api.ClientV1(api_key=self.api_key)
+        # Such- und Szenen-Cache, gemeinsam mit den anderen Planet-Analyzern
+        self.assets = PlanetAssetManager(
+            api_key=self.api_key,
+            base_url=stub_url or PLANET_API_URL,
+            cache_limit=cache_limit,
+            console=self.console
+        )
         
-    def get_satellite_images(self, location, start_date=None, end_date=None):
+        # Ergebnisse je Dateiinhalt (Hash) und Parametern
+        self.cache_file = self.base_path / "_scene_cache.json"
+        self.cache = self._load_cache()
+    
+    def _load_cache(self):
+        """
+        Lädt Datei-Hashes (nach Größe und Änderungszeit) und Szenenergebnisse
+        """
+        if self.cache_file.exists():
+            with open(self.cache_file) as f:
+                return json.load(f)
+        return {'files': {}, 'results': {}}
+    
+    def _save_cache(self):
+        """
+        Speichert den Szenen-Cache
+        """
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True)
+    
+    def _scene_hash(self, path):
+        """
+        Hash einer Szene, unveränderte Dateien werden nicht erneut gelesen
+        
+        Args:
+            path (Path): Pfad zur Szene
+        """
+        stat = path.stat()
+        key = str(path.resolve())
+        size, mtime, digest = self.cache['files'].get(key, (None, None, None))
+        if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+            digest = file_hash(path)
+            self.cache['files'][key] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+    
+    def get_satellite_images(self, location, start_date=None, end_date=None, radius_m=PARKING_LOT_RADIUS):
         """
-        Holt Satellitenbilder von Planet Labs
+        Holt Satellitenbilder von Planet Labs, zugeschnitten auf die Umgebung des Parkplatzes
         
         Args:
             location (dict): Koordinaten des Parkplatzes {'lat': float, 'lon': float}
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            radius_m (float): Halbe Kantenlänge des Ausschnitts in Metern
+        
+        Returns:
+            list: Szenen mit id, acquired und lokalem path
         """
         try:
             with self.console.status("[bold blue]Lade Satellitenbilder..."):
-                if not self.api_key:
+                if not self.api_key and not self.stub_url:
                     self.console.print("[red]Fehler: Kein API-Key verfügbar[/red]")
-                    return
-                
-                # Setze Standardwerte
-                if not end_date:
-                    end_date = datetime.now()
-                if not start_date:
-                    start_date = end_date - timedelta(days=7)
-                
-                # Erstelle GeoJSON für den Parkplatz
-                geojson = {
-                    "type": "Point",
-                    "coordinates": [location['lon'], location['lat']]
-                }
-                
-                # Erstelle Filter für die Suche
-                date_filter = filters.date_range('acquired', gte=start_date, lte=end_date)
-                cloud_filter = filters.range_filter('cloud_cover', lte=0.1)
-                geom_filter = filters.geom_filter(geojson)
-                
-                # Kombiniere Filter
-                combined_filter = filters.and_filter(date_filter, cloud_filter, geom_filter)
+                    return []
                 
-                # Suche nach Bildern
-                search = self.client.quick_search(combined_filter, item_type='PSScene4Band')
-                
-                return list(search.items_iter())
+                # Quadrat um den Parkplatz für Suche und Zuschnitt
+                aoi = point_aoi(location['lat'], location['lon'], radius_m)
+                return self.assets.get_scenes(aoi, start_date, end_date, cloud_cover=0.1, days=7, clip=aoi)
                 
         except Exception as e:
             self.console.print(f"[red]Fehler beim Abrufen der Satellitenbilder: {str(e)}[/red]")
             return []
     
+    def collect_scenes(self, scenes):
+        """
+        Sammelt Szenen aus Verzeichnissen und Dateipfaden
+        
+        Args:
+            scenes (str | list): Verzeichnis, Datei oder Liste davon
+        """
+        if isinstance(scenes, (str, Path)):
+            scenes = [scenes]
+        
+        paths = []
+        for scene in map(Path, scenes):
+            if scene.is_dir():
+                paths += sorted(p for p in scene.rglob('*') if p.suffix.lower() in SCENE_EXTENSIONS)
+            else:
+                paths.append(scene)
+        return paths
+    
+    def analyze_scenes(self, scenes, threshold=0.5, min_area=MIN_OBJECT_AREA, max_workers=None):
+        """
+        Berechnet die Auslastung vieler Szenen in einem Prozess-Pool
+        
+        Szenen werden in Threads dekodiert und in Shared-Memory-Segmente
+        geschrieben, die Worker-Prozesse zählen direkt darauf ohne Kopie.
+        Ergebnisse werden je Dateiinhalt gecacht, bereits analysierte Szenen
+        werden nicht erneut geladen.
+        
+        Args:
+            scenes (str | list): Verzeichnis, Datei oder Liste davon
+            threshold (float): Schwellenwert für die Erkennung
+            min_area (int): Mindestfläche eines Objekts in Pixeln
+            max_workers (int, optional): Anzahl Prozesse
+        
+        Returns:
+            pd.DataFrame: Eine Zeile je Szene mit Auslastung und Zählwerten
+        """
+        results, pending = {}, {}
+        for path in self.collect_scenes(scenes):
+            try:
+                key = f"{self._scene_hash(path)}:{threshold}:{min_area}"
+            except Exception as e:
+                self.console.print(f"[red]Fehler bei der Bildanalyse von {path}: {str(e)}[/red]")
+                continue
+            if key in self.cache['results']:
+                results[path] = self.cache['results'][key]
+            else:
+                pending.setdefault(key, []).append(path)
+        
+        def store(key, counts):
+            self.cache['results'][key] = counts
+            for path in pending[key]:
+                results[path] = counts
+        
+        # Gleiche Inhalte werden nur einmal analysiert
+        tasks = [(key, paths[0]) for key, paths in pending.items()]
+        
+        # Kleine Aufträge ohne Prozess-Overhead
+        if len(tasks) <= 1:
+            for key, path in tasks:
+                gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+                if gray is None:
+                    self.console.print(f"[red]Fehler bei der Bildanalyse von {path}: Bild konnte nicht gelesen werden[/red]")
+                    continue
+                store(key, occupancy_counts(gray, threshold, min_area))
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            queue, loading, running = deque(tasks), {}, {}
+            with ThreadPoolExecutor(max_workers=workers) as loader, ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(POOL_START_METHOD)) as executor:
+                with Progress() as progress:
+                    task = progress.add_task("[cyan]Analysiere Szenen...", total=len(tasks))
+                    
+                    try:
+                        while queue or loading or running:
+                            # Nur begrenzt viele dekodierte Szenen gleichzeitig im Speicher
+                            while queue and len(loading) + len(running) < workers * SCENES_PER_WORKER:
+                                key, path = queue.popleft()
+                                loading[loader.submit(_load_scene, path)] = (key, path)
+                        
+                            done, _ = wait(list(loading) + list(running), return_when=FIRST_COMPLETED)
+                            for future in done:
+                                if future in loading:
+                                    key, path = loading.pop(future)
+                                    try:
+                                        shm, shape = future.result()
+                                    except Exception as e:
+                                        self.console.print(f"[red]Fehler bei der Bildanalyse von {path}: {str(e)}[/red]")
+                                        progress.update(task, advance=1)
+                                        continue
+                                    running[executor.submit(_scene_occupancy, (shm.name, shape, threshold, min_area))] = (key, path, shm)
+                                else:
+                                    key, path, shm = running.pop(future)
+                                    shm.close()
+                                    shm.unlink()
+                                    try:
+                                        store(key, future.result())
+                                    except Exception as e:
+                                        self.console.print(f"[red]Fehler bei der Bildanalyse von {path}: {str(e)}[/red]")
+                                    progress.update(task, advance=1)
+                    finally:
+                        # Segmente abgebrochener Aufträge freigeben, auch noch ladender Szenen
+                        segments = [shm for _, _, shm in running.values()]
+                        for future in loading:
+                            if future.cancel():
+                                continue
+                            try:
+                                segments.append(future.result()[0])
+                            except Exception:
+                                pass
+                        for shm in segments:
+                            shm.close()
+                            shm.unlink()
+        
+        self._save_cache()
+        
+        rows = [{'path': str(path), **counts} for path, counts in results.items()]
+        return pd.DataFrame(rows, columns=['path', 'occupied_pixels', 'total_pixels', 'object_count', 'occupancy_rate'])
+    
     def analyze_parking_lot(self, image_path, threshold=0.5):
         """
         Analysiert die Parkplatzauslastung in einem Satellitenbild
@@ -87,28 +331,14 @@ class ParkingLotAnalyzer:
             threshold (float): Schwellenwert für die Erkennung
         """
         try:
-            # Lade und verarbeite das Bild
-            image = cv2.imread(image_path)
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Wende Schwellenwert an
-            _, binary = cv2.threshold(gray, int(255 * threshold), 255, cv2.THRESH_BINARY)
-            
-            # Finde Konturen
-            contours = measure.find_contours(binary, 0.5)
-            
-            # Berechne Auslastung
-            total_area = image.shape[0] * image.shape[1]
-            occupied_area = sum(cv2.contourArea(np.array(c)) for c in contours)
-            occupancy_rate = occupied_area / total_area
-            
-            return occupancy_rate
+            df = self.analyze_scenes([image_path], threshold=threshold)
+            return df['occupancy_rate'].iloc[0] if not df.empty else None
             
         except Exception as e:
             self.console.print(f"[red]Fehler bei der Bildanalyse: {str(e)}[/red]")
             return None
     
-    def process_parking_lots(self, locations, start_date=None, end_date=None):
+    def process_parking_lots(self, locations, start_date=None, end_date=None, threshold=0.5, min_area=MIN_OBJECT_AREA, max_workers=None, radius_m=PARKING_LOT_RADIUS):
         """
         Verarbeitet mehrere Parkplätze
         
@@ -116,34 +346,41 @@ class ParkingLotAnalyzer:
             locations (list): Liste von Parkplatz-Koordinaten
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            threshold (float): Schwellenwert für die Erkennung
+            min_area (int): Mindestfläche eines Objekts in Pixeln
+            max_workers (int, optional): Anzahl Prozesse
+            radius_m (float): Halbe Kantenlänge des Ausschnitts um einen Parkplatz in Metern
         """
         try:
-            results = []
+            images = []
             
             with Progress() as progress:
-                task = progress.add_task("[cyan]Analysiere Parkplätze...", total=len(locations))
+                task = progress.add_task("[cyan]Suche Bilder je Parkplatz...", total=len(locations))
                 
                 for location in locations:
                     # Hole Satellitenbilder
-                    images = self.get_satellite_images(location, start_date, end_date)
-                    
-                    if images:
-                        # Analysiere jedes Bild
-                        for image in images:
-                            occupancy = self.analyze_parking_lot(image['path'])
-                            
-                            if occupancy is not None:
-                                results.append({
-                                    'date': image['acquired'],
-                                    'location': f"{location['lat']}, {location['lon']}",
-                                    'occupancy_rate': occupancy
-                                })
-                    
+                    for image in self.get_satellite_images(location, start_date, end_date, radius_m):
+                        images.append((location, image))
                     progress.update(task, advance=1)
             
+            # Alle Szenen in einem Batch
+            scenes = self.analyze_scenes([image['path'] for _, image in images], threshold=threshold, min_area=min_area, max_workers=max_workers)
+            occupancy = dict(zip(scenes['path'], scenes['occupancy_rate']))
+            
+            results = []
+            for location, image in images:
+                path = str(Path(image['path']))
+                if path in occupancy:
+                    results.append({
+                        'date': image['acquired'],
+                        'location': f"{location['lat']}, {location['lon']}",
+                        'occupancy_rate': occupancy[path]
+                    })
+            
             # Konvertiere zu DataFrame
             if results:
                 df = pd.DataFrame(results)
+                df['date'] = pd.to_datetime(df['date'])
                 
                 # Speichere die Daten
                 output_file = self.base_path / f"parking_lot_analysis_{start_date}_{end_date}.csv"
@@ -166,11 +403,56 @@ class ParkingLotAnalyzer:
         except Exception as e:
             self.console.print(f"[red]Fehler bei der Verarbeitung: {str(e)}[/red]")
 
+    def process_scenes(self, scenes, threshold=0.5, min_area=MIN_OBJECT_AREA, max_workers=None):
+        """
+        Analysiert lokale Szenen (Verzeichnis oder Dateiliste) im Batch
+        
+        Args:
+            scenes (str | list): Verzeichnis, Datei oder Liste davon
+            threshold (float): Schwellenwert für die Erkennung
+            min_area (int): Mindestfläche eines Objekts in Pixeln
+            max_workers (int, optional): Anzahl Prozesse
+        """
+        try:
+            df = self.analyze_scenes(scenes, threshold=threshold, min_area=min_area, max_workers=max_workers)
+            if df.empty:
+                self.console.print("[yellow]Warnung: Keine Szenen analysiert[/yellow]")
+                return df
+            
+            # Speichere die Daten
+            output_file = self.base_path / f"parking_lot_scenes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            df.to_csv(output_file, index=False)
+            
+            table = Table(title="Szenen-Analyse Zusammenfassung")
+            table.add_column("Metrik", style="cyan")
+            table.add_column("Wert", style="green")
+            
+            table.add_row("Anzahl Szenen", str(len(df)))
+            table.add_row("Durchschnittliche Auslastung", f"{df['occupancy_rate'].mean():.1%}")
+            table.add_row("Maximale Auslastung", f"{df['occupancy_rate'].max():.1%}")
+            table.add_row("Minimale Auslastung", f"{df['occupancy_rate'].min():.1%}")
+            table.add_row("Objekte je Szene", f"{df['object_count'].mean():.1f}")
+            table.add_row("Speicherort", str(output_file))
+            
+            self.console.print(table)
+            return df
+            
+        except Exception as e:
+            self.console.print(f"[red]Fehler bei der Verarbeitung: {str(e)}[/red]")
+
 def main():
     parser = argparse.ArgumentParser(description='Parking Lot Analyzer')
     parser.add_argument('--locations', nargs='+', help='Liste von Parkplatz-Koordinaten (lat,lon)')
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--scenes', nargs='+', help='Lokale Szenen (Verzeichnisse oder Dateien) statt Planet-Suche')
+    parser.add_argument('--threshold', type=float, default=0.5, help='Schwellenwert für die Erkennung (0-1)')
+    parser.add_argument('--min-area', type=int, default=MIN_OBJECT_AREA, help='Mindestfläche eines Objekts in Pixeln')
+    parser.add_argument('--radius', type=float, default=PARKING_LOT_RADIUS, help='Halbe Kantenlänge des Ausschnitts um einen Parkplatz in Metern')
+    parser.add_argument('--max-workers', type=int, help='Anzahl Prozesse')
+    parser.add_argument('--cache-limit', type=float, default=CACHE_LIMIT / 1024 ** 3, help='Maximale Größe des Szenen-Caches in GB')
+    parser.add_argument('--stub', action='store_true', help='Lokalen Stub-Server statt der echten Planet API verwenden')
+    parser.add_argument('--stub-url', help='Basis-URL eines bereits laufenden Stub-Servers')
     
     args = parser.parse_args()
     
@@ -182,12 +464,34 @@ def main():
                 lat, lon = map(float, loc.split(','))
                 locations.append({'lat': lat, 'lon': lon})
         
-        analyzer = ParkingLotAnalyzer()
-        analyzer.process_parking_lots(
-            locations=locations,
-            start_date=args.start_date,
-            end_date=args.end_date
-        )
+        stub_server = None
+        stub_url = args.stub_url
+        if args.stub and not stub_url:
+            from common.planet_stub_server import PlanetStubServer
+            stub_server = PlanetStubServer(activation_delay=2.0, latency=0.05).start()
+            stub_url = stub_server.url
+        
+        analyzer = ParkingLotAnalyzer(stub_url=stub_url, cache_limit=int(args.cache_limit * 1024 ** 3))
+        if args.scenes:
+            analyzer.process_scenes(
+                scenes=args.scenes,
+                threshold=args.threshold,
+                min_area=args.min_area,
+                max_workers=args.max_workers
+            )
+        else:
+            analyzer.process_parking_lots(
+                locations=locations,
+                start_date=args.start_date,
+                end_date=args.end_date,
+                threshold=args.threshold,
+                min_area=args.min_area,
+                max_workers=args.max_workers,
+                radius_m=args.radius
+            )
+        
+        if stub_server:
+            stub_server.stop()
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
 
@@ -11,8 +11,131 @@ from rich import print as rprint
 from dotenv import load_dotenv
 import requests
 import json
-from shapely.geometry import Point, box
+from shapely.geometry import box, shape
+from shapely import STRtree
 import geopandas as gpd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Häfen und Meerengen als Rechtecke (min_lat, max_lat, min_lon, max_lon)
+SHIPPING_AREAS = {
+    'Strait of Hormuz': (25.8, 27.0, 55.8, 57.0),
+    'Suez Canal': (29.8, 31.4, 32.2, 32.7),
+    'Bab-el-Mandeb': (12.3, 13.0, 43.0, 43.6),
+    'Strait of Malacca': (1.0, 4.0, 99.5, 103.8),
+    'Port of Singapore': (1.15, 1.35, 103.6, 104.1),
+    'Panama Canal': (8.8, 9.4, -80.0, -79.5),
+    'Strait of Gibraltar': (35.8, 36.2, -6.0, -5.3),
+    'Bosporus': (41.0, 41.25, 28.95, 29.15),
+    'Port of Rotterdam': (51.85, 52.0, 3.95, 4.5),
+    'Port of Hamburg': (53.45, 53.58, 9.8, 10.05),
+    'Port of Shanghai': (30.6, 31.5, 121.5, 122.3),
+    'Port of Los Angeles/Long Beach': (33.68, 33.78, -118.3, -118.15)
+}
+
+POSITION_COLUMNS = ['MMSI', 'LAT', 'LON', 'SPEED', 'DRAFT', 'SHIPTYPE', 'FLAG', 'TIMESTAMP']
+
+def area_frame(areas):
+    """
+    GeoDataFrame der Gebiete aus Rechtecken, GeoJSON-Features oder benannten Geometrien
+    
+    Args:
+        areas (list): Rechtecke {'min_lat', 'max_lat', 'min_lon', 'max_lon', optional 'name'} oder GeoJSON-Features
+    """
+    names, geometries = [], []
+    for area in areas:
+        if area.get('type') == 'Feature':
+            properties = area.get('properties') or {}
+            geometry = shape(area['geometry'])
+            names.append(properties.get('name') or f"area_{len(names)}")
+        else:
+            geometry = box(area['min_lon'], area['min_lat'], area['max_lon'], area['max_lat'])
+            names.append(area.get('name') or f"{area['min_lat']},{area['min_lon']} - {area['max_lat']},{area['max_lon']}")
+        geometries.append(geometry)
+    return gpd.GeoDataFrame({'area': names}, geometry=geometries, crs='EPSG:4326')
+
+def fetch_groups(areas):
+    """
+    Fasst sich überlappende Gebiete zu gemeinsamen Abruf-Rechtecken zusammen
+    
+    Überlappungen werden über einen STR-Baum gefunden, zusammenhängende
+    Gruppen (auch über Ketten von Überlappungen) teilen sich einen Abruf.
+    
+    Args:
+        areas (gpd.GeoDataFrame): Gebiete aus area_frame
+    
+    Returns:
+        list: Abruf-Rechtecke {'min_lat', 'max_lat', 'min_lon', 'max_lon', 'areas'}
+    """
+    envelopes = areas.geometry.envelope.values
+    left, right = STRtree(envelopes).query(envelopes, predicate='intersects')
+    graph = coo_matrix((np.ones(len(left)), (left, right)), shape=(len(areas), len(areas)))
+    _, labels = connected_components(graph, directed=False)
+    
+    groups = []
+    for label in np.unique(labels):
+        members = areas[labels == label]
+        min_lon, min_lat, max_lon, max_lat = members.total_bounds
+        groups.append({
+            'min_lat': min_lat, 'max_lat': max_lat, 'min_lon': min_lon, 'max_lon': max_lon,
+            'areas': members['area'].tolist()
+        })
+    return groups
+
+def positions_frame(records, fetched_at=None):
+    """
+    Schiffspositionen als typisierter DataFrame (eine Zeile je Position)
+    
+    Args:
+        records (list): Positionen der MarineTraffic API
+        fetched_at (datetime, optional): Zeitstempel für Positionen ohne TIMESTAMP
+    """
+    df = pd.DataFrame(records)
+    if 'DRAFT' not in df and 'DRAUGHT' in df:
+        df = df.rename(columns={'DRAUGHT': 'DRAFT'})
+    df = df.reindex(columns=POSITION_COLUMNS)
+    
+    for column in ['LAT', 'LON', 'SPEED', 'DRAFT']:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'], errors='coerce').fillna(pd.Timestamp(fetched_at or datetime.now()))
+    return df.dropna(subset=['LAT', 'LON']).drop_duplicates(subset=['MMSI', 'TIMESTAMP'])
+
+def assign_areas(positions, areas):
+    """
+    Ordnet alle Positionen in einem räumlichen Join den Gebieten zu
+    
+    Positionen in mehreren (überlappenden) Gebieten erscheinen einmal je Gebiet,
+    Positionen außerhalb aller Gebiete entfallen.
+    
+    Args:
+        positions (pd.DataFrame): Positionen aus positions_frame
+        areas (gpd.GeoDataFrame): Gebiete aus area_frame
+    """
+    points = gpd.GeoDataFrame(positions, geometry=gpd.points_from_xy(positions['LON'], positions['LAT']), crs='EPSG:4326')
+    joined = gpd.sjoin(points, areas, how='inner', predicate='intersects')
+    return pd.DataFrame(joined.drop(columns=['geometry', 'index_right']))
+
+def area_time_series(assigned, freq='D'):
+    """
+    Zeitreihen je Gebiet: Schiffe, Positionen, Geschwindigkeit und Tiefgang
+    
+    Args:
+        assigned (pd.DataFrame): Positionen mit Gebiet aus assign_areas
+        freq (str): Pandas-Frequenz der Buckets (z.B. 'D' oder 'h')
+    
+    Returns:
+        pd.DataFrame: Eine Zeile je Gebiet und Bucket
+    """
+    grouped = assigned.groupby(['area', pd.Grouper(key='TIMESTAMP', freq=freq)])
+    series = grouped.agg(
+        vessels=('MMSI', 'nunique'),
+        positions=('MMSI', 'size'),
+        avg_speed=('SPEED', 'mean'),
+        median_speed=('SPEED', 'median'),
+        avg_draft=('DRAFT', 'mean'),
+        max_draft=('DRAFT', 'max')
+    )
+    return series.reset_index().rename(columns={'TIMESTAMP': 'date'})
 
 class ShippingTrafficAnalyzer:
     def __init__(self):
@@ -28,6 +151,8 @@ class ShippingTrafficAnalyzer:
         self.api_key = os.getenv('MARINETRAFFIC_API_KEY')
         if not self.api_key:
             self.console.print("[yellow]Warnung: Kein MARINETRAFFIC_API_KEY in .env gefunden[/yellow]")
+        
+        self.session = requests.Session()
     
     def get_vessel_positions(self, area, start_date=None, end_date=None):
         """
@@ -45,10 +170,8 @@ class ShippingTrafficAnalyzer:
                     return []
                 
                 # Setze Standardwerte
-                if not end_date:
-                    end_date = datetime.now()
-                if not start_date:
-                    start_date = end_date - timedelta(days=7)
+                end_date = datetime.strptime(end_date, '%Y-%m-%d') if isinstance(end_date, str) else (end_date or datetime.now())
+                start_date = datetime.strptime(start_date, '%Y-%m-%d') if isinstance(start_date, str) else (start_date or end_date - timedelta(days=7))
                 
                 # Erstelle API-URL
                 url = "https://services.marinetraffic.com/api/exportvessels/v:8"
@@ -64,7 +187,7 @@ class ShippingTrafficAnalyzer:
                 }
                 
                 # Mache API-Anfrage
-                response = requests.get(url, params=params)
+                response = self.session.get(url, params=params, timeout=60)
                 response.raise_for_status()
                 
                 return response.json()
@@ -102,59 +225,80 @@ class ShippingTrafficAnalyzer:
             self.console.print(f"[red]Fehler bei der Datenanalyse: {str(e)}[/red]")
             return None
     
-    def process_shipping_areas(self, areas, start_date=None, end_date=None):
+    def fetch_positions(self, areas, start_date=None, end_date=None):
+        """
+        Holt alle Positionen für die Gebiete, überlappende Gebiete mit einem gemeinsamen Abruf
+        
+        Args:
+            areas (gpd.GeoDataFrame): Gebiete aus area_frame
+            start_date (str, optional): Startdatum im Format YYYY-MM-DD
+            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+        
+        Returns:
+            tuple: Positionen (DataFrame), Anzahl Abrufe
+        """
+        groups = fetch_groups(areas)
+        frames = []
+        
+        with Progress() as progress:
+            task = progress.add_task("[cyan]Lade Schiffspositionen...", total=len(groups))
+            
+            for group in groups:
+                vessels_data = self.get_vessel_positions(group, start_date, end_date)
+                if vessels_data:
+                    frames.append(positions_frame(vessels_data, fetched_at=datetime.now()))
+                progress.update(task, advance=1)
+        
+        if not frames:
+            return pd.DataFrame(columns=POSITION_COLUMNS), len(groups)
+        return pd.concat(frames, ignore_index=True), len(groups)
+    
+    def process_shipping_areas(self, areas, start_date=None, end_date=None, freq='D'):
         """
         Verarbeitet mehrere Schifffahrtsgebiete
         
+        Positionen werden einmal geladen und in einem räumlichen Join allen
+        Gebieten (Häfen, Meerengen) zugeordnet.
+        
         Args:
-            areas (list): Liste von Gebieten
+            areas (list): Gebiete (siehe area_frame)
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            freq (str): Pandas-Frequenz der Zeitreihen (z.B. 'D' oder 'h')
+        
+        Returns:
+            pd.DataFrame: Zeitreihen je Gebiet
         """
         try:
-            results = []
+            area_gdf = area_frame(areas)
+            positions, fetches = self.fetch_positions(area_gdf, start_date, end_date)
+            if positions.empty:
+                self.console.print("[yellow]Warnung: Keine Schiffspositionen gefunden[/yellow]")
+                return None
             
-            with Progress() as progress:
-                task = progress.add_task("[cyan]Analysiere Schifffahrtsgebiete...", total=len(areas))
-                
-                for area in areas:
-                    # Hole Schiffsdaten
-                    vessels_data = self.get_vessel_positions(area, start_date, end_date)
-                    
-                    if vessels_data:
-                        # Analysiere die Daten
-                        metrics = self.analyze_shipping_traffic(vessels_data)
-                        
-                        if metrics:
-                            results.append({
-                                'area': f"{area['min_lat']},{area['min_lon']} - {area['max_lat']},{area['max_lon']}",
-                                'date': datetime.now().strftime('%Y-%m-%d'),
-                                **metrics
-                            })
-                    
-                    progress.update(task, advance=1)
+            assigned = assign_areas(positions, area_gdf)
+            df = area_time_series(assigned, freq)
+            
+            # Speichere die Daten
+            output_file = self.base_path / f"shipping_traffic_analysis_{start_date}_{end_date}.csv"
+            df.to_csv(output_file, index=False)
+            
+            # Erstelle eine schöne Zusammenfassung
+            table = Table(title="Schiffsverkehrs-Analyse Zusammenfassung")
+            table.add_column("Metrik", style="cyan")
+            table.add_column("Wert", style="green")
+            
+            table.add_row("Zeitraum", f"{start_date} bis {end_date}")
+            table.add_row("Anzahl Gebiete", f"{df['area'].nunique()} von {len(area_gdf)}")
+            table.add_row("API-Abrufe", str(fetches))
+            table.add_row("Positionen", f"{len(positions)} ({len(assigned)} in Gebieten)")
+            table.add_row("Durchschnittliche Schiffe pro Gebiet", f"{df.groupby('area')['vessels'].mean().mean():.1f}")
+            table.add_row("Durchschnittliche Geschwindigkeit", f"{assigned['SPEED'].mean():.1f} Knoten")
+            table.add_row("Speicherort", str(output_file))
+            
+            self.console.print(table)
+            return df
             
-            # Konvertiere zu DataFrame
-            if results:
-                df = pd.DataFrame(results)
-                
-                # Speichere die Daten
-                output_file = self.base_path / f"shipping_traffic_analysis_{start_date}_{end_date}.csv"
-                df.to_csv(output_file, index=False)
-                
-                # Erstelle eine schöne Zusammenfassung
-                table = Table(title="Schiffsverkehrs-Analyse Zusammenfassung")
-                table.add_column("Metrik", style="cyan")
-                table.add_column("Wert", style="green")
-                
-                table.add_row("Zeitraum", f"{start_date} bis {end_date}")
-                table.add_row("Anzahl Gebiete", str(len(df)))
-                table.add_row("Durchschnittliche Schiffe pro Gebiet", f"{df['total_vessels'].mean():.1f}")
-                table.add_row("Durchschnittliche Geschwindigkeit", f"{df['avg_speed'].mean():.1f} Knoten")
-                table.add_row("Speicherort", str(output_file))
-                
-                self.console.print(table)
-                
         except Exception as e:
             self.console.print(f"[red]Fehler bei der Verarbeitung: {str(e)}[/red]")
 
@@ -163,6 +307,9 @@ def main():
     parser.add_argument('--areas', nargs='+', help='Liste von Gebieten (min_lat,max_lat,min_lon,max_lon)')
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--areas-file', help='GeoJSON-Datei mit Gebieten (FeatureCollection, Property name)')
+    parser.add_argument('--preset', action='store_true', help='Vordefinierte Häfen und Meerengen verwenden')
+    parser.add_argument('--freq', default='D', help='Frequenz der Zeitreihen (z.B. D oder h)')
     
     args = parser.parse_args()
     
@@ -178,15 +325,29 @@ def main():
                     'min_lon': min_lon,
                     'max_lon': max_lon
                 })
+        if args.areas_file:
+            with open(args.areas_file) as f:
+                collection = json.load(f)
+            areas += collection['features'] if collection.get('type') == 'FeatureCollection' else [collection]
+        if args.preset:
+            for name, (min_lat, max_lat, min_lon, max_lon) in SHIPPING_AREAS.items():
+                areas.append({
+                    'name': name,
+                    'min_lat': min_lat,
+                    'max_lat': max_lat,
+                    'min_lon': min_lon,
+                    'max_lon': max_lon
+                })
         
         analyzer = ShippingTrafficAnalyzer()
         analyzer.process_shipping_areas(
             areas=areas,
             start_date=args.start_date,
-            end_date=args.end_date
+            end_date=args.end_date,
+            freq=args.freq
         )
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -10,6 +10,7 @@ from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fredapi import Fred
 import wbdata
 
@@ -53,6 +54,27 @@ class TradeBalanceFetcher:
             'NE.IMP.GNFS.ZS': 'Importe (% des BIP)',
             'NE.TRD.GNFS.ZS': 'Handelsvolumen (% des BIP)'
         }
+        
+        # Lokaler Cache für World Bank Antworten (ändern sich nur wenige Male pro Jahr)
+        self.wb_cache_path = self.base_path / "wb_cache"
+        self.wb_cache_path.mkdir(parents=True, exist_ok=True)
+        self.wb_cache_ttl = timedelta(days=30)
+        
+        # Maximale Anzahl paralleler Requests im Concurrent-Modus
+        self.max_workers = 8
+    
+    def _fred_series_ids(self, country_code):
+        """
+        Liefert die FRED Series IDs für ein Land
+        
+        Args:
+            country_code (str): Länder-Code
+        """
+        return {
+            f'BOPGSTB{country_code}': 'Handelsbilanz',
+            f'BOPGIMP{country_code}': 'Importe',
+            f'BOPGEXP{country_code}': 'Exporte'
+        }
     
     def fetch_fred_data(self, country_code, start_date=None, end_date=None):
         """
@@ -76,11 +98,7 @@ class TradeBalanceFetcher:
                     start_date = end_date - timedelta(days=365)
                 
                 # Definiere FRED Series IDs für das Land
-                series_ids = {
-                    f'BOPGSTB{country_code}': 'Handelsbilanz',
-                    f'BOPGIMP{country_code}': 'Importe',
-                    f'BOPGEXP{country_code}': 'Exporte'
-                }
+                series_ids = self._fred_series_ids(country_code)
                 
                 # Hole Daten für jede Series
                 data = {}
@@ -172,7 +190,120 @@ class TradeBalanceFetcher:
             self.console.print(f"[red]Fehler bei der Datenanalyse: {str(e)}[/red]")
             return None
     
-    def process_countries(self, country_codes=None, start_date=None, end_date=None):
+    def _resolve_dates(self, start_date=None, end_date=None):
+        """
+        Setzt Standardwerte für den Zeitraum und konvertiert ihn zu Timestamps
+        
+        Args:
+            start_date (str, optional): Startdatum im Format YYYY-MM-DD
+            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+        """
+        end = pd.Timestamp(end_date) if end_date else pd.Timestamp(datetime.now().date())
+        start = pd.Timestamp(start_date) if start_date else end - timedelta(days=365)
+        return start, end
+    
+    def _fetch_fred_series(self, series_id, start, end):
+        """
+        Holt eine einzelne FRED Series (ohne Statusanzeige, für Worker-Threads)
+        
+        Args:
+            series_id (str): FRED Series ID
+            start (pd.Timestamp): Startdatum
+            end (pd.Timestamp): Enddatum
+        """
+        return self.fred.get_series(series_id, observation_start=start, observation_end=end)
+    
+    def _fetch_wb_indicator(self, country_code, indicator, start, end, use_cache=True):
+        """
+        Holt einen World Bank Indikator für ein Land, bevorzugt aus dem lokalen Cache
+        
+        Args:
+            country_code (str): Länder-Code
+            indicator (str): World Bank Indikator-ID
+            start (pd.Timestamp): Startdatum
+            end (pd.Timestamp): Enddatum
+            use_cache (bool): Cache verwenden, solange er jünger als wb_cache_ttl ist
+        """
+        description = self.wb_indicators[indicator]
+        cache_file = self.wb_cache_path / f"{country_code}_{indicator}_{start.year}_{end.year}.csv"
+        
+        if use_cache and cache_file.exists():
+            age = datetime.now() - datetime.fromtimestamp(cache_file.stat().st_mtime)
+            if age < self.wb_cache_ttl:
+                cached = pd.read_csv(cache_file, index_col='date', parse_dates=['date'])
+                return cached[description]
+        
+        data = wbdata.get_dataframe(
+            {indicator: description},
+            country=country_code,
+            data_date=(start.to_pydatetime(), end.to_pydatetime())
+        )
+        
+        series = data[description]
+        series.index = pd.to_datetime(series.index.astype(str), format='%Y')
+        series = series.rename_axis('date').sort_index()
+        series.to_frame().to_csv(cache_file)
+        
+        return series
+    
+    def fetch_panel_concurrent(self, country_codes, start_date=None, end_date=None, max_workers=None, use_cache=True):
+        """
+        Holt FRED- und World-Bank-Daten für alle Länder × Quellen parallel
+        
+        Jede FRED Series und jeder World Bank Indikator ist ein eigener Job auf
+        einem begrenzten Thread-Pool, so dass die Laufzeit kaum mit der Anzahl
+        der Länder wächst.
+        
+        Args:
+            country_codes (list): Liste von Länder-Codes
+            start_date (str, optional): Startdatum im Format YYYY-MM-DD
+            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            max_workers (int, optional): Maximale Anzahl paralleler Requests
+            use_cache (bool): World Bank Cache verwenden
+        
+        Returns:
+            pd.DataFrame: Panel mit MultiIndex (country_code, date)
+        """
+        start, end = self._resolve_dates(start_date, end_date)
+        columns = list(self._fred_series_ids('').values()) + list(self.wb_indicators.values())
+        
+        collected = {}
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            jobs = {}
+            for country_code in country_codes:
+                if self.fred_api_key:
+                    for series_id, description in self._fred_series_ids(country_code).items():
+                        future = executor.submit(self._fetch_fred_series, series_id, start, end)
+                        jobs[future] = (country_code, description, series_id)
+                for indicator, description in self.wb_indicators.items():
+                    future = executor.submit(self._fetch_wb_indicator, country_code, indicator, start, end, use_cache)
+                    jobs[future] = (country_code, description, indicator)
+            
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Lade Länderdaten parallel...", total=len(jobs))
+                
+                for future in as_completed(jobs):
+                    country_code, description, source_id = jobs[future]
+                    try:
+                        series = future.result()
+                        if series is not None and not series.empty:
+                            collected.setdefault(country_code, {})[description] = series
+                    except Exception as e:
+                        self.console.print(f"[yellow]Warnung: Konnte {source_id} für {country_code} nicht abrufen: {str(e)}[/yellow]")
+                    progress.update(task, advance=1)
+        
+        if not collected:
+            return None
+        
+        frames = {
+            country_code: pd.DataFrame(series_map).reindex(columns=columns)
+            for country_code, series_map in collected.items()
+        }
+        panel = pd.concat(frames, names=['country_code', 'date']).sort_index()
+        
+        return panel
+    
+    def process_countries(self, country_codes=None, start_date=None, end_date=None, concurrent=False, max_workers=None, use_cache=True):
         """
         Verarbeitet mehrere Länder
         
@@ -180,6 +311,9 @@ class TradeBalanceFetcher:
             country_codes (list, optional): Liste von Länder-Codes
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            concurrent (bool, optional): Alle Länder × Quellen parallel abrufen
+            max_workers (int, optional): Maximale Anzahl paralleler Requests
+            use_cache (bool, optional): World Bank Cache verwenden (nur Concurrent-Modus)
         """
         try:
             # Verwende Standard-Länder, wenn keine angegeben wurden
@@ -188,19 +322,27 @@ class TradeBalanceFetcher:
             
             results = []
             
-            with Progress() as progress:
-                task = progress.add_task("[cyan]Analysiere Länder...", total=len(country_codes))
+            if concurrent:
+                country_codes = [code for code in country_codes if code in self.default_countries]
+                panel = self.fetch_panel_concurrent(country_codes, start_date, end_date, max_workers, use_cache)
                 
-                for country_code in country_codes:
-                    if country_code in self.default_countries:
+                if panel is not None:
+                    # Speichere das vollständige Panel
+                    panel_file = self.base_path / f"trade_balance_panel_{start_date}_{end_date}.csv"
+                    panel.to_csv(panel_file)
+                    
+                    fred_columns = list(self._fred_series_ids('').values())
+                    wb_columns = list(self.wb_indicators.values())
+                    
+                    for country_code in panel.index.get_level_values('country_code').unique():
                         country_name = self.default_countries[country_code]
+                        country_data = panel.loc[country_code]
                         
-                        # Hole Daten
-                        fred_data = self.fetch_fred_data(country_code, start_date, end_date)
-                        wb_data = self.fetch_wb_data(country_code, start_date, end_date)
-                        
-                        # Analysiere die Daten
-                        metrics = self.analyze_trade_balance(fred_data, wb_data, country_name)
+                        metrics = self.analyze_trade_balance(
+                            country_data[fred_columns].dropna(how='all'),
+                            country_data[wb_columns].dropna(how='all'),
+                            country_name
+                        )
                         
                         if metrics:
                             results.append({
@@ -209,8 +351,31 @@ class TradeBalanceFetcher:
                                 'date': datetime.now().strftime('%Y-%m-%d'),
                                 **metrics
                             })
+            
+            else:
+                with Progress() as progress:
+                    task = progress.add_task("[cyan]Analysiere Länder...", total=len(country_codes))
                     
-                    progress.update(task, advance=1)
+                    for country_code in country_codes:
+                        if country_code in self.default_countries:
+                            country_name = self.default_countries[country_code]
+                            
+                            # Hole Daten
+                            fred_data = self.fetch_fred_data(country_code, start_date, end_date)
+                            wb_data = self.fetch_wb_data(country_code, start_date, end_date)
+                            
+                            # Analysiere die Daten
+                            metrics = self.analyze_trade_balance(fred_data, wb_data, country_name)
+                            
+                            if metrics:
+                                results.append({
+                                    'country_code': country_code,
+                                    'country_name': country_name,
+                                    'date': datetime.now().strftime('%Y-%m-%d'),
+                                    **metrics
+                                })
+                        
+                        progress.update(task, advance=1)
             
             # Konvertiere zu DataFrame
             if results:
@@ -247,6 +412,9 @@ def main():
     parser.add_argument('--countries', nargs='+', help='Liste von Länder-Codes')
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--concurrent', action='store_true', help='Alle Länder × Quellen parallel abrufen')
+    parser.add_argument('--max-workers', type=int, help='Maximale Anzahl paralleler Requests')
+    parser.add_argument('--no-cache', action='store_true', help='World Bank Cache ignorieren')
     
     args = parser.parse_args()
     
@@ -255,7 +423,10 @@ def main():
         fetcher.process_countries(
             country_codes=args.countries,
             start_date=args.start_date,
-            end_date=args.end_date
+            end_date=args.end_date,
+            concurrent=args.concurrent,
+            max_workers=args.max_workers,
+            use_cache=not args.no_cache
         )
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
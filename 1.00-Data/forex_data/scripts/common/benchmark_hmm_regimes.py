@@ -0,0 +1,212 @@
+import numpy as np
+import itertools
+import time
+from pathlib import Path
+import argparse
+import sys
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.hmm_regimes import BatchGaussianHMM, pad_sequences, log_emissions, forward, backward, viterbi, _log
+
+# Wahre Parameter der simulierten Regime (ruhig, neutral, volatil)
+TRUE_TRANSMAT = np.array([[0.97, 0.02, 0.01], [0.02, 0.96, 0.02], [0.01, 0.03, 0.96]])
+TRUE_MEANS = np.array([0.0004, 0.0, -0.0008])
+TRUE_STDS = np.array([0.003, 0.006, 0.014])
+
+def best_of(func, repeats):
+    """
+    Führt eine Funktion mehrfach aus und liefert die schnellste Laufzeit in Sekunden
+    
+    Args:
+        func (callable): Zu messende Funktion
+        repeats (int): Anzahl Wiederholungen
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def simulate(n_seq, length, seed=42):
+    """
+    Simuliert Renditen mit bekannten Regimen, alle Sequenzen gleichzeitig
+    
+    Args:
+        n_seq (int): Anzahl Sequenzen
+        length (int): Länge je Sequenz
+        seed (int): Zufalls-Seed
+    
+    Returns:
+        tuple: Renditen (B, T), wahre Zustände (B, T)
+    """
+    rng = np.random.default_rng(seed)
+    cumulative = TRUE_TRANSMAT.cumsum(axis=1)
+    states = np.empty((n_seq, length), dtype=int)
+    states[:, 0] = rng.integers(len(TRUE_MEANS), size=n_seq)
+    draws = rng.random((n_seq, length))
+    for t in range(1, length):
+        states[:, t] = (draws[:, t, None] > cumulative[states[:, t - 1]]).sum(axis=1)
+    returns = rng.normal(TRUE_MEANS[states], TRUE_STDS[states])
+    return returns, states
+
+def walk_forward_batch(returns, folds):
+    """
+    Expandierende Walk-Forward Fenster je Sequenz (Paare × Folds)
+    
+    Args:
+        returns (np.ndarray): Renditen (Paare, T)
+        folds (int): Anzahl Folds je Paar
+    """
+    length = returns.shape[1]
+    ends = np.linspace(length // 2, length, folds).astype(int)
+    return pad_sequences([row[:end] for row in returns for end in ends])
+
+def reference_log_likelihood(x, params):
+    """
+    Referenz: skalierter Forward-Algorithmus im Wahrscheinlichkeitsraum für eine Sequenz
+    
+    Args:
+        x (np.ndarray): Beobachtungen (T,)
+        params (dict): Parameter einer Sequenz (K, ...)
+    """
+    std = np.sqrt(params['variances'][:, 0])
+    emission = np.exp(-0.5 * ((x[:, None] - params['means'][:, 0]) / std) ** 2) / (std * np.sqrt(2 * np.pi))
+    alpha = params['startprob'] * emission[0]
+    log_likelihood = np.log(alpha.sum())
+    alpha /= alpha.sum()
+    for t in range(1, len(x)):
+        alpha = (alpha @ params['transmat']) * emission[t]
+        scale = alpha.sum()
+        log_likelihood += np.log(scale)
+        alpha /= scale
+    return log_likelihood
+
+def hmmlearn_fit(X, lengths, n_states, n_iter):
+    """
+    Vergleich: hmmlearn GaussianHMM Sequenz für Sequenz (falls installiert)
+    
+    Returns:
+        float: Laufzeit in Sekunden oder None
+    """
+    try:
+        from hmmlearn.hmm import GaussianHMM
+    except ImportError:
+        return None
+    
+    start = time.perf_counter()
+    for x, length in zip(X, lengths):
+        GaussianHMM(n_components=n_states, covariance_type='diag', n_iter=n_iter, tol=0).fit(x[:length])
+    return time.perf_counter() - start
+
+def run_benchmark(pairs=28, folds=8, length=2520, n_states=3, n_iter=20, append=21, loop_count=8, repeats=3):
+    """
+    Misst Forward-Backward, Viterbi, Baum-Welch und Warm-Start Refits im Batch
+    gegen eine Schleife über die Sequenzen
+    
+    Args:
+        pairs (int): Anzahl Paare
+        folds (int): Walk-Forward Folds je Paar
+        length (int): Beobachtungen je Paar
+        n_states (int): Anzahl Zustände
+        n_iter (int): Feste Anzahl Baum-Welch Iterationen für den Laufzeitvergleich
+        append (int): Angehängte Bars für den Warm-Start
+        loop_count (int): Anzahl Sequenzen für die Referenzen in der Schleife
+        repeats (int): Anzahl Wiederholungen je Messung
+    """
+    console = Console()
+    returns, true_states = simulate(pairs, length + append)
+    X, lengths = walk_forward_batch(returns[:, :length], folds)
+    n_seq = len(lengths)
+    loop_count = min(loop_count, n_seq)
+    
+    model = BatchGaussianHMM(n_states, n_iter=n_iter, tol=-np.inf)
+    prepared, mask = model._prepare(X, lengths)
+    
+    # Baum-Welch: Batch vs. dieselbe Engine Sequenz für Sequenz
+    fit_time = best_of(lambda: model.fit(X, lengths), repeats)
+    loop_fit_time = best_of(lambda: [BatchGaussianHMM(n_states, n_iter=n_iter, tol=-np.inf).fit(X[i:i + 1, :lengths[i]]) for i in range(loop_count)], repeats)
+    hmmlearn_time = hmmlearn_fit(X[:loop_count], lengths[:loop_count], n_states, n_iter)
+    
+    params = model.params()
+    log_start = _log(params['startprob'])
+    log_emis = log_emissions(prepared, params['means'], params['variances'])
+    
+    def forward_backward():
+        forward(log_start, params['transmat'], log_emis, mask)
+        backward(params['transmat'], log_emis, mask)
+    
+    fb_time = best_of(forward_backward, repeats)
+    viterbi_time = best_of(lambda: viterbi(log_start, params['transmat'], log_emis, mask), repeats)
+    
+    # Genauigkeit: Log-Likelihood gegen die skalierte Referenz, Zustände gegen die Simulation
+    scores = model.score(X, lengths)
+    reference_time = best_of(lambda: [reference_log_likelihood(X[i, :lengths[i], 0], {k: v[i] for k, v in params.items()}) for i in range(loop_count)], 1)
+    deviation = max(
+        abs(reference_log_likelihood(X[i, :lengths[i], 0], {k: v[i] for k, v in params.items()}) - scores[i]) / abs(scores[i])
+        for i in range(loop_count)
+    )
+    
+    converged = BatchGaussianHMM(n_states).fit(X, lengths)
+    decoded, _ = converged.decode(X, lengths)
+    truth = np.repeat(true_states[:, :length], folds, axis=0)
+    # Zustände sind nur bis auf eine Permutation bestimmt: beste Zuordnung je Sequenz
+    matches = [((np.asarray(order)[truth] == decoded) & mask).sum(axis=1) for order in itertools.permutations(range(n_states))]
+    accuracy = np.max(matches, axis=0).sum() / mask.sum()
+    
+    # Warm-Start: Refit nach angehängten Bars
+    X_appended, lengths_appended = walk_forward_batch(returns, folds)
+    cold = BatchGaussianHMM(n_states)
+    cold_time = best_of(lambda: cold.fit(X_appended, lengths_appended), 1)
+    warm = BatchGaussianHMM(n_states)
+    
+    def warm_fit():
+        warm.fit(X_appended, lengths_appended, init=converged.params())
+    
+    warm_time = best_of(warm_fit, 1)
+    
+    table = Table(title=f"Batch HMM: {pairs} Paare × {folds} Folds = {n_seq} Sequenzen, bis {length} Bars, {n_states} Zustände")
+    table.add_column("Messung", style="cyan")
+    table.add_column("Wert", style="green")
+    
+    per_sequence = loop_fit_time / loop_count
+    table.add_row(f"Baum-Welch Batch ({n_iter} Iterationen)", f"{fit_time * 1000:.1f} ms ({fit_time / n_seq * 1000:.2f} ms je Sequenz)")
+    table.add_row("Baum-Welch Schleife je Sequenz", f"{per_sequence * 1000:.2f} ms je Sequenz")
+    table.add_row("Speedup Batch", f"{per_sequence * n_seq / fit_time:.1f}x")
+    if hmmlearn_time is not None:
+        table.add_row("hmmlearn je Sequenz", f"{hmmlearn_time / loop_count * 1000:.2f} ms ({hmmlearn_time / loop_count * n_seq / fit_time:.1f}x)")
+    else:
+        table.add_row("hmmlearn", "nicht installiert")
+    table.add_row("Forward-Backward Batch", f"{fb_time * 1000:.1f} ms")
+    table.add_row("Viterbi Batch", f"{viterbi_time * 1000:.1f} ms")
+    table.add_row("Skalierte Referenz je Sequenz (Forward)", f"{reference_time / loop_count * 1000:.2f} ms")
+    table.add_row("Max. rel. Abweichung Log-Likelihood", f"{deviation:.2e}")
+    table.add_row("Trefferquote Viterbi-Zustände", f"{accuracy:.1%}")
+    table.add_row(f"Refit +{append} Bars kalt", f"{cold_time * 1000:.1f} ms, Ø {cold.iterations.mean():.1f} / max. {cold.iterations.max()} Iterationen")
+    table.add_row(f"Refit +{append} Bars warm", f"{warm_time * 1000:.1f} ms, Ø {warm.iterations.mean():.1f} / max. {warm.iterations.max()} Iterationen")
+    
+    console.print(table)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BatchGaussianHMM')
+    parser.add_argument('--pairs', type=int, default=28, help='Anzahl Paare')
+    parser.add_argument('--folds', type=int, default=8, help='Walk-Forward Folds je Paar')
+    parser.add_argument('--length', type=int, default=2520, help='Beobachtungen je Paar')
+    parser.add_argument('--states', type=int, default=3, help='Anzahl Zustände')
+    parser.add_argument('--iterations', type=int, default=20, help='Baum-Welch Iterationen für den Laufzeitvergleich')
+    parser.add_argument('--append', type=int, default=21, help='Angehängte Bars für den Warm-Start')
+    parser.add_argument('--loop-count', type=int, default=8, help='Anzahl Sequenzen für die Referenzen in der Schleife')
+    parser.add_argument('--repeats', type=int, default=3, help='Anzahl Wiederholungen')
+    
+    args = parser.parse_args()
+    
+    try:
+        run_benchmark(args.pairs, args.folds, args.length, args.states, args.iterations, args.append, args.loop_count, args.repeats)
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
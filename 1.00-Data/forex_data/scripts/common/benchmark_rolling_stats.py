@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import time
+from pathlib import Path
+import argparse
+import sys
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.rolling_stats import RollingStats
+
+def best_of(func, repeats):
+    """
+    Führt eine Funktion mehrfach aus und liefert die schnellste Laufzeit in Sekunden
+    
+    Args:
+        func (callable): Zu messende Funktion
+        repeats (int): Anzahl Wiederholungen
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run_benchmark(rows=20000, columns=20, windows=None, repeats=3):
+    """
+    Vergleicht RollingStats mit pandas rolling auf einem zufälligen Preis-Panel
+    
+    Args:
+        rows (int): Anzahl Zeitpunkte
+        columns (int): Anzahl Spalten (Symbole)
+        windows (list, optional): Liste von Fenstergrößen
+        repeats (int): Anzahl Wiederholungen je Messung
+    """
+    console = Console()
+    windows = windows or [20, 60, 120, 250]
+    
+    rng = np.random.default_rng(42)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, columns)), axis=0)))
+    benchmark = prices.iloc[:, 0]
+    
+    def pandas_stats():
+        results = {}
+        for window in windows:
+            rolling = prices.rolling(window)
+            results[window] = {
+                'mean': rolling.mean(),
+                'std': rolling.std(),
+                'min': rolling.min(),
+                'max': rolling.max(),
+                'corr': rolling.corr(benchmark)
+            }
+        return results
+    
+    def engine_stats():
+        stats = RollingStats(prices, windows)
+        results = {'mean': stats.mean(), 'std': stats.std(), 'min': stats.min(), 'max': stats.max(), 'corr': stats.corr(benchmark)}
+        return {window: {name: values[window] for name, values in results.items()} for window in windows}
+    
+    pandas_time = best_of(pandas_stats, repeats)
+    engine_time = best_of(engine_stats, repeats)
+    
+    expected = pandas_stats()
+    actual = engine_stats()
+    
+    table = Table(title=f"Rolling-Statistik: {rows} × {columns}, Fenster {windows}")
+    table.add_column("Statistik", style="cyan")
+    table.add_column("Max. Abweichung zu pandas", style="green")
+    
+    for name in ['mean', 'std', 'min', 'max', 'corr']:
+        deviation = max(
+            np.nanmax(np.abs(actual[window][name].to_numpy() - expected[window][name].to_numpy()), initial=0.0)
+            for window in windows
+        )
+        table.add_row(name, f"{deviation:.2e}")
+    
+    table.add_row("pandas rolling", f"{pandas_time * 1000:.1f} ms")
+    table.add_row("RollingStats", f"{engine_time * 1000:.1f} ms")
+    table.add_row("Speedup", f"{pandas_time / engine_time:.1f}x")
+    
+    console.print(table)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark RollingStats vs. pandas rolling')
+    parser.add_argument('--rows', type=int, default=20000, help='Anzahl Zeitpunkte')
+    parser.add_argument('--columns', type=int, default=20, help='Anzahl Spalten')
+    parser.add_argument('--windows', type=int, nargs='+', help='Liste von Fenstergrößen')
+    parser.add_argument('--repeats', type=int, default=3, help='Anzahl Wiederholungen')
+    
+    args = parser.parse_args()
+    
+    try:
+        run_benchmark(args.rows, args.columns, args.windows, args.repeats)
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
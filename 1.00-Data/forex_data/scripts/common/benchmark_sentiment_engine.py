@@ -0,0 +1,116 @@
+import numpy as np
+import time
+from pathlib import Path
+import argparse
+import sys
+import tempfile
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.sentiment_engine import LexiconScorer, SentimentEngine
+
+FILLERS = ['the', 'a', 'is', 'EUR/USD', 'ECB', 'Fed', 'rates', 'traders', 'said', "it's", "don't", 'on', 'Tuesday', 'U.S.', 'up']
+PUNCTUATION_TOKENS = ['!', '.', ',', '?', '...', '"', '(', ')', '-']
+
+def random_corpus(size, unique, seed=42):
+    """
+    Erzeugt Schlagzeilen aus Lexikon-Wörtern, Modifiern, Negationen und Füllwörtern
+    
+    Args:
+        size (int): Anzahl Texte
+        unique (int): Anzahl verschiedener Texte (Rest sind Wiederholungen wie Retweets)
+        seed (int): Zufalls-Seed
+    """
+    rng = np.random.default_rng(seed)
+    words = list(pattern_sentiment.keys())
+    modifiers = [word for word in words if any(pos in pattern_sentiment[word] for pos in pattern_sentiment.modifiers)]
+    pool = words[:500] + modifiers * 2 + list(pattern_sentiment.negations) * 20 + FILLERS * 30 + PUNCTUATION_TOKENS * 10
+    
+    texts = []
+    for _ in range(unique):
+        tokens = rng.choice(pool, rng.integers(4, 25))
+        texts.append(" ".join(token.capitalize() if rng.random() < 0.1 else token for token in tokens))
+    return [texts[i] for i in rng.integers(0, unique, size)] if size > unique else texts[:size]
+
+def best_of(func, repeats):
+    """
+    Führt eine Funktion mehrfach aus und liefert die schnellste Laufzeit in Sekunden
+    
+    Args:
+        func (callable): Zu messende Funktion
+        repeats (int): Anzahl Wiederholungen
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run_benchmark(size=50000, unique=20000, reference_count=5000, max_workers=None, repeats=3):
+    """
+    Vergleicht TextBlob (Text für Text) mit dem Batch-Scorer und der SentimentEngine
+    
+    Args:
+        size (int): Anzahl Texte
+        unique (int): Anzahl verschiedener Texte
+        reference_count (int): Anzahl Texte für die TextBlob-Referenz
+        max_workers (int, optional): Prozesse für den Backfill
+        repeats (int): Anzahl Wiederholungen je Messung
+    """
+    console = Console()
+    texts = random_corpus(size, unique)
+    scorer = LexiconScorer()
+    
+    reference_texts = texts[:reference_count]
+    start = time.perf_counter()
+    expected = np.array([tuple(TextBlob(text).sentiment) for text in reference_texts])
+    textblob_time = (time.perf_counter() - start) / len(reference_texts)
+    
+    actual = scorer.score(reference_texts)
+    scorer_time = best_of(lambda: scorer.score(texts), repeats) / size
+    
+    with tempfile.TemporaryDirectory() as cache_path:
+        engine = SentimentEngine(cache_path, max_workers=max_workers, console=console)
+        start = time.perf_counter()
+        engine.score(texts)
+        cold_time = (time.perf_counter() - start) / size
+        warm_time = best_of(lambda: engine.score(texts), repeats) / size
+    
+    table = Table(title=f"Sentiment: {size:,} Texte, {unique:,} verschieden")
+    table.add_column("Verfahren", style="cyan")
+    table.add_column("µs/Text", style="green")
+    table.add_column("Texte/s", style="green")
+    
+    for name, seconds in [
+        ("TextBlob je Text", textblob_time),
+        ("LexiconScorer (Batch)", scorer_time),
+        ("SentimentEngine (leerer Cache)", cold_time),
+        ("SentimentEngine (Cache)", warm_time)
+    ]:
+        table.add_row(name, f"{seconds * 1e6:.1f}", f"{1 / seconds:,.0f}")
+    
+    table.add_row("Max. Abweichung zu TextBlob", f"{np.abs(actual - expected).max():.1e}", f"{len(reference_texts):,} Texte")
+    console.print(table)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark der Sentiment Engine vs. TextBlob')
+    parser.add_argument('--size', type=int, default=50000, help='Anzahl Texte')
+    parser.add_argument('--unique', type=int, default=20000, help='Anzahl verschiedener Texte')
+    parser.add_argument('--reference-count', type=int, default=5000, help='Anzahl Texte für die TextBlob-Referenz')
+    parser.add_argument('--max-workers', type=int, help='Anzahl Prozesse für große Backfills')
+    parser.add_argument('--repeats', type=int, default=3, help='Anzahl Wiederholungen')
+    
+    args = parser.parse_args()
+    
+    try:
+        run_benchmark(args.size, args.unique, args.reference_count, args.max_workers, args.repeats)
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,517 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import argparse
+import sys
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.market_data_loader import MarketDataLoader
+from common.rolling_stats import log_returns
+
+HMM_DATA_PATH = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/regime_data/hmm")
+
+DEFAULT_SYMBOLS = ["EURUSD=X", "GBPUSD=X", "USDJPY=X", "AUDUSD=X", "USDCAD=X", "USDCHF=X", "NZDUSD=X"]
+
+# Untergrenze der Varianzen gegen kollabierende Zustände
+MIN_VARIANCE = 1e-8
+# Konvergenz: Änderung der Log-Likelihood pro Beobachtung
+TOLERANCE = 1e-6
+# Anfangswahrscheinlichkeit, im Zustand zu bleiben
+INITIAL_PERSISTENCE = 0.9
+
+def _log(values):
+    """
+    Logarithmus mit log(0) = -inf ohne Warnung
+    """
+    with np.errstate(divide='ignore'):
+        return np.log(values)
+
+def pad_sequences(sequences):
+    """
+    Fasst Sequenzen unterschiedlicher Länge zu einem rechts aufgefüllten Batch zusammen
+    
+    Args:
+        sequences (list): Arrays (T,) oder (T, D)
+    
+    Returns:
+        tuple: X (B, T, D) mit 0 aufgefüllt, Längen (B,)
+    """
+    sequences = [np.asarray(seq, dtype=float).reshape(len(seq), -1) for seq in sequences]
+    lengths = np.array([len(seq) for seq in sequences])
+    X = np.zeros((len(sequences), lengths.max(), sequences[0].shape[1]))
+    for i, seq in enumerate(sequences):
+        X[i, :len(seq)] = seq
+    return X, lengths
+
+def walk_forward_sequences(panel, train_size, step, min_size=None):
+    """
+    Walk-Forward Trainingsfenster für alle Spalten eines Panels als ein Batch
+    
+    Jede Spalte (z.B. Währungspaar) liefert ein Fenster je Fold, alle Paare ×
+    Folds werden gemeinsam gefittet. Der letzte Fold endet immer an der letzten
+    Beobachtung.
+    
+    Args:
+        panel (pd.DataFrame): Zeit × Spalten (z.B. Log-Renditen), NaN wird je Spalte entfernt
+        train_size (int): Fensterlänge, None für expandierende Fenster ab Beginn
+        step (int): Abstand der Fold-Enden in Beobachtungen
+        min_size (int, optional): Kleinstes Fenster bei expandierenden Fenstern
+    
+    Returns:
+        tuple: X (B, T, 1), Längen (B,), Schlüssel [(Spalte, Fold-Ende)]
+    """
+    sequences, keys = [], []
+    for column in panel.columns:
+        series = panel[column].dropna()
+        ends = list(range(train_size or min_size or step, len(series) + 1, step))
+        if ends and ends[-1] < len(series):
+            ends.append(len(series))
+        for end in ends:
+            start = end - train_size if train_size else 0
+            sequences.append(series.iloc[start:end].to_numpy())
+            keys.append((column, series.index[end - 1]))
+    X, lengths = pad_sequences(sequences)
+    return X, lengths, keys
+
+def log_emissions(X, means, variances):
+    """
+    Log-Dichte der Gauß-Emissionen (diagonale Kovarianz) je Zeitpunkt und Zustand
+    
+    Args:
+        X (np.ndarray): Beobachtungen (B, T, D)
+        means (np.ndarray): Mittelwerte (B, K, D)
+        variances (np.ndarray): Varianzen (B, K, D)
+    
+    Returns:
+        np.ndarray: (B, T, K)
+    """
+    norm = np.log(2 * np.pi * variances).sum(axis=-1)
+    scaled = (X[:, :, None, :] - means[:, None]) ** 2 / variances[:, None]
+    return -0.5 * (norm[:, None] + scaled.sum(axis=-1))
+
+def forward(log_start, transmat, log_emis, mask):
+    """
+    Forward-Algorithmus im Log-Raum für einen Batch
+    
+    logsumexp(alpha + log A) wird als m + log(exp(alpha - m) · A) mit einer
+    Matrixmultiplikation je Schritt berechnet.
+    
+    Args:
+        log_start (np.ndarray): Log-Startwahrscheinlichkeiten (B, K)
+        transmat (np.ndarray): Übergangsmatrizen (B, K, K)
+        log_emis (np.ndarray): Log-Emissionen (B, T, K)
+        mask (np.ndarray): Gültige Zeitpunkte (B, T), rechts aufgefüllt
+    
+    Returns:
+        tuple: Log-Alpha (B, T, K), Log-Likelihood (B,)
+    """
+    n_seq, n_steps, _ = log_emis.shape
+    alpha = np.empty_like(log_emis)
+    alpha[:, 0] = log_start + log_emis[:, 0]
+    for t in range(1, n_steps):
+        prev = alpha[:, t - 1]
+        peak = prev.max(axis=1, keepdims=True)
+        step = peak + _log(np.matmul(np.exp(prev - peak)[:, None], transmat)[:, 0]) + log_emis[:, t]
+        alpha[:, t] = np.where(mask[:, t, None], step, prev)
+    
+    last = alpha[:, -1]
+    peak = last.max(axis=1)
+    log_likelihood = peak + np.log(np.exp(last - peak[:, None]).sum(axis=1))
+    return alpha, log_likelihood
+
+def backward(transmat, log_emis, mask):
+    """
+    Backward-Algorithmus im Log-Raum für einen Batch
+    
+    Args:
+        transmat (np.ndarray): Übergangsmatrizen (B, K, K)
+        log_emis (np.ndarray): Log-Emissionen (B, T, K)
+        mask (np.ndarray): Gültige Zeitpunkte (B, T), rechts aufgefüllt
+    
+    Returns:
+        np.ndarray: Log-Beta (B, T, K)
+    """
+    n_seq, n_steps, _ = log_emis.shape
+    beta = np.zeros_like(log_emis)
+    for t in range(n_steps - 2, -1, -1):
+        following = log_emis[:, t + 1] + beta[:, t + 1]
+        peak = following.max(axis=1, keepdims=True)
+        step = peak + _log(np.matmul(transmat, np.exp(following - peak)[:, :, None])[:, :, 0])
+        beta[:, t] = np.where(mask[:, t + 1, None], step, 0.0)
+    return beta
+
+def viterbi(log_start, transmat, log_emis, mask):
+    """
+    Wahrscheinlichste Zustandsfolge je Sequenz
+    
+    Args:
+        log_start (np.ndarray): Log-Startwahrscheinlichkeiten (B, K)
+        transmat (np.ndarray): Übergangsmatrizen (B, K, K)
+        log_emis (np.ndarray): Log-Emissionen (B, T, K)
+        mask (np.ndarray): Gültige Zeitpunkte (B, T), rechts aufgefüllt
+    
+    Returns:
+        tuple: Zustände (B, T) mit -1 an aufgefüllten Stellen, Log-Wahrscheinlichkeit des Pfads (B,)
+    """
+    n_seq, n_steps, n_states = log_emis.shape
+    log_trans = _log(transmat)
+    rows = np.arange(n_seq)
+    stay = np.broadcast_to(np.arange(n_states), (n_seq, n_states))
+    
+    delta = log_start + log_emis[:, 0]
+    pointers = np.empty((n_seq, n_steps, n_states), dtype=np.intp)
+    pointers[:, 0] = stay
+    for t in range(1, n_steps):
+        scores = delta[:, :, None] + log_trans
+        best = scores.argmax(axis=1)
+        step = np.take_along_axis(scores, best[:, None], axis=1)[:, 0] + log_emis[:, t]
+        valid = mask[:, t, None]
+        pointers[:, t] = np.where(valid, best, stay)
+        delta = np.where(valid, step, delta)
+    
+    # Aufgefüllte Stellen zeigen auf sich selbst, der Pfad startet daher am letzten gültigen Zustand
+    states = np.empty((n_seq, n_steps), dtype=np.intp)
+    states[:, -1] = delta.argmax(axis=1)
+    for t in range(n_steps - 1, 0, -1):
+        states[:, t - 1] = pointers[rows, t, states[:, t]]
+    states[~mask] = -1
+    return states, delta.max(axis=1)
+
+class BatchGaussianHMM:
+    def __init__(self, n_states=3, n_iter=100, tol=TOLERANCE, min_variance=MIN_VARIANCE, order_states=True):
+        """
+        Hidden Markov Model mit Gauß-Emissionen für viele Sequenzen gleichzeitig
+        
+        Jede Sequenz (z.B. Paar × Walk-Forward Fold) hat eigene Parameter;
+        Baum-Welch, Forward-Backward und Viterbi laufen im Log-Raum vektorisiert
+        über den ganzen Batch. Konvergierte Sequenzen scheiden aus dem E-Schritt aus.
+        
+        Args:
+            n_states (int): Anzahl Zustände
+            n_iter (int): Maximale Anzahl Baum-Welch Iterationen
+            tol (float): Konvergenzschwelle der Log-Likelihood pro Beobachtung
+            min_variance (float): Untergrenze der Varianzen
+            order_states (bool): Zustände je Sequenz nach dem Mittelwert des ersten Merkmals sortieren
+        """
+        self.n_states = n_states
+        self.n_iter = n_iter
+        self.tol = tol
+        self.min_variance = min_variance
+        self.order_states = order_states
+        
+        self.startprob = None
+        self.transmat = None
+        self.means = None
+        self.variances = None
+        self.log_likelihood = None
+        self.iterations = None
+    
+    @staticmethod
+    def _prepare(X, lengths=None):
+        """
+        Bringt Beobachtungen in die Form (B, T, D) und baut die Maske
+        
+        Args:
+            X (np.ndarray): (T,), (B, T) oder (B, T, D)
+            lengths (array-like, optional): Gültige Länge je Sequenz, sonst T
+        """
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X[None, :, None]
+        elif X.ndim == 2:
+            X = X[:, :, None]
+        lengths = np.full(X.shape[0], X.shape[1]) if lengths is None else np.asarray(lengths)
+        mask = np.arange(X.shape[1]) < lengths[:, None]
+        return np.where(mask[:, :, None], X, 0.0), mask
+    
+    def params(self):
+        """
+        Aktuelle Parameter als Dictionary
+        """
+        return {'startprob': self.startprob, 'transmat': self.transmat, 'means': self.means, 'variances': self.variances}
+    
+    def _init_params(self, X, mask):
+        """
+        Startparameter aus den Quantilen des ersten Merkmals je Sequenz
+        """
+        n_seq, _, n_features = X.shape
+        K = self.n_states
+        observed = np.where(mask[:, :, None], X, np.nan)
+        
+        quantiles = (np.arange(K) + 0.5) / K
+        self.means = np.moveaxis(np.nanquantile(observed, quantiles, axis=1), 0, 1)
+        self.variances = np.repeat(np.nanvar(observed, axis=1)[:, None] + self.min_variance, K, axis=1)
+        self.startprob = np.full((n_seq, K), 1 / K)
+        
+        off_diagonal = (1 - INITIAL_PERSISTENCE) / max(K - 1, 1)
+        transmat = np.full((K, K), off_diagonal)
+        np.fill_diagonal(transmat, INITIAL_PERSISTENCE if K > 1 else 1.0)
+        self.transmat = np.repeat(transmat[None], n_seq, axis=0)
+    
+    def _e_step(self, X, mask, params):
+        """
+        Forward-Backward und die Sufficient Statistics für einen Teil-Batch
+        
+        Returns:
+            tuple: Log-Likelihood (B,), Posterior gamma (B, T, K), summierte Übergänge (B, K, K)
+        """
+        log_emis = log_emissions(X, params['means'], params['variances'])
+        alpha, log_likelihood = forward(_log(params['startprob']), params['transmat'], log_emis, mask)
+        beta = backward(params['transmat'], log_emis, mask)
+        
+        gamma = np.exp(alpha + beta - log_likelihood[:, None, None]) * mask[:, :, None]
+        
+        # xi_t(i, j) = exp(alpha_t(i) + log A(i, j) + log b_t+1(j) + beta_t+1(j) - log L), je Schritt skaliert
+        left = alpha[:, :-1]
+        right = log_emis[:, 1:] + beta[:, 1:]
+        left_peak = left.max(axis=2, keepdims=True)
+        right_peak = right.max(axis=2, keepdims=True)
+        weight = np.exp(left_peak[..., 0] + right_peak[..., 0] - log_likelihood[:, None]) * mask[:, 1:]
+        xi = params['transmat'] * np.einsum('bti,btj,bt->bij', np.exp(left - left_peak), np.exp(right - right_peak), weight)
+        return log_likelihood, gamma, xi
+    
+    def _m_step(self, X, gamma, xi, params):
+        """
+        Neue Parameter aus den Sufficient Statistics, leere Zustände behalten ihre Werte
+        """
+        occupancy = gamma.sum(axis=1)
+        filled = occupancy[:, :, None] > 1e-10
+        safe = np.maximum(occupancy, 1e-300)[:, :, None]
+        
+        means = np.einsum('btk,btd->bkd', gamma, X) / safe
+        means = np.where(filled, means, params['means'])
+        spread = np.einsum('btk,btkd->bkd', gamma, (X[:, :, None] - means[:, None]) ** 2) / safe
+        variances = np.where(filled, spread + self.min_variance, params['variances'])
+        
+        totals = xi.sum(axis=2, keepdims=True)
+        transmat = np.where(totals > 0, xi / np.maximum(totals, 1e-300), params['transmat'])
+        
+        return {'startprob': gamma[:, 0], 'transmat': transmat, 'means': means, 'variances': variances}
+    
+    def _sort_states(self):
+        """
+        Ordnet die Zustände je Sequenz aufsteigend nach dem Mittelwert des ersten Merkmals
+        """
+        order = np.argsort(self.means[:, :, 0], axis=1)
+        self.startprob = np.take_along_axis(self.startprob, order, axis=1)
+        self.means = np.take_along_axis(self.means, order[:, :, None], axis=1)
+        self.variances = np.take_along_axis(self.variances, order[:, :, None], axis=1)
+        transmat = np.take_along_axis(self.transmat, order[:, :, None], axis=1)
+        self.transmat = np.take_along_axis(transmat, order[:, None, :], axis=2)
+    
+    def fit(self, X, lengths=None, warm_start=False, init=None):
+        """
+        Baum-Welch für alle Sequenzen gleichzeitig
+        
+        Mit warm_start oder init starten die Iterationen bei vorhandenen
+        Parametern, z.B. nach angehängten Bars; es braucht dann meist nur
+        wenige Iterationen.
+        
+        Args:
+            X (np.ndarray): Beobachtungen (T,), (B, T) oder (B, T, D), rechts aufgefüllt
+            lengths (array-like, optional): Gültige Länge je Sequenz
+            warm_start (bool): Bisherige Parameter als Start verwenden (gleiches B, K, D)
+            init (dict, optional): Startparameter je Sequenz wie params(), Zeilen mit NaN-Mittelwerten starten kalt
+        
+        Returns:
+            BatchGaussianHMM: self
+        """
+        X, mask = self._prepare(X, lengths)
+        n_seq = X.shape[0]
+        if warm_start and init is None and self.means is not None and self.means.shape[0] == n_seq:
+            init = self.params()
+        
+        self._init_params(X, mask)
+        if init is not None:
+            warm = ~np.isnan(init['means']).any(axis=(1, 2))
+            for name, values in self.params().items():
+                shape = (-1,) + (1,) * (values.ndim - 1)
+                setattr(self, name, np.where(warm.reshape(shape), np.nan_to_num(init[name], nan=1.0), values))
+        
+        params = self.params()
+        counts = mask.sum(axis=1)
+        previous = np.full(n_seq, -np.inf)
+        log_likelihood = np.full(n_seq, -np.inf)
+        iterations = np.zeros(n_seq, dtype=int)
+        active = np.arange(n_seq)
+        
+        for _ in range(self.n_iter):
+            subset = {name: values[active] for name, values in params.items()}
+            ll, gamma, xi = self._e_step(X[active], mask[active], subset)
+            log_likelihood[active] = ll
+            iterations[active] += 1
+            
+            # Parameter der E-Schritt Likelihood gehören zu den aktuellen Parametern;
+            # konvergierte Sequenzen behalten sie und scheiden aus
+            converged = (ll - previous[active]) / counts[active] < self.tol
+            previous[active] = ll
+            updating = active[~converged]
+            if len(updating) == 0:
+                break
+            
+            update = self._m_step(X[updating], gamma[~converged], xi[~converged], {name: values[updating] for name, values in params.items()})
+            for name, values in update.items():
+                params[name][updating] = values
+            active = updating
+        
+        self.startprob, self.transmat, self.means, self.variances = (params[name] for name in ['startprob', 'transmat', 'means', 'variances'])
+        self.log_likelihood = log_likelihood
+        self.iterations = iterations
+        if self.order_states:
+            self._sort_states()
+        return self
+    
+    def score(self, X, lengths=None):
+        """
+        Log-Likelihood je Sequenz unter den aktuellen Parametern
+        """
+        X, mask = self._prepare(X, lengths)
+        log_emis = log_emissions(X, self.means, self.variances)
+        return forward(_log(self.startprob), self.transmat, log_emis, mask)[1]
+    
+    def predict_proba(self, X, lengths=None):
+        """
+        Geglättete Zustandswahrscheinlichkeiten P(z_t | x_1..T)
+        
+        Returns:
+            np.ndarray: (B, T, K), 0 an aufgefüllten Stellen
+        """
+        X, mask = self._prepare(X, lengths)
+        return self._e_step(X, mask, self.params())[1]
+    
+    def filter_proba(self, X, lengths=None):
+        """
+        Gefilterte Zustandswahrscheinlichkeiten P(z_t | x_1..t) ohne Look-Ahead, für Backtests
+        
+        Returns:
+            np.ndarray: (B, T, K), 0 an aufgefüllten Stellen
+        """
+        X, mask = self._prepare(X, lengths)
+        log_emis = log_emissions(X, self.means, self.variances)
+        alpha = forward(_log(self.startprob), self.transmat, log_emis, mask)[0]
+        alpha = alpha - alpha.max(axis=2, keepdims=True)
+        proba = np.exp(alpha)
+        return proba / proba.sum(axis=2, keepdims=True) * mask[:, :, None]
+    
+    def decode(self, X, lengths=None):
+        """
+        Viterbi-Zustände je Sequenz
+        
+        Returns:
+            tuple: Zustände (B, T) mit -1 an aufgefüllten Stellen, Log-Wahrscheinlichkeit des Pfads (B,)
+        """
+        X, mask = self._prepare(X, lengths)
+        log_emis = log_emissions(X, self.means, self.variances)
+        return viterbi(_log(self.startprob), self.transmat, log_emis, mask)
+    
+    def save(self, path, **extra):
+        """
+        Speichert die Parameter als .npz
+        
+        Args:
+            path (str): Zieldatei
+            **extra: Zusätzliche Arrays, z.B. Schlüssel der Sequenzen
+        """
+        np.savez(path, **self.params(), **extra)
+    
+    def load(self, path):
+        """
+        Lädt Parameter aus einer .npz Datei, z.B. als Start für einen Warm-Start
+        
+        Args:
+            path (str): Quelldatei
+        
+        Returns:
+            BatchGaussianHMM: self
+        """
+        with np.load(path) as stored:
+            self.startprob, self.transmat, self.means, self.variances = (stored[name] for name in ['startprob', 'transmat', 'means', 'variances'])
+        self.n_states = self.means.shape[1]
+        return self
+
+def main():
+    parser = argparse.ArgumentParser(description='HMM-Regime für FX-Paare (Walk-Forward)')
+    parser.add_argument('--symbols', nargs='+', default=DEFAULT_SYMBOLS, help='Yahoo Finance Symbole')
+    parser.add_argument('--start-date', default='2010-01-01', help='Startdatum (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--states', type=int, default=3, help='Anzahl Zustände')
+    parser.add_argument('--train-size', type=int, help='Fensterlänge in Tagen (Standard: expandierend)')
+    parser.add_argument('--step', type=int, default=63, help='Abstand der Folds in Tagen')
+    parser.add_argument('--min-size', type=int, default=252, help='Kleinstes expandierendes Fenster')
+    parser.add_argument('--cold', action='store_true', help='Gespeicherte Parameter nicht als Start verwenden')
+    
+    args = parser.parse_args()
+    
+    try:
+        console = Console()
+        HMM_DATA_PATH.mkdir(parents=True, exist_ok=True)
+        params_file = HMM_DATA_PATH / f"hmm_params_{args.states}.npz"
+        
+        with console.status("[bold blue]Lade Kurse..."):
+            loader = MarketDataLoader(console=console)
+            history = loader.get_history(args.symbols, args.start_date, args.end_date)
+            closes = pd.DataFrame({symbol: frame['Close'] for symbol, frame in history.items() if not frame.empty})
+            returns = log_returns(closes)
+        
+        X, lengths, keys = walk_forward_sequences(returns, args.train_size, args.step, args.min_size)
+        symbols = np.array([symbol for symbol, _ in keys])
+        ends = np.array([end for _, end in keys], dtype='datetime64[ns]')
+        
+        # Warm-Start: jede Sequenz startet beim letzten gespeicherten Fold desselben Symbols
+        model = BatchGaussianHMM(n_states=args.states)
+        init = None
+        if params_file.exists() and not args.cold:
+            stored = dict(np.load(params_file))
+            init = {name: np.full((len(keys),) + stored[name].shape[1:], np.nan) for name in model.params()}
+            for i, (symbol, end) in enumerate(zip(symbols, ends)):
+                candidates = np.flatnonzero((stored['symbols'] == symbol) & (stored['ends'] <= end))
+                if len(candidates) and stored['means'].shape[1:] == (args.states, X.shape[2]):
+                    source = candidates[np.argmax(stored['ends'][candidates])]
+                    for name in init:
+                        init[name][i] = stored[name][source]
+        
+        with console.status(f"[bold blue]Fitte {len(keys)} Sequenzen..."):
+            model.fit(X, lengths, init=init)
+            states, _ = model.decode(X, lengths)
+        model.save(params_file, symbols=symbols, ends=ends)
+        
+        # Zustände des letzten Folds je Symbol
+        last_fold = {symbol: i for i, symbol in enumerate(symbols)}
+        
+        output_file = HMM_DATA_PATH / f"hmm_states_{args.states}.csv"
+        frames = []
+        for symbol, i in last_fold.items():
+            dates = returns[symbol].dropna().loc[:ends[i]].index[-lengths[i]:]
+            frames.append(pd.DataFrame({'date': dates, 'symbol': symbol, 'state': states[i, :lengths[i]]}))
+        pd.concat(frames).to_csv(output_file, index=False)
+        
+        # Erstelle eine schöne Zusammenfassung
+        table = Table(title="HMM Regime Zusammenfassung (letzter Fold)")
+        table.add_column("Symbol", style="cyan")
+        table.add_column("Aktueller Zustand", style="green")
+        table.add_column("Mittelwert je Zustand", style="green")
+        table.add_column("Volatilität je Zustand", style="green")
+        table.add_column("Iterationen", style="green")
+        
+        for symbol, i in last_fold.items():
+            table.add_row(
+                symbol,
+                str(states[i, lengths[i] - 1]),
+                " / ".join(f"{m:.2e}" for m in model.means[i, :, 0]),
+                " / ".join(f"{np.sqrt(v):.4f}" for v in model.variances[i, :, 0]),
+                str(model.iterations[i])
+            )
+        
+        table.add_row("Sequenzen", f"{len(keys)} ({'Warm-Start' if init is not None else 'Kaltstart'})", "", "", f"Ø {model.iterations.mean():.1f}")
+        table.add_row("Speicherort", str(output_file), "", "", "")
+        
+        console.print(table)
+    
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,426 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import hashlib
+import json
+from pathlib import Path
+import argparse
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+import nltk
+from nltk.corpus import stopwords
+
+SENTIMENT_DATA_PATH = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data")
+
+# Quelle -> (Dateimuster relativ zu sentiment_data, Textspalten)
+SOURCES = {
+    'news': ("news_sentiment/store/*/*.csv", ['title', 'description']),
+    'twitter': ("social_media/twitter_sentiment_*.csv", ['text']),
+    'reddit': ("social_media/reddit_sentiment_*.csv", ['title', 'text'])
+}
+
+BATCH_ROWS = 50000
+TOKEN_PATTERN = r"[^\W_]+"
+
+_stop_words = None
+
+def get_stop_words():
+    """
+    Englische NLTK-Stopwörter (einmal pro Prozess geladen)
+    """
+    global _stop_words
+    if _stop_words is None:
+        try:
+            nltk.data.find('corpora/stopwords')
+        except LookupError:
+            nltk.download('stopwords')
+        _stop_words = frozenset(stopwords.words('english'))
+    return _stop_words
+
+def tokenize(texts):
+    """
+    Zerlegt einen Batch von Texten in kleingeschriebene Schlüsselwörter ohne Stopwörter
+    
+    Args:
+        texts (pd.Series): Texte
+    
+    Returns:
+        pd.Series: Ein Token pro Zeile, Index = Position des Textes im Batch
+    """
+    tokens = texts.fillna("").astype(str).reset_index(drop=True).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    return tokens[~tokens.isin(get_stop_words())]
+
+def top_keywords(text, n=10):
+    """
+    Häufigste Schlüsselwörter eines einzelnen Textes
+    
+    Args:
+        text (str): Text
+        n (int): Anzahl Schlüsselwörter
+    """
+    return tokenize(pd.Series([text])).value_counts().head(n)
+
+class KeywordFrequencyEngine:
+    def __init__(self, data_path=None, console=None):
+        """
+        Inkrementelle Schlüsselwort-Häufigkeiten pro Tag und Quelle
+        
+        Der gespeicherte News- und Social-Media-Korpus wird in Batches
+        tokenisiert. Je Quelle gibt es eine dünn besetzte Matrix (Tage × Begriffe),
+        das Vokabular ist gemeinsam. Pro Datei wird gemerkt, wie viele Zeilen
+        bereits gezählt sind, sodass ein Update nur neue Zeilen liest. Top-N und
+        Trend-Abfragen laufen ausschließlich auf diesen Aggregaten.
+        
+        Args:
+            data_path (str, optional): Ordner sentiment_data
+            console (Console, optional): Rich Console für Warnungen
+        """
+        self.console = console or Console()
+        self.data_path = Path(data_path or SENTIMENT_DATA_PATH)
+        self.index_path = self.data_path / "keywords"
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        self.meta_file = self.index_path / "_keyword_meta.json"
+        self.vocabulary_file = self.index_path / "vocabulary.txt"
+        
+        self.meta = self._load_meta()
+        self.terms = self.vocabulary_file.read_text().splitlines() if self.vocabulary_file.exists() else []
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.counts = {source: self._load_counts(source) for source in SOURCES}
+    
+    def _load_meta(self):
+        """
+        Lädt Ursprungstag je Quelle und die Datei-Cursor
+        """
+        if self.meta_file.exists():
+            with open(self.meta_file) as f:
+                return json.load(f)
+        return {'origin': {}, 'files': {}}
+    
+    def _load_counts(self, source):
+        """
+        Lädt die Tage × Begriffe Matrix einer Quelle
+        
+        Args:
+            source (str): Quelle (news, twitter, reddit)
+        """
+        counts_file = self.index_path / f"{source}_counts.npz"
+        if counts_file.exists():
+            return sp.load_npz(counts_file).tocsr()
+        return sp.csr_matrix((0, 0), dtype=np.int64)
+    
+    def save(self):
+        """
+        Speichert Matrizen, Vokabular und Cursor
+        """
+        for source, counts in self.counts.items():
+            sp.save_npz(self.index_path / f"{source}_counts.npz", counts)
+        self.vocabulary_file.write_text("\n".join(self.terms))
+        with open(self.meta_file, 'w') as f:
+            json.dump(self.meta, f, indent=2, sort_keys=True)
+    
+    def _term_codes(self, tokens):
+        """
+        Begriffs-IDs für Tokens, neue Begriffe werden an das Vokabular angehängt
+        
+        Args:
+            tokens (pd.Series): Tokens
+        """
+        codes, uniques = pd.factorize(tokens)
+        for term in uniques:
+            if term not in self.term_ids:
+                self.term_ids[term] = len(self.terms)
+                self.terms.append(term)
+        return np.array([self.term_ids[term] for term in uniques], dtype=np.int64)[codes]
+    
+    def _add_counts(self, source, days, tokens):
+        """
+        Addiert Token-Zählungen eines Batches in die Matrix einer Quelle
+        
+        Args:
+            source (str): Quelle
+            days (np.ndarray): Tag (datetime64[D]) je Text im Batch
+            tokens (pd.Series): Tokens mit Text-Position als Index
+        """
+        if tokens.empty:
+            return
+        
+        token_days = days[tokens.index.to_numpy()]
+        origin = self.meta['origin'].get(source)
+        first_day = token_days.min()
+        counts = self.counts[source]
+        
+        # Neuer Ursprung: Zeilen oben anfügen, damit Zeile = Tage seit Ursprung bleibt
+        if origin is None or first_day < np.datetime64(origin):
+            shift = 0 if origin is None else int((np.datetime64(origin) - first_day).astype(int))
+            counts = sp.vstack([sp.csr_matrix((shift, counts.shape[1]), dtype=np.int64), counts]).tocsr()
+            origin = str(first_day)
+            self.meta['origin'][source] = origin
+        
+        rows = (token_days - np.datetime64(origin)).astype(np.int64)
+        cols = self._term_codes(tokens)
+        shape = (max(counts.shape[0], rows.max() + 1), len(self.terms))
+        counts.resize(shape)
+        self.counts[source] = counts + sp.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=shape)
+    
+    def _file_head(self, path):
+        """
+        Fingerabdruck der ersten Datenzeile (erkennt überschriebene Dateien)
+        
+        Args:
+            path (Path): CSV-Datei
+        """
+        with open(path, 'rb') as f:
+            f.readline()
+            return hashlib.blake2b(f.readline(), digest_size=8).hexdigest()
+    
+    def _update_file(self, source, path, text_columns):
+        """
+        Zählt die neuen Zeilen einer Datei
+        
+        Append-only Dateien werden ab dem gespeicherten Zeilen-Cursor gelesen.
+        Wurde eine Datei neu geschrieben, zählen nur Zeilen nach dem letzten
+        bereits gezählten Zeitstempel.
+        
+        Args:
+            source (str): Quelle
+            path (Path): CSV-Datei
+            text_columns (list): Spalten, die zum Text verbunden werden
+        
+        Returns:
+            int: Anzahl neu gezählter Zeilen
+        """
+        key = str(path.relative_to(self.data_path))
+        cursor = self.meta['files'].get(key, {'rows': 0, 'head': None, 'last_date': None})
+        head = self._file_head(path)
+        rewritten = cursor['head'] is not None and cursor['head'] != head
+        skip = 0 if rewritten else cursor['rows']
+        
+        reader = pd.read_csv(
+            path,
+            usecols=['date'] + text_columns,
+            skiprows=range(1, skip + 1),
+            chunksize=BATCH_ROWS,
+            dtype={column: str for column in text_columns},
+            keep_default_na=False
+        )
+        
+        new_rows, rows, last_date = 0, skip, cursor['last_date']
+        for chunk in reader:
+            rows += len(chunk)
+            dates = pd.to_datetime(chunk['date'], utc=True, format='mixed')
+            if rewritten and last_date is not None:
+                chunk = chunk[dates > pd.Timestamp(last_date)]
+                dates = dates[chunk.index]
+            chunk, dates = chunk[dates.notna()], dates.dropna()
+            if chunk.empty:
+                continue
+            
+            text = chunk[text_columns[0]]
+            for column in text_columns[1:]:
+                text = text + " " + chunk[column]
+            days = dates.dt.tz_localize(None).to_numpy().astype('datetime64[D]')
+            self._add_counts(source, days, tokenize(text))
+            
+            new_rows += len(chunk)
+            batch_last = dates.max().isoformat()
+            last_date = batch_last if last_date is None else max(last_date, batch_last)
+        
+        self.meta['files'][key] = {'rows': rows, 'head': head, 'last_date': last_date}
+        return new_rows
+    
+    def update(self, sources=None):
+        """
+        Zählt alle neuen Zeilen des gespeicherten Korpus
+        
+        Args:
+            sources (list, optional): Quellen (Standard: alle)
+        
+        Returns:
+            dict: Quelle -> Anzahl neu gezählter Texte
+        """
+        added = {}
+        for source in sources or SOURCES:
+            pattern, text_columns = SOURCES[source]
+            added[source] = 0
+            for path in sorted(self.data_path.glob(pattern)):
+                try:
+                    added[source] += self._update_file(source, path, text_columns)
+                except Exception as e:
+                    self.console.print(f"[yellow]Warnung: {path.name} übersprungen: {str(e)}[/yellow]")
+        self.save()
+        return added
+    
+    def daily_counts(self, start_date=None, end_date=None, sources=None):
+        """
+        Summierte Tage × Begriffe Matrix über Quellen für einen Zeitraum
+        
+        Args:
+            start_date (str, optional): Erster Tag (YYYY-MM-DD)
+            end_date (str, optional): Letzter Tag (YYYY-MM-DD)
+            sources (list, optional): Quellen (Standard: alle)
+        
+        Returns:
+            tuple: Tage (pd.DatetimeIndex) und Matrix (csr_matrix, Tage × Begriffe)
+        """
+        sources = [source for source in (sources or SOURCES) if self.meta['origin'].get(source)]
+        if not sources:
+            return pd.DatetimeIndex([]), sp.csr_matrix((0, len(self.terms)), dtype=np.int64)
+        
+        origins = {source: np.datetime64(self.meta['origin'][source]) for source in sources}
+        first = np.datetime64(start_date, 'D') if start_date else min(origins.values())
+        last = np.datetime64(end_date, 'D') if end_date else max(origins[source] + self.counts[source].shape[0] - 1 for source in sources)
+        n_days = max(int((last - first).astype(int)) + 1, 0)
+        
+        total = sp.csr_matrix((n_days, len(self.terms)), dtype=np.int64)
+        for source in sources:
+            counts = self.counts[source]
+            offset = int((first - origins[source]).astype(int))
+            lo, hi = max(offset, 0), min(offset + n_days, counts.shape[0])
+            if lo >= hi:
+                continue
+            block = counts[lo:hi]
+            block.resize((hi - lo, len(self.terms)))
+            total = total + sp.vstack([
+                sp.csr_matrix((lo - offset, len(self.terms)), dtype=np.int64),
+                block,
+                sp.csr_matrix((n_days - (hi - offset), len(self.terms)), dtype=np.int64)
+            ]).tocsr()
+        
+        return pd.date_range(str(first), periods=n_days, freq='D'), total
+    
+    def top_terms(self, n=10, start_date=None, end_date=None, sources=None):
+        """
+        Häufigste Begriffe in einem Zeitraum
+        
+        Args:
+            n (int): Anzahl Begriffe
+            start_date (str, optional): Erster Tag (YYYY-MM-DD)
+            end_date (str, optional): Letzter Tag (YYYY-MM-DD)
+            sources (list, optional): Quellen (Standard: alle)
+        
+        Returns:
+            pd.Series: Begriff -> Häufigkeit, absteigend
+        """
+        _, counts = self.daily_counts(start_date, end_date, sources)
+        totals = np.asarray(counts.sum(axis=0)).ravel()
+        n = min(n, int((totals > 0).sum()))
+        if n == 0:
+            return pd.Series(dtype=np.int64)
+        
+        top = np.argpartition(-totals, n - 1)[:n]
+        top = top[np.argsort(-totals[top], kind='stable')]
+        return pd.Series(totals[top], index=pd.Index(np.array(self.terms, dtype=object)[top], name='term'), name='count')
+    
+    def term_series(self, terms, start_date=None, end_date=None, sources=None, freq='D', share=False):
+        """
+        Zeitreihe der Häufigkeit einzelner Begriffe
+        
+        Args:
+            terms (list): Begriffe
+            start_date (str, optional): Erster Tag (YYYY-MM-DD)
+            end_date (str, optional): Letzter Tag (YYYY-MM-DD)
+            sources (list, optional): Quellen (Standard: alle)
+            freq (str): Resampling-Frequenz (z.B. 'D', 'W')
+            share (bool): Anteil an allen Tokens des Zeitraums statt absoluter Anzahl
+        """
+        days, counts = self.daily_counts(start_date, end_date, sources)
+        terms = [term.lower() for term in terms]
+        columns = [self.term_ids.get(term, -1) for term in terms]
+        
+        values = np.zeros((len(days), len(terms)))
+        known = [i for i, column in enumerate(columns) if column >= 0]
+        if known:
+            values[:, known] = counts[:, [columns[i] for i in known]].toarray()
+        
+        series = pd.DataFrame(values, index=days, columns=terms).resample(freq).sum()
+        if share:
+            totals = pd.Series(np.asarray(counts.sum(axis=1)).ravel(), index=days).resample(freq).sum()
+            series = series.div(totals.replace(0, np.nan), axis=0).fillna(0.0)
+        return series
+    
+    def trending_terms(self, n=10, end_date=None, window_days=1, baseline_days=7, min_count=5, sources=None):
+        """
+        Begriffe mit dem stärksten Anstieg ihres Anteils gegenüber einer Basisperiode
+        
+        Args:
+            n (int): Anzahl Begriffe
+            end_date (str, optional): Letzter Tag des Fensters (Standard: letzter gezählter Tag)
+            window_days (int): Länge des aktuellen Fensters in Tagen
+            baseline_days (int): Länge der Basisperiode direkt davor
+            min_count (int): Mindestanzahl im aktuellen Fenster
+            sources (list, optional): Quellen (Standard: alle)
+        
+        Returns:
+            pd.DataFrame: count, baseline_count und log_ratio (geglättetes Log-Verhältnis der Anteile)
+        """
+        if end_date is None:
+            days, _ = self.daily_counts(sources=sources)
+            if len(days) == 0:
+                return pd.DataFrame(columns=['count', 'baseline_count', 'log_ratio'])
+            end_date = days[-1]
+        
+        end = pd.Timestamp(end_date)
+        window_start = end - pd.Timedelta(days=window_days - 1)
+        baseline_start = window_start - pd.Timedelta(days=baseline_days)
+        days, counts = self.daily_counts(baseline_start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), sources)
+        
+        current = np.asarray(counts[baseline_days:].sum(axis=0)).ravel().astype(float)
+        baseline = np.asarray(counts[:baseline_days].sum(axis=0)).ravel().astype(float)
+        
+        # Additive Glättung, damit neue Begriffe kein unendliches Verhältnis bekommen
+        log_ratio = np.log((current + 1) / (current.sum() + len(current))) - np.log((baseline + 1) / (baseline.sum() + len(baseline)))
+        candidates = np.flatnonzero(current >= min_count)
+        top = candidates[np.argsort(-log_ratio[candidates], kind='stable')[:n]]
+        
+        return pd.DataFrame({
+            'count': current[top].astype(np.int64),
+            'baseline_count': baseline[top].astype(np.int64),
+            'log_ratio': log_ratio[top]
+        }, index=pd.Index(np.array(self.terms, dtype=object)[top], name='term'))
+
+def main():
+    parser = argparse.ArgumentParser(description='Schlüsselwort-Häufigkeiten im Sentiment-Korpus')
+    parser.add_argument('--sources', nargs='+', choices=list(SOURCES), help='Quellen (Standard: alle)')
+    parser.add_argument('--start-date', help='Erster Tag der Abfrage (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Letzter Tag der Abfrage (YYYY-MM-DD)')
+    parser.add_argument('--top', type=int, default=20, help='Anzahl Begriffe')
+    parser.add_argument('--baseline-days', type=int, default=7, help='Basisperiode für Trend-Begriffe in Tagen')
+    parser.add_argument('--no-update', action='store_true', help='Keine neuen Zeilen zählen, nur abfragen')
+    
+    args = parser.parse_args()
+    
+    try:
+        engine = KeywordFrequencyEngine()
+        console = engine.console
+        
+        if not args.no_update:
+            with console.status("[bold blue]Zähle neue Texte..."):
+                added = engine.update(args.sources)
+            console.print("Neu gezählt: " + ", ".join(f"{source} {count}" for source, count in added.items()))
+        
+        top = engine.top_terms(args.top, args.start_date, args.end_date, args.sources)
+        trending = engine.trending_terms(args.top, args.end_date, baseline_days=args.baseline_days, sources=args.sources)
+        
+        table = Table(title=f"Schlüsselwörter ({args.start_date or 'Anfang'} bis {args.end_date or 'heute'})")
+        table.add_column("Häufigste Begriffe", style="cyan")
+        table.add_column("Anzahl", style="green")
+        table.add_column("Trend-Begriffe", style="cyan")
+        table.add_column("Letzter Tag / Basis", style="green")
+        
+        for i in range(max(len(top), len(trending))):
+            table.add_row(
+                top.index[i] if i < len(top) else "",
+                str(top.iloc[i]) if i < len(top) else "",
+                trending.index[i] if i < len(trending) else "",
+                f"{trending['count'].iloc[i]} / {trending['baseline_count'].iloc[i]}" if i < len(trending) else ""
+            )
+        
+        table.add_row("Vokabular", str(len(engine.terms)), "Speicherort", str(engine.index_path))
+        console.print(table)
+    
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
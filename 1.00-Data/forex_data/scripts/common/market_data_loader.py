@@ -0,0 +1,284 @@
+import pandas as pd
+import yfinance as yf
+from datetime import datetime, timedelta
+import json
+from pathlib import Path
+import argparse
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+# Symbole, die von den Regime- und Volatilitäts-Fetchern gemeinsam genutzt werden
+REGIME_SYMBOLS = ['^VIX', 'GC=F', 'DX-Y.NYB']
+VOLATILITY_SYMBOLS = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'AUDUSD=X', 'USDCAD=X']
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class MarketDataLoader:
+    def __init__(self, cache_path=None, console=None):
+        """
+        Initialisiert den Market Data Loader
+        
+        Tägliche Yahoo Finance Bars werden pro Symbol lokal gecacht. Fehlende
+        Zeiträume werden gebündelt in einem yf.download Aufruf nachgeladen,
+        bereits gecachte Symbole nur ab ihrer letzten gespeicherten Zeile.
+        
+        Args:
+            cache_path (str, optional): Cache-Ordner für die täglichen Bars
+            console (Console, optional): Rich Console für Warnungen
+        """
+        self.console = console or Console()
+        self.cache_path = Path(cache_path or "/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/price_data/daily/yahoo")
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.meta_file = self.cache_path / "_cache_meta.json"
+        self.meta = self._load_meta()
+    
+    def _load_meta(self):
+        """
+        Lädt die abgedeckten Zeiträume je Symbol
+        """
+        if self.meta_file.exists():
+            with open(self.meta_file) as f:
+                return json.load(f)
+        return {}
+    
+    def _save_meta(self):
+        """
+        Speichert die abgedeckten Zeiträume je Symbol
+        """
+        with open(self.meta_file, 'w') as f:
+            json.dump(self.meta, f, indent=2, sort_keys=True)
+    
+    def _cache_file(self, symbol):
+        """
+        Liefert den Cache-Pfad für ein Symbol
+        
+        Args:
+            symbol (str): Yahoo Finance Symbol
+        """
+        return self.cache_path / f"{symbol.replace('/', '_')}.csv"
+    
+    def _resolve_dates(self, start_date=None, end_date=None):
+        """
+        Setzt Standardwerte und begrenzt das Enddatum auf morgen (yfinance End ist exklusiv)
+        
+        Args:
+            start_date (str|datetime, optional): Startdatum
+            end_date (str|datetime, optional): Enddatum (exklusiv)
+        """
+        tomorrow = pd.Timestamp(datetime.now().date()) + timedelta(days=1)
+        end = pd.Timestamp(end_date).normalize() if end_date else tomorrow
+        end = min(end, tomorrow)
+        start = pd.Timestamp(start_date).normalize() if start_date else end - timedelta(days=365)
+        return start, end
+    
+    def _read_cache(self, symbol):
+        """
+        Liest die gecachten Bars eines Symbols
+        
+        Args:
+            symbol (str): Yahoo Finance Symbol
+        """
+        cache_file = self._cache_file(symbol)
+        if not cache_file.exists():
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+        return pd.read_csv(cache_file, index_col='Date', parse_dates=['Date'])
+    
+    def _download(self, symbols, start, end):
+        """
+        Lädt mehrere Symbole in einem einzigen yf.download Aufruf
+        
+        Args:
+            symbols (list): Liste von Yahoo Finance Symbolen
+            start (pd.Timestamp): Startdatum
+            end (pd.Timestamp): Enddatum (exklusiv)
+        
+        Returns:
+            dict: Symbol -> DataFrame mit OHLCV Spalten
+        """
+        data = yf.download(
+            symbols,
+            start=start,
+            end=end,
+            interval='1d',
+            group_by='ticker',
+            auto_adjust=True,
+            progress=False,
+            threads=True
+        )
+        
+        if data is None or data.empty:
+            return {}
+        
+        if not isinstance(data.columns, pd.MultiIndex):
+            data = pd.concat({symbols[0]: data}, axis=1)
+        
+        if data.index.tz is not None:
+            data.index = data.index.tz_localize(None)
+        data.index.name = 'Date'
+        
+        frames = {}
+        for symbol in symbols:
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol].reindex(columns=OHLCV_COLUMNS).dropna(how='all')
+            if not frame.empty:
+                frames[symbol] = frame
+        
+        return frames
+    
+    def refresh(self, symbols, start_date=None, end_date=None):
+        """
+        Bringt den Cache für alle Symbole auf den angeforderten Zeitraum
+        
+        Symbole, deren Cache den Zeitraum bereits abdeckt, lösen keinen Request aus.
+        Alle Symbole mit neuem Anfang werden gemeinsam vollständig geladen, alle
+        übrigen gemeinsam ab ihrer ältesten letzten Zeile (Tail-Update).
+        Fehlgeschlagene oder leere Abrufe erweitern die Abdeckung nicht.
+        
+        Args:
+            symbols (list): Liste von Yahoo Finance Symbolen
+            start_date (str|datetime, optional): Startdatum
+            end_date (str|datetime, optional): Enddatum (exklusiv)
+        """
+        start, end = self._resolve_dates(start_date, end_date)
+        
+        backfill, tail = [], {}
+        for symbol in dict.fromkeys(symbols):
+            coverage = self.meta.get(symbol)
+            if coverage is None or start < pd.Timestamp(coverage['start']):
+                backfill.append(symbol)
+            elif end > pd.Timestamp(coverage['end']):
+                cached = self._read_cache(symbol)
+                # Letzte Zeile neu laden, da sie beim letzten Abruf unvollständig gewesen sein kann
+                tail[symbol] = cached.index.max() if not cached.empty else pd.Timestamp(coverage['end'])
+        
+        batches = []
+        if backfill:
+            batches.append((backfill, start))
+        if tail:
+            batches.append((list(tail), min(tail.values())))
+        
+        for batch_symbols, batch_start in batches:
+            try:
+                frames = self._download(batch_symbols, batch_start, end)
+            except Exception as e:
+                self.console.print(f"[red]Fehler beim Abrufen von {', '.join(batch_symbols)}: {str(e)}[/red]")
+                continue
+            
+            for symbol in batch_symbols:
+                if symbol not in frames:
+                    # Abdeckung nicht erweitern, damit der Zeitraum beim nächsten Aufruf erneut geladen wird
+                    self.console.print(f"[yellow]Warnung: Keine Daten für {symbol} erhalten[/yellow]")
+                    continue
+                
+                cached = self._read_cache(symbol)
+                merged = pd.concat([cached, frames[symbol]])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                merged.to_csv(self._cache_file(symbol))
+                
+                coverage = self.meta.get(symbol, {})
+                coverage_start = min(batch_start, pd.Timestamp(coverage.get('start', batch_start)))
+                coverage_end = max(end, pd.Timestamp(coverage.get('end', end)))
+                self.meta[symbol] = {
+                    'start': coverage_start.strftime('%Y-%m-%d'),
+                    'end': coverage_end.strftime('%Y-%m-%d')
+                }
+        
+        if batches:
+            self._save_meta()
+        
+        return len(batches)
+    
+    def get_history(self, symbols, start_date=None, end_date=None, refresh=True):
+        """
+        Liefert tägliche Bars für mehrere Symbole aus dem Cache
+        
+        Args:
+            symbols (list): Liste von Yahoo Finance Symbolen
+            start_date (str|datetime, optional): Startdatum
+            end_date (str|datetime, optional): Enddatum (exklusiv)
+            refresh (bool, optional): Fehlende Zeiträume vorher nachladen
+        
+        Returns:
+            dict: Symbol -> DataFrame mit OHLCV Spalten und DatetimeIndex
+        """
+        if refresh:
+            self.refresh(symbols, start_date, end_date)
+        
+        start, end = self._resolve_dates(start_date, end_date)
+        
+        history = {}
+        for symbol in symbols:
+            cached = self._read_cache(symbol)
+            history[symbol] = cached[(cached.index >= start) & (cached.index < end)]
+        
+        return history
+    
+    def get_panel(self, symbols, start_date=None, end_date=None, refresh=True):
+        """
+        Liefert tägliche Bars im Format von yf.download(group_by='ticker')
+        
+        Args:
+            symbols (list): Liste von Yahoo Finance Symbolen
+            start_date (str|datetime, optional): Startdatum
+            end_date (str|datetime, optional): Enddatum (exklusiv)
+            refresh (bool, optional): Fehlende Zeiträume vorher nachladen
+        
+        Returns:
+            pd.DataFrame: Spalten-MultiIndex (Symbol, Feld)
+        """
+        history = self.get_history(symbols, start_date, end_date, refresh)
+        history = {symbol: frame for symbol, frame in history.items() if not frame.empty}
+        
+        if not history:
+            return pd.DataFrame()
+        
+        return pd.concat(history, axis=1).sort_index()
+
+def main():
+    parser = argparse.ArgumentParser(description='Market Data Loader (Yahoo Finance Cache)')
+    parser.add_argument('--symbols', nargs='+', help='Liste von Yahoo Finance Symbolen (Standard: Regime + Volatilität)')
+    parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    
+    args = parser.parse_args()
+    
+    try:
+        symbols = args.symbols or REGIME_SYMBOLS + VOLATILITY_SYMBOLS
+        
+        loader = MarketDataLoader()
+        console = loader.console
+        
+        with console.status("[bold blue]Aktualisiere Marktdaten-Cache..."):
+            requests_made = loader.refresh(symbols, args.start_date, args.end_date)
+        
+        # Erstelle eine schöne Zusammenfassung
+        table = Table(title="Marktdaten-Cache")
+        table.add_column("Symbol", style="cyan")
+        table.add_column("Von", style="green")
+        table.add_column("Bis", style="green")
+        table.add_column("Bars", style="green")
+        
+        for symbol in symbols:
+            cached = loader._read_cache(symbol)
+            if cached.empty:
+                table.add_row(symbol, "-", "-", "0")
+            else:
+                table.add_row(
+                    symbol,
+                    cached.index.min().strftime('%Y-%m-%d'),
+                    cached.index.max().strftime('%Y-%m-%d'),
+                    str(len(cached))
+                )
+        
+        table.add_row("Requests", str(requests_made), "", "")
+        table.add_row("Speicherort", str(loader.cache_path), "", "")
+        
+        console.print(table)
+    
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
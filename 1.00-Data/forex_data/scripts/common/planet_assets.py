@@ -0,0 +1,531 @@
+import json
+import math
+import time
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from rich.console import Console
+
+from common.rate_limiter import RateLimiter, RateLimitExceeded
+
+PLANET_API_URL = "https://api.planet.com/data/v1"
+PLANET_DATA_PATH = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/alternative_data/planet")
+ITEM_TYPE = 'PSScene4Band'
+ASSET_TYPE = 'analytic'
+
+# (Aufrufe, Sekunden) je Endpunkt nach den Limits der Planet Data API
+RATE_LIMITS = {'search': (10, 1), 'assets': (10, 1), 'activate': (5, 1), 'download': (15, 1)}
+MAX_RETRIES = 3
+
+# Suchergebnisse für Zeiträume, die bis in die letzten Tage reichen, werden nach SEARCH_TTL neu geholt
+SEARCH_TTL = 6 * 3600
+OPEN_WINDOW_DAYS = 2
+
+# Aktivierung: Abfrageintervall wächst je Asset bis POLL_INTERVAL_MAX
+POLL_INTERVAL = 5.0
+POLL_INTERVAL_MAX = 60.0
+ACTIVATION_TIMEOUT = 3600
+
+CACHE_LIMIT = 20 * 1024 ** 3
+DOWNLOAD_CHUNK = 1 << 20
+
+def aoi_key(geometry):
+    """
+    Kurzer, stabiler Schlüssel einer GeoJSON-Geometrie
+    
+    Args:
+        geometry (dict): GeoJSON-Geometrie oder None (ganze Szene)
+    """
+    if geometry is None:
+        return 'full'
+    return hashlib.sha1(json.dumps(geometry, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def point_aoi(lat, lon, radius_m=None):
+    """
+    GeoJSON für einen Standort, optional als Quadrat mit Halbkantenlänge radius_m
+    
+    Args:
+        lat (float): Breitengrad
+        lon (float): Längengrad
+        radius_m (float, optional): Halbe Kantenlänge in Metern
+    """
+    if not radius_m:
+        return {"type": "Point", "coordinates": [lon, lat]}
+    
+    dlat = radius_m / 111_320
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    ring = [[lon - dlon, lat - dlat], [lon + dlon, lat - dlat], [lon + dlon, lat + dlat], [lon - dlon, lat + dlat], [lon - dlon, lat - dlat]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+def search_filter(geometry, start_date, end_date, cloud_cover=0.1, extra_filters=None):
+    """
+    Filter der Planet Data API (AndFilter aus Geometrie, Zeitraum und Wolkenbedeckung)
+    
+    Args:
+        geometry (dict): GeoJSON-Geometrie
+        start_date (datetime): Beginn des Zeitraums
+        end_date (datetime): Ende des Zeitraums
+        cloud_cover (float): Maximale Wolkenbedeckung (0-1)
+        extra_filters (list, optional): Weitere Filter im API-Format
+    """
+    config = [
+        {"type": "GeometryFilter", "field_name": "geometry", "config": geometry},
+        {"type": "DateRangeFilter", "field_name": "acquired", "config": {
+            "gte": start_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "lte": end_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+        }},
+        {"type": "RangeFilter", "field_name": "cloud_cover", "config": {"lte": cloud_cover}}
+    ]
+    return {"type": "AndFilter", "config": config + list(extra_filters or [])}
+
+def clip_to_aoi(source, target, geometry):
+    """
+    Schneidet ein GeoTIFF auf das umschließende Fenster einer Geometrie zu
+    
+    Args:
+        source (Path): Heruntergeladene Szene
+        target (Path): Zieldatei
+        geometry (dict): GeoJSON-Geometrie in WGS84
+    """
+    import rasterio
+    from rasterio.features import geometry_window
+    from rasterio.warp import transform_geom
+    
+    with rasterio.open(source) as src:
+        window = geometry_window(src, [transform_geom('EPSG:4326', src.crs, geometry)])
+        profile = src.profile.copy()
+        profile.update(width=window.width, height=window.height, transform=src.window_transform(window))
+        profile.pop('blockxsize', None)
+        profile.pop('blockysize', None)
+        profile['tiled'] = False
+        with rasterio.open(target, 'w', **profile) as dst:
+            dst.write(src.read(window=window))
+
+def _parse_date(value, default):
+    """
+    Datum aus YYYY-MM-DD, datetime oder None (UTC)
+    
+    Args:
+        value (str | datetime): Datum
+        default (datetime): Standardwert
+    """
+    if value is None:
+        value = default
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d')
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+class PlanetClient:
+    def __init__(self, api_key=None, base_url=PLANET_API_URL, max_workers=8):
+        """
+        HTTP-Client für die Planet Data API (auch gegen planet_stub_server.py)
+        
+        Args:
+            api_key (str, optional): Planet API-Key
+            base_url (str): Basis-URL der Data API
+            max_workers (int): Größe des Connection-Pools
+        """
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if api_key:
+            self.session.auth = (api_key, '')
+    
+    def _request(self, method, url, **kwargs):
+        """
+        Sendet einen Request, HTTP 429 wird als RateLimitExceeded gemeldet
+        
+        Args:
+            method (str): HTTP-Methode
+            url (str): URL
+            **kwargs: Parameter für requests
+        """
+        response = self.session.request(method, url, timeout=kwargs.pop('timeout', 60), **kwargs)
+        if response.status_code == 429:
+            response.close()
+            raise RateLimitExceeded(float(response.headers.get('Retry-After', 1)))
+        response.raise_for_status()
+        return response
+    
+    def quick_search(self, item_type, search_filter, url=None):
+        """
+        Eine Seite der Quick Search
+        
+        Args:
+            item_type (str): Item-Typ (z.B. PSScene4Band)
+            search_filter (dict): Filter im API-Format
+            url (str, optional): Link auf die nächste Seite
+        
+        Returns:
+            tuple: Features der Seite, Link auf die nächste Seite oder None
+        """
+        if url:
+            payload = self._request('GET', url).json()
+        else:
+            body = {"item_types": [item_type], "filter": search_filter}
+            payload = self._request('POST', f"{self.base_url}/quick-search", json=body).json()
+        return payload.get('features', []), payload.get('_links', {}).get('_next')
+    
+    def assets(self, item_type, item_id):
+        """
+        Assets eines Items mit Status und Links
+        
+        Args:
+            item_type (str): Item-Typ
+            item_id (str): Item-ID
+        """
+        return self._request('GET', f"{self.base_url}/item-types/{item_type}/items/{item_id}/assets").json()
+    
+    def activate(self, asset):
+        """
+        Startet die Aktivierung eines Assets
+        
+        Args:
+            asset (dict): Asset aus assets()
+        """
+        self._request('POST', asset['_links']['activate']).close()
+    
+    def download(self, url, target):
+        """
+        Lädt eine Datei streamend herunter (atomar über eine .part-Datei)
+        
+        Args:
+            url (str): Download-Link des aktiven Assets
+            target (Path): Zieldatei
+        
+        Returns:
+            int: Größe in Bytes
+        """
+        part = target.with_name(target.name + '.part')
+        with self._request('GET', url, stream=True, timeout=300) as response:
+            with open(part, 'wb') as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK):
+                    f.write(chunk)
+        part.replace(target)
+        return target.stat().st_size
+
+class PlanetAssetManager:
+    def __init__(self, base_path=PLANET_DATA_PATH, api_key=None, base_url=PLANET_API_URL, cache_limit=CACHE_LIMIT,
+                 max_workers=4, console=None):
+        """
+        Sucht, aktiviert und lädt Planet-Szenen mit persistentem Such- und Szenen-Cache
+        
+        Suchergebnisse werden je Filter gespeichert. Szenen liegen in einem
+        größenbegrenzten LRU-Cache, Schlüssel ist Item-ID, Asset und AOI. Fehlende
+        Assets werden gleichzeitig aktiviert, der Status wird in einer
+        Ereignisschleife ohne blockierte Threads abgefragt und aktive Assets
+        werden sofort heruntergeladen.
+        
+        Args:
+            base_path (Path): Verzeichnis für Index und Szenen (gemeinsam für alle Analyzer)
+            api_key (str, optional): Planet API-Key
+            base_url (str): Basis-URL der Data API (oder eines Stub-Servers)
+            cache_limit (int): Maximale Größe des Szenen-Caches in Bytes
+            max_workers (int): Anzahl gleichzeitiger Requests
+            console (Console, optional): Rich Console für Meldungen
+        """
+        self.console = console or Console()
+        self.base_path = Path(base_path)
+        self.scene_path = self.base_path / "scenes"
+        self.scene_path.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.base_path / "_asset_index.json"
+        self.index = self._load_index()
+        self.lock = threading.Lock()
+        self.client = PlanetClient(api_key, base_url, max_workers)
+        self.cache_limit = cache_limit
+        self.max_workers = max_workers
+        self.rate_limiters = {name: RateLimiter(calls, period) for name, (calls, period) in RATE_LIMITS.items()}
+    
+    def _load_index(self):
+        """
+        Lädt gespeicherte Suchergebnisse und den Szenen-Index
+        """
+        if self.index_file.exists():
+            with open(self.index_file) as f:
+                return json.load(f)
+        return {'searches': {}, 'scenes': {}}
+    
+    def _save_index(self):
+        """
+        Speichert den Index
+        """
+        with self.lock:
+            with open(self.index_file, 'w') as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+    
+    def _call(self, endpoint, func, *args):
+        """
+        Ruft die API innerhalb des Rate Limits eines Endpunkts auf, bei HTTP 429 mit Backoff
+        
+        Args:
+            endpoint (str): search, assets, activate oder download
+            func (callable): API-Aufruf
+            *args: Argumente des Aufrufs
+        """
+        limiter = self.rate_limiters[endpoint]
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire()
+            try:
+                return func(*args)
+            except RateLimitExceeded as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                limiter.backoff(e.retry_after)
+    
+    def search(self, geometry, start_date=None, end_date=None, item_type=ITEM_TYPE, cloud_cover=0.1, extra_filters=None, days=7):
+        """
+        Sucht Szenen, abgeschlossene Zeiträume werden nur einmal abgefragt
+        
+        Args:
+            geometry (dict): GeoJSON-Geometrie in WGS84
+            start_date (str, optional): Startdatum im Format YYYY-MM-DD
+            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            item_type (str): Item-Typ
+            cloud_cover (float): Maximale Wolkenbedeckung (0-1)
+            extra_filters (list, optional): Weitere Filter im API-Format
+            days (int): Länge des Zeitraums, wenn kein Startdatum angegeben ist
+        
+        Returns:
+            list: Items mit id, item_type, acquired und properties
+        """
+        # Offenes Ende auf den Folgetag normiert: Filter und Cache-Schlüssel bleiben
+        # über den Tag stabil, neue Szenen holt die SEARCH_TTL
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        end = _parse_date(end_date, today + timedelta(days=1))
+        start = _parse_date(start_date, end - timedelta(days=days))
+        query = search_filter(geometry, start, end, cloud_cover, extra_filters)
+        key = hashlib.sha1(json.dumps([item_type, query], sort_keys=True).encode('utf-8')).hexdigest()
+        
+        cached = self.index['searches'].get(key)
+        is_open = end > datetime.now(timezone.utc) - timedelta(days=OPEN_WINDOW_DAYS)
+        if cached and not (is_open and time.time() - cached['fetched'] > SEARCH_TTL):
+            return cached['items']
+        
+        items, url = [], None
+        while True:
+            features, url = self._call('search', self.client.quick_search, item_type, query, url)
+            items += [
+                {
+                    'id': feature['id'],
+                    'item_type': feature.get('properties', {}).get('item_type', item_type),
+                    'acquired': feature['properties']['acquired'],
+                    'properties': feature['properties']
+                }
+                for feature in features
+            ]
+            if not url or not features:
+                break
+        
+        with self.lock:
+            self.index['searches'][key] = {'fetched': time.time(), 'items': items}
+        self._save_index()
+        return items
+    
+    def _scene_file(self, item, asset_type, clip):
+        """
+        Pfad einer Szene im Cache
+        
+        Args:
+            item (dict): Item aus search()
+            asset_type (str): Asset-Typ
+            clip (dict): AOI, auf die zugeschnitten wird (oder None)
+        """
+        return self.scene_path / aoi_key(clip) / f"{item['id']}_{asset_type}.tif"
+    
+    def _activate(self, item, asset_type):
+        """
+        Fragt den Asset-Status ab und startet bei Bedarf die Aktivierung
+        
+        Args:
+            item (dict): Item aus search()
+            asset_type (str): Asset-Typ
+        
+        Returns:
+            str: Download-Link, wenn das Asset aktiv ist, sonst None
+        """
+        assets = self._call('assets', self.client.assets, item['item_type'], item['id'])
+        if asset_type not in assets:
+            raise KeyError(f"Asset {asset_type} nicht verfügbar für {item['id']}")
+        
+        asset = assets[asset_type]
+        if asset.get('status') == 'active' and asset.get('location'):
+            return asset['location']
+        if asset.get('status') == 'inactive':
+            self._call('activate', self.client.activate, asset)
+        return None
+    
+    def _download(self, item, location, target, clip):
+        """
+        Lädt ein aktives Asset und schneidet es optional auf die AOI zu
+        
+        Args:
+            item (dict): Item aus search()
+            location (str): Download-Link
+            target (Path): Zieldatei im Cache
+            clip (dict): AOI oder None
+        
+        Returns:
+            int: Größe der Datei im Cache in Bytes
+        """
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if clip is None:
+            return self._call('download', self.client.download, location, target)
+        
+        raw = target.with_name(target.stem + '.raw.tif')
+        self._call('download', self.client.download, location, raw)
+        try:
+            clip_to_aoi(raw, target, clip)
+        finally:
+            raw.unlink(missing_ok=True)
+        return target.stat().st_size
+    
+    def fetch(self, items, asset_type=ASSET_TYPE, clip=None, timeout=ACTIVATION_TIMEOUT):
+        """
+        Stellt die Szenen lokal bereit (Cache, sonst Aktivierung und Download)
+        
+        Args:
+            items (list): Items aus search()
+            asset_type (str): Asset-Typ
+            clip (dict, optional): AOI in WGS84, auf die jede Szene zugeschnitten wird
+            timeout (float): Maximale Wartezeit auf die Aktivierung in Sekunden
+        
+        Returns:
+            list: Items mit zusätzlichem 'path' (nur erfolgreich bereitgestellte)
+        """
+        ready, missing = {}, []
+        for item in items:
+            target = self._scene_file(item, asset_type, clip)
+            if target.exists():
+                ready[item['id']] = target
+            else:
+                missing.append(item)
+        
+        if missing:
+            ready.update(self._activate_and_download(missing, asset_type, clip, timeout))
+        
+        # LRU: zuletzt genutzte Szenen bleiben im Cache
+        now = time.time()
+        with self.lock:
+            for target in ready.values():
+                key = str(target.relative_to(self.scene_path))
+                self.index['scenes'][key] = {'size': target.stat().st_size, 'last_used': now}
+        self._evict(keep={str(target.relative_to(self.scene_path)) for target in ready.values()})
+        self._save_index()
+        
+        return [{**item, 'path': str(ready[item['id']])} for item in items if item['id'] in ready]
+    
+    def _activate_and_download(self, items, asset_type, clip, timeout):
+        """
+        Aktiviert Assets gleichzeitig und lädt sie, sobald sie aktiv sind
+        
+        Statusabfragen und Downloads laufen im Thread-Pool, die Schleife wartet nur
+        auf das nächste fertige Ergebnis oder den nächsten fälligen Poll.
+        
+        Args:
+            items (list): Items ohne lokale Szene
+            asset_type (str): Asset-Typ
+            clip (dict): AOI oder None
+            timeout (float): Maximale Wartezeit auf die Aktivierung in Sekunden
+        
+        Returns:
+            dict: Item-ID -> Pfad der Szene
+        """
+        ready = {}
+        deadline = time.monotonic() + timeout
+        # Item-ID -> (nächster Poll, aktuelles Intervall)
+        schedule = {item['id']: (time.monotonic(), POLL_INTERVAL) for item in items}
+        by_id = {item['id']: item for item in items}
+        polls, downloads = {}, {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while schedule or polls or downloads:
+                now = time.monotonic()
+                for item_id, (due, interval) in list(schedule.items()):
+                    if now >= deadline:
+                        self.console.print(f"[yellow]Warnung: Aktivierung von {item_id} nicht rechtzeitig abgeschlossen[/yellow]")
+                        del schedule[item_id]
+                    elif due <= now:
+                        del schedule[item_id]
+                        polls[executor.submit(self._activate, by_id[item_id], asset_type)] = (item_id, interval)
+                
+                if not polls and not downloads:
+                    if schedule:
+                        time.sleep(max(min(due for due, _ in schedule.values()) - time.monotonic(), 0))
+                    continue
+                
+                next_due = min((due for due, _ in schedule.values()), default=None)
+                done, _ = wait(list(polls) + list(downloads), timeout=None if next_due is None else max(next_due - now, 0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in polls:
+                        item_id, interval = polls.pop(future)
+                        try:
+                            location = future.result()
+                        except Exception as e:
+                            self.console.print(f"[red]Fehler bei der Aktivierung von {item_id}: {str(e)}[/red]")
+                            continue
+                        if location:
+                            target = self._scene_file(by_id[item_id], asset_type, clip)
+                            downloads[executor.submit(self._download, by_id[item_id], location, target, clip)] = (item_id, target)
+                        else:
+                            schedule[item_id] = (time.monotonic() + interval, min(interval * 2, POLL_INTERVAL_MAX))
+                    else:
+                        item_id, target = downloads.pop(future)
+                        try:
+                            future.result()
+                            ready[item_id] = target
+                        except Exception as e:
+                            self.console.print(f"[red]Fehler beim Download von {item_id}: {str(e)}[/red]")
+        
+        return ready
+    
+    def _evict(self, keep=()):
+        """
+        Löscht die am längsten nicht genutzten Szenen, bis der Cache unter dem Limit liegt
+        
+        Args:
+            keep (set): Szenen, die nicht gelöscht werden (aktuell angefordert)
+        """
+        with self.lock:
+            scenes = self.index['scenes']
+            for key in [key for key in scenes if not (self.scene_path / key).exists()]:
+                del scenes[key]
+            
+            total = sum(entry['size'] for entry in scenes.values())
+            for key in sorted(scenes, key=lambda key: scenes[key]['last_used']):
+                if total <= self.cache_limit:
+                    break
+                if key in keep:
+                    continue
+                (self.scene_path / key).unlink(missing_ok=True)
+                total -= scenes.pop(key)['size']
+            
+            if total > self.cache_limit:
+                self.console.print(f"[yellow]Warnung: Angeforderte Szenen ({total / 1024 ** 3:.1f} GB) überschreiten das Cache-Limit[/yellow]")
+    
+    def get_scenes(self, geometry, start_date=None, end_date=None, item_type=ITEM_TYPE, asset_type=ASSET_TYPE,
+                   cloud_cover=0.1, extra_filters=None, days=7, clip=None):
+        """
+        Sucht Szenen und stellt sie lokal bereit
+        
+        Args:
+            geometry (dict): GeoJSON-Geometrie der Suche in WGS84
+            start_date (str, optional): Startdatum im Format YYYY-MM-DD
+            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            item_type (str): Item-Typ
+            asset_type (str): Asset-Typ
+            cloud_cover (float): Maximale Wolkenbedeckung (0-1)
+            extra_filters (list, optional): Weitere Filter im API-Format
+            days (int): Länge des Zeitraums, wenn kein Startdatum angegeben ist
+            clip (dict, optional): AOI, auf die jede Szene zugeschnitten wird
+        
+        Returns:
+            list: Items mit id, acquired, properties und path
+        """
+        items = self.search(geometry, start_date, end_date, item_type, cloud_cover, extra_filters, days)
+        return self.fetch(items, asset_type, clip)
\ No newline at end of file
@@ -0,0 +1,396 @@
+import json
+import threading
+import time
+import hashlib
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import numpy as np
+from rich import print as rprint
+
+API_PREFIX = '/data/v1'
+
+# (Aufrufe, Sekunden) je Endpunkt wie in planet_assets.RATE_LIMITS
+STUB_LIMITS = {'search': (10, 1), 'assets': (10, 1), 'activate': (5, 1), 'download': (15, 1)}
+
+# Ausdehnung einer Szene in Grad um den Mittelpunkt der Suchgeometrie
+SCENE_EXTENT = 0.05
+SCENE_SIZE = 512
+
+def _centroid(geometry):
+    """
+    Mittelpunkt der Koordinaten einer GeoJSON-Geometrie
+    
+    Args:
+        geometry (dict): GeoJSON-Geometrie
+    """
+    coordinates = np.array(geometry['coordinates'], dtype=float).reshape(-1, 2)
+    return float(coordinates[:, 0].mean()), float(coordinates[:, 1].mean())
+
+def _parse_time(value):
+    """
+    ISO-Zeitstempel der API (mit Z) als datetime
+    
+    Args:
+        value (str): Zeitstempel
+    """
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _matches(search_filter, item):
+    """
+    Prüft einen Filter der Data API gegen ein Item (And, DateRange, Range, Geometry)
+    
+    Args:
+        search_filter (dict): Filter im API-Format
+        item (dict): Feature des Stubs
+    """
+    kind, config = search_filter['type'], search_filter.get('config')
+    if kind == 'AndFilter':
+        return all(_matches(child, item) for child in config)
+    if kind == 'OrFilter':
+        return any(_matches(child, item) for child in config)
+    # Szenen liegen immer um den Mittelpunkt der Suchgeometrie
+    if kind == 'GeometryFilter':
+        return True
+    
+    value = item['properties'].get(search_filter['field_name'])
+    if value is None:
+        return False
+    if kind == 'DateRangeFilter':
+        value = _parse_time(value)
+        config = {key: _parse_time(bound) for key, bound in config.items()}
+    checks = {'gte': value.__ge__, 'gt': value.__gt__, 'lte': value.__le__, 'lt': value.__lt__}
+    return all(checks[key](bound) for key, bound in config.items() if key in checks)
+
+class PlanetStubState:
+    def __init__(self, activation_delay=2.0, latency=0.0, enforce_limits=True, scenes_per_day=1, page_size=250):
+        """
+        Zustand des Stubs: deterministische Szenen, Aktivierung mit Verzögerung, Rate Limits
+        
+        Jede Suche liefert je Tag scenes_per_day Szenen um den Mittelpunkt der
+        Suchgeometrie. Wolkenbedeckung und Sonnenhöhe wechseln je Tag, damit
+        Filter (z.B. Nachtaufnahmen) greifen. Assets sind zunächst inaktiv und
+        werden activation_delay Sekunden nach der Aktivierung aktiv.
+        
+        Args:
+            activation_delay (float): Sekunden bis ein Asset aktiv ist
+            latency (float): Künstliche Antwortzeit in Sekunden
+            enforce_limits (bool): HTTP 429 bei Überschreitung der Rate Limits
+            scenes_per_day (int): Szenen je Tag und Suche
+            page_size (int): Features je Seite der Quick Search
+        """
+        self.activation_delay = activation_delay
+        self.latency = latency
+        self.enforce_limits = enforce_limits
+        self.scenes_per_day = scenes_per_day
+        self.page_size = page_size
+        self.items = {}
+        self.activations = {}
+        self.pages = {}
+        self.calls = {endpoint: deque() for endpoint in STUB_LIMITS}
+        self.request_count = {endpoint: 0 for endpoint in STUB_LIMITS}
+        self.lock = threading.Lock()
+    
+    def allow(self, endpoint):
+        """
+        Prüft das Rate Limit eines Endpunkts (gleitendes Fenster)
+        
+        Args:
+            endpoint (str): search, assets, activate oder download
+        
+        Returns:
+            float: 0 wenn erlaubt, sonst Sekunden bis im Fenster wieder Platz ist
+        """
+        calls, period = STUB_LIMITS[endpoint]
+        with self.lock:
+            now = time.monotonic()
+            window = self.calls[endpoint]
+            while window and now - window[0] >= period:
+                window.popleft()
+            self.request_count[endpoint] += 1
+            if self.enforce_limits and len(window) >= calls:
+                return period - (now - window[0])
+            window.append(now)
+            return 0.0
+    
+    def search(self, item_types, search_filter):
+        """
+        Szenen zu einer Suche
+        
+        Args:
+            item_types (list): Item-Typen
+            search_filter (dict): Filter im API-Format
+        """
+        filters = search_filter['config'] if search_filter['type'] == 'AndFilter' else [search_filter]
+        geometry = next(f['config'] for f in filters if f['type'] == 'GeometryFilter')
+        dates = next(f['config'] for f in filters if f['type'] == 'DateRangeFilter')
+        lon, lat = _centroid(geometry)
+        tag = hashlib.sha1(f"{lon:.5f},{lat:.5f}".encode('utf-8')).hexdigest()[:6]
+        
+        features = []
+        day = _parse_time(dates['gte']).replace(hour=0, minute=0, second=0, microsecond=0)
+        end = _parse_time(dates['lte'])
+        while day <= end:
+            for n in range(self.scenes_per_day):
+                acquired = day + timedelta(hours=2 + n * 12)
+                ordinal = acquired.toordinal()
+                item_id = f"{acquired:%Y%m%d_%H%M%S}_{tag}"
+                feature = {
+                    'id': item_id,
+                    'type': 'Feature',
+                    'geometry': {'type': 'Polygon', 'coordinates': [[
+                        [lon - SCENE_EXTENT, lat - SCENE_EXTENT], [lon + SCENE_EXTENT, lat - SCENE_EXTENT],
+                        [lon + SCENE_EXTENT, lat + SCENE_EXTENT], [lon - SCENE_EXTENT, lat + SCENE_EXTENT],
+                        [lon - SCENE_EXTENT, lat - SCENE_EXTENT]
+                    ]]},
+                    'properties': {
+                        'item_type': item_types[0],
+                        'acquired': acquired.strftime('%Y-%m-%dT%H:%M:%S.000000Z'),
+                        'cloud_cover': (ordinal * 7 % 20) / 100,
+                        'sun_elevation': -25.0 if ordinal % 2 == 0 else 35.0
+                    }
+                }
+                if _matches(search_filter, feature):
+                    features.append(feature)
+                    with self.lock:
+                        self.items[item_id] = (lon, lat)
+            day += timedelta(days=1)
+        return features
+    
+    def asset_status(self, item_id, asset_type):
+        """
+        Status eines Assets (inactive, activating oder active)
+        
+        Args:
+            item_id (str): Item-ID
+            asset_type (str): Asset-Typ
+        """
+        started = self.activations.get((item_id, asset_type))
+        if started is None:
+            return 'inactive'
+        return 'active' if time.monotonic() - started >= self.activation_delay else 'activating'
+    
+    def activate(self, item_id, asset_type):
+        """
+        Startet die Aktivierung (wiederholte Aufrufe ändern nichts)
+        
+        Args:
+            item_id (str): Item-ID
+            asset_type (str): Asset-Typ
+        """
+        with self.lock:
+            self.activations.setdefault((item_id, asset_type), time.monotonic())
+    
+    def scene(self, item_id):
+        """
+        Synthetisches GeoTIFF einer Szene (uint8, ein Band, EPSG:4326)
+        
+        Helle Rechtecke auf verrauschtem Hintergrund, deterministisch je Item.
+        
+        Args:
+            item_id (str): Item-ID
+        """
+        from rasterio.io import MemoryFile
+        from rasterio.transform import from_bounds
+        
+        lon, lat = self.items[item_id]
+        rng = np.random.default_rng(int(hashlib.sha1(item_id.encode('utf-8')).hexdigest()[:8], 16))
+        data = (rng.random((SCENE_SIZE, SCENE_SIZE)) * 100).astype(np.uint8)
+        for _ in range(200):
+            row, col = rng.integers(0, SCENE_SIZE - 12, 2)
+            data[row:row + rng.integers(2, 12), col:col + rng.integers(2, 12)] = rng.integers(180, 255)
+        
+        transform = from_bounds(lon - SCENE_EXTENT, lat - SCENE_EXTENT, lon + SCENE_EXTENT, lat + SCENE_EXTENT, SCENE_SIZE, SCENE_SIZE)
+        with MemoryFile() as memfile:
+            with memfile.open(driver='GTiff', width=SCENE_SIZE, height=SCENE_SIZE, count=1, dtype='uint8',
+                              crs='EPSG:4326', transform=transform, nodata=0) as dst:
+                dst.write(data, 1)
+            return memfile.read()
+
+class PlanetStubRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        """
+        Keine Zugriffs-Logs auf der Konsole
+        """
+    
+    def _send(self, status, payload=None, body=None, content_type='application/json', headers=None):
+        """
+        Sendet eine JSON- oder Binärantwort
+        
+        Args:
+            status (int): HTTP-Status
+            payload (dict, optional): JSON-Body
+            body (bytes, optional): Binärer Body
+            content_type (str): Content-Type
+            headers (dict, optional): Zusätzliche Header
+        """
+        if body is None:
+            body = json.dumps(payload or {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _limited(self, endpoint):
+        """
+        Antwortet mit HTTP 429, wenn das Rate Limit überschritten ist
+        
+        Args:
+            endpoint (str): Endpunkt
+        """
+        retry_after = self.server.state.allow(endpoint)
+        if retry_after:
+            self._send(429, {'message': 'Too Many Requests'}, headers={'Retry-After': str(int(retry_after) + 1)})
+            return True
+        return False
+    
+    def _route(self, method):
+        """
+        quick-search (POST, GET mit _page), Assets, Aktivierung und Download
+        
+        Args:
+            method (str): GET oder POST
+        """
+        state = self.server.state
+        base = f"http://{self.headers.get('Host')}{API_PREFIX}"
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path[len(API_PREFIX):].strip('/').split('/') if url.path.startswith(API_PREFIX) else []
+        
+        if state.latency:
+            time.sleep(state.latency)
+        
+        if parts == ['quick-search']:
+            if self._limited('search'):
+                return
+            if method == 'POST':
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                features = state.search(request['item_types'], request['filter'])
+            else:
+                features = state.pages.pop(params.get('_page'), [])
+            page_size = int(params.get('_page_size', state.page_size))
+            links = {}
+            if len(features) > page_size:
+                token = hashlib.sha1(f"{time.time()}{id(features)}".encode('utf-8')).hexdigest()[:12]
+                state.pages[token] = features[page_size:]
+                links['_next'] = f"{base}/quick-search?_page={token}&_page_size={page_size}"
+            return self._send(200, {'type': 'FeatureCollection', 'features': features[:page_size], '_links': links})
+        
+        if len(parts) == 5 and parts[0] == 'item-types' and parts[2] == 'items' and parts[4] == 'assets' and method == 'GET':
+            if self._limited('assets'):
+                return
+            item_id = parts[3]
+            if item_id not in state.items:
+                return self._send(404, {'message': 'item not found'})
+            assets = {}
+            for asset_type in ('analytic', 'visual'):
+                status = state.asset_status(item_id, asset_type)
+                asset = {
+                    'type': asset_type,
+                    'status': status,
+                    '_links': {'activate': f"{base}/assets/{item_id}/{asset_type}/activate"}
+                }
+                if status == 'active':
+                    asset['location'] = f"{base}/download/{item_id}/{asset_type}"
+                assets[asset_type] = asset
+            return self._send(200, assets)
+        
+        if len(parts) == 4 and parts[0] == 'assets' and parts[3] == 'activate':
+            if self._limited('activate'):
+                return
+            if parts[1] not in state.items:
+                return self._send(404, {'message': 'item not found'})
+            state.activate(parts[1], parts[2])
+            return self._send(202, {})
+        
+        if len(parts) == 3 and parts[0] == 'download' and method == 'GET':
+            if self._limited('download'):
+                return
+            if parts[1] not in state.items or state.asset_status(parts[1], parts[2]) != 'active':
+                return self._send(404, {'message': 'asset not active'})
+            return self._send(200, body=state.scene(parts[1]), content_type='image/tiff')
+        
+        self._send(404, {'message': 'not found'})
+    
+    def do_GET(self):
+        self._route('GET')
+    
+    def do_POST(self):
+        self._route('POST')
+
+class PlanetStubServer:
+    def __init__(self, host='127.0.0.1', port=0, **state_kwargs):
+        """
+        Lokaler Stub der Planet Data API (für Tests und Offline-Läufe)
+        
+        Args:
+            host (str): Host
+            port (int): Port (0 = freier Port)
+            **state_kwargs: Parameter für PlanetStubState (activation_delay, latency, enforce_limits, scenes_per_day, page_size)
+        """
+        self.server = ThreadingHTTPServer((host, port), PlanetStubRequestHandler)
+        self.server.daemon_threads = True
+        self.server.state = PlanetStubState(**state_kwargs)
+        self.thread = None
+    
+    @property
+    def url(self):
+        """
+        Basis-URL der Data API des Servers
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+    
+    @property
+    def state(self):
+        """
+        Zustand (Szenen, Aktivierungen, Anzahl Requests)
+        """
+        return self.server.state
+    
+    def start(self):
+        """
+        Startet den Server in einem Hintergrund-Thread
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """
+        Beendet den Server
+        """
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Lokaler Stub-Server für die Planet Data API')
+    parser.add_argument('--port', type=int, default=8766, help='Port')
+    parser.add_argument('--activation-delay', type=float, default=10.0, help='Sekunden bis ein Asset aktiv ist')
+    parser.add_argument('--latency', type=float, default=0.1, help='Künstliche Antwortzeit in Sekunden')
+    
+    args = parser.parse_args()
+    
+    try:
+        server = PlanetStubServer(port=args.port, activation_delay=args.activation_delay, latency=args.latency)
+        rprint(f"[green]Stub-Server läuft auf {server.url} (Strg+C beendet)[/green]")
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import deque
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after):
+        """
+        HTTP 429 einer API
+        
+        Args:
+            retry_after (float): Empfohlene Wartezeit in Sekunden
+        """
+        super().__init__(f"Rate Limit überschritten, erneut in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class RateLimiter:
+    def __init__(self, calls, period):
+        """
+        Thread-sicherer Rate Limiter mit gleitendem Fenster
+        
+        Höchstens `calls` Aufrufe pro `period` Sekunden. Worker-Threads rufen vor
+        jedem Request acquire() auf und warten, bis im Fenster wieder Platz ist.
+        
+        Args:
+            calls (int): Erlaubte Aufrufe pro Fenster
+            period (float): Fensterlänge in Sekunden
+        """
+        self.calls = calls
+        self.period = period
+        self.timestamps = deque()
+        self.lock = threading.Lock()
+        self.blocked_until = 0.0
+    
+    def acquire(self):
+        """
+        Blockiert, bis ein weiterer Aufruf erlaubt ist
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.timestamps and now - self.timestamps[0] >= self.period:
+                    self.timestamps.popleft()
+                
+                wait = self.blocked_until - now
+                if wait <= 0 and len(self.timestamps) < self.calls:
+                    self.timestamps.append(now)
+                    return
+                if wait <= 0:
+                    wait = self.period - (now - self.timestamps[0])
+            time.sleep(wait)
+    
+    def backoff(self, seconds):
+        """
+        Sperrt alle Aufrufe für eine Weile (z.B. nach HTTP 429 mit Retry-After)
+        
+        Args:
+            seconds (float): Wartezeit in Sekunden
+        """
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
\ No newline at end of file
@@ -0,0 +1,368 @@
+import numpy as np
+import pandas as pd
+import json
+from pathlib import Path
+import argparse
+import sys
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common.market_data_loader import MarketDataLoader
+from common.rolling_stats import RollingStats
+
+REGIME_DATA_PATH = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/regime_data")
+
+# Regime-Codes: 1 = oberhalb des Bands, -1 = unterhalb, 0 = innerhalb
+VIX_REGIMES = {1: "Risk-Off (Hohe Volatilität)", 0: "Neutral", -1: "Risk-On (Niedrige Volatilität)"}
+GOLD_REGIMES = {1: "Starkes Safe-Haven-Verhalten", 0: "Neutrales Verhalten", -1: "Schwaches Safe-Haven-Verhalten"}
+
+# Asset -> (Yahoo Finance Symbol, Regime-Bezeichnungen)
+ASSETS = {'vix': ('^VIX', VIX_REGIMES), 'gold': ('GC=F', GOLD_REGIMES)}
+
+BAND_WINDOW = 20
+BAND_WIDTH = 1.0
+HISTORY_START = '2000-01-01'
+
+def classify_bands(values, mean, std, width=BAND_WIDTH):
+    """
+    Klassifiziert jeden Wert gegen das Band Mittelwert ± width · Standardabweichung
+    
+    Args:
+        values (array-like): Werte
+        mean (array-like): Gleitender Mittelwert
+        std (array-like): Gleitende Standardabweichung
+        width (float): Breite des Bands in Standardabweichungen
+    
+    Returns:
+        np.ndarray: Codes 1, 0, -1 (NaN, solange das Band noch nicht definiert ist)
+    """
+    values, mean, std = (np.asarray(x, dtype=float) for x in (values, mean, std))
+    codes = np.where(values > mean + width * std, 1.0, np.where(values < mean - width * std, -1.0, 0.0))
+    codes[~np.isfinite(values + mean + std)] = np.nan
+    return codes
+
+def band_regime(series, window=BAND_WINDOW, width=BAND_WIDTH):
+    """
+    Gleitendes Band und Regime für eine ganze Zeitreihe in einem Durchlauf
+    
+    Args:
+        series (pd.Series): Werte (nur beobachtete Tage)
+        window (int): Fenstergröße des Bands
+        width (float): Breite des Bands in Standardabweichungen
+    
+    Returns:
+        pd.DataFrame: Spalten value, mean, std, regime
+    """
+    stats = RollingStats(series, [window])
+    frame = pd.DataFrame({
+        'value': series,
+        'mean': stats.mean()[window],
+        'std': stats.std()[window]
+    })
+    frame['regime'] = classify_bands(frame['value'], frame['mean'], frame['std'], width)
+    return frame
+
+def regime_runs(codes, carry=None):
+    """
+    Dauer des aktuellen Regimes an jedem Datum (1 = erster Tag eines Regimes)
+    
+    Args:
+        codes (pd.Series): Regime-Codes
+        carry (tuple, optional): (Code, Dauer) am Datum vor der Reihe, setzt einen Lauf fort
+    """
+    run_id = codes.ne(codes.shift()).cumsum()
+    runs = (codes.groupby(run_id).cumcount() + 1).astype(float)
+    if carry is not None and len(codes) and codes.iloc[0] == carry[0]:
+        runs[run_id == run_id.iloc[0]] += carry[1]
+    runs[codes.isna()] = np.nan
+    return runs
+
+def transition_matrix(codes, normalize=True):
+    """
+    Übergänge zwischen Regimen von einem Datum zum nächsten
+    
+    Args:
+        codes (pd.Series): Regime-Codes
+        normalize (bool): Zeilen als Wahrscheinlichkeiten statt Anzahlen
+    
+    Returns:
+        pd.DataFrame: Zeilen = Regime vorher, Spalten = Regime nachher (-1, 0, 1)
+    """
+    codes = codes.dropna().astype(int).to_numpy()
+    counts = np.zeros((3, 3))
+    np.add.at(counts, (codes[:-1] + 1, codes[1:] + 1), 1)
+    
+    if normalize:
+        totals = counts.sum(axis=1, keepdims=True)
+        counts = np.divide(counts, totals, out=np.full_like(counts, np.nan), where=totals > 0)
+    
+    levels = [-1, 0, 1]
+    return pd.DataFrame(counts, index=pd.Index(levels, name='from'), columns=pd.Index(levels, name='to'))
+
+def regime_statistics(codes, labels):
+    """
+    Anteil, Anzahl und Dauer der Regime-Phasen sowie Persistenz aus der Übergangsmatrix
+    
+    Args:
+        codes (pd.Series): Regime-Codes
+        labels (dict): Code -> Bezeichnung
+    
+    Returns:
+        pd.DataFrame: Eine Zeile je Regime
+    """
+    codes = codes.dropna().astype(int)
+    spells = codes.groupby(codes.ne(codes.shift()).cumsum()).agg(['first', 'size'])
+    lengths = spells.groupby('first')['size']
+    persistence = np.diag(transition_matrix(codes).to_numpy())
+    
+    stats = pd.DataFrame(index=pd.Index([-1, 0, 1], name='code'))
+    stats['regime'] = [labels[code] for code in stats.index]
+    stats['days'] = codes.value_counts().reindex(stats.index, fill_value=0)
+    stats['share'] = stats['days'] / max(len(codes), 1)
+    stats['spells'] = lengths.size().reindex(stats.index, fill_value=0)
+    stats['mean_duration'] = lengths.mean().reindex(stats.index)
+    stats['max_duration'] = lengths.max().reindex(stats.index)
+    stats['persistence'] = persistence
+    with np.errstate(divide='ignore'):
+        stats['expected_duration'] = 1 / (1 - persistence)
+    return stats.reset_index()
+
+def label_panel(values, window=BAND_WINDOW, width=BAND_WIDTH, start=None, carry=None):
+    """
+    Regime-Labels aller Assets für jedes Datum eines Panels
+    
+    Bänder werden je Asset auf dessen eigenen Handelstagen berechnet, an Tagen
+    ohne Beobachtung gilt das letzte Regime weiter.
+    
+    Args:
+        values (pd.DataFrame): Schlusskurse je Asset (Spalten wie ASSETS), NaN an Tagen ohne Beobachtung
+        window (int): Fenstergröße des Bands
+        width (float): Breite des Bands in Standardabweichungen
+        start (datetime, optional): Erstes Ausgabedatum, frühere Zeilen dienen nur als Kontext der Bänder
+        carry (dict, optional): Asset -> (Code, Dauer) am Datum vor start
+    
+    Returns:
+        pd.DataFrame: Je Asset Wert, Mittelwert, Standardabweichung, Regime und Dauer
+    """
+    carry = carry or {}
+    index = values.index if start is None else values.index[values.index >= start]
+    columns = {}
+    for asset in values.columns:
+        observed = values[asset].dropna()
+        bands = band_regime(observed, window, width).reindex(index)
+        
+        regime = bands['regime'].ffill()
+        if asset in carry:
+            regime = regime.fillna(carry[asset][0])
+        
+        columns[asset] = bands['value']
+        columns[f"{asset}_mean"] = bands['mean']
+        columns[f"{asset}_std"] = bands['std']
+        columns[f"{asset}_regime"] = regime
+        columns[f"{asset}_run"] = regime_runs(regime, carry.get(asset))
+    return pd.DataFrame(columns, index=index)
+
+class RegimeClassifier:
+    def __init__(self, data_path=None, loader=None, window=BAND_WINDOW, width=BAND_WIDTH, console=None):
+        """
+        Regime-Historie für VIX und Gold, inkrementell fortgeschrieben
+        
+        Jedes Datum wird vektorisiert gegen das gleitende Band klassifiziert
+        (gleiche Regel wie VIXDataFetcher.analyze_regime und
+        GoldDataFetcher.analyze_safe_haven). Bei neuen Bars werden nur die
+        letzten window - 1 Beobachtungen als Kontext neu gerechnet.
+        
+        Args:
+            data_path (str, optional): Ordner regime_data
+            loader (MarketDataLoader, optional): Quelle der täglichen Bars
+            window (int): Fenstergröße des Bands
+            width (float): Breite des Bands in Standardabweichungen
+            console (Console, optional): Rich Console für Meldungen
+        """
+        self.console = console or Console()
+        self.base_path = Path(data_path or REGIME_DATA_PATH) / "regimes"
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.labels_file = self.base_path / "regime_labels.csv"
+        self.meta_file = self.base_path / "_regime_meta.json"
+        self.loader = loader or MarketDataLoader(console=self.console)
+        self.window = window
+        self.width = width
+    
+    def _load_labels(self):
+        """
+        Lädt die gespeicherten Labels, verwirft sie bei geänderten Band-Parametern
+        """
+        if not self.labels_file.exists() or not self.meta_file.exists():
+            return None
+        with open(self.meta_file) as f:
+            meta = json.load(f)
+        if meta != {'window': self.window, 'width': self.width}:
+            return None
+        return pd.read_csv(self.labels_file, index_col='date', parse_dates=['date'])
+    
+    def _save_labels(self, labels):
+        """
+        Speichert Labels und Band-Parameter
+        
+        Args:
+            labels (pd.DataFrame): Labels je Datum
+        """
+        labels.to_csv(self.labels_file, index_label='date')
+        with open(self.meta_file, 'w') as f:
+            json.dump({'window': self.window, 'width': self.width}, f, indent=2)
+    
+    def _closes(self, start_date, end_date=None):
+        """
+        Schlusskurse aller Assets ab einem Datum
+        
+        Args:
+            start_date (str|datetime): Startdatum
+            end_date (str|datetime, optional): Enddatum (exklusiv)
+        """
+        history = self.loader.get_history([symbol for symbol, _ in ASSETS.values()], start_date, end_date)
+        return pd.DataFrame({asset: history[symbol]['Close'] for asset, (symbol, _) in ASSETS.items()}).sort_index()
+    
+    def update(self, start_date=None, end_date=None):
+        """
+        Schreibt die Labels bis zum letzten verfügbaren Bar fort
+        
+        Ohne gespeicherte Labels wird die ganze Historie ab start_date (Standard:
+        HISTORY_START) gerechnet, sonst ab dem letzten gespeicherten Datum. Der
+        letzte gespeicherte Tag wird neu gerechnet, da sein Bar unvollständig
+        gewesen sein kann.
+        
+        Args:
+            start_date (str, optional): Startdatum der ersten Berechnung
+            end_date (str, optional): Enddatum (exklusiv)
+        
+        Returns:
+            pd.DataFrame: Alle Labels
+        """
+        stored = self._load_labels()
+        if stored is None or stored.empty:
+            labels = label_panel(self._closes(start_date or HISTORY_START, end_date), self.window, self.width)
+            self._save_labels(labels)
+            return labels
+        
+        last_date = stored.index.max()
+        new_values = self._closes(last_date, end_date)
+        if new_values.empty:
+            return stored
+        
+        kept = stored[stored.index < last_date]
+        
+        # Kontext: die letzten window - 1 Beobachtungen je Asset vor den neuen Bars
+        context = pd.concat([kept[asset].dropna().iloc[-(self.window - 1):] for asset in ASSETS], axis=1)
+        values = pd.concat([context, new_values.reindex(columns=list(ASSETS))])
+        values = values[~values.index.duplicated(keep='last')].sort_index()
+        
+        # Regime und Dauer am letzten behaltenen Datum setzen die Läufe fort
+        carry = {}
+        if not kept.empty:
+            row = kept.iloc[-1]
+            carry = {asset: (row[f"{asset}_regime"], row[f"{asset}_run"]) for asset in ASSETS if pd.notna(row[f"{asset}_regime"])}
+        
+        fresh = label_panel(values, self.window, self.width, last_date, carry)
+        labels = pd.concat([kept, fresh])
+        self._save_labels(labels)
+        return labels
+    
+    def labels(self, start_date=None, end_date=None, named=False):
+        """
+        Gespeicherte Labels für einen Zeitraum
+        
+        Args:
+            start_date (str, optional): Startdatum
+            end_date (str, optional): Enddatum (inklusiv)
+            named (bool): Regime als Bezeichnung statt als Code
+        """
+        labels = self._load_labels()
+        if labels is None:
+            return pd.DataFrame()
+        labels = labels.loc[start_date:end_date]
+        if named:
+            labels = labels.copy()
+            for asset, (_, names) in ASSETS.items():
+                labels[f"{asset}_regime"] = labels[f"{asset}_regime"].map(names)
+        return labels
+    
+    def statistics(self, start_date=None, end_date=None):
+        """
+        Persistenz- und Übergangsstatistiken je Asset
+        
+        Args:
+            start_date (str, optional): Startdatum
+            end_date (str, optional): Enddatum (inklusiv)
+        
+        Returns:
+            tuple: Statistik je Asset und Regime, Übergangsmatrizen je Asset
+        """
+        labels = self.labels(start_date, end_date)
+        if labels.empty:
+            return pd.DataFrame(), {}
+        
+        stats, transitions = [], {}
+        for asset, (_, names) in ASSETS.items():
+            codes = labels[f"{asset}_regime"]
+            stats.append(regime_statistics(codes, names).assign(asset=asset))
+            transitions[asset] = transition_matrix(codes)
+        stats = pd.concat(stats, ignore_index=True)
+        stats.to_csv(self.base_path / "regime_statistics.csv", index=False)
+        return stats, transitions
+
+def main():
+    parser = argparse.ArgumentParser(description='Regime-Labels für VIX und Gold')
+    parser.add_argument('--start-date', help='Startdatum der ersten Berechnung (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--window', type=int, default=BAND_WINDOW, help='Fenstergröße des Bands')
+    parser.add_argument('--width', type=float, default=BAND_WIDTH, help='Breite des Bands in Standardabweichungen')
+    
+    args = parser.parse_args()
+    
+    try:
+        classifier = RegimeClassifier(window=args.window, width=args.width)
+        console = classifier.console
+        
+        with console.status("[bold blue]Aktualisiere Regime-Labels..."):
+            labels = classifier.update(args.start_date, args.end_date)
+            stats, transitions = classifier.statistics()
+        
+        if labels.empty:
+            console.print("[yellow]Keine Daten für die Regime-Labels verfügbar[/yellow]")
+            return
+        
+        # Erstelle eine schöne Zusammenfassung
+        table = Table(title="Regime Zusammenfassung")
+        table.add_column("Asset", style="cyan")
+        table.add_column("Regime", style="cyan")
+        table.add_column("Anteil", style="green")
+        table.add_column("Phasen", style="green")
+        table.add_column("Ø Dauer", style="green")
+        table.add_column("Persistenz", style="green")
+        
+        for _, row in stats.iterrows():
+            table.add_row(
+                row['asset'],
+                row['regime'],
+                f"{row['share']:.1%}",
+                str(int(row['spells'])),
+                f"{row['mean_duration']:.1f}",
+                f"{row['persistence']:.2f}"
+            )
+        
+        last = labels.iloc[-1]
+        for asset, (_, names) in ASSETS.items():
+            if pd.notna(last[f"{asset}_regime"]):
+                table.add_row(asset, f"Aktuell: {names[int(last[f'{asset}_regime'])]}", "", "", f"{last[f'{asset}_run']:.0f}", "")
+        table.add_row("Zeitraum", f"{labels.index.min().strftime('%Y-%m-%d')} bis {labels.index.max().strftime('%Y-%m-%d')}", "", "", "", "")
+        table.add_row("Speicherort", str(classifier.labels_file), "", "", "", "")
+        
+        console.print(table)
+    
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
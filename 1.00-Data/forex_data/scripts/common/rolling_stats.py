@@ -0,0 +1,432 @@
+import numpy as np
+import pandas as pd
+
+# Relative Rundungsgrenze für Momente aus Differenzen von Quadratsummen
+ROUNDING_TOLERANCE = 64 * np.finfo(float).eps
+
+# Blockgröße der Präfixsummen relativ zum größten Fenster
+BLOCK_FACTOR = 4
+MIN_BLOCK_SIZE = 1024
+
+def log_returns(prices):
+    """
+    Berechnet logarithmische Renditen
+    
+    Args:
+        prices (pd.Series|pd.DataFrame|np.ndarray): Preise (Zeit in der ersten Achse)
+    """
+    if isinstance(prices, (pd.Series, pd.DataFrame)):
+        return np.log(prices / prices.shift(1))
+    
+    prices = np.asarray(prices, dtype=float)
+    returns = np.full(prices.shape, np.nan)
+    returns[1:] = np.log(prices[1:] / prices[:-1])
+    return returns
+
+class RollingStats:
+    def __init__(self, panel, windows):
+        """
+        Initialisiert die Rolling-Statistik für ein 2-D Panel (Zeit × Spalten)
+        
+        Alle Fenster teilen sich dieselben Präfixsummen, so dass jede Statistik
+        in einem O(n) Durchlauf für alle Fenster berechnet wird. Die Präfixsummen
+        starten in jedem Block (mindestens das größte Fenster) neu und werden auf den
+        Blockmittelwert zentriert. Die beiden Blockteile eines Fensters werden
+        mit dem paarweisen Update nach Chan et al. kombiniert, der Fehler wächst
+        daher nicht mit der Länge der Reihe.
+        Wie bei pandas (min_periods=window) ist ein Fenster mit fehlenden Werten NaN.
+        
+        Args:
+            panel (pd.Series|pd.DataFrame|np.ndarray): Daten (Zeit in der ersten Achse)
+            windows (list): Liste von Fenstergrößen
+        """
+        self.windows = sorted(set(int(window) for window in windows))
+        
+        self._index = None
+        self._columns = None
+        self._name = None
+        self._kind = 'array'
+        
+        if isinstance(panel, pd.Series):
+            self._kind = 'series'
+            self._index = panel.index
+            self._name = panel.name
+            values = panel.to_numpy(dtype=float)[:, None]
+        elif isinstance(panel, pd.DataFrame):
+            self._kind = 'frame'
+            self._index = panel.index
+            self._columns = panel.columns
+            values = panel.to_numpy(dtype=float)
+        else:
+            values = np.asarray(panel, dtype=float)
+            if values.ndim == 1:
+                self._kind = 'vector'
+                values = values[:, None]
+        
+        self.values = values
+        self.valid = np.isfinite(values)
+        self._all_valid = bool(self.valid.all())
+        
+        # Blöcke mindestens so groß wie das größte Fenster, so dass jedes Fenster höchstens
+        # zwei Blöcke überspannt; größere Blöcke halten den Anteil geteilter Fenster klein
+        n_rows = values.shape[0]
+        self._block_size = max(BLOCK_FACTOR * self.windows[-1], MIN_BLOCK_SIZE) if self.windows else MIN_BLOCK_SIZE
+        self._n_blocks = max(-(-n_rows // self._block_size), 1)
+        self._block_id = np.arange(n_rows) // self._block_size
+        self._splits = {}
+        self._stats = {}
+        self._moments_cache = {}
+    
+    def _wrap(self, result):
+        """
+        Gibt das Ergebnis im Format der Eingabe zurück
+        
+        Args:
+            result (np.ndarray): Ergebnis (Zeit × Spalten)
+        """
+        if self._kind == 'series':
+            return pd.Series(result[:, 0], index=self._index, name=self._name)
+        if self._kind == 'frame':
+            return pd.DataFrame(result, index=self._index, columns=self._columns)
+        if self._kind == 'vector':
+            return result[:, 0]
+        return result
+    
+    def _empty(self):
+        """
+        Ergebnis ohne gültige Fenster
+        """
+        return np.full(self.values.shape, np.nan)
+    
+    def _block_center(self, values, valid):
+        """
+        Zentriert die Werte blockweise auf den Blockmittelwert (fehlende Werte als 0)
+        
+        Args:
+            values (np.ndarray): Werte (Zeit × Spalten)
+            valid (np.ndarray): Maske gültiger Werte
+        
+        Returns:
+            tuple: Zentrierte Werte und Blockmittelwert je Zeile (beide Zeit × Spalten)
+        """
+        starts = np.arange(0, values.shape[0], self._block_size)
+        filled = np.where(valid, values, 0.0)
+        totals = np.add.reduceat(filled, starts, axis=0)
+        counts = np.add.reduceat(valid.astype(float), starts, axis=0)
+        centers = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)[self._block_id]
+        return np.where(valid, values - centers, 0.0), centers
+    
+    def _bundle(self, values):
+        """
+        Blockweise Präfixsummen, aus denen jedes Fenster mit Slices zusammengesetzt wird
+        
+        Args:
+            values (np.ndarray): Zu summierende Werte (Zeit × Spalten)
+        
+        Returns:
+            dict: inklusive Präfixsumme, exklusive Präfixsumme und Blocksumme je Zeile
+        """
+        n_rows, n_cols = values.shape
+        padded = np.zeros((self._n_blocks * self._block_size, n_cols))
+        padded[:n_rows] = values
+        blocks = np.cumsum(padded.reshape(self._n_blocks, self._block_size, n_cols), axis=1)
+        inclusive = blocks.reshape(-1, n_cols)[:n_rows]
+        return {
+            'inclusive': inclusive,
+            'exclusive': inclusive - values,
+            'block_total': blocks[:, -1][self._block_id]
+        }
+    
+    def _split_rows(self, window):
+        """
+        Fenster, die eine Blockgrenze überspannen
+        
+        Da kein Fenster größer als ein Block ist, überspannt ein
+        Fenster höchstens zwei Blöcke: das Suffix des Startblocks (a) und das
+        Präfix des Endblocks (b). Zeile k steht für das Fenster, das in Zeile
+        k + window - 1 endet.
+        
+        Args:
+            window (int): Fenstergröße
+        """
+        if window not in self._splits:
+            starts = np.arange(self.values.shape[0] - window + 1)
+            self._splits[window] = np.flatnonzero(self._block_id[starts] != self._block_id[starts + window - 1])
+        return self._splits[window]
+    
+    def _part_a(self, bundle, window, split_rows):
+        """
+        Summe über das Blocksuffix (a) jedes Fensters, ohne Blockgrenze über das ganze Fenster
+        
+        Args:
+            bundle (dict): Ergebnis von _bundle
+            window (int): Fenstergröße
+            split_rows (np.ndarray): Ergebnis von _split_rows
+        """
+        length = self.values.shape[0] - window + 1
+        result = bundle['inclusive'][window - 1:] - bundle['exclusive'][:length]
+        if split_rows.size:
+            result[split_rows] = bundle['block_total'][split_rows] - bundle['exclusive'][split_rows]
+        return result
+    
+    def _part_b(self, bundle, window, split_rows):
+        """
+        Summe über das Blockpräfix (b) der Fenster, die eine Blockgrenze überspannen
+        
+        Args:
+            bundle (dict): Ergebnis von _bundle
+            window (int): Fenstergröße
+            split_rows (np.ndarray): Ergebnis von _split_rows
+        """
+        return bundle['inclusive'][split_rows + window - 1]
+    
+    def _counts(self, window, split_rows, count_bundle):
+        """
+        Anzahl gültiger Werte in beiden Fensterteilen
+        
+        Args:
+            window (int): Fenstergröße
+            split_rows (np.ndarray): Ergebnis von _split_rows
+            count_bundle (dict|None): Bundle der gültigen Werte (None = keine fehlenden Werte)
+        """
+        if count_bundle is not None:
+            return self._part_a(count_bundle, window, split_rows), self._part_b(count_bundle, window, split_rows)
+        
+        n_a = np.full((self.values.shape[0] - window + 1, 1), float(window))
+        n_a[split_rows, 0] = (split_rows // self._block_size + 1) * self._block_size - split_rows
+        return n_a, window - n_a[split_rows]
+    
+    def _prepare(self):
+        """
+        Berechnet die blockweisen Präfixsummen einmal für alle Fenster
+        """
+        if not self._stats:
+            centered, centers = self._block_center(self.values, self.valid)
+            self._stats = {
+                'n': None if self._all_valid else self._bundle(self.valid.astype(float)),
+                's1': self._bundle(centered),
+                's2': self._bundle(centered * centered),
+                'centers': centers
+            }
+        return self._stats
+    
+    def _finish(self, window, values, count_bundle=None, use_own_counts=True):
+        """
+        Schreibt die Fensterwerte in ein Ergebnis der vollen Länge und maskiert unvollständige Fenster
+        
+        Args:
+            window (int): Fenstergröße
+            values (np.ndarray): Werte für die Fenster, die in Zeile window-1 .. T-1 enden
+            count_bundle (dict, optional): Bundle der gültigen Werte
+            use_own_counts (bool, optional): Ohne count_bundle das der Eingabe verwenden
+        """
+        result = self._empty()
+        if count_bundle is None and use_own_counts:
+            count_bundle = self._prepare()['n']
+        if count_bundle is not None:
+            split_rows = self._split_rows(window)
+            n_a, n_b = self._counts(window, split_rows, count_bundle)
+            n_a[split_rows] += n_b
+            values = np.where(n_a == window, values, np.nan)
+        result[window - 1:] = values
+        return result
+    
+    def _mean_m2(self, window):
+        """
+        Mittelwert und Summe der quadrierten Abweichungen (M2) je Fenster
+        
+        Fenster über eine Blockgrenze werden aus beiden Teilen mit dem paarweisen
+        Update nach Chan et al. kombiniert, so dass nie große Präfixsummen
+        voneinander abgezogen werden.
+        
+        Args:
+            window (int): Fenstergröße
+        """
+        if window in self._moments_cache:
+            return self._moments_cache[window]
+        
+        stats = self._prepare()
+        length = self.values.shape[0] - window + 1
+        centers = stats['centers']
+        rows = self._split_rows(window)
+        
+        n_a, n_b = self._counts(window, rows, stats['n'])
+        s1_a = self._part_a(stats['s1'], window, rows)
+        s2_a = self._part_a(stats['s2'], window, rows)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_a = np.where(n_a > 0, 1.0 / n_a, 0.0)
+            m2 = s2_a
+            m2 -= s1_a * s1_a * inv_a
+            mean = s1_a
+            mean *= inv_a
+            mean += centers[:length]
+            # Größenordnung der subtrahierten Präfixsummen
+            scale = stats['s2']['inclusive'][window - 1:].copy()
+            
+            if rows.size:
+                s1_b = self._part_b(stats['s1'], window, rows)
+                s2_b = self._part_b(stats['s2'], window, rows)
+                inv_b = np.where(n_b > 0, 1.0 / n_b, 0.0)
+                total = n_a[rows] + n_b
+                delta = np.where(n_b > 0, centers[rows + window - 1] + s1_b * inv_b - mean[rows], 0.0)
+                m2[rows] += (s2_b - s1_b * s1_b * inv_b) + delta * delta * (n_a[rows] * n_b / total)
+                mean[rows] += delta * (n_b / total)
+                scale[rows] += stats['s2']['block_total'][rows]
+        
+        # Reste unterhalb der Rundungsgrenze der Präfixsummen sind exakt 0 (konstante Fenster)
+        m2[m2 <= ROUNDING_TOLERANCE * scale] = 0.0
+        
+        self._moments_cache[window] = (mean, m2)
+        return self._moments_cache[window]
+    
+    def mean(self):
+        """
+        Rollierender Mittelwert für alle Fenster
+        
+        Returns:
+            dict: Fenstergröße -> Mittelwert
+        """
+        results = {}
+        for window in self.windows:
+            if window > self.values.shape[0]:
+                results[window] = self._wrap(self._empty())
+                continue
+            mean, _ = self._mean_m2(window)
+            results[window] = self._wrap(self._finish(window, mean))
+        return results
+    
+    def std(self, ddof=1):
+        """
+        Rollierende Standardabweichung für alle Fenster
+        
+        Args:
+            ddof (int, optional): Freiheitsgrade-Korrektur (wie pandas: 1)
+        
+        Returns:
+            dict: Fenstergröße -> Standardabweichung
+        """
+        results = {}
+        for window in self.windows:
+            if window - ddof <= 0 or window > self.values.shape[0]:
+                results[window] = self._wrap(self._empty())
+                continue
+            _, m2 = self._mean_m2(window)
+            results[window] = self._wrap(self._finish(window, np.sqrt(m2 / (window - ddof))))
+        return results
+    
+    def _extreme(self, window, ufunc, fill):
+        """
+        Rollierendes Minimum/Maximum in O(n) (van Herk/Gil-Werman)
+        
+        Die Reihe wird in Blöcke der Fenstergröße zerlegt. Jedes Fenster setzt
+        sich aus dem Suffix eines Blocks und dem Präfix des nächsten zusammen.
+        
+        Args:
+            window (int): Fenstergröße
+            ufunc (np.ufunc): np.minimum oder np.maximum
+            fill (float): Neutrales Element für fehlende Werte
+        """
+        n_rows, n_cols = self.values.shape
+        if window > n_rows:
+            return self._empty()
+        
+        n_blocks = -(-n_rows // window)
+        padded = np.full((n_blocks * window, n_cols), fill)
+        padded[:n_rows] = self.values if self._all_valid else np.where(self.valid, self.values, fill)
+        blocks = padded.reshape(n_blocks, window, n_cols)
+        
+        prefix = ufunc.accumulate(blocks, axis=1).reshape(-1, n_cols)
+        suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n_cols)
+        
+        length = n_rows - window + 1
+        return self._finish(window, ufunc(suffix[:length], prefix[window - 1:n_rows]))
+    
+    def min(self):
+        """
+        Rollierendes Minimum für alle Fenster
+        
+        Returns:
+            dict: Fenstergröße -> Minimum
+        """
+        return {window: self._wrap(self._extreme(window, np.minimum, np.inf)) for window in self.windows}
+    
+    def max(self):
+        """
+        Rollierendes Maximum für alle Fenster
+        
+        Returns:
+            dict: Fenstergröße -> Maximum
+        """
+        return {window: self._wrap(self._extreme(window, np.maximum, -np.inf)) for window in self.windows}
+    
+    def corr(self, other):
+        """
+        Rollierende Korrelation jeder Spalte mit einer zweiten Reihe bzw. einem zweiten Panel
+        
+        Fenster, in denen eine der beiden Reihen fehlt, werden NaN (wie bei pandas).
+        
+        Args:
+            other (pd.Series|pd.DataFrame|np.ndarray): Reihe (wird auf alle Spalten
+                angewendet) oder Panel derselben Form, positionsgleich ausgerichtet
+        
+        Returns:
+            dict: Fenstergröße -> Korrelation
+        """
+        other = np.asarray(other, dtype=float)
+        if other.ndim == 1:
+            other = np.repeat(other[:, None], self.values.shape[1], axis=1)
+        
+        valid = self.valid & np.isfinite(other)
+        x, centers_x = self._block_center(self.values, valid)
+        y, centers_y = self._block_center(other, valid)
+        
+        count = None if valid.all() else self._bundle(valid.astype(float))
+        sx, sy = self._bundle(x), self._bundle(y)
+        sxx, syy, sxy = self._bundle(x * x), self._bundle(y * y), self._bundle(x * y)
+        
+        results = {}
+        for window in self.windows:
+            if window > self.values.shape[0]:
+                results[window] = self._wrap(self._empty())
+                continue
+            
+            length = self.values.shape[0] - window + 1
+            rows = self._split_rows(window)
+            n_a, n_b = self._counts(window, rows, count)
+            sx_a, sy_a = self._part_a(sx, window, rows), self._part_a(sy, window, rows)
+            sxx_a, syy_a = self._part_a(sxx, window, rows), self._part_a(syy, window, rows)
+            sxy_a = self._part_a(sxy, window, rows)
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                inv_a = np.where(n_a > 0, 1.0 / n_a, 0.0)
+                cov = sxy_a - sx_a * sy_a * inv_a
+                var_x = sxx_a - sx_a * sx_a * inv_a
+                var_y = syy_a - sy_a * sy_a * inv_a
+                scale_x = sxx['inclusive'][window - 1:].copy()
+                scale_y = syy['inclusive'][window - 1:].copy()
+                
+                if rows.size:
+                    end_rows = rows + window - 1
+                    sx_b, sy_b = self._part_b(sx, window, rows), self._part_b(sy, window, rows)
+                    sxx_b, syy_b = self._part_b(sxx, window, rows), self._part_b(syy, window, rows)
+                    sxy_b = self._part_b(sxy, window, rows)
+                    inv_b = np.where(n_b > 0, 1.0 / n_b, 0.0)
+                    weight = n_a[rows] * n_b / (n_a[rows] + n_b)
+                    inv_a_rows = inv_a[rows]
+                    dx = np.where(n_b > 0, (centers_x[end_rows] + sx_b * inv_b) - (centers_x[rows] + sx_a[rows] * inv_a_rows), 0.0)
+                    dy = np.where(n_b > 0, (centers_y[end_rows] + sy_b * inv_b) - (centers_y[rows] + sy_a[rows] * inv_a_rows), 0.0)
+                    
+                    cov[rows] += (sxy_b - sx_b * sy_b * inv_b) + dx * dy * weight
+                    var_x[rows] += (sxx_b - sx_b * sx_b * inv_b) + dx * dx * weight
+                    var_y[rows] += (syy_b - sy_b * sy_b * inv_b) + dy * dy * weight
+                    scale_x[rows] += sxx['block_total'][rows]
+                    scale_y[rows] += syy['block_total'][rows]
+                
+                var_x[var_x <= ROUNDING_TOLERANCE * scale_x] = 0.0
+                var_y[var_y <= ROUNDING_TOLERANCE * scale_y] = 0.0
+                corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+            
+            corr[(var_x <= 0) | (var_y <= 0)] = np.nan
+            results[window] = self._wrap(self._finish(window, corr, count, use_own_counts=False))
+        return results
\ No newline at end of file
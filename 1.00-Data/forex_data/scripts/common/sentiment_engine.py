@@ -0,0 +1,337 @@
+import numpy as np
+import pandas as pd
+import hashlib
+import os
+import re
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from rich.console import Console
+from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import find_tokens, EMOTICONS, PUNCTUATION, EOS
+
+CACHE_COLUMNS = ['hash', 'polarity', 'subjectivity']
+BATCH_SIZE = 5000
+PARALLEL_THRESHOLD = 20000
+
+# Zeichen, die find_tokens am Rand eines Tokens abtrennt
+LEADING_PUNCTUATION = tuple(PUNCTUATION.replace(".", ""))
+TRAILING_PUNCTUATION = tuple(PUNCTUATION)
+
+# "n't" wird abgetrennt, Anführungszeichen werden freigestellt (wie find_tokens)
+RE_SPLIT_QUOTES = re.compile("(?=n't)|([“”‘’'\"])")
+
+# Emoticons und "(!)" werden von TextBlob erst nach der Tokenisierung zusammengesetzt.
+# Texte, die so etwas enthalten könnten, werden direkt mit TextBlob bewertet.
+EMOTICON_STRINGS = sorted({emoticon for emoticons in EMOTICONS.values() for emoticon in emoticons})
+RE_EXACT_PATH = re.compile(
+    "(?=[" + re.escape("".join({char for emoticon in EMOTICON_STRINGS for char in (emoticon[0].lower(), emoticon[0].upper())} | {"("})) + "])(?:"
+    + "|".join(r"\s*".join(re.escape(char) for char in emoticon) for emoticon in EMOTICON_STRINGS)
+    + r"|\(\s*!\s*\))",
+    re.IGNORECASE
+)
+
+def content_hash(text):
+    """
+    Inhalts-Hash eines Textes (identische Texte haben identische Scores)
+    
+    Args:
+        text (str): Text
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class LexiconScorer:
+    def __init__(self):
+        """
+        Vektorisierter Sentiment-Scorer mit dem Lexikon und den Regeln von TextBlob (PatternAnalyzer)
+        
+        Ein Batch wird in ein flaches Token-Array zerlegt. TextBlob wertet die
+        Tokens sequentiell aus (Modifier wie "very" verstärken das nächste bekannte
+        Wort, Negationen kehren es um, "!" verstärkt). Dieser Zustand hängt nur
+        von den Tokens seit dem letzten bekannten Wort ab und wird daher
+        segmentweise mit kumulativen Array-Operationen berechnet.
+        """
+        words = dict(pattern_sentiment.items())
+        self.vocabulary = pd.Index(list(words))
+        scores = np.array([words[word][None] for word in self.vocabulary], dtype=float)
+        self.polarity, self.subjectivity, self.intensity = scores.T
+        self.is_modifier = np.array([any(pos in words[word] for pos in pattern_sentiment.modifiers) for word in self.vocabulary])
+        self.is_ly = np.array([word.endswith('ly') for word in self.vocabulary])
+        self.negations = set(pattern_sentiment.negations)
+        self.known_negations = [word for word in self.negations if word in words]
+        self._token_cache = {}
+    
+    def _split_token(self, token):
+        """
+        Endgültige Tokens eines Roh-Tokens (Satzzeichen am Rand abgetrennt, kleingeschrieben)
+        
+        Args:
+            token (str): Roh-Token nach Leerzeichen-Split
+        """
+        if token.startswith(LEADING_PUNCTUATION) or token.endswith(TRAILING_PUNCTUATION):
+            pieces = " ".join(find_tokens(token)).split()
+        else:
+            pieces = [token]
+        return [piece.lower() for piece in pieces if piece != EOS]
+    
+    def tokenize(self, texts):
+        """
+        Zerlegt einen Batch wie TextBlob in kleingeschriebene Tokens
+        
+        Ersetzungen und Zeilenumbrüche werden für den ganzen Batch vektorisiert
+        behandelt. Die Roh-Tokens werden faktorisiert, sodass Satzzeichen und
+        Kleinschreibung nur je eindeutigem Token (und über Batches hinweg
+        gecacht) aufgelöst werden.
+        
+        Args:
+            texts (pd.Series): Texte
+        
+        Returns:
+            tuple: Text-Position je Token, Token-Codes (beide np.ndarray) und Vokabular (pd.Index)
+        """
+        texts = texts.astype(str).str.replace(RE_SPLIT_QUOTES, r" \1 ", regex=True)
+        texts = texts.str.replace("\r\n", "\n", regex=False).str.replace(r"\n{2,}", f" {EOS} ", regex=True)
+        
+        raw = texts.reset_index(drop=True).str.split().explode().dropna()
+        raw_codes, raw_tokens = pd.factorize(raw)
+        
+        pieces = []
+        for token in raw_tokens:
+            if token not in self._token_cache:
+                self._token_cache[token] = self._split_token(token)
+            pieces.append(self._token_cache[token])
+        lengths = np.array([len(piece) for piece in pieces], dtype=np.int64)
+        flat_codes, vocabulary = pd.factorize(pd.Series([token for piece in pieces for token in piece], dtype=object))
+        starts = np.cumsum(lengths) - lengths
+        
+        # Roh-Tokens auf ihre endgültigen Tokens expandieren
+        counts = lengths[raw_codes]
+        offsets = np.cumsum(counts) - counts
+        position = np.arange(counts.sum()) + np.repeat(starts[raw_codes] - offsets, counts)
+        doc = np.repeat(raw.index.to_numpy(), counts)
+        return doc, flat_codes[position], pd.Index(vocabulary)
+    
+    def _score_tokens(self, doc, codes, vocabulary, n_texts):
+        """
+        Wertet die Tokens eines Batches aus (Regeln von Sentiment.assessments)
+        
+        Args:
+            doc (np.ndarray): Text-Position je Token (aufsteigend)
+            codes (np.ndarray): Token-Codes ins Vokabular
+            vocabulary (pd.Index): Kleingeschriebene eindeutige Tokens
+            n_texts (int): Anzahl Texte im Batch
+        
+        Returns:
+            np.ndarray: Polarität und Subjektivität je Text (n_texts × 2)
+        """
+        result = np.zeros((n_texts, 2))
+        if len(codes) == 0:
+            return result
+        
+        # Eigenschaften je Vokabel, danach per Code auf die Tokens verteilt
+        words = vocabulary.to_series()
+        lex = self.vocabulary.get_indexer(vocabulary)[codes]
+        known = lex >= 0
+        negation = words.isin(self.negations).to_numpy()[codes]
+        long1 = (words.str.strip("'").str.len() > 1).to_numpy()[codes]
+        long2 = (words.str.len() > 2).to_numpy()[codes]
+        exclamation = (vocabulary == "!")[codes]
+        
+        # Segment = bekanntes Wort (oder Textanfang) samt folgender unbekannter Wörter
+        text_start = np.r_[True, doc[1:] != doc[:-1]]
+        segment = np.cumsum(known | text_start) - 1
+        n_segments = segment[-1] + 1
+        head = np.flatnonzero(known | text_start)
+        head_known = known[head]
+        head_lex = np.where(head_known, lex[head], 0)
+        head_mod = head_known & self.is_modifier[head_lex]
+        head_ly = head_mod & self.is_ly[head_lex]
+        
+        unknown = ~known
+        seg_ly = head_ly[segment]
+        seg_mod = head_mod[segment]
+        position = np.arange(len(codes))
+        no_pos = len(codes)
+        
+        # Modifier endet am ersten langen unbekannten Wort (bei "-ly" Modifiern zählen Negationen nicht)
+        clears = unknown & long2 & ~(seg_ly & negation)
+        clear_pos = np.full(n_segments, no_pos)
+        np.minimum.at(clear_pos, segment[clears], position[clears])
+        m_end = head_mod & (clear_pos == no_pos)
+        
+        # Negationen nach einem aktiven "-ly" Modifier gehören zur laufenden Bewertung
+        consumed = unknown & negation & seg_ly & (position < clear_pos[segment])
+        consumption = np.bincount(segment[consumed], minlength=n_segments) > 0
+        
+        # Negation am Segmentende: letztes Ereignis (Negation setzt, langes Wort löscht)
+        region = ~seg_ly | (position >= clear_pos[segment])
+        events = unknown & region & (negation | long1)
+        last_event = np.full(n_segments, -1)
+        np.maximum.at(last_event, segment[events], position[events])
+        n_end = (last_event >= 0) & negation[np.maximum(last_event, 0)]
+        
+        # Zustand beim Eintritt in ein bekanntes Wort = Ende des vorherigen Segments im selben Text
+        k_tokens = np.flatnonzero(known)
+        if len(k_tokens) == 0:
+            return result
+        k_segment = segment[k_tokens]
+        k_lex = lex[k_tokens]
+        same_text = (k_segment > 0) & ~text_start[k_tokens]
+        previous = np.maximum(k_segment - 1, 0)
+        m_at = same_text & m_end[previous]
+        n_at = same_text & n_end[previous]
+        
+        intensity = self.intensity[k_lex]
+        i_eff = np.where(n_at, 1.0 / intensity, intensity)
+        prev_i = np.r_[1.0, i_eff[:-1]]
+        p = np.where(m_at, np.clip(self.polarity[k_lex] * prev_i, -1.0, 1.0), self.polarity[k_lex])
+        s = np.where(m_at, np.clip(self.subjectivity[k_lex] * prev_i, -1.0, 1.0), self.subjectivity[k_lex])
+        
+        # Bewertungen: Modifier-Ketten ergeben eine Bewertung mit den Werten des letzten Wortes
+        new = ~m_at
+        assessment = np.cumsum(new) - 1
+        n_assessments = assessment[-1] + 1 if len(assessment) else 0
+        last = np.r_[new[1:], True]
+        negated = np.bincount(assessment, weights=(n_at | consumption[k_segment]).astype(float), minlength=n_assessments) > 0
+        
+        boosts = np.bincount(segment[exclamation], minlength=n_segments)[k_segment[last]]
+        final_p = p[last]
+        for step in range(int(boosts.max(initial=0))):
+            final_p = np.where(boosts > step, np.clip(final_p * 1.25, -1.0, 1.0), final_p)
+        final_p = np.where(negated, final_p * -0.5, final_p)
+        final_s = s[last]
+        
+        assessment_doc = doc[k_tokens[last]]
+        counts = np.bincount(assessment_doc, minlength=n_texts)
+        with np.errstate(invalid='ignore'):
+            result[:, 0] = np.bincount(assessment_doc, weights=final_p, minlength=n_texts) / np.maximum(counts, 1)
+            result[:, 1] = np.bincount(assessment_doc, weights=final_s, minlength=n_texts) / np.maximum(counts, 1)
+        return result
+    
+    def score(self, texts):
+        """
+        Bewertet einen Batch von Texten
+        
+        Args:
+            texts (list|pd.Series): Texte
+        
+        Returns:
+            np.ndarray: Polarität und Subjektivität je Text (n × 2), identisch zu TextBlob(text).sentiment
+        """
+        texts = pd.Series(list(texts), dtype=object).fillna("").astype(str)
+        exact = texts.str.contains(RE_EXACT_PATH).to_numpy()
+        if self.known_negations:
+            exact |= texts.str.lower().str.contains("|".join(map(re.escape, self.known_negations))).to_numpy()
+        
+        result = np.zeros((len(texts), 2))
+        fast = np.flatnonzero(~exact)
+        if len(fast):
+            doc, codes, vocabulary = self.tokenize(texts.iloc[fast])
+            result[fast] = self._score_tokens(doc, codes, vocabulary, len(fast))
+        for position in np.flatnonzero(exact):
+            result[position] = tuple(TextBlob(texts.iloc[position]).sentiment)
+        return result
+
+_worker_scorer = None
+
+def _score_chunk(texts):
+    """
+    Bewertet einen Chunk in einem Worker-Prozess (Scorer wird je Prozess einmal aufgebaut)
+    
+    Args:
+        texts (list): Texte
+    """
+    global _worker_scorer
+    if _worker_scorer is None:
+        _worker_scorer = LexiconScorer()
+    return _worker_scorer.score(texts)
+
+class SentimentEngine:
+    def __init__(self, cache_path=None, batch_size=BATCH_SIZE, max_workers=None, console=None):
+        """
+        Bewertet Texte in Batches mit persistentem Cache nach Inhalts-Hash
+        
+        Identische Texte (Retweets, syndizierte Schlagzeilen) werden nur einmal
+        bewertet. Bekannte Hashes kommen aus dem Cache, neue Texte werden
+        vektorisiert bewertet, große Backfills auf mehrere Prozesse verteilt.
+        
+        Args:
+            cache_path (str, optional): Ordner des Score-Caches
+            batch_size (int): Texte pro Batch
+            max_workers (int, optional): Anzahl Prozesse für große Backfills (Standard: alle Kerne)
+            console (Console, optional): Rich Console für Warnungen
+        """
+        self.console = console or Console()
+        self.cache_path = Path(cache_path or "/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data/sentiment_cache")
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.cache_file = self.cache_path / "sentiment_scores.csv"
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count()
+        self.scorer = LexiconScorer()
+        self.cache = self._load_cache()
+    
+    def _load_cache(self):
+        """
+        Lädt die gespeicherten Scores (Hash -> Polarität, Subjektivität)
+        """
+        if not self.cache_file.exists():
+            return {}
+        
+        try:
+            cached = pd.read_csv(self.cache_file, dtype={'hash': str}, float_precision='round_trip').drop_duplicates('hash', keep='last')
+            return dict(zip(cached['hash'], zip(cached['polarity'], cached['subjectivity'])))
+        except Exception as e:
+            self.console.print(f"[yellow]Warnung: Sentiment-Cache nicht lesbar, starte leer: {str(e)}[/yellow]")
+            return {}
+    
+    def _score_missing(self, texts):
+        """
+        Bewertet noch unbekannte Texte, bei großen Mengen parallel
+        
+        Args:
+            texts (list): Texte
+        """
+        chunks = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(texts) >= PARALLEL_THRESHOLD and self.max_workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                return np.concatenate(list(executor.map(_score_chunk, chunks)))
+        return np.concatenate([self.scorer.score(chunk) for chunk in chunks])
+    
+    def score(self, texts):
+        """
+        Liefert Polarität und Subjektivität für beliebig viele Texte
+        
+        Args:
+            texts (list|pd.Series): Texte (None wird als leerer Text bewertet)
+        
+        Returns:
+            pd.DataFrame: Spalten polarity und subjectivity (Index wie die Eingabe bei pd.Series)
+        """
+        index = texts.index if isinstance(texts, pd.Series) else None
+        texts = pd.Series(list(texts), dtype=object).fillna("").astype(str)
+        hashes = texts.map(content_hash)
+        
+        unique = pd.unique(hashes)
+        missing = [digest for digest in unique if digest not in self.cache]
+        if missing:
+            first_text = dict(zip(hashes, texts))
+            scores = self._score_missing([first_text[digest] for digest in missing])
+            new = pd.DataFrame(dict(zip(CACHE_COLUMNS, (missing, scores[:, 0], scores[:, 1]))))
+            new.to_csv(self.cache_file, mode='a', header=not self.cache_file.exists(), index=False)
+            self.cache.update(zip(missing, zip(scores[:, 0], scores[:, 1])))
+        
+        values = np.array([self.cache[digest] for digest in hashes], dtype=float).reshape(-1, 2)
+        return pd.DataFrame(values, columns=CACHE_COLUMNS[1:], index=index)
+    
+    def analyze_sentiment(self, text):
+        """
+        Bewertet einen einzelnen Text
+        
+        Args:
+            text (str): Text
+        
+        Returns:
+            tuple: (polarity, subjectivity)
+        """
+        polarity, subjectivity = self.score([text]).iloc[0]
+        return polarity, subjectivity
\ No newline at end of file
@@ -0,0 +1,463 @@
+import numpy as np
+import pandas as pd
+import hashlib
+import json
+import re
+from pathlib import Path
+import argparse
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+SENTIMENT_DATA_PATH = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data")
+
+# Quelle -> (Dateimuster relativ zu sentiment_data, benötigte Spalten)
+SOURCES = {
+    'news': ("news_sentiment/store/*/*.csv", ['date', 'polarity']),
+    'twitter': ("social_media/twitter_sentiment_*.csv", ['date', 'sentiment_polarity', 'retweets', 'favorites']),
+    'reddit': ("social_media/reddit_sentiment_*.csv", ['date', 'sentiment_polarity', 'score']),
+    'retail': ("retail_sentiment/store/*/*.csv", ['date', 'long_percentage', 'short_percentage'])
+}
+
+# Quellen der kombinierten Spalte 'all' (Text-Sentiment, ohne Retail-Positionierung)
+TEXT_SOURCES = ['news', 'twitter', 'reddit']
+
+# Quellen mit Niveau statt Ereignissen: je Bucket gilt der letzte Schnappschuss, danach fortgeschrieben
+LEVEL_SOURCES = ['retail']
+
+FREQUENCIES = {'hourly': 'h', 'daily': 'D'}
+
+# Halbwertszeiten in Buckets für den schnellen und den langsamen EWMA
+HALFLIFES = {'hourly': (6, 24), 'daily': (3, 14)}
+
+# Suffiziente Statistiken je Bucket (additiv, daher O(neue Posts) Updates)
+STATS = ['volume', 'weight', 'weighted_polarity', 'weighted_polarity_sq']
+FEATURES = ['volume', 'engagement', 'polarity', 'dispersion', 'ewma', 'trend']
+
+BATCH_ROWS = 50000
+
+# Relative Varianz, unterhalb der die Dispersion als Rundungsrest gilt
+DISPERSION_TOLERANCE = 1e-12
+
+def symbol_from_path(source, path):
+    """
+    Symbol einer Rohdatei (News und Retail: Ordner im Store, News-Ordner = Suchanfrage)
+    
+    Args:
+        source (str): Quelle
+        path (Path): CSV-Datei
+    """
+    name = path.parent.name if source in ('news', 'retail') else path.stem.split('_')[2]
+    return re.sub(r'[^A-Z0-9]', '', name.upper())
+
+def item_frame(source, chunk):
+    """
+    Datum (UTC), Polarität und Engagement-Gewicht je Post
+    
+    Twitter gewichtet mit 1 + log(1 + Retweets + Favoriten), Reddit mit
+    1 + log(1 + Score). News zählen einfach, Retail-Polarität eines
+    Schnappschusses ist (Long % - Short %) / 100.
+    
+    Args:
+        source (str): Quelle
+        chunk (pd.DataFrame): Rohzeilen
+    """
+    if source == 'news':
+        polarity, weight = chunk['polarity'], 1.0
+    elif source == 'twitter':
+        polarity = chunk['sentiment_polarity']
+        weight = 1 + np.log1p(chunk['retweets'].fillna(0).clip(lower=0) + chunk['favorites'].fillna(0).clip(lower=0))
+    elif source == 'reddit':
+        polarity = chunk['sentiment_polarity']
+        weight = 1 + np.log1p(chunk['score'].fillna(0).clip(lower=0))
+    else:
+        polarity, weight = (chunk['long_percentage'] - chunk['short_percentage']) / 100, 1.0
+    
+    return pd.DataFrame({
+        'date': pd.to_datetime(chunk['date'], utc=True, format='mixed').dt.tz_localize(None),
+        'polarity': pd.to_numeric(polarity, errors='coerce'),
+        'weight': pd.Series(weight, index=chunk.index, dtype=float)
+    }).dropna()
+
+def bucket_stats(items, freq, level=False):
+    """
+    Summiert Posts zu suffizienten Statistiken je Zeit-Bucket
+    
+    Args:
+        items (pd.DataFrame): date, polarity, weight
+        freq (str): hourly oder daily
+        level (bool): Niveau-Quelle, nur der letzte Schnappschuss je Bucket zählt
+    
+    Returns:
+        pd.DataFrame: Bucket-Beginn -> STATS
+    """
+    if level:
+        items = items.sort_values('date', kind='stable')
+        items = items[~items['date'].dt.floor(FREQUENCIES[freq]).duplicated(keep='last')]
+    buckets = items['date'].dt.floor(FREQUENCIES[freq]).to_numpy()
+    weighted = items['weight'] * items['polarity']
+    return pd.DataFrame({
+        'volume': np.ones(len(items)),
+        'weight': items['weight'].to_numpy(),
+        'weighted_polarity': weighted.to_numpy(),
+        'weighted_polarity_sq': (weighted * items['polarity']).to_numpy()
+    }).groupby(buckets).sum()
+
+def fill_levels(stats):
+    """
+    Schreibt Niveaus in Buckets ohne neuen Schnappschuss fort
+    
+    Args:
+        stats (np.ndarray): Zeit × Spalten × STATS von Niveau-Quellen
+    """
+    present = stats[..., 0] > 0
+    last = np.maximum.accumulate(np.where(present, np.arange(stats.shape[0])[:, None], 0), axis=0)
+    return stats[last, np.arange(stats.shape[1])]
+
+def ewm_ratio(numerator, denominator, halflife):
+    """
+    EWMA eines gewichteten Mittels: EWMA(Σ w·p) / EWMA(Σ w)
+    
+    Leere Buckets tragen nichts bei, der Wert klingt dann mit dem Alter
+    der letzten Posts ab statt auf 0 zu fallen.
+    
+    Args:
+        numerator (np.ndarray): Zeit × Spalten
+        denominator (np.ndarray): Zeit × Spalten
+        halflife (float): Halbwertszeit in Buckets
+    """
+    numerator = pd.DataFrame(numerator).ewm(halflife=halflife).mean().to_numpy()
+    denominator = pd.DataFrame(denominator).ewm(halflife=halflife).mean().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return numerator / denominator
+
+def compute_features(stats, freq):
+    """
+    Features aus den Bucket-Statistiken, vektorisiert über alle Spalten
+    
+    Args:
+        stats (np.ndarray): Zeit × Spalten × STATS
+        freq (str): hourly oder daily
+    
+    Returns:
+        dict: Feature -> np.ndarray (Zeit × Spalten)
+    """
+    volume, weight, weighted_polarity, weighted_polarity_sq = (stats[..., i] for i in range(len(STATS)))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        polarity = weighted_polarity / weight
+        second_moment = weighted_polarity_sq / weight
+        variance = second_moment - polarity ** 2
+        # E[p²] - E[p]² löscht sich aus: Rundungsreste (und einzelne Posts) ergeben 0 statt ~1e-8
+        variance = np.where((variance <= DISPERSION_TOLERANCE * second_moment) | (volume == 1), 0.0, variance)
+        dispersion = np.sqrt(variance)
+    
+    fast, slow = (ewm_ratio(weighted_polarity, weight, halflife) for halflife in HALFLIFES[freq])
+    return {
+        'volume': volume,
+        'engagement': weight,
+        'polarity': polarity,
+        'dispersion': dispersion,
+        'ewma': fast,
+        'trend': fast - slow
+    }
+
+class SentimentFeatureAggregator:
+    def __init__(self, data_path=None, console=None):
+        """
+        Inkrementelle Sentiment-Features je Symbol, Quelle und Stunde bzw. Tag
+        
+        Rohe Posts (News-Store, Twitter, Reddit, Retail) werden zu additiven
+        Statistiken je Bucket verdichtet (Anzahl, Gewicht, Σ w·p, Σ w·p²) und als
+        ausgerichtetes Array Zeit × (Symbol, Quelle) × Statistik gespeichert.
+        Pro Datei wird ein Zeilen-Cursor gemerkt, ein Update liest nur neue Zeilen.
+        Features (gewichtete Polarität, Dispersion, EWMA-Trend) werden beim Abruf
+        vektorisiert aus den Statistiken berechnet.
+        
+        Args:
+            data_path (str, optional): Ordner sentiment_data
+            console (Console, optional): Rich Console für Warnungen
+        """
+        self.console = console or Console()
+        self.data_path = Path(data_path or SENTIMENT_DATA_PATH)
+        self.features_path = self.data_path / "features"
+        self.features_path.mkdir(parents=True, exist_ok=True)
+        self.meta_file = self.features_path / "_feature_meta.json"
+        
+        self.meta = self._load_meta()
+        self.keys = [tuple(key) for key in self.meta['keys']]
+        self.stats = {freq: self._load_stats(freq) for freq in FREQUENCIES}
+    
+    def _load_meta(self):
+        """
+        Lädt Ursprung je Frequenz, Spalten (Symbol, Quelle) und Datei-Cursor
+        """
+        if self.meta_file.exists():
+            with open(self.meta_file) as f:
+                return json.load(f)
+        return {'origin': {}, 'keys': [], 'files': {}}
+    
+    def _load_stats(self, freq):
+        """
+        Lädt das Statistik-Array einer Frequenz
+        
+        Args:
+            freq (str): hourly oder daily
+        """
+        stats_file = self.features_path / f"{freq}_stats.npy"
+        if stats_file.exists():
+            return np.load(stats_file)
+        return np.zeros((0, len(self.keys), len(STATS)))
+    
+    def save(self):
+        """
+        Speichert Statistik-Arrays und Metadaten
+        """
+        for freq, stats in self.stats.items():
+            np.save(self.features_path / f"{freq}_stats.npy", stats)
+        self.meta['keys'] = [list(key) for key in self.keys]
+        with open(self.meta_file, 'w') as f:
+            json.dump(self.meta, f, indent=2, sort_keys=True)
+    
+    def _key_index(self, symbol, source):
+        """
+        Spalte von (Symbol, Quelle), neue Spalten werden angehängt
+        
+        Args:
+            symbol (str): Symbol
+            source (str): Quelle
+        """
+        key = (symbol, source)
+        if key not in self.keys:
+            self.keys.append(key)
+            for freq, stats in self.stats.items():
+                self.stats[freq] = np.concatenate([stats, np.zeros((stats.shape[0], 1, len(STATS)))], axis=1)
+        return self.keys.index(key)
+    
+    def _file_head(self, path):
+        """
+        Fingerabdruck der ersten Datenzeile (erkennt überschriebene Dateien)
+        
+        Args:
+            path (Path): CSV-Datei
+        """
+        with open(path, 'rb') as f:
+            f.readline()
+            return hashlib.blake2b(f.readline(), digest_size=8).hexdigest()
+    
+    def _read_new_items(self, source, path, columns):
+        """
+        Liest die neuen Zeilen einer Datei als Posts (Datum, Polarität, Gewicht)
+        
+        Append-only Dateien werden ab dem gespeicherten Zeilen-Cursor gelesen.
+        Wurde eine Datei neu geschrieben (z.B. ältere Social-Media-Dateien), zählen nur
+        Zeilen nach dem letzten bereits verarbeiteten Zeitstempel.
+        
+        Args:
+            source (str): Quelle
+            path (Path): CSV-Datei
+            columns (list): Benötigte Spalten
+        """
+        key = str(path.relative_to(self.data_path))
+        cursor = self.meta['files'].get(key, {'rows': 0, 'head': None, 'last_date': None})
+        head = self._file_head(path)
+        rewritten = cursor['head'] is not None and cursor['head'] != head
+        skip = 0 if rewritten else cursor['rows']
+        
+        reader = pd.read_csv(path, usecols=columns, skiprows=range(1, skip + 1), chunksize=BATCH_ROWS)
+        
+        batches, rows, last_date = [], skip, cursor['last_date']
+        for chunk in reader:
+            rows += len(chunk)
+            items = item_frame(source, chunk)
+            if rewritten and last_date is not None:
+                items = items[items['date'] > pd.Timestamp(last_date)]
+            if items.empty:
+                continue
+            batches.append(items)
+            batch_last = items['date'].max().isoformat()
+            last_date = batch_last if last_date is None else max(last_date, batch_last)
+        
+        self.meta['files'][key] = {'rows': rows, 'head': head, 'last_date': last_date}
+        return pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=['date', 'polarity', 'weight'])
+    
+    def _apply(self, freq, pieces):
+        """
+        Addiert Bucket-Statistiken in das Array einer Frequenz (einmal wachsen pro Update)
+        
+        Args:
+            freq (str): hourly oder daily
+            pieces (list): (Spalte, DataFrame Bucket -> STATS)
+        """
+        if not pieces:
+            return
+        
+        step = pd.Timedelta(1, unit=FREQUENCIES[freq])
+        first = min(stats.index.min() for _, stats in pieces)
+        last = max(stats.index.max() for _, stats in pieces)
+        origin = self.meta['origin'].get(freq)
+        stats = self.stats[freq]
+        
+        # Neuer Ursprung: Zeilen oben anfügen, damit Zeile = Buckets seit Ursprung bleibt
+        if origin is None or first < pd.Timestamp(origin):
+            shift = 0 if origin is None else int((pd.Timestamp(origin) - first) / step)
+            stats = np.concatenate([np.zeros((shift,) + stats.shape[1:]), stats])
+            origin = first.isoformat()
+            self.meta['origin'][freq] = origin
+        
+        n_rows = int((last - pd.Timestamp(origin)) / step) + 1
+        if n_rows > stats.shape[0]:
+            stats = np.concatenate([stats, np.zeros((n_rows - stats.shape[0],) + stats.shape[1:])])
+        
+        for column, bucket_values in pieces:
+            rows = ((bucket_values.index - pd.Timestamp(origin)) / step).astype(np.int64)
+            # Niveaus: neuerer Schnappschuss ersetzt den Bucket statt ihn zu addieren
+            if self.keys[column][1] in LEVEL_SOURCES:
+                stats[rows, column] = bucket_values[STATS].to_numpy()
+            else:
+                stats[rows, column] += bucket_values[STATS].to_numpy()
+        self.stats[freq] = stats
+    
+    def update(self, sources=None):
+        """
+        Verdichtet alle neuen Posts zu Stunden- und Tagesstatistiken
+        
+        Args:
+            sources (list, optional): Quellen (Standard: alle)
+        
+        Returns:
+            dict: Quelle -> Anzahl neu verarbeiteter Posts
+        """
+        pieces = {freq: [] for freq in FREQUENCIES}
+        added = {}
+        for source in sources or SOURCES:
+            pattern, columns = SOURCES[source]
+            added[source] = 0
+            for path in sorted(self.data_path.glob(pattern)):
+                try:
+                    items = self._read_new_items(source, path, columns)
+                except Exception as e:
+                    self.console.print(f"[yellow]Warnung: {path.name} übersprungen: {str(e)}[/yellow]")
+                    continue
+                if items.empty:
+                    continue
+                
+                column = self._key_index(symbol_from_path(source, path), source)
+                for freq in FREQUENCIES:
+                    pieces[freq].append((column, bucket_stats(items, freq, source in LEVEL_SOURCES)))
+                added[source] += len(items)
+        
+        for freq in FREQUENCIES:
+            self._apply(freq, pieces[freq])
+        self.save()
+        return added
+    
+    def panel(self, freq='daily', start_date=None, end_date=None, symbols=None, sources=None, combined=True):
+        """
+        Ausgerichtetes Feature-Panel für Modelle
+        
+        EWMA und Trend werden über die gesamte Historie berechnet und erst dann
+        auf den Zeitraum geschnitten, die Werte hängen also nicht vom Startdatum ab.
+        Niveau-Quellen (Retail) werden fortgeschrieben wie load_history(freq=...),
+        Volumen und Engagement sind dort 1, sobald ein Niveau bekannt ist.
+        
+        Args:
+            freq (str): hourly oder daily
+            start_date (str, optional): Erster Bucket (z.B. YYYY-MM-DD)
+            end_date (str, optional): Letzter Bucket (z.B. YYYY-MM-DD)
+            symbols (list, optional): Symbole (Standard: alle)
+            sources (list, optional): Quellen inkl. 'all' (Standard: alle)
+            combined (bool): Spalte 'all' je Symbol aus den Text-Quellen ergänzen
+        
+        Returns:
+            pd.DataFrame: Index Bucket-Beginn (UTC), Spalten (symbol, source, feature)
+        """
+        origin = self.meta['origin'].get(freq)
+        columns = pd.MultiIndex.from_tuples([], names=['symbol', 'source', 'feature'])
+        if origin is None:
+            return pd.DataFrame(columns=columns)
+        
+        stats = self.stats[freq]
+        keys = list(self.keys)
+        levels = [i for i, (_, source) in enumerate(keys) if source in LEVEL_SOURCES]
+        if levels:
+            stats = stats.copy()
+            stats[:, levels] = fill_levels(stats[:, levels])
+        if combined:
+            all_symbols = sorted({symbol for symbol, _ in keys})
+            text_columns = [[i for i, (symbol, source) in enumerate(keys) if symbol == name and source in TEXT_SOURCES] for name in all_symbols]
+            stats = np.concatenate([stats, np.stack([stats[:, indices].sum(axis=1) for indices in text_columns], axis=1)], axis=1)
+            keys += [(symbol, 'all') for symbol in all_symbols]
+        
+        selected = [i for i, (symbol, source) in enumerate(keys) if (not symbols or symbol in symbols) and (not sources or source in sources)]
+        if not selected:
+            return pd.DataFrame(columns=columns)
+        
+        features = compute_features(stats[:, selected], freq)
+        values = np.stack([features[name] for name in FEATURES], axis=2).reshape(stats.shape[0], -1)
+        columns = pd.MultiIndex.from_tuples(
+            [keys[i] + (name,) for i in selected for name in FEATURES],
+            names=['symbol', 'source', 'feature']
+        )
+        index = pd.date_range(origin, periods=stats.shape[0], freq=FREQUENCIES[freq], name='date')
+        
+        return pd.DataFrame(values, index=index, columns=columns).sort_index(axis=1).loc[start_date:end_date]
+    
+    def export(self, freq='daily', start_date=None, end_date=None):
+        """
+        Schreibt das Feature-Panel als CSV (Spalten symbol_source_feature)
+        
+        Args:
+            freq (str): hourly oder daily
+            start_date (str, optional): Erster Bucket
+            end_date (str, optional): Letzter Bucket
+        """
+        panel = self.panel(freq, start_date, end_date)
+        panel.columns = ["_".join(column) for column in panel.columns]
+        output_file = self.features_path / f"{freq}_features.csv"
+        panel.to_csv(output_file)
+        return output_file
+
+def main():
+    parser = argparse.ArgumentParser(description='Stündliche und tägliche Sentiment-Features je Symbol')
+    parser.add_argument('--frequency', choices=list(FREQUENCIES), default='daily', help='Bucket-Größe')
+    parser.add_argument('--symbols', nargs='+', help='Symbole (Standard: alle)')
+    parser.add_argument('--sources', nargs='+', choices=list(SOURCES), help='Quellen für das Update (Standard: alle)')
+    parser.add_argument('--start-date', help='Erster Bucket der Abfrage')
+    parser.add_argument('--end-date', help='Letzter Bucket der Abfrage')
+    parser.add_argument('--no-update', action='store_true', help='Keine neuen Posts verarbeiten, nur abfragen')
+    parser.add_argument('--export', action='store_true', help='Feature-Panel als CSV schreiben')
+    
+    args = parser.parse_args()
+    
+    try:
+        aggregator = SentimentFeatureAggregator()
+        console = aggregator.console
+        
+        if not args.no_update:
+            with console.status("[bold blue]Verarbeite neue Posts..."):
+                added = aggregator.update(args.sources)
+            console.print("Neu verarbeitet: " + ", ".join(f"{source} {count}" for source, count in added.items()))
+        
+        panel = aggregator.panel(args.frequency, args.start_date, args.end_date, args.symbols)
+        if panel.empty:
+            console.print("[yellow]Keine Sentiment-Daten vorhanden[/yellow]")
+            return
+        
+        table = Table(title=f"Sentiment-Features ({args.frequency}, letzter Bucket {panel.index[-1]})")
+        table.add_column("Symbol", style="cyan")
+        table.add_column("Quelle", style="cyan")
+        for name in FEATURES:
+            table.add_column(name.capitalize(), style="green")
+        
+        last = panel.iloc[-1]
+        for symbol, source in dict.fromkeys((symbol, source) for symbol, source, _ in panel.columns):
+            table.add_row(symbol, source, *(f"{last[(symbol, source, name)]:.3f}" for name in FEATURES))
+        console.print(table)
+        
+        if args.export:
+            console.print(f"[green]Feature-Panel gespeichert: {aggregator.export(args.frequency, args.start_date, args.end_date)}[/green]")
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -32,6 +32,10 @@ def get_url(symbol, dt):
         f"{dt.year}/{dt.month - 1:02d}/{dt.day:02d}/{dt.hour:02d}h_ticks.bi5"
     )
 
+# === Preisskalierung (Dukascopy speichert Preise als ganzzahlige Points) ===
+def get_point_size(symbol):
+    return 1e3 if "JPY" in symbol.upper() else 1e5
+
 # === Tick-Datei herunterladen & extrahieren ===
 def download_and_extract(pair, dt):
     url = get_url(pair, dt)
@@ -40,17 +44,16 @@ def download_and_extract(pair, dt):
         if r.status_code != 200:
             return []
         raw = lzma.decompress(r.content)
+        point = get_point_size(pair)
         records = []
         for i in range(0, len(raw), 20):
             chunk = raw[i:i + 20]
             if len(chunk) < 20:
                 continue
-            m = struct.unpack(">IIIff", chunk)
-            ms = m[0]
-            bid = m[3]
-            ask = m[4]
+            # Datensatz: ms seit Stundenbeginn, Ask, Bid (in Points), Ask-Volumen, Bid-Volumen
+            ms, ask_points, bid_points, ask_volume, bid_volume = struct.unpack(">IIIff", chunk)
             timestamp = dt + timedelta(seconds=ms / 1000.0)
-            records.append([timestamp, bid, ask])
+            records.append([timestamp, bid_points / point, ask_points / point, bid_volume, ask_volume])
         return records
     except Exception:
         return []
@@ -99,7 +102,7 @@ def fetch_yearly_ticks_parallel(pair, year, base_path):
 
     # === Speichern
     if all_ticks:
-        df = pd.DataFrame(all_ticks, columns=["timestamp", "bid", "ask"])
+        df = pd.DataFrame(all_ticks, columns=["timestamp", "bid", "ask", "bid_volume", "ask_volume"])
         os.makedirs(folder, exist_ok=True)
         df.sort_values("timestamp", inplace=True)
         df.to_csv(file_path, index=False)
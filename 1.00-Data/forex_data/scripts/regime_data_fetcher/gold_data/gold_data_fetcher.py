@@ -9,6 +9,15 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.market_data_loader import MarketDataLoader
+from common.rolling_stats import RollingStats
+from common.regime_labels import classify_bands, GOLD_REGIMES
+
+# Fehlende USD-Kurse höchstens so viele Zeilen fortschreiben
+USD_FFILL_LIMIT = 5
 
 class GoldDataFetcher:
     def __init__(self):
@@ -18,6 +27,7 @@ class GoldDataFetcher:
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/regime_data/gold_data")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.loader = MarketDataLoader(console=self.console)
         
     def fetch_gold_data(self, start_date=None, end_date=None, interval='1d'):
         """
@@ -36,28 +46,39 @@ class GoldDataFetcher:
                 if not start_date:
                     start_date = end_date - timedelta(days=365)
                 
-                # Hole Gold-Daten
-                gold = yf.Ticker("GC=F")  # Gold Futures
-                hist = gold.history(start=start_date, end=end_date, interval=interval)
+                # Hole Gold-Daten und USD Index (Tagesdaten gebündelt aus dem gemeinsamen Cache)
+                if interval == '1d':
+                    history = self.loader.get_history(["GC=F", "DX-Y.NYB"], start_date, end_date)
+                    hist = history["GC=F"]  # Gold Futures
+                    usd_hist = history["DX-Y.NYB"]  # US Dollar Index
+                else:
+                    gold = yf.Ticker("GC=F")  # Gold Futures
+                    hist = gold.history(start=start_date, end=end_date, interval=interval)
+                    usd_index = yf.Ticker("DX-Y.NYB")  # US Dollar Index
+                    usd_hist = usd_index.history(start=start_date, end=end_date, interval=interval)
                 
                 if hist.empty:
                     self.console.print("[yellow]Keine Gold-Daten verfügbar für den angegebenen Zeitraum[/yellow]")
                     return
                 
                 # Berechne zusätzliche Metriken
+                stats = RollingStats(hist['Close'], [20, 50])
+                means = stats.mean()
+                
                 data = pd.DataFrame()
                 data['date'] = hist.index
-                data['price'] = hist['Close']
-                data['volume'] = hist['Volume']
-                data['ma20'] = hist['Close'].rolling(window=20).mean()
-                data['ma50'] = hist['Close'].rolling(window=50).mean()
-                data['volatility'] = hist['Close'].rolling(window=20).std()
+                data['price'] = hist['Close'].to_numpy()
+                data['volume'] = hist['Volume'].to_numpy()
+                data['ma20'] = means[20].to_numpy()
+                data['ma50'] = means[50].to_numpy()
+                data['volatility'] = stats.std()[20].to_numpy()
+                data['safe_haven'] = pd.Series(classify_bands(data['price'], data['ma20'], data['volatility'])).map(GOLD_REGIMES)
                 
-                # Berechne Korrelation mit USD
-                usd_index = yf.Ticker("DX-Y.NYB")  # US Dollar Index
-                usd_hist = usd_index.history(start=start_date, end=end_date, interval=interval)
+                # Berechne Korrelation mit USD (letzter USD-Schlusskurs je Gold-Handelstag,
+                # abweichende Feiertage lassen sonst ganze 20-Tage-Fenster ausfallen)
                 if not usd_hist.empty:
-                    data['usd_correlation'] = data['price'].rolling(window=20).corr(usd_hist['Close'])
+                    usd_close = usd_hist['Close'].reindex(hist.index.union(usd_hist.index)).ffill(limit=USD_FFILL_LIMIT).reindex(hist.index)
+                    data['usd_correlation'] = stats.corr(usd_close)[20].to_numpy()
                 
                 # Speichere die Daten
                 output_file = self.base_path / f"gold_data_{interval}.csv"
@@ -75,6 +96,7 @@ class GoldDataFetcher:
                 table.add_row("Maximaler Preis", f"${data['price'].max():.2f}")
                 table.add_row("Minimaler Preis", f"${data['price'].min():.2f}")
                 table.add_row("Durchschnittliches Volumen", f"{data['volume'].mean():.0f}")
+                table.add_row("Safe-Haven-Status", str(self.analyze_safe_haven(data)))
                 if 'usd_correlation' in data.columns:
                     table.add_row("USD Korrelation (20 Tage)", f"{data['usd_correlation'].iloc[-1]:.2f}")
                 table.add_row("Speicherort", str(output_file))
@@ -90,20 +112,12 @@ class GoldDataFetcher:
         
         Args:
             data (pd.DataFrame): Gold-Daten
-        """
-        current_price = data['price'].iloc[-1]
-        ma20 = data['ma20'].iloc[-1]
-        volatility = data['volatility'].iloc[-1]
         
-        # Safe-Haven-Analyse
-        if current_price > ma20 + volatility:
-            status = "Starkes Safe-Haven-Verhalten"
-        elif current_price < ma20 - volatility:
-            status = "Schwaches Safe-Haven-Verhalten"
-        else:
-            status = "Neutrales Verhalten"
-            
-        return status
+        Returns:
+            str: Status des letzten Datums (None, solange das Band nicht definiert ist)
+        """
+        codes = classify_bands(data['price'], data['ma20'], data['volatility'])
+        return GOLD_REGIMES.get(codes[-1])
 
 def main():
     parser = argparse.ArgumentParser(description='Gold Data Fetcher')
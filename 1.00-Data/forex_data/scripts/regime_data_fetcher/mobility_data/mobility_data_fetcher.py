@@ -2,6 +2,8 @@ import pandas as pd
 import requests
 from datetime import datetime, timedelta
 import os
+import gzip
+import json
 from pathlib import Path
 import argparse
 from rich.console import Console
@@ -10,6 +12,43 @@ from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
 
+# Globaler Google Mobility Report (alle Länder, mehrere hundert MB)
+GOOGLE_MOBILITY_URL = "https://www.gstatic.com/covid19/mobility/Global_Mobility_Report.csv"
+
+REGION_COLUMNS = ['country_region_code', 'sub_region_1', 'sub_region_2', 'metro_area', 'iso_3166_2_code']
+METRIC_COLUMNS = [
+    'retail_and_recreation_percent_change_from_baseline',
+    'grocery_and_pharmacy_percent_change_from_baseline',
+    'parks_percent_change_from_baseline',
+    'transit_stations_percent_change_from_baseline',
+    'workplaces_percent_change_from_baseline',
+    'residential_percent_change_from_baseline'
+]
+MOBILITY_DTYPES = {**{col: str for col in REGION_COLUMNS}, 'date': str, **{col: 'float32' for col in METRIC_COLUMNS}}
+
+# Zeilen pro Chunk beim Streamen des Reports
+CHUNK_ROWS = 250000
+
+def read_mobility_csv(source, chunksize=None):
+    """
+    Liest Google Mobility CSV mit festen Spalten und Typen
+    
+    Leere Regionen bleiben leere Strings (Namibia hat den Länder-Code 'NA'),
+    fehlende Messwerte werden NaN.
+    
+    Args:
+        source (str|file): Pfad oder Datei-Objekt
+        chunksize (int, optional): Zeilen pro Chunk, sonst ein DataFrame
+    """
+    return pd.read_csv(
+        source,
+        usecols=REGION_COLUMNS + ['date'] + METRIC_COLUMNS,
+        dtype=MOBILITY_DTYPES,
+        keep_default_na=False,
+        na_values={col: [''] for col in METRIC_COLUMNS},
+        chunksize=chunksize
+    )
+
 class MobilityDataFetcher:
     def __init__(self):
         """
@@ -18,63 +57,224 @@ class MobilityDataFetcher:
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/regime_data/mobility_data")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.partition_path = self.base_path / "google_partitions"
+        self.partition_path.mkdir(parents=True, exist_ok=True)
+        self.meta_file = self.partition_path / "_partition_meta.json"
+        self.meta = self._load_meta()
         load_dotenv()
+    
+    def _load_meta(self):
+        """
+        Lädt den abgedeckten Zeitraum je Länder-Partition
+        """
+        if self.meta_file.exists():
+            with open(self.meta_file) as f:
+                return json.load(f)
+        return {}
+    
+    def _save_meta(self):
+        """
+        Speichert den abgedeckten Zeitraum je Länder-Partition
+        """
+        with open(self.meta_file, 'w') as f:
+            json.dump(self.meta, f, indent=2, sort_keys=True)
+    
+    def _partition_file(self, country_code):
+        """
+        Pfad der Partition eines Landes
         
-    def fetch_google_mobility(self, country_code='US', start_date=None, end_date=None):
+        Args:
+            country_code (str): Länder-Code
+        """
+        return self.partition_path / f"{country_code}.csv.gz"
+    
+    def _is_covered(self, country_code, start, end):
         """
-        Holt Google Mobility Daten
+        Prüft, ob die Partition eines Landes den Zeitraum enthält
         
         Args:
-            country_code (str): Länder-Code (z.B. 'US', 'GB', 'DE')
-            start_date (str, optional): Startdatum im Format YYYY-MM-DD
-            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            country_code (str): Länder-Code
+            start (str): Startdatum YYYY-MM-DD oder None (offen)
+            end (str): Enddatum YYYY-MM-DD oder None (offen)
         """
+        coverage = self.meta.get(country_code)
+        if coverage is None or not self._partition_file(country_code).exists():
+            return False
+        start_ok = coverage['start'] is None or (start is not None and start >= coverage['start'])
+        end_ok = coverage['end'] is None or (end is not None and end <= coverage['end'])
+        return start_ok and end_ok
+    
+    def ingest_google_mobility(self, countries, start_date=None, end_date=None, url=GOOGLE_MOBILITY_URL, chunksize=CHUNK_ROWS):
+        """
+        Streamt den globalen Report einmal und schreibt kompakte Länder-Partitionen
+        
+        Der Report wird nicht vollständig geladen: die Antwort wird in Chunks
+        gelesen, nur die benötigten Spalten typisiert geparst und noch während
+        des Lesens nach Land und Datum gefiltert (ISO-Datum als String-Vergleich).
+        Da der Report nach Ländern gruppiert ist, endet der Download, sobald alle
+        angefragten Länder vollständig gelesen sind.
+        
+        Args:
+            countries (list): Länder-Codes
+            start_date (str, optional): Startdatum YYYY-MM-DD (sonst ganze Historie)
+            end_date (str, optional): Enddatum YYYY-MM-DD (sonst ganze Historie)
+            url (str): URL des Reports
+            chunksize (int): Zeilen pro Chunk
+        
+        Returns:
+            dict: Anzahl geschriebener Zeilen je Land
+        """
+        countries = set(countries)
+        rows = {country: 0 for country in countries}
+        seen, finished = set(), set()
+        handles = {}
+        read_rows = 0
+        
         try:
-            with self.console.status("[bold blue]Lade Google Mobility Daten..."):
-                # Setze Standardwerte
-                if not end_date:
-                    end_date = datetime.now()
-                if not start_date:
-                    start_date = end_date - timedelta(days=90)
-                
-                # Google Mobility Report URL
-                url = "https://www.gstatic.com/covid19/mobility/Region_Mobility_Report_CSVs"
-                file_url = f"{url}/{start_date.strftime('%Y-%m-%d')}_{country_code}_Region_Mobility_Report.csv"
+            with requests.get(url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
                 
-                # Lade die Daten
-                response = requests.get(file_url)
-                if response.status_code == 200:
-                    data = pd.read_csv(pd.StringIO(response.text))
-                    
-                    # Filtere nach Datum
-                    data['date'] = pd.to_datetime(data['date'])
-                    data = data[(data['date'] >= start_date) & (data['date'] <= end_date)]
+                for chunk in read_mobility_csv(response.raw, chunksize):
+                    read_rows += len(chunk)
+                    present = set(chunk['country_region_code'].unique())
                     
-                    # Speichere die Daten
-                    output_file = self.base_path / f"google_mobility_{country_code}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.csv"
-                    data.to_csv(output_file, index=False)
+                    # Länder aus früheren Chunks, die nicht mehr vorkommen, sind vollständig
+                    finished |= seen - present
+                    seen |= countries & present
                     
-                    # Erstelle eine schöne Zusammenfassung
-                    table = Table(title="Google Mobility Daten Zusammenfassung")
-                    table.add_column("Metrik", style="cyan")
-                    table.add_column("Wert", style="green")
+                    mask = chunk['country_region_code'].isin(countries)
+                    if start_date:
+                        mask &= chunk['date'] >= start_date
+                    if end_date:
+                        mask &= chunk['date'] <= end_date
                     
-                    table.add_row("Zeitraum", f"{data['date'].min().strftime('%Y-%m-%d')} bis {data['date'].max().strftime('%Y-%m-%d')}")
-                    table.add_row("Anzahl Datenpunkte", str(len(data)))
-                    table.add_row("Region", country_code)
+                    for country, part in chunk[mask].groupby('country_region_code'):
+                        if country not in handles:
+                            handles[country] = gzip.open(self._partition_file(country).with_suffix('.part'), 'wt')
+                            part.to_csv(handles[country], index=False)
+                        else:
+                            part.to_csv(handles[country], index=False, header=False)
+                        rows[country] += len(part)
                     
-                    # Füge aktuelle Mobilitätswerte hinzu
-                    latest_data = data.iloc[-1]
-                    for col in data.columns:
-                        if 'percent_change' in col:
-                            value = latest_data[col]
-                            table.add_row(col.replace('_percent_change', '').title(), f"{value:+.1f}%")
-                    
-                    table.add_row("Speicherort", str(output_file))
-                    
-                    self.console.print(table)
-                else:
-                    self.console.print("[yellow]Keine Google Mobility Daten verfügbar[/yellow]")
+                    if countries <= finished:
+                        break
+        finally:
+            for handle in handles.values():
+                handle.close()
+        
+        for country in countries:
+            part_file = self._partition_file(country).with_suffix('.part')
+            if not part_file.exists():
+                # Keine Zeilen im Zeitraum: leere Partition, damit nicht erneut geladen wird
+                with gzip.open(part_file, 'wt') as handle:
+                    pd.DataFrame(columns=REGION_COLUMNS + ['date'] + METRIC_COLUMNS).to_csv(handle, index=False)
+            part_file.replace(self._partition_file(country))
+            self.meta[country] = {'start': start_date, 'end': end_date, 'rows': rows[country]}
+        
+        self._save_meta()
+        self.console.print(f"[green]{read_rows} Zeilen gelesen, Partitionen für {', '.join(sorted(countries))} geschrieben[/green]")
+        return rows
+    
+    def load_google_mobility(self, country_code='US', start_date=None, end_date=None, regions=False, refresh=False):
+        """
+        Liefert Google Mobility Daten eines Landes aus der lokalen Partition
+        
+        Fehlt die Partition oder deckt sie den Zeitraum nicht ab, wird der
+        Report einmal gestreamt (Zeitraum vereinigt mit dem bisher abgedeckten).
+        
+        Args:
+            country_code (str): Länder-Code (z.B. 'US', 'GB', 'DE')
+            start_date (str, optional): Startdatum YYYY-MM-DD
+            end_date (str, optional): Enddatum YYYY-MM-DD
+            regions (bool): Auch Regionen statt nur Werte auf Landesebene
+            refresh (bool): Partition neu laden
+        """
+        return self.load_google_mobility_many([country_code], start_date, end_date, regions, refresh)[country_code]
+    
+    def load_google_mobility_many(self, countries, start_date=None, end_date=None, regions=False, refresh=False):
+        """
+        Wie load_google_mobility für mehrere Länder, fehlende Länder in einem Durchlauf
+        
+        Args:
+            countries (list): Länder-Codes
+            start_date (str, optional): Startdatum YYYY-MM-DD
+            end_date (str, optional): Enddatum YYYY-MM-DD
+            regions (bool): Auch Regionen statt nur Werte auf Landesebene
+            refresh (bool): Partitionen neu laden
+        
+        Returns:
+            dict: Länder-Code -> DataFrame
+        """
+        start = pd.Timestamp(start_date).strftime('%Y-%m-%d') if start_date else None
+        end = pd.Timestamp(end_date).strftime('%Y-%m-%d') if end_date else None
+        
+        missing = [country for country in countries if refresh or not self._is_covered(country, start, end)]
+        if missing:
+            # Gemeinsamer Zeitraum aus Anfrage und bisheriger Abdeckung, damit nichts verloren geht
+            starts = [start] + [self.meta[c]['start'] for c in missing if c in self.meta and not refresh]
+            ends = [end] + [self.meta[c]['end'] for c in missing if c in self.meta and not refresh]
+            ingest_start = None if None in starts else min(starts)
+            ingest_end = None if None in ends else max(ends)
+            with self.console.status(f"[bold blue]Streame Google Mobility Report für {', '.join(missing)}..."):
+                self.ingest_google_mobility(missing, ingest_start, ingest_end)
+        
+        results = {}
+        for country in countries:
+            data = read_mobility_csv(self._partition_file(country))
+            if start:
+                data = data[data['date'] >= start]
+            if end:
+                data = data[data['date'] <= end]
+            if not regions:
+                data = data[(data['sub_region_1'] == '') & (data['metro_area'] == '')]
+            data = data.assign(date=pd.to_datetime(data['date'])).sort_values('date').reset_index(drop=True)
+            results[country] = data
+        return results
+        
+    def fetch_google_mobility(self, country_code='US', start_date=None, end_date=None, regions=False, refresh=False):
+        """
+        Holt Google Mobility Daten (ohne Zeitraum die ganze Historie)
+        
+        Args:
+            country_code (str): Länder-Code (z.B. 'US', 'GB', 'DE')
+            start_date (str, optional): Startdatum im Format YYYY-MM-DD
+            end_date (str, optional): Enddatum im Format YYYY-MM-DD
+            regions (bool): Auch Regionen statt nur Werte auf Landesebene
+            refresh (bool): Partition neu laden
+        """
+        try:
+            data = self.load_google_mobility(country_code, start_date, end_date, regions, refresh)
+            
+            if data.empty:
+                self.console.print("[yellow]Keine Google Mobility Daten verfügbar[/yellow]")
+                return
+            
+            # Speichere die Daten
+            output_file = self.base_path / f"google_mobility_{country_code}_{data['date'].min().strftime('%Y%m%d')}_{data['date'].max().strftime('%Y%m%d')}.csv"
+            data.to_csv(output_file, index=False)
+            
+            # Erstelle eine schöne Zusammenfassung
+            table = Table(title="Google Mobility Daten Zusammenfassung")
+            table.add_column("Metrik", style="cyan")
+            table.add_column("Wert", style="green")
+            
+            table.add_row("Zeitraum", f"{data['date'].min().strftime('%Y-%m-%d')} bis {data['date'].max().strftime('%Y-%m-%d')}")
+            table.add_row("Anzahl Datenpunkte", str(len(data)))
+            table.add_row("Region", country_code)
+            
+            # Füge aktuelle Mobilitätswerte hinzu (Landesebene)
+            national = data[(data['sub_region_1'] == '') & (data['metro_area'] == '')]
+            if not national.empty:
+                latest_data = national.iloc[-1]
+                for col in METRIC_COLUMNS:
+                    value = latest_data[col]
+                    if pd.notna(value):
+                        table.add_row(col.replace('_percent_change_from_baseline', '').replace('_', ' ').title(), f"{value:+.1f}%")
+            
+            table.add_row("Speicherort", str(output_file))
+            
+            self.console.print(table)
                 
         except Exception as e:
             self.console.print(f"[red]Fehler beim Abrufen der Google Mobility Daten: {str(e)}[/red]")
@@ -170,11 +370,13 @@ class MobilityDataFetcher:
 
 def main():
     parser = argparse.ArgumentParser(description='Mobility Data Fetcher')
-    parser.add_argument('--country', default='US', help='Länder-Code (z.B. US, GB, DE)')
+    parser.add_argument('--country', nargs='+', default=['US'], help='Länder-Codes (z.B. US GB DE)')
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
     parser.add_argument('--source', choices=['google', 'apple', 'both'], default='both', 
                       help='Datenquelle (google, apple, oder both)')
+    parser.add_argument('--regions', action='store_true', help='Google: auch Regionen statt nur Landesebene')
+    parser.add_argument('--refresh', action='store_true', help='Google: Länder-Partitionen neu laden')
     
     args = parser.parse_args()
     
@@ -182,18 +384,23 @@ def main():
         fetcher = MobilityDataFetcher()
         
         if args.source in ['google', 'both']:
-            fetcher.fetch_google_mobility(
-                country_code=args.country,
-                start_date=args.start_date,
-                end_date=args.end_date
-            )
+            # Fehlende Länder in einem Durchlauf durch den Report laden
+            fetcher.load_google_mobility_many(args.country, args.start_date, args.end_date, refresh=args.refresh)
+            for country in args.country:
+                fetcher.fetch_google_mobility(
+                    country_code=country,
+                    start_date=args.start_date,
+                    end_date=args.end_date,
+                    regions=args.regions
+                )
             
         if args.source in ['apple', 'both']:
-            fetcher.fetch_apple_mobility(
-                country_code=args.country,
-                start_date=args.start_date,
-                end_date=args.end_date
-            )
+            for country in args.country:
+                fetcher.fetch_apple_mobility(
+                    country_code=country,
+                    start_date=args.start_date,
+                    end_date=args.end_date
+                )
             
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
@@ -0,0 +1,360 @@
+import numpy as np
+import pandas as pd
+import json
+from pathlib import Path
+import argparse
+import sys
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "mobility_data"))
+from common.market_data_loader import MarketDataLoader
+from common.rolling_stats import RollingStats
+from mobility_data_fetcher import MobilityDataFetcher
+
+# Markt-Inputs: Spaltenname -> Yahoo Finance Symbol
+MARKET_INPUTS = {'vix': '^VIX', 'gold': 'GC=F', 'dxy': 'DX-Y.NYB'}
+
+# Google Mobility Metriken (Kurzname -> Spalte des Reports)
+MOBILITY_METRICS = {
+    'retail': 'retail_and_recreation_percent_change_from_baseline',
+    'transit': 'transit_stations_percent_change_from_baseline',
+    'workplaces': 'workplaces_percent_change_from_baseline',
+    'residential': 'residential_percent_change_from_baseline'
+}
+MOBILITY_SMOOTHING = 7
+
+# Rendite-Paare für rollierende Korrelationen
+CORRELATION_PAIRS = [('gold', 'dxy'), ('gold', 'vix'), ('vix', 'dxy')]
+# Z-Score Spreads (erste minus zweite Reihe)
+SPREAD_PAIRS = [('vix', 'gold'), ('gold', 'dxy')]
+
+DEFAULT_WINDOWS = [20, 60]
+DEFAULT_COUNTRIES = ['US']
+HISTORY_START = '2000-01-01'
+
+# Fehlende Werte höchstens so viele Geschäftstage fortschreiben
+FFILL_LIMIT = 5
+# Geschäftstage am Ende, in denen sich Inputs noch ändern können (unvollständige Bars, Nachlieferungen)
+REVISION_DAYS = 5
+
+class RegimeFeatureBuilder:
+    def __init__(self, windows=None, countries=None, loader=None, mobility=None):
+        """
+        Initialisiert den Builder für die Cross-Asset Regime-Feature-Matrix
+        
+        VIX, Gold, USD Index und Google Mobility werden auf einen gemeinsamen
+        Geschäftstags-Index ausgerichtet (Lücken höchstens FFILL_LIMIT Tage
+        fortgeschrieben, kein Look-Ahead). Alle Features werden vektorisiert über
+        das ganze Panel berechnet und als eine float32 Matrix gespeichert.
+        
+        Args:
+            windows (list, optional): Fenstergrößen für Z-Scores und Korrelationen
+            countries (list, optional): Länder-Codes für Mobilitätsdaten
+            loader (MarketDataLoader, optional): Quelle der täglichen Bars
+            mobility (MobilityDataFetcher, optional): Quelle der Mobilitätsdaten
+        """
+        self.console = Console()
+        self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/regime_data/features")
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.matrix_file = self.base_path / "regime_features.npy"
+        self.meta_file = self.base_path / "_feature_meta.json"
+        
+        self.windows = sorted(set(windows or DEFAULT_WINDOWS))
+        self.countries = list(countries if countries is not None else DEFAULT_COUNTRIES)
+        self.loader = loader or MarketDataLoader(console=self.console)
+        self.mobility = mobility
+        self.columns = self.column_metadata()
+    
+    def config(self):
+        """
+        Parameter, bei deren Änderung die Matrix neu berechnet wird
+        """
+        return {'windows': self.windows, 'countries': self.countries, 'ffill_limit': FFILL_LIMIT, 'columns': [c['name'] for c in self.columns]}
+    
+    def column_metadata(self):
+        """
+        Beschreibung aller Spalten der Matrix in fester Reihenfolge
+        
+        Returns:
+            list: Dictionaries mit name, kind, inputs, window
+        """
+        columns = []
+        inputs = list(MARKET_INPUTS)
+        for country in self.countries:
+            inputs += [f"mobility_{country}_{metric}" for metric in MOBILITY_METRICS]
+        
+        for name in inputs:
+            columns.append({'name': name, 'kind': 'level', 'inputs': [name], 'window': None})
+        for name in MARKET_INPUTS:
+            columns.append({'name': f"{name}_return", 'kind': 'log_return', 'inputs': [name], 'window': None})
+        for window in self.windows:
+            for name in inputs:
+                columns.append({'name': f"{name}_z{window}", 'kind': 'zscore', 'inputs': [name], 'window': window})
+            for first, second in CORRELATION_PAIRS:
+                columns.append({'name': f"corr{window}_{first}_{second}", 'kind': 'correlation', 'inputs': [f"{first}_return", f"{second}_return"], 'window': window})
+            for first, second in SPREAD_PAIRS:
+                columns.append({'name': f"spread{window}_{first}_{second}", 'kind': 'zscore_spread', 'inputs': [f"{first}_z{window}", f"{second}_z{window}"], 'window': window})
+        return columns
+    
+    def _load_meta(self):
+        """
+        Lädt Startdatum, Zeilenanzahl und Parameter der gespeicherten Matrix
+        """
+        if self.meta_file.exists() and self.matrix_file.exists():
+            with open(self.meta_file) as f:
+                return json.load(f)
+        return None
+    
+    def _save(self, index, matrix):
+        """
+        Speichert Matrix und Spalten-Metadaten
+        
+        Args:
+            index (pd.DatetimeIndex): Geschäftstage der Zeilen
+            matrix (np.ndarray): Features (Zeilen × Spalten) als float32
+        """
+        np.save(self.matrix_file, matrix.astype(np.float32))
+        meta = {
+            'start': index[0].strftime('%Y-%m-%d'),
+            'end': index[-1].strftime('%Y-%m-%d'),
+            'rows': len(index),
+            'freq': 'B',
+            'config': self.config(),
+            'columns': self.columns
+        }
+        with open(self.meta_file, 'w') as f:
+            json.dump(meta, f, indent=2)
+    
+    def _mobility_inputs(self):
+        """
+        Geglättete Mobilitätsreihen auf Landesebene (Kalendertage)
+        
+        Returns:
+            pd.DataFrame: Spalten mobility_{land}_{metrik}
+        """
+        if not self.countries:
+            return pd.DataFrame()
+        
+        try:
+            if self.mobility is None:
+                self.mobility = MobilityDataFetcher()
+            data = self.mobility.load_google_mobility_many(self.countries)
+        except Exception as e:
+            self.console.print(f"[yellow]Warnung: Mobilitätsdaten nicht verfügbar: {str(e)}[/yellow]")
+            return pd.DataFrame()
+        
+        series = {}
+        for country, frame in data.items():
+            frame = frame.set_index('date').asfreq('D')
+            for metric, column in MOBILITY_METRICS.items():
+                series[f"mobility_{country}_{metric}"] = frame[column].astype(float).rolling(MOBILITY_SMOOTHING, min_periods=1).mean()
+        return pd.DataFrame(series)
+    
+    def load_inputs(self, start_date, end_date=None):
+        """
+        Lädt alle Inputs und richtet sie auf Geschäftstage aus
+        
+        Der Index reicht vom Startdatum bis zum letzten Datum eines Markt-Inputs.
+        
+        Args:
+            start_date (str|datetime): Startdatum
+            end_date (str|datetime, optional): Enddatum (exklusiv)
+        
+        Returns:
+            pd.DataFrame: Geschäftstage × Level-Spalten
+        """
+        history = self.loader.get_history(list(MARKET_INPUTS.values()), start_date, end_date)
+        market = pd.DataFrame({name: history[symbol]['Close'] for name, symbol in MARKET_INPUTS.items()})
+        market = market.dropna(how='all')
+        if market.empty:
+            return pd.DataFrame(columns=[c['name'] for c in self.columns if c['kind'] == 'level'])
+        
+        index = pd.bdate_range(pd.Timestamp(start_date).normalize(), market.index.max().normalize())
+        inputs = market.reindex(index).ffill(limit=FFILL_LIMIT)
+        
+        mobility = self._mobility_inputs()
+        for country in self.countries:
+            for metric in MOBILITY_METRICS:
+                name = f"mobility_{country}_{metric}"
+                inputs[name] = mobility[name].reindex(index) if name in mobility else np.nan
+        return inputs
+    
+    def compute(self, inputs):
+        """
+        Berechnet alle Features vektorisiert aus den ausgerichteten Inputs
+        
+        Args:
+            inputs (pd.DataFrame): Ergebnis von load_inputs
+        
+        Returns:
+            np.ndarray: Zeilen × Spalten (float64) in der Reihenfolge von column_metadata
+        """
+        levels = inputs[[c['name'] for c in self.columns if c['kind'] == 'level']].astype(float)
+        features = {name: levels[name].to_numpy() for name in levels.columns}
+        
+        returns = np.log(levels[list(MARKET_INPUTS)] / levels[list(MARKET_INPUTS)].shift(1))
+        for name in MARKET_INPUTS:
+            features[f"{name}_return"] = returns[name].to_numpy()
+        
+        level_stats = RollingStats(levels, self.windows)
+        means, stds = level_stats.mean(), level_stats.std()
+        
+        first = returns[[a for a, _ in CORRELATION_PAIRS]].to_numpy()
+        second = returns[[b for _, b in CORRELATION_PAIRS]].to_numpy()
+        correlations = RollingStats(first, self.windows).corr(second)
+        
+        for window in self.windows:
+            std = stds[window].to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                zscores = np.where(std > 0, (levels.to_numpy() - means[window].to_numpy()) / std, np.nan)
+            for i, name in enumerate(levels.columns):
+                features[f"{name}_z{window}"] = zscores[:, i]
+            for i, (a, b) in enumerate(CORRELATION_PAIRS):
+                features[f"corr{window}_{a}_{b}"] = correlations[window][:, i]
+            for a, b in SPREAD_PAIRS:
+                features[f"spread{window}_{a}_{b}"] = features[f"{a}_z{window}"] - features[f"{b}_z{window}"]
+        
+        return np.column_stack([features[c['name']] for c in self.columns])
+    
+    def update(self, start_date=None, end_date=None, rebuild=False):
+        """
+        Baut die Matrix oder rechnet nur das betroffene Ende neu
+        
+        Für ein Update werden die Inputs der letzten Geschäftstage mit Kontext
+        für das größte Fenster neu geladen. Ab dem ersten Tag, an dem sich ein
+        Input gegenüber der gespeicherten Matrix geändert hat (höchstens
+        REVISION_DAYS zurück), bzw. ab dem ersten neuen Tag werden die Zeilen
+        ersetzt; ältere Zeilen bleiben unverändert.
+        
+        Args:
+            start_date (str, optional): Startdatum beim vollständigen Aufbau
+            end_date (str, optional): Enddatum (exklusiv)
+            rebuild (bool): Matrix vollständig neu berechnen
+        
+        Returns:
+            tuple: Anzahl neu berechneter Zeilen, Anzahl Zeilen gesamt
+        """
+        meta = self._load_meta()
+        if rebuild or meta is None or meta['config'] != self.config():
+            inputs = self.load_inputs(start_date or HISTORY_START, end_date)
+            if inputs.empty:
+                return 0, 0
+            self._save(inputs.index, self.compute(inputs))
+            return len(inputs), len(inputs)
+        
+        stored = np.load(self.matrix_file)
+        stored_index = pd.bdate_range(meta['start'], periods=meta['rows'])
+        last = stored_index[-1]
+        
+        # Kontext: größtes Fenster + Lücken + Revisionen, doppelt als Reserve
+        lookback = 2 * (max(self.windows) + FFILL_LIMIT + REVISION_DAYS) + 1
+        load_start = max(last - pd.offsets.BDay(lookback), stored_index[0])
+        inputs = self.load_inputs(load_start, end_date)
+        if inputs.empty:
+            return 0, meta['rows']
+        fresh = self.compute(inputs).astype(np.float32)
+        
+        # Erster geänderter Tag innerhalb der Revisionsspanne, sonst der erste neue Tag
+        level_columns = [i for i, c in enumerate(self.columns) if c['kind'] == 'level']
+        revision_start = max(stored_index.get_loc(last) - REVISION_DAYS + 1, stored_index.get_loc(load_start))
+        overlap = stored_index[revision_start:].intersection(inputs.index)
+        old = stored[stored_index.get_indexer(overlap)][:, level_columns]
+        new = fresh[inputs.index.get_indexer(overlap)][:, level_columns]
+        changed = ~((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+        affected = overlap[changed.argmax()] if changed.any() else last + pd.offsets.BDay(1)
+        
+        if affected > inputs.index[-1]:
+            return 0, meta['rows']
+        
+        keep = stored[:stored_index.get_loc(affected)] if affected <= last else stored
+        tail = fresh[inputs.index.get_loc(affected):]
+        matrix = np.vstack([keep, tail])
+        index = pd.bdate_range(meta['start'], periods=len(matrix))
+        self._save(index, matrix)
+        return len(tail), len(matrix)
+    
+    def panel(self, start_date=None, end_date=None, columns=None):
+        """
+        Feature-Matrix als DataFrame
+        
+        Args:
+            start_date (str, optional): Erster Geschäftstag
+            end_date (str, optional): Letzter Geschäftstag
+            columns (list, optional): Spaltennamen (Standard: alle)
+        
+        Returns:
+            pd.DataFrame: Geschäftstage × Features (float32)
+        """
+        meta = self._load_meta()
+        if meta is None:
+            return pd.DataFrame(columns=columns or [c['name'] for c in self.columns])
+        
+        matrix = np.load(self.matrix_file, mmap_mode='r')
+        index = pd.bdate_range(meta['start'], periods=meta['rows'])
+        names = [c['name'] for c in meta['columns']]
+        rows = index.slice_indexer(start_date, end_date)
+        selected = [names.index(name) for name in columns] if columns else list(range(len(names)))
+        return pd.DataFrame(np.asarray(matrix[rows][:, selected]), index=index[rows], columns=[names[i] for i in selected])
+    
+    def export(self, start_date=None, end_date=None):
+        """
+        Schreibt die Feature-Matrix als CSV
+        
+        Args:
+            start_date (str, optional): Erster Geschäftstag
+            end_date (str, optional): Letzter Geschäftstag
+        """
+        output_file = self.base_path / "regime_features.csv"
+        self.panel(start_date, end_date).to_csv(output_file, index_label='date')
+        return output_file
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-Asset Regime-Feature-Matrix')
+    parser.add_argument('--start-date', help='Startdatum beim vollständigen Aufbau (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
+    parser.add_argument('--windows', type=int, nargs='+', help='Fenstergrößen für Z-Scores und Korrelationen')
+    parser.add_argument('--countries', nargs='*', help='Länder-Codes für Mobilitätsdaten (leer: ohne)')
+    parser.add_argument('--rebuild', action='store_true', help='Matrix vollständig neu berechnen')
+    parser.add_argument('--export', action='store_true', help='Matrix zusätzlich als CSV schreiben')
+    
+    args = parser.parse_args()
+    
+    try:
+        builder = RegimeFeatureBuilder(windows=args.windows, countries=args.countries)
+        console = builder.console
+        
+        with console.status("[bold blue]Aktualisiere Regime-Features..."):
+            recomputed, total = builder.update(args.start_date, args.end_date, args.rebuild)
+        
+        if total == 0:
+            console.print("[yellow]Keine Daten für die Regime-Features verfügbar[/yellow]")
+            return
+        
+        panel = builder.panel()
+        latest = panel.iloc[-1]
+        
+        # Erstelle eine schöne Zusammenfassung
+        table = Table(title="Regime Features Zusammenfassung")
+        table.add_column("Metrik", style="cyan")
+        table.add_column("Wert", style="green")
+        
+        table.add_row("Zeitraum", f"{panel.index.min().strftime('%Y-%m-%d')} bis {panel.index.max().strftime('%Y-%m-%d')}")
+        table.add_row("Matrix", f"{total} × {len(builder.columns)} (float32)")
+        table.add_row("Neu berechnete Zeilen", str(recomputed))
+        for column in builder.columns:
+            if column['kind'] in ('correlation', 'zscore_spread') or column['name'] in ('vix_z20', 'gold_z20', 'dxy_z20'):
+                table.add_row(column['name'], f"{latest[column['name']]:.2f}")
+        table.add_row("Speicherort", str(builder.matrix_file))
+        if args.export:
+            table.add_row("CSV", str(builder.export()))
+        
+        console.print(table)
+    
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
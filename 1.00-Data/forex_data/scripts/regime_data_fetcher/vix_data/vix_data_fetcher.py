@@ -9,6 +9,12 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.market_data_loader import MarketDataLoader
+from common.rolling_stats import RollingStats
+from common.regime_labels import classify_bands, VIX_REGIMES
 
 class VIXDataFetcher:
     def __init__(self):
@@ -18,6 +24,7 @@ class VIXDataFetcher:
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/regime_data/vix_data")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.loader = MarketDataLoader(console=self.console)
         
     def fetch_vix_data(self, start_date=None, end_date=None, interval='1d'):
         """
@@ -36,21 +43,28 @@ class VIXDataFetcher:
                 if not start_date:
                     start_date = end_date - timedelta(days=365)
                 
-                # Hole VIX-Daten
-                vix = yf.Ticker("^VIX")
-                hist = vix.history(start=start_date, end=end_date, interval=interval)
+                # Hole VIX-Daten (Tagesdaten aus dem gemeinsamen Cache)
+                if interval == '1d':
+                    hist = self.loader.get_history(["^VIX"], start_date, end_date)["^VIX"]
+                else:
+                    vix = yf.Ticker("^VIX")
+                    hist = vix.history(start=start_date, end=end_date, interval=interval)
                 
                 if hist.empty:
                     self.console.print("[yellow]Keine VIX-Daten verfügbar für den angegebenen Zeitraum[/yellow]")
                     return
                 
                 # Berechne zusätzliche Metriken
+                stats = RollingStats(hist['Close'], [20, 50])
+                means = stats.mean()
+                
                 data = pd.DataFrame()
                 data['date'] = hist.index
-                data['vix'] = hist['Close']
-                data['vix_ma20'] = hist['Close'].rolling(window=20).mean()
-                data['vix_ma50'] = hist['Close'].rolling(window=50).mean()
-                data['vix_std20'] = hist['Close'].rolling(window=20).std()
+                data['vix'] = hist['Close'].to_numpy()
+                data['vix_ma20'] = means[20].to_numpy()
+                data['vix_ma50'] = means[50].to_numpy()
+                data['vix_std20'] = stats.std()[20].to_numpy()
+                data['regime'] = pd.Series(classify_bands(data['vix'], data['vix_ma20'], data['vix_std20'])).map(VIX_REGIMES)
                 
                 # Speichere die Daten
                 output_file = self.base_path / f"vix_data_{interval}.csv"
@@ -67,6 +81,7 @@ class VIXDataFetcher:
                 table.add_row("Durchschnittlicher VIX", f"{data['vix'].mean():.2f}")
                 table.add_row("Maximaler VIX", f"{data['vix'].max():.2f}")
                 table.add_row("Minimaler VIX", f"{data['vix'].min():.2f}")
+                table.add_row("Aktuelles Regime", str(self.analyze_regime(data)))
                 table.add_row("Speicherort", str(output_file))
                 
                 self.console.print(table)
@@ -80,20 +95,12 @@ class VIXDataFetcher:
         
         Args:
             data (pd.DataFrame): VIX-Daten
-        """
-        current_vix = data['vix'].iloc[-1]
-        vix_ma20 = data['vix_ma20'].iloc[-1]
-        vix_std20 = data['vix_std20'].iloc[-1]
         
-        # Regime-Klassifizierung
-        if current_vix > vix_ma20 + vix_std20:
-            regime = "Risk-Off (Hohe Volatilität)"
-        elif current_vix < vix_ma20 - vix_std20:
-            regime = "Risk-On (Niedrige Volatilität)"
-        else:
-            regime = "Neutral"
-            
-        return regime
+        Returns:
+            str: Regime des letzten Datums (None, solange das Band nicht definiert ist)
+        """
+        codes = classify_bands(data['vix'], data['vix_ma20'], data['vix_std20'])
+        return VIX_REGIMES.get(codes[-1])
 
 def main():
     parser = argparse.ArgumentParser(description='VIX Data Fetcher')
@@ -1,7 +1,10 @@
 import pandas as pd
+import numpy as np
 from pytrends.request import TrendReq
 from datetime import datetime, timedelta
 import os
+import time
+import hashlib
 from pathlib import Path
 import argparse
 from rich.console import Console
@@ -9,18 +12,247 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.rate_limiter import RateLimiter
+
+# pytrends erlaubt höchstens 5 Suchbegriffe pro Payload
+MAX_KEYWORDS = 5
+ANCHOR_KEYWORD = 'forex'
+
+# Tägliche Auflösung gibt es nur für Zeiträume unter ~270 Tagen. Fenster liegen auf
+# einem festen Raster ab GRID_ORIGIN, damit gecachte Fenster wiederverwendet werden.
+GRID_ORIGIN = pd.Timestamp('2004-01-01')
+WINDOW_DAYS = 180
+OVERLAP_DAYS = 60
+
+# Fenster, die bis in die letzten Tage reichen, sind noch vorläufig (isPartial)
+OPEN_WINDOW_DAYS = 3
+OPEN_WINDOW_TTL_HOURS = 12
+
+REQUESTS_PER_MINUTE = 10
+MAX_RETRIES = 5
+INITIAL_BACKOFF = 60.0
+MAX_BACKOFF = 900.0
+
+def keyword_batches(keywords, anchor=ANCHOR_KEYWORD):
+    """
+    Teilt Suchbegriffe in Payloads zu je 5 Begriffen, jede Payload enthält den Anker
+    
+    Args:
+        keywords (list): Suchbegriffe
+        anchor (str): Anker-Begriff für die Normalisierung zwischen Payloads
+    """
+    others = [keyword for keyword in dict.fromkeys(keywords) if keyword != anchor]
+    size = MAX_KEYWORDS - 1
+    return [[anchor] + others[i:i + size] for i in range(0, len(others), size)] or [[anchor]]
+
+def daily_windows(start_date, end_date):
+    """
+    Sich überlappende Fenster mit täglicher Auflösung, die [start_date, end_date] abdecken
+    
+    Args:
+        start_date (pd.Timestamp): Erster Tag
+        end_date (pd.Timestamp): Letzter Tag
+    """
+    step = pd.Timedelta(days=WINDOW_DAYS - OVERLAP_DAYS)
+    window_start = GRID_ORIGIN + step * max((start_date - GRID_ORIGIN) // step, 0)
+    windows = []
+    while True:
+        window_end = min(window_start + pd.Timedelta(days=WINDOW_DAYS - 1), end_date)
+        windows.append((window_start, window_end))
+        if window_end >= end_date:
+            return windows
+        window_start += step
+
+def anchor_normalize(frames, anchor):
+    """
+    Führt die Payloads eines Fensters auf eine gemeinsame Skala zusammen
+    
+    Google skaliert jede Payload einzeln auf 0-100, die Verhältnisse innerhalb
+    einer Payload bleiben erhalten. Geteilt durch die Summe des Ankers im Fenster
+    sind alle Payloads vergleichbar.
+    
+    Args:
+        frames (list): Payloads eines Fensters (Datum × Begriffe)
+        anchor (str): Anker-Begriff
+    """
+    normalized = [frame / frame[anchor].sum() for frame in frames if frame[anchor].sum() > 0]
+    if not normalized:
+        return None
+    merged = pd.concat(normalized, axis=1)
+    return merged.loc[:, ~merged.columns.duplicated()]
+
+def stitch_windows(windows):
+    """
+    Verkettet Fenster zu einer langen Tagesreihe
+    
+    Jedes Fenster wird über die Summe der Überlappung auf die Skala der bisherigen
+    Reihe gebracht, überlappende Tage werden gemittelt.
+    
+    Args:
+        windows (list): Anker-normalisierte Fenster in zeitlicher Reihenfolge
+    """
+    result = windows[0]
+    for frame in windows[1:]:
+        overlap = result.index.intersection(frame.index)
+        columns = result.columns.intersection(frame.columns)
+        previous = np.nansum(result.loc[overlap, columns].to_numpy())
+        current = np.nansum(frame.loc[overlap, columns].to_numpy())
+        factor = previous / current if previous > 0 and current > 0 else 1.0
+        result = pd.concat([result, frame * factor]).groupby(level=0).mean()
+    return result
 
 class GoogleTrendsFetcher:
-    def __init__(self):
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE):
         """
         Initialisiert den Google Trends Fetcher
+        
+        Beliebig viele Suchbegriffe werden in Payloads zu 5 Begriffen mit einem
+        gemeinsamen Anker aufgeteilt, lange Zeiträume in überlappende Fenster mit
+        täglicher Auflösung. Jede Payload-Antwort wird roh gecacht, erneute Läufe
+        fragen nur neue bzw. noch vorläufige Fenster ab.
+        
+        Args:
+            requests_per_minute (int): Rate Limit für Google Trends
         """
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data/google_trends")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.raw_path = self.base_path / "raw"
+        self.raw_path.mkdir(parents=True, exist_ok=True)
         self.pytrends = TrendReq(hl='en-US', tz=360)
+        self.rate_limiter = RateLimiter(requests_per_minute, 60)
+        self.backoff_seconds = INITIAL_BACKOFF
+    
+    def _cache_file(self, batch, window, geo):
+        """
+        Cache-Datei einer Payload (Begriffe, Fenster, Region)
+        
+        Args:
+            batch (list): Suchbegriffe
+            window (tuple): Start und Ende des Fensters
+            geo (str): Region
+        """
+        timeframe = f"{window[0].strftime('%Y-%m-%d')} {window[1].strftime('%Y-%m-%d')}"
+        key = hashlib.blake2b("|".join(batch + [timeframe, geo]).encode('utf-8'), digest_size=8).hexdigest()
+        return self.raw_path / (geo or 'GLOBAL') / f"{window[0].strftime('%Y%m%d')}_{key}.csv"
+    
+    def _is_cached(self, cache_file, window):
+        """
+        Prüft, ob eine gecachte Payload verwendet werden kann
+        
+        Abgeschlossene Fenster gelten dauerhaft, vorläufige Fenster nur für einige Stunden.
+        
+        Args:
+            cache_file (Path): Cache-Datei
+            window (tuple): Start und Ende des Fensters
+        """
+        if not cache_file.exists():
+            return False
+        if window[1] < pd.Timestamp.now().normalize() - pd.Timedelta(days=OPEN_WINDOW_DAYS):
+            return True
+        return time.time() - cache_file.stat().st_mtime < OPEN_WINDOW_TTL_HOURS * 3600
+    
+    def _request_payload(self, batch, window, geo):
+        """
+        Fragt eine Payload ab, bei HTTP 429 mit adaptivem Backoff
+        
+        Jede 429-Antwort verdoppelt die Wartezeit (bis MAX_BACKOFF), jede
+        erfolgreiche Antwort halbiert sie wieder bis zum Ausgangswert.
+        
+        Args:
+            batch (list): Suchbegriffe (höchstens 5)
+            window (tuple): Start und Ende des Fensters
+            geo (str): Region
+        """
+        timeframe = f"{window[0].strftime('%Y-%m-%d')} {window[1].strftime('%Y-%m-%d')}"
+        for attempt in range(MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            try:
+                self.pytrends.build_payload(batch, cat=0, timeframe=timeframe, geo=geo)
+                data = self.pytrends.interest_over_time()
+                self.backoff_seconds = max(self.backoff_seconds / 2, INITIAL_BACKOFF)
+                return data
+            except Exception as e:
+                response = getattr(e, 'response', None)
+                if getattr(response, 'status_code', None) != 429 or attempt == MAX_RETRIES:
+                    raise
+                self.console.print(f"[yellow]Warnung: Google Trends Rate Limit, warte {self.backoff_seconds:.0f}s[/yellow]")
+                self.rate_limiter.backoff(self.backoff_seconds)
+                self.backoff_seconds = min(self.backoff_seconds * 2, MAX_BACKOFF)
+    
+    def fetch_payload(self, batch, window, geo=''):
+        """
+        Rohe Payload-Antwort aus dem Cache oder von Google Trends
+        
+        Args:
+            batch (list): Suchbegriffe (höchstens 5)
+            window (tuple): Start und Ende des Fensters
+            geo (str): Region
         
-    def fetch_trends_data(self, keywords=None, start_date=None, end_date=None, geo=''):
+        Returns:
+            tuple: DataFrame (Datum × Begriffe) und ob die Antwort aus dem Cache kam
+        """
+        cache_file = self._cache_file(batch, window, geo)
+        if self._is_cached(cache_file, window):
+            return pd.read_csv(cache_file, index_col='date', parse_dates=['date']), True
+        
+        data = self._request_payload(batch, window, geo)
+        data = data.drop(columns=['isPartial'], errors='ignore').reindex(columns=batch)
+        data.index.name = 'date'
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        data.to_csv(cache_file)
+        return data, False
+    
+    def fetch_interest(self, keywords, start_date, end_date, geo='', anchor=ANCHOR_KEYWORD):
+        """
+        Lange tägliche Reihen für beliebig viele Suchbegriffe
+        
+        Args:
+            keywords (list): Suchbegriffe
+            start_date (pd.Timestamp): Erster Tag
+            end_date (pd.Timestamp): Letzter Tag
+            geo (str): Region
+            anchor (str): Anker-Begriff
+        
+        Returns:
+            tuple: DataFrame (Datum × Begriffe, Maximum = 100) und Anzahl neuer Abfragen
+        """
+        batches = keyword_batches(keywords, anchor)
+        windows = daily_windows(start_date, end_date)
+        normalized, requested = [], 0
+        
+        with Progress() as progress:
+            task = progress.add_task("[cyan]Lade Google Trends Payloads...", total=len(batches) * len(windows))
+            
+            for window in windows:
+                frames = []
+                for batch in batches:
+                    try:
+                        data, cached = self.fetch_payload(batch, window, geo)
+                        frames.append(data)
+                        requested += not cached
+                    except Exception as e:
+                        self.console.print(f"[red]Fehler bei {', '.join(batch)} ({window[0].strftime('%Y-%m-%d')}): {str(e)}[/red]")
+                    progress.update(task, advance=1)
+                
+                window_data = anchor_normalize(frames, anchor)
+                if window_data is None:
+                    self.console.print(f"[yellow]Warnung: Anker '{anchor}' ohne Daten ab {window[0].strftime('%Y-%m-%d')}, Fenster übersprungen[/yellow]")
+                    continue
+                normalized.append(window_data)
+        
+        if not normalized:
+            return pd.DataFrame(), requested
+        
+        interest = stitch_windows(normalized).loc[start_date:end_date]
+        interest = interest * 100 / np.nanmax(interest.to_numpy())
+        columns = [keyword for keyword in dict.fromkeys([anchor] + keywords) if keyword in interest.columns]
+        return interest[columns], requested
+    
+    def fetch_trends_data(self, keywords=None, start_date=None, end_date=None, geo='', anchor=ANCHOR_KEYWORD):
         """
         Holt Google Trends Daten
         
@@ -29,67 +261,58 @@ class GoogleTrendsFetcher:
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
             geo (str, optional): Geografische Region (z.B. 'US', 'GB', 'DE')
+            anchor (str, optional): Anker-Begriff in jeder Payload
         """
         try:
-            with self.console.status("[bold blue]Lade Google Trends Daten..."):
-                # Setze Standardwerte
-                if not keywords:
-                    keywords = ['forex trading', 'currency exchange', 'forex market']
-                if not end_date:
-                    end_date = datetime.now()
-                if not start_date:
-                    start_date = end_date - timedelta(days=90)
-                
-                # Konfiguriere die Anfrage
-                self.pytrends.build_payload(
-                    keywords,
-                    cat=0,
-                    timeframe=f'{start_date.strftime("%Y%m%d")} {end_date.strftime("%Y%m%d")}',
-                    geo=geo
-                )
-                
-                # Hole die Daten
-                interest_over_time = self.pytrends.interest_over_time()
-                
-                if interest_over_time.empty:
-                    self.console.print("[yellow]Keine Google Trends Daten verfügbar für den angegebenen Zeitraum[/yellow]")
-                    return
-                
-                # Berechne zusätzliche Metriken
-                data = pd.DataFrame()
-                data['date'] = interest_over_time.index
-                
-                for keyword in keywords:
-                    data[keyword] = interest_over_time[keyword]
-                    data[f'{keyword}_ma7'] = interest_over_time[keyword].rolling(window=7).mean()
-                    data[f'{keyword}_trend'] = interest_over_time[keyword].rolling(window=7).mean().diff()
-                
-                # Speichere die Daten
-                output_file = self.base_path / f"google_trends_{geo}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.csv"
-                data.to_csv(output_file, index=False)
-                
-                # Erstelle eine schöne Zusammenfassung
-                table = Table(title="Google Trends Daten Zusammenfassung")
-                table.add_column("Metrik", style="cyan")
-                table.add_column("Wert", style="green")
-                
-                table.add_row("Zeitraum", f"{data['date'].min().strftime('%Y-%m-%d')} bis {data['date'].max().strftime('%Y-%m-%d')}")
-                table.add_row("Anzahl Datenpunkte", str(len(data)))
-                table.add_row("Region", geo if geo else "Global")
-                
-                for keyword in keywords:
-                    current_value = data[keyword].iloc[-1]
-                    avg_value = data[keyword].mean()
-                    trend = data[f'{keyword}_trend'].iloc[-1]
-                    trend_direction = "↑" if trend > 0 else "↓" if trend < 0 else "→"
-                    
-                    table.add_row(f"{keyword} (Aktuell)", f"{current_value} {trend_direction}")
-                    table.add_row(f"{keyword} (Durchschnitt)", f"{avg_value:.1f}")
-                
-                table.add_row("Speicherort", str(output_file))
-                
-                self.console.print(table)
+            # Setze Standardwerte
+            if not keywords:
+                keywords = ['forex trading', 'currency exchange', 'forex market']
+            end_date = pd.Timestamp(end_date) if end_date else pd.Timestamp.now().normalize()
+            start_date = pd.Timestamp(start_date) if start_date else end_date - timedelta(days=90)
+            
+            interest, requested = self.fetch_interest(keywords, start_date, end_date, geo, anchor)
+            
+            if interest.empty:
+                self.console.print("[yellow]Keine Google Trends Daten verfügbar für den angegebenen Zeitraum[/yellow]")
+                return
+            
+            # Berechne zusätzliche Metriken
+            data = pd.DataFrame()
+            data['date'] = interest.index
+            
+            for keyword in interest.columns:
+                data[keyword] = interest[keyword].to_numpy()
+                data[f'{keyword}_ma7'] = interest[keyword].rolling(window=7).mean().to_numpy()
+                data[f'{keyword}_trend'] = interest[keyword].rolling(window=7).mean().diff().to_numpy()
+            
+            # Speichere die Daten
+            output_file = self.base_path / f"google_trends_{geo}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.csv"
+            data.to_csv(output_file, index=False)
+            
+            # Erstelle eine schöne Zusammenfassung
+            table = Table(title="Google Trends Daten Zusammenfassung")
+            table.add_column("Metrik", style="cyan")
+            table.add_column("Wert", style="green")
+            
+            table.add_row("Zeitraum", f"{data['date'].min().strftime('%Y-%m-%d')} bis {data['date'].max().strftime('%Y-%m-%d')}")
+            table.add_row("Anzahl Datenpunkte", str(len(data)))
+            table.add_row("Region", geo if geo else "Global")
+            table.add_row("Payloads", f"{len(keyword_batches(keywords, anchor)) * len(daily_windows(start_date, end_date))} ({requested} neu abgefragt)")
+            table.add_row("Anker", anchor)
+            
+            for keyword in interest.columns:
+                current_value = data[keyword].iloc[-1]
+                avg_value = data[keyword].mean()
+                trend = data[f'{keyword}_trend'].iloc[-1]
+                trend_direction = "↑" if trend > 0 else "↓" if trend < 0 else "→"
                 
+                table.add_row(f"{keyword} (Aktuell)", f"{current_value:.1f} {trend_direction}")
+                table.add_row(f"{keyword} (Durchschnitt)", f"{avg_value:.1f}")
+            
+            table.add_row("Speicherort", str(output_file))
+            
+            self.console.print(table)
+        
         except Exception as e:
             self.console.print(f"[red]Fehler beim Abrufen der Google Trends Daten: {str(e)}[/red]")
     
@@ -116,7 +339,7 @@ class GoogleTrendsFetcher:
             status = "Leichter Abwärtstrend"
         else:
             status = "Seitwärtsbewegung"
-            
+        
         return status
 
 def main():
@@ -125,19 +348,22 @@ def main():
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
     parser.add_argument('--geo', default='', help='Geografische Region (z.B. US, GB, DE)')
+    parser.add_argument('--anchor', default=ANCHOR_KEYWORD, help='Anker-Begriff in jeder Payload')
+    parser.add_argument('--requests-per-minute', type=int, default=REQUESTS_PER_MINUTE, help='Rate Limit für Google Trends')
     
     args = parser.parse_args()
     
     try:
-        fetcher = GoogleTrendsFetcher()
+        fetcher = GoogleTrendsFetcher(requests_per_minute=args.requests_per_minute)
         fetcher.fetch_trends_data(
             keywords=args.keywords,
             start_date=args.start_date,
             end_date=args.end_date,
-            geo=args.geo
+            geo=args.geo,
+            anchor=args.anchor
         )
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -9,43 +9,303 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
-from textblob import TextBlob
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.sentiment_engine import SentimentEngine, content_hash
+from common.rate_limiter import RateLimiter
+from common.keyword_frequency import top_keywords
+from common.sentiment_features import bucket_stats, compute_features
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+PAGE_SIZE = 100
+MAX_PAGES = 5
+MAX_RETRIES = 3
+REQUESTS_PER_MINUTE = 30
+
+STORE_COLUMNS = ['date', 'query', 'title', 'description', 'source', 'url', 'url_hash', 'content_hash', 'polarity', 'subjectivity']
+SEEN_COLUMNS = ['url_hash', 'content_hash', 'date']
+
+def normalize_url(url):
+    """
+    Normalisiert eine Artikel-URL (ohne Fragment, Tracking-Parameter und abschließenden Slash)
+    
+    Args:
+        url (str): Artikel-URL
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query) if not key.startswith('utm_')])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
 
 class NewsSentimentFetcher:
-    def __init__(self):
+    def __init__(self, max_workers=4, requests_per_minute=REQUESTS_PER_MINUTE):
         """
         Initialisiert den News Sentiment Fetcher
+        
+        Artikel werden pro Suchanfrage und Tag in store/{query}/{YYYY-MM-DD}.csv
+        angehängt. Der Seen-Index (URL- und Inhalts-Hash) verhindert Duplikate
+        über sich überschneidende Abrufe hinweg.
+        
+        Args:
+            max_workers (int): Anzahl paralleler Seitenabrufe
+            requests_per_minute (int): Rate Limit für die News API
         """
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data/news_sentiment")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.store_path = self.base_path / "store"
+        self.seen_path = self.base_path / "seen_index"
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        self.seen_path.mkdir(parents=True, exist_ok=True)
         load_dotenv()
+        self.sentiment_engine = SentimentEngine(console=self.console)
+        self.session = requests.Session()
+        self.rate_limiter = RateLimiter(requests_per_minute, 60)
+        self.max_workers = max_workers
         
         # Lade API-Key aus .env
         self.api_key = os.getenv('NEWS_API_KEY')
         if not self.api_key:
             self.console.print("[yellow]Warnung: Kein NEWS_API_KEY in .env gefunden[/yellow]")
+    
+    def _query_slug(self, query):
+        """
+        Ordnername einer Suchanfrage im Store
         
-        # Initialisiere NLTK
-        try:
-            nltk.data.find('tokenizers/punkt')
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('punkt')
-            nltk.download('stopwords')
+        Args:
+            query (str): Suchbegriff
+        """
+        return query.replace(' ', '_').replace('/', '_')
+    
+    def _seen_file(self, query):
+        """
+        Pfad des Seen-Index einer Suchanfrage
+        
+        Args:
+            query (str): Suchbegriff
+        """
+        return self.seen_path / f"{self._query_slug(query)}.csv"
+    
+    def load_seen_index(self, query):
+        """
+        Lädt die bereits gespeicherten Artikel-Hashes einer Suchanfrage
+        
+        Args:
+            query (str): Suchbegriff
+        """
+        seen_file = self._seen_file(query)
+        if not seen_file.exists():
+            return pd.DataFrame(columns=SEEN_COLUMNS)
+        return pd.read_csv(seen_file, dtype={'url_hash': str, 'content_hash': str}, parse_dates=['date'])
+    
+    def _request_page(self, params, page):
+        """
+        Holt eine Ergebnisseite der News API innerhalb des Rate Limits
+        
+        Bei HTTP 429 wird der Limiter für alle Threads gesperrt und erneut
+        versucht. Liefert None, wenn der API-Plan keine weiteren Seiten erlaubt.
+        
+        Args:
+            params (dict): Request-Parameter ohne Seite
+            page (int): Seitennummer (ab 1)
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            response = self.session.get(NEWS_API_URL, params={**params, 'page': page, 'pageSize': PAGE_SIZE}, timeout=30)
+            
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code == 429 and attempt < MAX_RETRIES:
+                self.rate_limiter.backoff(float(response.headers.get('Retry-After', 2 ** attempt * 10)))
+                continue
+            
+            code = response.json().get('code') if 'json' in response.headers.get('Content-Type', '') else None
+            if code == 'maximumResultsReached':
+                return None
+            raise RuntimeError(f"News API Seite {page}: HTTP {response.status_code} {code or ''}".strip())
+    
+    def _fetch_window(self, params, max_pages):
+        """
+        Holt die Ergebnisseiten eines Zeitfensters
+        
+        Die erste Seite liefert die Gesamtzahl der Treffer, die übrigen Seiten
+        werden parallel abgerufen. Schlägt eine Seite fehl, wird der Fehler
+        weitergereicht, damit keine Lücke gespeichert wird.
+        
+        Args:
+            params (dict): Request-Parameter ohne Seite
+            max_pages (int): Maximale Anzahl Seiten
+        
+        Returns:
+            tuple: Artikel (neueste zuerst), Anzahl Seiten, ob alle Treffer abgerufen wurden
+        """
+        first = self._request_page(params, 1)
+        if first is None:
+            return [], 0, False
+        
+        pages = {1: first['articles']}
+        total_pages = -(-first.get('totalResults', 0) // PAGE_SIZE)
+        n_pages = min(max_pages, total_pages)
+        complete = n_pages == total_pages or total_pages == 0
+        if n_pages > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._request_page, params, page): page for page in range(2, n_pages + 1)}
+                
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result is None:
+                        complete = False
+                    else:
+                        pages[futures[future]] = result['articles']
+        
+        return [article for page in sorted(pages) for article in pages[page]], len(pages), complete
+    
+    def fetch_pages(self, query, start_date, end_date, language='en', max_pages=MAX_PAGES):
+        """
+        Holt alle Artikel einer Suchanfrage im Zeitraum
+        
+        Liefert ein Fenster mehr Treffer als max_pages Seiten (oder erlaubt der
+        API-Plan keine weiteren Seiten), wird das Fenster am ältesten erhaltenen
+        Artikel geschlossen und der Rest in einem weiteren Fenster abgefragt.
+        
+        Args:
+            query (str): Suchbegriff
+            start_date (pd.Timestamp): Beginn des Zeitraums (UTC)
+            end_date (pd.Timestamp): Ende des Zeitraums (UTC)
+            language (str): Sprache der Artikel
+            max_pages (int): Maximale Anzahl Seiten je Zeitfenster
+            
+        Returns:
+            tuple: Liste der Artikel und Anzahl abgerufener Seiten
+        """
+        params = {
+            'q': query,
+            'from': start_date.strftime('%Y-%m-%dT%H:%M:%S'),
+            'language': language,
+            'sortBy': 'publishedAt',
+            'apiKey': self.api_key
+        }
+        
+        articles, n_pages, window_end = [], 0, end_date
+        while True:
+            window, pages, complete = self._fetch_window({**params, 'to': window_end.strftime('%Y-%m-%dT%H:%M:%S')}, max_pages)
+            articles += window
+            n_pages += pages
+            if complete:
+                break
+            
+            # Nach publishedAt sortiert: der älteste Artikel begrenzt das nächste Fenster
+            dates = pd.to_datetime([article.get('publishedAt') for article in window], utc=True).dropna()
+            if dates.empty or dates.min().floor('s') >= window_end or dates.min() <= start_date:
+                raise RuntimeError(f"News API liefert für '{query}' bis {window_end} nicht alle Treffer, Zeitfenster lässt sich nicht weiter teilen")
+            window_end = dates.min().floor('s')
         
-    def fetch_news_data(self, query, start_date=None, end_date=None, language='en'):
+        return articles, n_pages
+    
+    def _articles_frame(self, articles, query):
         """
-        Holt News-Daten von der News API
+        Wandelt API-Artikel in das Store-Format inklusive URL- und Inhalts-Hash
+        
+        Args:
+            articles (list): Artikel aus der News API
+            query (str): Suchbegriff
+        """
+        df = pd.DataFrame({
+            'date': [article.get('publishedAt') for article in articles],
+            'query': query,
+            'title': [article.get('title') or "" for article in articles],
+            'description': [article.get('description') or "" for article in articles],
+            'source': [(article.get('source') or {}).get('name') or "" for article in articles],
+            'url': [article.get('url') or "" for article in articles]
+        })
+        df['date'] = pd.to_datetime(df['date'], utc=True)
+        df['url_hash'] = df['url'].map(lambda url: content_hash(normalize_url(url)))
+        
+        # Syndizierte Artikel haben verschiedene URLs, aber denselben Text (ohne Text kein Hash)
+        text = (df['title'] + " " + df['description']).str.lower().str.split().str.join(" ")
+        df['content_hash'] = text.map(lambda value: content_hash(value) if value else "")
+        return df
+    
+    def deduplicate(self, df, seen):
+        """
+        Entfernt Artikel, deren URL oder Inhalt bereits gespeichert ist oder im Abruf doppelt vorkommt
+        
+        Artikel ohne Titel und Beschreibung werden nur über die URL erkannt.
+        
+        Args:
+            df (pd.DataFrame): Artikel im Store-Format
+            seen (pd.DataFrame): Seen-Index der Suchanfrage
+        """
+        has_text = df['content_hash'] != ""
+        known = df['url_hash'].isin(seen['url_hash']) | (has_text & df['content_hash'].isin(seen['content_hash']))
+        df = df[~known & df['date'].notna()].drop_duplicates('url_hash')
+        df = df[(df['content_hash'] == "") | ~df['content_hash'].duplicated()]
+        return df.sort_values('date').reset_index(drop=True)
+    
+    def append_to_store(self, df, query):
+        """
+        Hängt neue Artikel an die Tages-Partitionen der Suchanfrage an und aktualisiert den Seen-Index
+        
+        Args:
+            df (pd.DataFrame): Neue, deduplizierte Artikel mit Sentiment
+            query (str): Suchbegriff
+            
+        Returns:
+            list: Geschriebene Partitionen
+        """
+        query_path = self.store_path / self._query_slug(query)
+        query_path.mkdir(parents=True, exist_ok=True)
+        
+        partitions = []
+        for day, day_df in df.groupby(df['date'].dt.strftime('%Y-%m-%d')):
+            partition = query_path / f"{day}.csv"
+            day_df[STORE_COLUMNS].to_csv(partition, mode='a', header=not partition.exists(), index=False)
+            partitions.append(partition)
+        
+        seen_file = self._seen_file(query)
+        df[SEEN_COLUMNS].to_csv(seen_file, mode='a', header=not seen_file.exists(), index=False)
+        return partitions
+    
+    def load_news(self, query, start_date=None, end_date=None):
+        """
+        Lädt gespeicherte Artikel einer Suchanfrage aus dem partitionierten Store
+        
+        Es werden nur die Partitionen im angefragten Zeitraum gelesen.
+        
+        Args:
+            query (str): Suchbegriff
+            start_date (str, optional): Erster Tag (YYYY-MM-DD)
+            end_date (str, optional): Letzter Tag (YYYY-MM-DD)
+        """
+        partitions = sorted((self.store_path / self._query_slug(query)).glob("*.csv"))
+        partitions = [
+            partition for partition in partitions
+            if (not start_date or partition.stem >= start_date) and (not end_date or partition.stem <= end_date)
+        ]
+        
+        if not partitions:
+            return pd.DataFrame(columns=STORE_COLUMNS)
+        
+        df = pd.concat((pd.read_csv(partition, keep_default_na=False) for partition in partitions), ignore_index=True)
+        df['date'] = pd.to_datetime(df['date'], utc=True)
+        return df.sort_values('date').reset_index(drop=True)
+    
+    def fetch_news_data(self, query, start_date=None, end_date=None, language='en', max_pages=MAX_PAGES):
+        """
+        Holt neue News-Artikel von der News API und hängt sie an den Store an
+        
+        Ohne Startdatum wird ab dem jüngsten gespeicherten Artikel der Suchanfrage
+        abgefragt, sodass stündliche Aktualisierungen nur neue Artikel laden.
+        Schlägt eine Seite fehl, wird nichts gespeichert und der Cursor bleibt stehen.
         
         Args:
             query (str): Suchbegriff
             start_date (str, optional): Startdatum im Format YYYY-MM-DD
             end_date (str, optional): Enddatum im Format YYYY-MM-DD
             language (str, optional): Sprache der Artikel
+            max_pages (int, optional): Maximale Anzahl Ergebnisseiten je Zeitfenster
         """
         try:
             with self.console.status("[bold blue]Lade News-Daten..."):
@@ -53,79 +313,57 @@ class NewsSentimentFetcher:
                     self.console.print("[red]Fehler: Kein API-Key verfügbar[/red]")
                     return
                 
+                seen = self.load_seen_index(query)
+                
                 # Setze Standardwerte
-                if not end_date:
-                    end_date = datetime.now()
-                if not start_date:
+                if end_date:
+                    end_date = pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+                else:
+                    end_date = pd.Timestamp.now(tz='UTC')
+                if start_date:
+                    start_date = pd.Timestamp(start_date, tz='UTC')
+                elif len(seen):
+                    start_date = pd.to_datetime(seen['date'], utc=True).max()
+                else:
                     start_date = end_date - timedelta(days=7)
                 
-                # News API URL
-                url = "https://newsapi.org/v2/everything"
-                params = {
-                    'q': query,
-                    'from': start_date.strftime('%Y-%m-%d'),
-                    'to': end_date.strftime('%Y-%m-%d'),
-                    'language': language,
-                    'sortBy': 'publishedAt',
-                    'apiKey': self.api_key
-                }
+                articles, n_pages = self.fetch_pages(query, start_date, end_date, language, max_pages)
+                df = self.deduplicate(self._articles_frame(articles, query), seen)
                 
-                # Lade die Daten
-                response = requests.get(url, params=params)
-                if response.status_code == 200:
-                    data = response.json()
-                    articles = data['articles']
-                    
-                    # Verarbeite die Artikel
-                    processed_articles = []
-                    for article in articles:
-                        # Analysiere den Sentiment
-                        text = article['title'] + " " + article['description']
-                        sentiment = TextBlob(text).sentiment
-                        
-                        processed_article = {
-                            'date': article['publishedAt'],
-                            'title': article['title'],
-                            'description': article['description'],
-                            'source': article['source']['name'],
-                            'url': article['url'],
-                            'polarity': sentiment.polarity,
-                            'subjectivity': sentiment.subjectivity
-                        }
-                        processed_articles.append(processed_article)
-                    
-                    # Konvertiere zu DataFrame
-                    df = pd.DataFrame(processed_articles)
-                    df['date'] = pd.to_datetime(df['date'])
-                    
-                    # Speichere die Daten
-                    output_file = self.base_path / f"news_sentiment_{query.replace(' ', '_')}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.csv"
-                    df.to_csv(output_file, index=False)
-                    
-                    # Erstelle eine schöne Zusammenfassung
-                    table = Table(title="News Sentiment Zusammenfassung")
-                    table.add_column("Metrik", style="cyan")
-                    table.add_column("Wert", style="green")
-                    
-                    table.add_row("Zeitraum", f"{df['date'].min().strftime('%Y-%m-%d')} bis {df['date'].max().strftime('%Y-%m-%d')}")
-                    table.add_row("Anzahl Artikel", str(len(df)))
-                    table.add_row("Durchschnittliche Polarität", f"{df['polarity'].mean():.2f}")
-                    table.add_row("Durchschnittliche Subjektivität", f"{df['subjectivity'].mean():.2f}")
-                    
-                    # Füge Sentiment-Verteilung hinzu
-                    positive = len(df[df['polarity'] > 0])
-                    neutral = len(df[df['polarity'] == 0])
-                    negative = len(df[df['polarity'] < 0])
-                    
-                    table.add_row("Positive Artikel", f"{positive} ({positive/len(df)*100:.1f}%)")
-                    table.add_row("Neutrale Artikel", f"{neutral} ({neutral/len(df)*100:.1f}%)")
-                    table.add_row("Negative Artikel", f"{negative} ({negative/len(df)*100:.1f}%)")
-                    
-                    table.add_row("Speicherort", str(output_file))
-                    
-                    self.console.print(table)
-                else:
-                    self.console.print(f"[yellow]Fehler beim Abrufen der News-Daten: {response.status_code}[/yellow]")
+                if df.empty:
+                    self.console.print(f"[yellow]Keine neuen Artikel für '{query}' ({len(articles)} Artikel, alle bekannt)[/yellow]")
+                    return
+                
+                # Nur neue Artikel werden bewertet
+                sentiment = self.sentiment_engine.score((df['title'] + " " + df['description']).tolist())
+                df['polarity'] = sentiment['polarity'].to_numpy()
+                df['subjectivity'] = sentiment['subjectivity'].to_numpy()
+                partitions = self.append_to_store(df, query)
+                
+                # Erstelle eine schöne Zusammenfassung
+                table = Table(title="News Sentiment Zusammenfassung")
+                table.add_column("Metrik", style="cyan")
+                table.add_column("Wert", style="green")
+                
+                table.add_row("Zeitraum", f"{df['date'].min().strftime('%Y-%m-%d %H:%M')} bis {df['date'].max().strftime('%Y-%m-%d %H:%M')}")
+                table.add_row("Abgerufene Seiten", str(n_pages))
+                table.add_row("Neue Artikel", f"{len(df)} von {len(articles)}")
+                table.add_row("Durchschnittliche Polarität", f"{df['polarity'].mean():.2f}")
+                table.add_row("Durchschnittliche Subjektivität", f"{df['subjectivity'].mean():.2f}")
+                
+                # Füge Sentiment-Verteilung hinzu
+                positive = len(df[df['polarity'] > 0])
+                neutral = len(df[df['polarity'] == 0])
+                negative = len(df[df['polarity'] < 0])
+                
+                table.add_row("Positive Artikel", f"{positive} ({positive/len(df)*100:.1f}%)")
+                table.add_row("Neutrale Artikel", f"{neutral} ({neutral/len(df)*100:.1f}%)")
+                table.add_row("Negative Artikel", f"{negative} ({negative/len(df)*100:.1f}%)")
+                
+                table.add_row("Tages-Partitionen", str(len(partitions)))
+                table.add_row("Speicherort", str(partitions[0].parent))
+                
+                self.console.print(table)
                 
         except Exception as e:
             self.console.print(f"[red]Fehler beim Abrufen der News-Daten: {str(e)}[/red]")
@@ -134,40 +372,43 @@ class NewsSentimentFetcher:
         """
         Analysiert Schlüsselwörter in einem Text
         
+        Für Abfragen über den gespeicherten Korpus (Top-N, Trends je Zeitraum)
+        siehe common/keyword_frequency.py.
+        
         Args:
             text (str): Zu analysierender Text
         """
-        # Tokenisiere und entferne Stopwords
-        tokens = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english'))
-        keywords = [word for word in tokens if word.isalnum() and word not in stop_words]
-        
-        # Zähle Häufigkeiten
-        keyword_freq = pd.Series(keywords).value_counts()
-        return keyword_freq.head(10)
+        return top_keywords(text, 10)
     
     def get_sentiment_trend(self, data):
         """
         Analysiert den Sentiment-Trend
         
+        Vergleicht den schnellen mit dem langsamen EWMA der täglichen Polarität
+        (wie das Feature 'trend' in common/sentiment_features.py) statt nur die
+        letzten beiden Tagesmittel.
+        
         Args:
             data (pd.DataFrame): News-Daten
         """
-        # Berechne täglichen Durchschnitt
-        daily_sentiment = data.groupby(data['date'].dt.date)['polarity'].mean()
+        if data['date'].dt.date.nunique() < 2:
+            return "Nicht genügend Daten für Trend-Analyse"
         
-        # Bestimme Trend
-        if len(daily_sentiment) >= 2:
-            trend = daily_sentiment.iloc[-1] - daily_sentiment.iloc[-2]
-            
-            if trend > 0.1:
-                return "Verbesserung des Sentiments"
-            elif trend < -0.1:
-                return "Verschlechterung des Sentiments"
-            else:
-                return "Stabiles Sentiment"
+        items = pd.DataFrame({
+            'date': pd.to_datetime(data['date'], utc=True).dt.tz_localize(None),
+            'polarity': data['polarity'],
+            'weight': 1.0
+        })
+        stats = bucket_stats(items, 'daily')
+        stats = stats.reindex(pd.date_range(stats.index.min(), stats.index.max(), freq='D'), fill_value=0.0)
+        trend = compute_features(stats.to_numpy()[:, None, :], 'daily')['trend'][-1, 0]
+        
+        if trend > 0.05:
+            return "Verbesserung des Sentiments"
+        elif trend < -0.05:
+            return "Verschlechterung des Sentiments"
         else:
-            return "Nicht genügend Daten für Trend-Analyse"
+            return "Stabiles Sentiment"
 
 def main():
     parser = argparse.ArgumentParser(description='News Sentiment Fetcher')
@@ -175,16 +416,20 @@ def main():
     parser.add_argument('--start-date', help='Startdatum (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Enddatum (YYYY-MM-DD)')
     parser.add_argument('--language', default='en', help='Sprache (z.B. en, de, fr)')
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES, help='Maximale Anzahl Ergebnisseiten je Zeitfenster')
+    parser.add_argument('--max-workers', type=int, default=4, help='Anzahl paralleler Seitenabrufe')
+    parser.add_argument('--requests-per-minute', type=int, default=REQUESTS_PER_MINUTE, help='Rate Limit für die News API')
     
     args = parser.parse_args()
     
     try:
-        fetcher = NewsSentimentFetcher()
+        fetcher = NewsSentimentFetcher(max_workers=args.max_workers, requests_per_minute=args.requests_per_minute)
         fetcher.fetch_news_data(
             query=args.query,
             start_date=args.start_date,
             end_date=args.end_date,
-            language=args.language
+            language=args.language,
+            max_pages=args.max_pages
         )
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
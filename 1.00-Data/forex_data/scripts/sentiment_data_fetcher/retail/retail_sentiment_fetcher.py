@@ -1,7 +1,11 @@
 import pandas as pd
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timezone
 import os
+import re
+import time
+import hashlib
 from pathlib import Path
 import argparse
 from rich.console import Console
@@ -9,19 +13,98 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import threading
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.rate_limiter import RateLimiter
+
+SENTIMENT_URL = "https://www.tradingview.com/markets/currencies/sentiment/{symbol}"
+REQUESTS_PER_MINUTE = 120
+PARSE_CACHE_SIZE = 1000
+
+STORE_COLUMNS = ['date', 'long_percentage', 'short_percentage', 'total_traders', 'long_traders', 'short_traders']
+SNAPSHOT_FIELDS = ['long_percentage', 'short_percentage', 'total_traders']
+
+# Felder im eingebetteten JSON bzw. Text der Sentiment-Seite
+FIELD_PATTERNS = {
+    'long_percentage': re.compile(r'"?long_?percentage"?\s*[:=]\s*"?(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'short_percentage': re.compile(r'"?short_?percentage"?\s*[:=]\s*"?(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'total_traders': re.compile(r'"?total_?traders"?\s*[:=]\s*"?(\d+)', re.IGNORECASE)
+}
+# Text-Fallback nur als Paar "70% Long ... 30% Short" (nicht "70% long-term")
+TEXT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*%\s*long\b(?!-)[^\d%]{0,40}?(\d+(?:\.\d+)?)\s*%\s*short\b(?!-)', re.IGNORECASE)
+
+def parse_sentiment_page(html):
+    """
+    Liest Long/Short-Anteile und Anzahl Trader aus einer Sentiment-Seite
+    
+    Args:
+        html (str): HTML der Seite
+    
+    Returns:
+        dict: Snapshot-Felder oder None, wenn die Seite keine Sentiment-Daten enthält.
+            Fehlt die Anzahl Trader, sind die Trader-Felder None (leer in der CSV).
+    """
+    values = {}
+    for field in SNAPSHOT_FIELDS:
+        match = FIELD_PATTERNS[field].search(html)
+        if match:
+            values[field] = float(match.group(1))
+    
+    if 'long_percentage' not in values:
+        match = TEXT_PATTERN.search(html)
+        if not match:
+            return None
+        values['long_percentage'] = float(match.group(1))
+        values.setdefault('short_percentage', float(match.group(2)))
+    values.setdefault('short_percentage', 100.0 - values['long_percentage'])
+    
+    total = values.setdefault('total_traders', None)
+    values['long_traders'] = round(total * values['long_percentage'] / 100) if total is not None else None
+    values['short_traders'] = round(total * values['short_percentage'] / 100) if total is not None else None
+    return values
+
+def sentiment_label(long_percentage):
+    """
+    Einordnung der Retail-Positionierung
+    
+    Args:
+        long_percentage (float): Anteil Long-Positionen in Prozent
+    """
+    if long_percentage >= 55:
+        return 'BULLISH'
+    if long_percentage <= 45:
+        return 'BEARISH'
+    return 'NEUTRAL'
 
 class RetailSentimentFetcher:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_workers=8, requests_per_minute=REQUESTS_PER_MINUTE):
         """
         Initialisiert den Retail Sentiment Fetcher
         
+        Alle Paare werden parallel über eine gemeinsame Session abgefragt. Mit
+        ETag/Last-Modified kosten unveränderte Seiten nur eine 304-Antwort, geparste
+        Ergebnisse werden nach Inhalts-Hash gecacht. Snapshots werden nur bei einer
+        Änderung an store/{symbol}/{YYYY-MM}.csv angehängt.
+        
         Args:
             api_key (str, optional): TradingView API Key. Wenn nicht angegeben, wird versucht, ihn aus der .env Datei zu laden.
+            max_workers (int): Anzahl paralleler Abfragen
+            requests_per_minute (int): Rate Limit für TradingView
         """
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data/retail_sentiment")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.store_path = self.base_path / "store"
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        self.state_file = self.base_path / "_scraper_state.json"
+        self.state = self._load_state()
+        self.state_lock = threading.Lock()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_minute, 60)
         
         # Lade API Key
         load_dotenv()
@@ -29,99 +112,243 @@ class RetailSentimentFetcher:
         if not self.api_key:
             self.console.print("[yellow]Kein TradingView API Key gefunden. Verwende öffentliche Daten.[/yellow]")
         
-    def fetch_tradingview_data(self, symbol, timeframe='1D'):
+        # Eine Session mit Connection-Pool für alle Threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if self.api_key:
+            self.session.headers['Authorization'] = f"Bearer {self.api_key}"
+    
+    def _load_state(self):
+        """
+        Lädt HTTP-Validatoren, Parse-Cache und letzten Snapshot je Paar
+        """
+        if self.state_file.exists():
+            with open(self.state_file) as f:
+                return json.load(f)
+        return {'http': {}, 'parsed': {}, 'last': {}}
+    
+    def _save_state(self):
+        """
+        Speichert den Zustand, der Parse-Cache behält die zuletzt genutzten Einträge
+        """
+        parsed = self.state['parsed']
+        self.state['parsed'] = dict(list(parsed.items())[-PARSE_CACHE_SIZE:])
+        with open(self.state_file, 'w') as f:
+            # Ohne sort_keys, die Reihenfolge von 'parsed' ist die LRU-Reihenfolge
+            json.dump(self.state, f, indent=2)
+    
+    def fetch_snapshot(self, symbol, url=None):
+        """
+        Holt den aktuellen Long/Short-Snapshot eines Paares
+        
+        Sendet If-None-Match/If-Modified-Since. Bei 304 oder unverändertem
+        Inhalts-Hash wird nicht erneut geparst.
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            url (str, optional): Seite (Standard: TradingView Sentiment-Seite)
+        
+        Returns:
+            tuple: Snapshot (dict oder None) und Status (neu, 304, Hash, leer)
+        """
+        url = url or SENTIMENT_URL.format(symbol=symbol)
+        with self.state_lock:
+            validators = self.state['http'].get(url, {})
+            cached = self.state['parsed'].get(validators.get('content_hash'))
+        
+        # Ohne gecachtes Parse-Ergebnis nützt eine 304-Antwort nichts
+        headers = {}
+        if cached is not None and validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if cached is not None and validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        
+        self.rate_limiter.acquire()
+        response = self.session.get(url, headers=headers, timeout=30)
+        
+        if response.status_code == 304:
+            with self.state_lock:
+                parsed = self.state['parsed']
+                parsed[validators['content_hash']] = parsed.pop(validators['content_hash'], cached)
+            return cached, '304'
+        response.raise_for_status()
+        
+        content_hash = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+        with self.state_lock:
+            self.state['http'][url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': content_hash
+            }
+            parsed = self.state['parsed']
+            if content_hash in parsed:
+                parsed[content_hash] = parsed.pop(content_hash)
+                return parsed[content_hash], 'Hash'
+        
+        snapshot = parse_sentiment_page(response.text)
+        with self.state_lock:
+            self.state['parsed'][content_hash] = snapshot
+        return snapshot, 'neu' if snapshot else 'leer'
+    
+    def append_snapshots(self, snapshots, timestamp):
         """
-        Holt Retail-Sentiment-Daten von TradingView
+        Hängt geänderte Snapshots an die Monats-Partitionen der Paare an
+        
+        Args:
+            snapshots (dict): Symbol -> Snapshot
+            timestamp (datetime): Zeitpunkt der Abfrage (UTC)
+        
+        Returns:
+            list: Symbole mit neuem Eintrag
+        """
+        changed = []
+        for symbol, snapshot in snapshots.items():
+            if snapshot is None or self.state['last'].get(symbol) == snapshot:
+                continue
+            
+            partition = self.store_path / symbol / f"{timestamp.strftime('%Y-%m')}.csv"
+            partition.parent.mkdir(parents=True, exist_ok=True)
+            row = pd.DataFrame([{'date': timestamp.isoformat(timespec='seconds'), **snapshot}])[STORE_COLUMNS]
+            row.to_csv(partition, mode='a', header=not partition.exists(), index=False)
+            self.state['last'][symbol] = snapshot
+            changed.append(symbol)
+        return changed
+    
+    def load_history(self, symbol, start_date=None, end_date=None, freq=None):
+        """
+        Lädt die Snapshot-Historie eines Paares
         
         Args:
             symbol (str): Forex-Paar Symbol
-            timeframe (str): Zeitrahmen für die Daten
+            start_date (str, optional): Startdatum (YYYY-MM-DD)
+            end_date (str, optional): Enddatum (YYYY-MM-DD)
+            freq (str, optional): Regelmäßiges Raster (z.B. '5min', 'h'), Werte werden fortgeschrieben
+        
+        Returns:
+            pd.DataFrame: Snapshots mit Datum als Index
         """
-        try:
-            # TradingView API-Endpunkt (Beispiel)
-            url = f"https://www.tradingview.com/markets/currencies/sentiment/{symbol}"
+        partitions = sorted((self.store_path / symbol).glob("*.csv"))
+        partitions = [
+            partition for partition in partitions
+            if (not start_date or partition.stem >= start_date[:7]) and (not end_date or partition.stem <= end_date[:7])
+        ]
+        if not partitions:
+            return pd.DataFrame(columns=STORE_COLUMNS[1:])
+        
+        df = pd.concat((pd.read_csv(partition) for partition in partitions), ignore_index=True)
+        df = df.set_index(pd.to_datetime(df.pop('date'), utc=True)).sort_index()
+        if freq:
+            df = df.resample(freq).last().ffill()
+        if start_date:
+            df = df[df.index >= pd.Timestamp(start_date, tz='UTC')]
+        if end_date:
+            df = df[df.index < pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1)]
+        return df
+    
+    def poll(self, symbols):
+        """
+        Fragt alle Paare einmal parallel ab und speichert geänderte Snapshots
+        
+        Args:
+            symbols (list): Liste von Forex-Paaren
+        
+        Returns:
+            dict: Symbol -> (Snapshot, Status)
+        """
+        timestamp = datetime.now(timezone.utc).replace(microsecond=0)
+        results = {}
+        
+        with Progress() as progress:
+            task = progress.add_task("[cyan]Lade Retail-Sentiment-Daten...", total=len(symbols))
             
-            with self.console.status(f"[bold blue]Lade Sentiment-Daten für {symbol}..."):
-                response = requests.get(url)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self.fetch_snapshot, symbol): symbol for symbol in symbols}
                 
-                if response.status_code == 200:
-                    # Hier müsste die tatsächliche Verarbeitung der TradingView-Daten implementiert werden
-                    # Dies ist nur ein Beispiel, da TradingView keine offizielle API hat
-                    data = {
-                        'date': datetime.now(),
-                        'symbol': symbol,
-                        'timeframe': timeframe,
-                        'sentiment': 'NEUTRAL',  # Beispielwert
-                        'long_percentage': 50,   # Beispielwert
-                        'short_percentage': 50,  # Beispielwert
-                        'total_traders': 1000,   # Beispielwert
-                        'long_traders': 500,     # Beispielwert
-                        'short_traders': 500     # Beispielwert
-                    }
-                    
-                    df = pd.DataFrame([data])
-                    output_file = self.base_path / f"tradingview_sentiment_{symbol}_{timeframe}.csv"
-                    df.to_csv(output_file, index=False)
-                    
-                    # Erstelle eine schöne Zusammenfassung
-                    table = Table(title=f"Retail Sentiment für {symbol}")
-                    table.add_column("Metrik", style="cyan")
-                    table.add_column("Wert", style="green")
-                    
-                    table.add_row("Zeitpunkt", data['date'].strftime('%Y-%m-%d %H:%M:%S'))
-                    table.add_row("Zeitrahmen", timeframe)
-                    table.add_row("Sentiment", data['sentiment'])
-                    table.add_row("Long %", f"{data['long_percentage']}%")
-                    table.add_row("Short %", f"{data['short_percentage']}%")
-                    table.add_row("Gesamttrader", str(data['total_traders']))
-                    table.add_row("Speicherort", str(output_file))
-                    
-                    self.console.print(table)
-                else:
-                    self.console.print(f"[red]Fehler beim Abrufen der TradingView-Daten für {symbol}: {response.status_code}[/red]")
-                    
-        except Exception as e:
-            self.console.print(f"[red]Fehler beim API-Aufruf: {str(e)}[/red]")
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        results[symbol] = future.result()
+                    except Exception as e:
+                        self.console.print(f"[red]Fehler beim Abrufen der TradingView-Daten für {symbol}: {str(e)}[/red]")
+                        results[symbol] = (None, 'Fehler')
+                    progress.update(task, advance=1)
+        
+        changed = self.append_snapshots({symbol: snapshot for symbol, (snapshot, _) in results.items()}, timestamp)
+        self._save_state()
+        
+        for symbol, (snapshot, status) in results.items():
+            if status == 'leer':
+                self.console.print(f"[yellow]Warnung: Keine Sentiment-Daten auf der Seite für {symbol}[/yellow]")
+        
+        # Erstelle eine schöne Zusammenfassung
+        table = Table(title=f"Retail Sentiment {timestamp.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+        table.add_column("Symbol", style="cyan")
+        table.add_column("Sentiment", style="green")
+        table.add_column("Long %", style="green")
+        table.add_column("Short %", style="green")
+        table.add_column("Gesamttrader", style="green")
+        table.add_column("Abruf", style="green")
+        table.add_column("Gespeichert", style="green")
+        
+        for symbol in symbols:
+            snapshot, status = results[symbol]
+            if snapshot is None:
+                table.add_row(symbol, "-", "-", "-", "-", status, "nein")
+                continue
+            table.add_row(
+                symbol,
+                sentiment_label(snapshot['long_percentage']),
+                f"{snapshot['long_percentage']:.1f}%",
+                f"{snapshot['short_percentage']:.1f}%",
+                f"{snapshot['total_traders']:.0f}" if snapshot['total_traders'] is not None else "-",
+                status,
+                "ja" if symbol in changed else "unverändert"
+            )
+        
+        table.add_row("Speicherort", str(self.store_path), "", "", "", "", "")
+        self.console.print(table)
+        return results
     
-    def fetch_retail_sentiment(self, symbols=None, timeframes=None):
+    def fetch_retail_sentiment(self, symbols=None, interval=0):
         """
         Hauptfunktion zum Abrufen aller Retail-Sentiment-Daten
         
         Args:
             symbols (list, optional): Liste von Forex-Paaren
-            timeframes (list, optional): Liste von Zeitrahmen
+            interval (float, optional): Abfrage-Intervall in Minuten (0 = einmalig)
         """
         # Standardwerte
         if not symbols:
             symbols = ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']
-        if not timeframes:
-            timeframes = ['1D', '1W', '1M']
         
-        with Progress() as progress:
-            task = progress.add_task("[cyan]Lade Retail-Sentiment-Daten...", total=len(symbols) * len(timeframes))
-            
-            for symbol in symbols:
-                for timeframe in timeframes:
-                    self.console.print(f"\n[bold blue]Lade Daten für {symbol} ({timeframe})...[/bold blue]")
-                    self.fetch_tradingview_data(symbol, timeframe)
-                    progress.update(task, advance=1)
+        while True:
+            started = time.monotonic()
+            self.poll(symbols)
+            if not interval:
+                return
+            time.sleep(max(interval * 60 - (time.monotonic() - started), 0))
 
 def main():
     parser = argparse.ArgumentParser(description='Retail Sentiment Fetcher')
     parser.add_argument('--api-key', help='TradingView API Key')
     parser.add_argument('--symbols', nargs='+', help='Liste von Forex-Paaren')
-    parser.add_argument('--timeframes', nargs='+', help='Liste von Zeitrahmen')
+    parser.add_argument('--interval', type=float, default=0, help='Abfrage-Intervall in Minuten (0 = einmalig)')
+    parser.add_argument('--max-workers', type=int, default=8, help='Anzahl paralleler Abfragen')
     
     args = parser.parse_args()
     
     try:
-        fetcher = RetailSentimentFetcher(api_key=args.api_key)
+        fetcher = RetailSentimentFetcher(api_key=args.api_key, max_workers=args.max_workers)
         fetcher.fetch_retail_sentiment(
             symbols=args.symbols,
-            timeframes=args.timeframes
+            interval=args.interval
         )
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -2,6 +2,9 @@ import pandas as pd
 import requests
 from datetime import datetime
 import os
+import json
+import time
+import threading
 from pathlib import Path
 import argparse
 from rich.console import Console
@@ -9,16 +12,126 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import tweepy
 import praw
-from textblob import TextBlob
+import prawcore
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.sentiment_engine import SentimentEngine
+from common.rate_limiter import RateLimiter, RateLimitExceeded
+
+SUBREDDITS = ['forex', 'trading', 'investing']
+SOURCES = ['twitter', 'reddit']
+
+# (Aufrufe, Sekunden) je API: Twitter v1.1 Suche 180 pro 15 Minuten, Reddit OAuth 60 pro Minute
+RATE_LIMITS = {'twitter': (180, 900), 'reddit': (60, 60)}
+MAX_RETRIES = 3
+
+TWITTER_COLUMNS = ['id', 'date', 'symbol', 'text', 'user', 'retweets', 'favorites', 'sentiment_polarity', 'sentiment_subjectivity']
+REDDIT_COLUMNS = ['id', 'date', 'symbol', 'title', 'text', 'score', 'subreddit', 'sentiment_polarity', 'sentiment_subjectivity']
+
+class TwitterClient:
+    def __init__(self, api):
+        """
+        Twitter-Suche über tweepy
+        
+        Args:
+            api (tweepy.API): Authentifizierte Twitter API
+        """
+        self.api = api
+    
+    def search(self, query, count, since_id=None, max_id=None):
+        """
+        Sucht Tweets neuer als since_id, neueste zuerst
+        
+        Args:
+            query (str): Suchanfrage
+            count (int): Maximale Anzahl Tweets
+            since_id (int, optional): Nur Tweets mit größerer ID
+            max_id (int, optional): Nur Tweets mit kleinerer oder gleicher ID (ältere Seiten)
+        """
+        try:
+            tweets = self.api.search_tweets(q=query, lang="en", count=count, since_id=since_id, max_id=max_id, result_type="recent")
+        except tweepy.TooManyRequests as e:
+            reset = float(e.response.headers.get('x-rate-limit-reset', time.time() + 60))
+            raise RateLimitExceeded(max(reset - time.time(), 1.0))
+        
+        return [
+            {
+                'id': tweet.id,
+                'date': tweet.created_at,
+                'text': tweet.text,
+                'user': tweet.user.screen_name,
+                'retweets': tweet.retweet_count,
+                'favorites': tweet.favorite_count
+            }
+            for tweet in tweets
+        ]
+
+class RedditClient:
+    def __init__(self, reddit):
+        """
+        Reddit-Suche über praw
+        
+        Args:
+            reddit (praw.Reddit): Reddit Instanz
+        """
+        self.reddit = reddit
+    
+    def search(self, subreddit, query, limit, since_id=None):
+        """
+        Sucht die neuesten Posts eines Subreddits, nur neuer als since_id
+        
+        Args:
+            subreddit (str): Subreddit
+            query (str): Suchbegriff
+            limit (int): Maximale Anzahl Posts
+            since_id (str, optional): Fullname (t3_...) des letzten bekannten Posts
+        """
+        params = {'before': since_id} if since_id else {}
+        try:
+            posts = list(self.reddit.subreddit(subreddit).search(query, sort='new', limit=limit, params=params))
+        except prawcore.exceptions.TooManyRequests:
+            raise RateLimitExceeded(60.0)
+        
+        return [
+            {
+                'id': post.name,
+                'date': datetime.fromtimestamp(post.created_utc),
+                'title': post.title,
+                'text': post.selftext,
+                'score': post.score
+            }
+            for post in posts
+        ]
+    
+    def exists(self, fullname):
+        """
+        Prüft, ob ein Post noch existiert (nicht gelöscht oder entfernt)
+        
+        Args:
+            fullname (str): Fullname (t3_...) des Posts
+        """
+        try:
+            posts = list(self.reddit.info(fullnames=[fullname]))
+        except prawcore.exceptions.TooManyRequests:
+            raise RateLimitExceeded(60.0)
+        
+        return bool(posts) and posts[0].author is not None and getattr(posts[0], 'removed_by_category', None) is None
 
 class SocialMediaSentimentFetcher:
-    def __init__(self, twitter_api_key=None, twitter_api_secret=None, twitter_access_token=None, 
-                 twitter_access_token_secret=None, reddit_client_id=None, reddit_client_secret=None):
+    def __init__(self, twitter_api_key=None, twitter_api_secret=None, twitter_access_token=None,
+                 twitter_access_token_secret=None, reddit_client_id=None, reddit_client_secret=None,
+                 stub_url=None, max_workers=8, base_path=None):
         """
         Initialisiert den Social Media Sentiment Fetcher
         
+        Alle Abfragen (Symbol × Quelle × Subreddit) laufen parallel, jede API
+        hat ihren eigenen Rate Limiter. Pro Abfrage wird eine Since-ID gespeichert,
+        sodass erneute Läufe nur neue Posts holen und an die CSV-Dateien anhängen.
+        
         Args:
             twitter_api_key (str, optional): Twitter API Key
             twitter_api_secret (str, optional): Twitter API Secret
@@ -26,10 +139,26 @@ class SocialMediaSentimentFetcher:
             twitter_access_token_secret (str, optional): Twitter Access Token Secret
             reddit_client_id (str, optional): Reddit Client ID
             reddit_client_secret (str, optional): Reddit Client Secret
+            stub_url (str, optional): Basis-URL eines Stub-Servers (social_media_stub_server.py) statt der echten APIs
+            max_workers (int): Anzahl paralleler Abfragen
+            base_path (Path, optional): Zielverzeichnis (Standard: sentiment_data/social_media)
         """
         self.console = Console()
-        self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data/social_media")
+        self.base_path = Path(base_path or "/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/sentiment_data/social_media")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.sentiment_engine = SentimentEngine(console=self.console)
+        self.max_workers = max_workers
+        self.rate_limiters = {source: RateLimiter(*limit) for source, limit in RATE_LIMITS.items()}
+        self.cursor_file = self.base_path / "_cursors.json"
+        self.cursors = self._load_cursors()
+        self.cursor_lock = threading.Lock()
+        
+        if stub_url:
+            sys.path.append(str(Path(__file__).resolve().parent))
+            from social_media_stub_server import StubTwitterClient, StubRedditClient
+            self.twitter_api = StubTwitterClient(stub_url)
+            self.reddit = StubRedditClient(stub_url)
+            return
         
         # Lade API Keys
         load_dotenv()
@@ -44,38 +173,268 @@ class SocialMediaSentimentFetcher:
         if all([self.twitter_api_key, self.twitter_api_secret, self.twitter_access_token, self.twitter_access_token_secret]):
             auth = tweepy.OAuthHandler(self.twitter_api_key, self.twitter_api_secret)
             auth.set_access_token(self.twitter_access_token, self.twitter_access_token_secret)
-            self.twitter_api = tweepy.API(auth)
+            self.twitter_api = TwitterClient(tweepy.API(auth))
         else:
             self.console.print("[yellow]Twitter API Credentials nicht vollständig. Twitter-Daten werden nicht abgerufen.[/yellow]")
             self.twitter_api = None
         
         # Initialisiere Reddit API
         if all([self.reddit_client_id, self.reddit_client_secret]):
-            self.reddit = praw.Reddit(
+            self.reddit = RedditClient(praw.Reddit(
                 client_id=self.reddit_client_id,
                 client_secret=self.reddit_client_secret,
                 user_agent="YOUR_USER_AGENT"
-            )
+            ))
         else:
             self.console.print("[yellow]Reddit API Credentials nicht vollständig. Reddit-Daten werden nicht abgerufen.[/yellow]")
             self.reddit = None
-        
+    
     def analyze_sentiment(self, text):
         """
         Analysiert den Sentiment eines Textes
         
         Args:
             text (str): Der zu analysierende Text
-            
+        
         Returns:
             tuple: (polarity, subjectivity)
         """
-        analysis = TextBlob(text)
-        return analysis.sentiment.polarity, analysis.sentiment.subjectivity
+        return self.sentiment_engine.analyze_sentiment(text)
+    
+    def add_sentiment(self, df, texts):
+        """
+        Bewertet alle Texte eines Abrufs in einem Batch (Duplikate wie Retweets nur einmal)
+        
+        Args:
+            df (pd.DataFrame): Posts, erhält die Spalten sentiment_polarity und sentiment_subjectivity
+            texts (list): Texte in derselben Reihenfolge wie df
+        """
+        sentiment = self.sentiment_engine.score(texts)
+        df['sentiment_polarity'] = sentiment['polarity'].to_numpy()
+        df['sentiment_subjectivity'] = sentiment['subjectivity'].to_numpy()
+        return df
+    
+    def _load_cursors(self):
+        """
+        Lädt die Since-ID-Cursor je Abfrage (twitter/{symbol}, reddit/{subreddit}/{symbol})
+        """
+        if self.cursor_file.exists():
+            with open(self.cursor_file) as f:
+                return json.load(f)
+        return {}
+    
+    def _save_cursors(self):
+        """
+        Speichert die Since-ID-Cursor
+        """
+        with open(self.cursor_file, 'w') as f:
+            json.dump(self.cursors, f, indent=2, sort_keys=True)
+    
+    def _call(self, source, func, *args):
+        """
+        Ruft eine API innerhalb ihres Rate Limits auf, bei HTTP 429 mit Backoff für alle Threads
+        
+        Args:
+            source (str): twitter oder reddit
+            func (callable): API-Aufruf
+            *args: Argumente des Aufrufs
+        """
+        limiter = self.rate_limiters[source]
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire()
+            try:
+                return func(*args)
+            except RateLimitExceeded as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                limiter.backoff(e.retry_after)
+    
+    def _twitter_task(self, symbol, count):
+        """
+        Holt neue Tweets eines Symbols seit dem gespeicherten Cursor
+        
+        Die Suche liefert die neuesten count Tweets. Mit Cursor wird über max_id
+        rückwärts geblättert, bis keine Tweets neuer als der Cursor mehr kommen,
+        damit bei mehr als count neuen Tweets keine Lücke entsteht. Ohne Cursor
+        (erster Lauf) wird nur die neueste Seite geholt.
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            count (int): Tweets je Seite
+        
+        Returns:
+            tuple: Cursor-Schlüssel, neue Posts, neuer Cursor
+        """
+        key = f"twitter/{symbol}"
+        since_id = self.cursors.get(key, {}).get('since_id')
+        query = f"#{symbol} OR {symbol}"
+        posts, max_id = [], None
+        while True:
+            page = self._call('twitter', self.twitter_api.search, query, count, since_id, max_id)
+            posts += page
+            if not page or since_id is None:
+                break
+            max_id = min(post['id'] for post in page) - 1
+        cursor = {'since_id': max(post['id'] for post in posts)} if posts else None
+        return key, posts, cursor
+    
+    def _reddit_task(self, symbol, subreddit, limit):
+        """
+        Holt neue Posts eines Symbols in einem Subreddit seit dem gespeicherten Cursor
+        
+        Ist der Cursor-Post gelöscht, liefert Reddit für "before" nichts mehr. Nur
+        wenn der Post laut info nicht mehr existiert, wird ohne Cursor gesucht und
+        nach dem Zeitstempel des letzten Posts gefiltert.
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            subreddit (str): Subreddit
+            limit (int): Maximale Anzahl Posts
+        
+        Returns:
+            tuple: Cursor-Schlüssel, neue Posts, neuer Cursor
+        """
+        key = f"reddit/{subreddit}/{symbol}"
+        cursor = self.cursors.get(key, {})
+        posts = self._call('reddit', self.reddit.search, subreddit, symbol, limit, cursor.get('since_id'))
+        
+        if not posts and cursor and not self._call('reddit', self.reddit.exists, cursor['since_id']):
+            posts = self._call('reddit', self.reddit.search, subreddit, symbol, limit, None)
+            posts = [post for post in posts if post['date'].isoformat() > cursor['date'] and post['id'] != cursor['since_id']]
+        
+        for post in posts:
+            post['subreddit'] = subreddit
+        
+        # Neueste zuerst (sort=new)
+        new_cursor = {'since_id': posts[0]['id'], 'date': posts[0]['date'].isoformat()} if posts else None
+        return key, posts, new_cursor
+    
+    def _append(self, df, output_file, columns):
+        """
+        Hängt neue Posts an eine CSV-Datei an
+        
+        Dateien mit anderem Spaltenformat (ältere Läufe ohne id) werden einmalig
+        auf das neue Format umgeschrieben.
+        
+        Args:
+            df (pd.DataFrame): Neue Posts
+            output_file (Path): CSV-Datei
+            columns (list): Spaltenreihenfolge
+        """
+        df = df.reindex(columns=columns)
+        if output_file.exists():
+            with open(output_file) as f:
+                header = f.readline().strip().split(',')
+            if header != columns:
+                df = pd.concat([pd.read_csv(output_file).reindex(columns=columns), df], ignore_index=True)
+                df.to_csv(output_file, index=False)
+                return
+        df.to_csv(output_file, mode='a', header=not output_file.exists(), index=False)
+    
+    def collect(self, symbols, sources=None, twitter_count=100, reddit_limit=100, subreddits=None):
+        """
+        Sammelt alle Symbol × Quelle × Subreddit Abfragen parallel
+        
+        Neue Posts werden je Symbol und Quelle gebündelt bewertet, an
+        twitter_sentiment_{symbol}.csv bzw. reddit_sentiment_{symbol}.csv angehängt
+        und erst danach die Cursor gespeichert.
+        
+        Args:
+            symbols (list): Liste von Forex-Paaren
+            sources (list, optional): twitter und/oder reddit (Standard: beide)
+            twitter_count (int): Tweets je Seite (beim ersten Lauf Anzahl pro Symbol)
+            reddit_limit (int): Maximale Anzahl Reddit-Posts pro Symbol und Subreddit
+            subreddits (list, optional): Subreddits (Standard: forex, trading, investing)
+        
+        Returns:
+            dict: (Quelle, Symbol) -> DataFrame mit neuen Posts
+        """
+        sources = [source for source in (sources or SOURCES) if (self.twitter_api if source == 'twitter' else self.reddit)]
+        tasks = []
+        for symbol in symbols:
+            if 'twitter' in sources:
+                tasks.append(('twitter', symbol, self._twitter_task, (symbol, twitter_count)))
+            if 'reddit' in sources:
+                for subreddit in subreddits or SUBREDDITS:
+                    tasks.append(('reddit', symbol, self._reddit_task, (symbol, subreddit, reddit_limit)))
+        
+        posts, cursors = {}, {}
+        with Progress() as progress:
+            task_id = progress.add_task("[cyan]Lade Social-Media-Sentiment-Daten...", total=len(tasks))
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(func, *args): (source, symbol) for source, symbol, func, args in tasks}
+                
+                for future in as_completed(futures):
+                    source, symbol = futures[future]
+                    try:
+                        key, new_posts, cursor = future.result()
+                        posts.setdefault((source, symbol), []).extend(new_posts)
+                        if cursor:
+                            cursors[key] = cursor
+                    except Exception as e:
+                        self.console.print(f"[red]Fehler beim Abrufen der {source.capitalize()}-Daten für {symbol}: {str(e)}[/red]")
+                    progress.update(task_id, advance=1)
+        
+        results = {}
+        for (source, symbol), items in posts.items():
+            if not items:
+                continue
+            df = pd.DataFrame(items)
+            df['symbol'] = symbol
+            if source == 'twitter':
+                df = self.add_sentiment(df, df['text'].tolist())
+                self._append(df, self.base_path / f"twitter_sentiment_{symbol}.csv", TWITTER_COLUMNS)
+            else:
+                df = self.add_sentiment(df, (df['title'] + " " + df['text']).tolist())
+                self._append(df, self.base_path / f"reddit_sentiment_{symbol}.csv", REDDIT_COLUMNS)
+            results[(source, symbol)] = df
+        
+        with self.cursor_lock:
+            self.cursors.update(cursors)
+            self._save_cursors()
+        
+        return results
+    
+    def print_summary(self, results, symbols, sources=None):
+        """
+        Zeigt neue Posts und Sentiment je Symbol und Quelle
+        
+        Args:
+            results (dict): Ergebnis von collect
+            symbols (list): Liste von Forex-Paaren
+            sources (list, optional): Angezeigte Quellen
+        """
+        table = Table(title="Social Media Sentiment")
+        table.add_column("Symbol", style="cyan")
+        table.add_column("Quelle", style="cyan")
+        table.add_column("Neue Posts", style="green")
+        table.add_column("Zeitraum", style="green")
+        table.add_column("Durchschnittlicher Sentiment", style="green")
+        table.add_column("Engagement", style="green")
+        
+        for symbol in symbols:
+            for source in sources or SOURCES:
+                df = results.get((source, symbol))
+                if df is None:
+                    table.add_row(symbol, source, "0", "-", "-", "-")
+                    continue
+                engagement = f"{df['retweets'].sum()} RT / {df['favorites'].sum()} Fav" if source == 'twitter' else f"Score {df['score'].sum()}"
+                table.add_row(
+                    symbol,
+                    source,
+                    str(len(df)),
+                    f"{df['date'].min().strftime('%Y-%m-%d %H:%M')} bis {df['date'].max().strftime('%Y-%m-%d %H:%M')}",
+                    f"{df['sentiment_polarity'].mean():.2f}",
+                    engagement
+                )
+        
+        table.add_row("Speicherort", str(self.base_path), "", "", "", "")
+        self.console.print(table)
     
     def fetch_twitter_sentiment(self, symbol, count=100):
         """
-        Holt Twitter-Sentiment-Daten
+        Holt neue Twitter-Sentiment-Daten eines Symbols
         
         Args:
             symbol (str): Forex-Paar Symbol
@@ -84,108 +443,22 @@ class SocialMediaSentimentFetcher:
         if not self.twitter_api:
             return
         
-        try:
-            with self.console.status(f"[bold blue]Lade Twitter-Daten für {symbol}..."):
-                # Suche nach Tweets mit dem Forex-Paar
-                tweets = self.twitter_api.search_tweets(
-                    q=f"#{symbol} OR {symbol}",
-                    lang="en",
-                    count=count
-                )
-                
-                data = []
-                for tweet in tweets:
-                    polarity, subjectivity = self.analyze_sentiment(tweet.text)
-                    data.append({
-                        'date': tweet.created_at,
-                        'symbol': symbol,
-                        'text': tweet.text,
-                        'user': tweet.user.screen_name,
-                        'retweets': tweet.retweet_count,
-                        'favorites': tweet.favorite_count,
-                        'sentiment_polarity': polarity,
-                        'sentiment_subjectivity': subjectivity
-                    })
-                
-                if data:
-                    df = pd.DataFrame(data)
-                    output_file = self.base_path / f"twitter_sentiment_{symbol}.csv"
-                    df.to_csv(output_file, index=False)
-                    
-                    # Erstelle eine schöne Zusammenfassung
-                    table = Table(title=f"Twitter Sentiment für {symbol}")
-                    table.add_column("Metrik", style="cyan")
-                    table.add_column("Wert", style="green")
-                    
-                    table.add_row("Anzahl Tweets", str(len(df)))
-                    table.add_row("Zeitraum", f"{df['date'].min().strftime('%Y-%m-%d %H:%M:%S')} bis {df['date'].max().strftime('%Y-%m-%d %H:%M:%S')}")
-                    table.add_row("Durchschnittlicher Sentiment", f"{df['sentiment_polarity'].mean():.2f}")
-                    table.add_row("Gesamt-Retweets", str(df['retweets'].sum()))
-                    table.add_row("Gesamt-Favorites", str(df['favorites'].sum()))
-                    table.add_row("Speicherort", str(output_file))
-                    
-                    self.console.print(table)
-                else:
-                    self.console.print(f"[yellow]Keine Tweets gefunden für {symbol}[/yellow]")
-                
-        except Exception as e:
-            self.console.print(f"[red]Fehler beim Abrufen der Twitter-Daten: {str(e)}[/red]")
+        results = self.collect([symbol], sources=['twitter'], twitter_count=count)
+        self.print_summary(results, [symbol], ['twitter'])
     
     def fetch_reddit_sentiment(self, symbol, limit=100):
         """
-        Holt Reddit-Sentiment-Daten
+        Holt neue Reddit-Sentiment-Daten eines Symbols (alle Subreddits parallel)
         
         Args:
             symbol (str): Forex-Paar Symbol
-            limit (int): Maximale Anzahl der Posts
+            limit (int): Maximale Anzahl der Posts pro Subreddit
         """
         if not self.reddit:
             return
         
-        try:
-            with self.console.status(f"[bold blue]Lade Reddit-Daten für {symbol}..."):
-                # Suche nach Posts in Forex-bezogenen Subreddits
-                subreddits = ['forex', 'trading', 'investing']
-                data = []
-                
-                for subreddit_name in subreddits:
-                    subreddit = self.reddit.subreddit(subreddit_name)
-                    for post in subreddit.search(symbol, limit=limit):
-                        polarity, subjectivity = self.analyze_sentiment(post.title + " " + post.selftext)
-                        data.append({
-                            'date': datetime.fromtimestamp(post.created_utc),
-                            'symbol': symbol,
-                            'title': post.title,
-                            'text': post.selftext,
-                            'score': post.score,
-                            'subreddit': subreddit_name,
-                            'sentiment_polarity': polarity,
-                            'sentiment_subjectivity': subjectivity
-                        })
-                
-                if data:
-                    df = pd.DataFrame(data)
-                    output_file = self.base_path / f"reddit_sentiment_{symbol}.csv"
-                    df.to_csv(output_file, index=False)
-                    
-                    # Erstelle eine schöne Zusammenfassung
-                    table = Table(title=f"Reddit Sentiment für {symbol}")
-                    table.add_column("Metrik", style="cyan")
-                    table.add_column("Wert", style="green")
-                    
-                    table.add_row("Anzahl Posts", str(len(df)))
-                    table.add_row("Zeitraum", f"{df['date'].min().strftime('%Y-%m-%d %H:%M:%S')} bis {df['date'].max().strftime('%Y-%m-%d %H:%M:%S')}")
-                    table.add_row("Durchschnittlicher Sentiment", f"{df['sentiment_polarity'].mean():.2f}")
-                    table.add_row("Gesamt-Score", str(df['score'].sum()))
-                    table.add_row("Subreddits", ", ".join(df['subreddit'].unique()))
-                    table.add_row("Speicherort", str(output_file))
-                    
-                    self.console.print(table)
-                else:
-                    self.console.print(f"[yellow]Keine Reddit-Posts gefunden für {symbol}[/yellow]")
-                
-        except Exception as e:
-            self.console.print(f"[red]Fehler beim Abrufen der Reddit-Daten: {str(e)}[/red]")
+        results = self.collect([symbol], sources=['reddit'], reddit_limit=limit)
+        self.print_summary(results, [symbol], ['reddit'])
     
     def fetch_social_media_sentiment(self, symbols=None, twitter_count=100, reddit_limit=100):
         """
@@ -200,15 +473,10 @@ class SocialMediaSentimentFetcher:
         if not symbols:
             symbols = ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']
         
-        with Progress() as progress:
-            task = progress.add_task("[cyan]Lade Social-Media-Sentiment-Daten...", total=len(symbols) * 2)
-            
-            for symbol in symbols:
-                self.console.print(f"\n[bold blue]Verarbeite {symbol}...[/bold blue]")
-                self.fetch_twitter_sentiment(symbol, count=twitter_count)
-                progress.update(task, advance=1)
-                self.fetch_reddit_sentiment(symbol, limit=reddit_limit)
-                progress.update(task, advance=1)
+        start = time.perf_counter()
+        results = self.collect(symbols, twitter_count=twitter_count, reddit_limit=reddit_limit)
+        self.print_summary(results, symbols)
+        self.console.print(f"[green]{sum(len(df) for df in results.values())} neue Posts in {time.perf_counter() - start:.1f}s[/green]")
 
 def main():
     parser = argparse.ArgumentParser(description='Social Media Sentiment Fetcher')
@@ -219,27 +487,42 @@ def main():
     parser.add_argument('--reddit-client-id', help='Reddit Client ID')
     parser.add_argument('--reddit-client-secret', help='Reddit Client Secret')
     parser.add_argument('--symbols', nargs='+', help='Liste von Forex-Paaren')
-    parser.add_argument('--twitter-count', type=int, default=100, help='Anzahl der Tweets pro Symbol')
+    parser.add_argument('--twitter-count', type=int, default=100, help='Tweets je Seite (beim ersten Lauf Anzahl pro Symbol)')
     parser.add_argument('--reddit-limit', type=int, default=100, help='Maximale Anzahl der Reddit-Posts pro Symbol')
+    parser.add_argument('--max-workers', type=int, default=8, help='Anzahl paralleler Abfragen')
+    parser.add_argument('--stub', action='store_true', help='Lokalen Stub-Server statt der echten APIs verwenden')
+    parser.add_argument('--stub-url', help='Basis-URL eines bereits laufenden Stub-Servers')
     
     args = parser.parse_args()
     
     try:
+        stub_server = None
+        stub_url = args.stub_url
+        if args.stub and not stub_url:
+            from social_media_stub_server import SocialMediaStubServer
+            stub_server = SocialMediaStubServer(latency=0.2).start()
+            stub_url = stub_server.url
+        
         fetcher = SocialMediaSentimentFetcher(
             twitter_api_key=args.twitter_api_key,
             twitter_api_secret=args.twitter_api_secret,
             twitter_access_token=args.twitter_access_token,
             twitter_access_token_secret=args.twitter_access_token_secret,
             reddit_client_id=args.reddit_client_id,
-            reddit_client_secret=args.reddit_client_secret
+            reddit_client_secret=args.reddit_client_secret,
+            stub_url=stub_url,
+            max_workers=args.max_workers
         )
         fetcher.fetch_social_media_sentiment(
             symbols=args.symbols,
             twitter_count=args.twitter_count,
             reddit_limit=args.reddit_limit
         )
+        
+        if stub_server:
+            stub_server.stop()
     except Exception as e:
         rprint(f"[red]Fehler: {str(e)}[/red]")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
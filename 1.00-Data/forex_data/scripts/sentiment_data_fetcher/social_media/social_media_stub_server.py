@@ -0,0 +1,410 @@
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from pathlib import Path
+import argparse
+import sys
+import requests
+from rich import print as rprint
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.rate_limiter import RateLimitExceeded
+
+# Textbausteine für synthetische Posts (mit Wiederholungen wie Retweets)
+PHRASES = [
+    "{symbol} looking very bullish after the data",
+    "not a good day for {symbol}, stops hit",
+    "{symbol} breaking out, great momentum",
+    "Fed talk keeps {symbol} in a tight range",
+    "terrible liquidity on {symbol} this morning",
+    "RT @fxdesk: {symbol} strong support holding",
+    "{symbol} short squeeze incoming?!",
+    "really not bad price action on {symbol}"
+]
+
+TWITTER_LIMIT = (180, 900)
+REDDIT_LIMIT = (60, 60)
+
+def _post_index(source, key):
+    """
+    Deterministischer Versatz je Quelle und Suchanfrage (verschiedene Posts pro Feed)
+    
+    Args:
+        source (str): twitter oder reddit
+        key (str): Suchanfrage bzw. Subreddit + Suchanfrage
+    """
+    return sum(ord(char) for char in source + key) % len(PHRASES)
+
+class StubState:
+    def __init__(self, interval=1.0, backlog=200, latency=0.0, enforce_limits=True):
+        """
+        Zustand der Stub-Server: Posts erscheinen im festen Takt, Rate Limits wie die echten APIs
+        
+        Post i eines Feeds wird zum Zeitpunkt start - backlog * interval + i * interval
+        veröffentlicht. Dadurch liefert jeder spätere Abruf neue Posts und
+        Since-ID-Cursor lassen sich realistisch prüfen.
+        
+        Args:
+            interval (float): Sekunden zwischen zwei Posts je Feed
+            backlog (int): Anzahl Posts, die beim Start bereits existieren
+            latency (float): Künstliche Antwortzeit in Sekunden
+            enforce_limits (bool): HTTP 429 bei Überschreitung der Rate Limits
+        """
+        self.interval = interval
+        self.latency = latency
+        self.start = time.time() - backlog * interval
+        self.enforce_limits = enforce_limits
+        self.limits = {'twitter': TWITTER_LIMIT, 'reddit': REDDIT_LIMIT}
+        self.calls = {'twitter': deque(), 'reddit': deque()}
+        self.request_count = {'twitter': 0, 'reddit': 0}
+        # Gelieferte Reddit-Posts (Fullname) und gelöschte Posts
+        self.submissions = set()
+        self.removed = set()
+        self.lock = threading.Lock()
+    
+    def allow(self, api):
+        """
+        Prüft das Rate Limit einer API (gleitendes Fenster)
+        
+        Args:
+            api (str): twitter oder reddit
+        
+        Returns:
+            float: 0 wenn erlaubt, sonst Sekunden bis im Fenster wieder Platz ist
+        """
+        calls, period = self.limits[api]
+        with self.lock:
+            now = time.monotonic()
+            window = self.calls[api]
+            while window and now - window[0] >= period:
+                window.popleft()
+            self.request_count[api] += 1
+            if self.enforce_limits and len(window) >= calls:
+                return period - (now - window[0])
+            window.append(now)
+            return 0.0
+    
+    def posts(self, source, key, symbol, newest_first=True):
+        """
+        Alle bisher veröffentlichten Posts eines Feeds
+        
+        Args:
+            source (str): twitter oder reddit
+            key (str): Feed-Schlüssel
+            symbol (str): Suchbegriff, der im Text vorkommt
+            newest_first (bool): Sortierung
+        """
+        count = int((time.time() - self.start) / self.interval) + 1
+        offset = _post_index(source, key)
+        posts = [
+            {
+                'number': i,
+                'created': self.start + i * self.interval,
+                'text': PHRASES[(i + offset) % len(PHRASES)].format(symbol=symbol)
+            }
+            for i in range(count)
+        ]
+        return posts[::-1] if newest_first else posts
+    
+    def remove(self, fullname):
+        """
+        Löscht einen Reddit-Post (erscheint weder in Suche noch in info)
+        
+        Args:
+            fullname (str): Fullname (t3_...) des Posts
+        """
+        with self.lock:
+            self.removed.add(fullname)
+
+def _tweet(post, query):
+    """
+    Tweet im Format der Twitter API v1.1
+    
+    Args:
+        post (dict): Synthetischer Post
+        query (str): Suchanfrage
+    """
+    created = datetime.fromtimestamp(post['created'], tz=timezone.utc)
+    tweet_id = int(post['created'] * 1000) * 100 + _post_index('twitter', query)
+    return {
+        'id': tweet_id,
+        'id_str': str(tweet_id),
+        'created_at': created.strftime('%a %b %d %H:%M:%S +0000 %Y'),
+        'text': post['text'],
+        'user': {'screen_name': f"trader{post['number'] % 37}"},
+        'retweet_count': post['number'] % 11,
+        'favorite_count': post['number'] % 23
+    }
+
+def _submission(post, subreddit, symbol):
+    """
+    Reddit-Post im Listing-Format
+    
+    Args:
+        post (dict): Synthetischer Post
+        subreddit (str): Subreddit
+        symbol (str): Suchbegriff
+    """
+    post_id = f"{subreddit[:2]}{symbol.lower()}{post['number']:06d}"
+    return {
+        'kind': 't3',
+        'data': {
+            'id': post_id,
+            'name': f"t3_{post_id}",
+            'title': post['text'],
+            'selftext': "" if post['number'] % 3 else "Any thoughts? Not sure about this move.",
+            'score': post['number'] % 50,
+            'created_utc': post['created'],
+            'subreddit': subreddit
+        }
+    }
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        """
+        Keine Zugriffs-Logs auf der Konsole
+        """
+    
+    def _send(self, status, payload, headers=None):
+        """
+        Sendet eine JSON-Antwort
+        
+        Args:
+            status (int): HTTP-Status
+            payload (dict): JSON-Body
+            headers (dict, optional): Zusätzliche Header
+        """
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        """
+        Twitter: /1.1/search/tweets.json, Reddit: /r/{subreddit}/search.json und /api/info.json
+        """
+        state = self.server.state
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+        
+        if state.latency:
+            time.sleep(state.latency)
+        
+        if url.path == '/1.1/search/tweets.json':
+            retry_after = state.allow('twitter')
+            if retry_after:
+                return self._send(429, {'errors': [{'code': 88, 'message': 'Rate limit exceeded'}]}, {'x-rate-limit-reset': str(int(time.time() + retry_after) + 1)})
+            query = params.get('q', '')
+            symbol = query.split()[-1] if query else 'FX'
+            since_id = int(params.get('since_id', 0))
+            max_id = int(params['max_id']) if 'max_id' in params else None
+            count = min(int(params.get('count', 15)), 100)
+            tweets = [_tweet(post, query) for post in state.posts('twitter', query, symbol)]
+            statuses = [tweet for tweet in tweets if tweet['id'] > since_id and (max_id is None or tweet['id'] <= max_id)][:count]
+            return self._send(200, {'statuses': statuses, 'search_metadata': {'count': count, 'since_id': since_id, 'max_id': max_id, 'query': query}})
+        
+        if len(parts) == 3 and parts[0] == 'r' and parts[2] == 'search.json':
+            retry_after = state.allow('reddit')
+            if retry_after:
+                return self._send(429, {'message': 'Too Many Requests', 'error': 429}, {'Retry-After': str(int(retry_after) + 1)})
+            subreddit = parts[1]
+            symbol = params.get('q', '')
+            limit = min(int(params.get('limit', 25)), 100)
+            children = [_submission(post, subreddit, symbol) for post in state.posts('reddit', subreddit + symbol, symbol)]
+            children = [child for child in children if child['data']['name'] not in state.removed]
+            with state.lock:
+                state.submissions.update(child['data']['name'] for child in children)
+            # Wie Reddit: "before" liefert die limit Posts direkt vor dem Cursor, fehlt er, nichts
+            before = params.get('before')
+            if before:
+                names = [child['data']['name'] for child in children]
+                children = children[max(names.index(before) - limit, 0):names.index(before)] if before in names else []
+            return self._send(200, {'kind': 'Listing', 'data': {'children': children[:limit], 'after': None, 'before': None}})
+        
+        if url.path == '/api/info.json':
+            retry_after = state.allow('reddit')
+            if retry_after:
+                return self._send(429, {'message': 'Too Many Requests', 'error': 429}, {'Retry-After': str(int(retry_after) + 1)})
+            names = [name for name in params.get('id', '').split(',') if name in state.submissions and name not in state.removed]
+            children = [{'kind': 't3', 'data': {'name': name, 'id': name[3:]}} for name in names]
+            return self._send(200, {'kind': 'Listing', 'data': {'children': children, 'after': None, 'before': None}})
+        
+        self._send(404, {'error': 'not found'})
+
+class SocialMediaStubServer:
+    def __init__(self, host='127.0.0.1', port=0, **state_kwargs):
+        """
+        Lokaler Stub für die Twitter- und Reddit-Such-APIs (für Tests und Offline-Läufe)
+        
+        Args:
+            host (str): Host
+            port (int): Port (0 = freier Port)
+            **state_kwargs: Parameter für StubState (interval, backlog, latency, enforce_limits)
+        """
+        self.server = ThreadingHTTPServer((host, port), StubRequestHandler)
+        self.server.daemon_threads = True
+        self.server.state = StubState(**state_kwargs)
+        self.thread = None
+    
+    @property
+    def url(self):
+        """
+        Basis-URL des Servers
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    @property
+    def state(self):
+        """
+        Zustand (Posts, Rate Limits, Anzahl Requests)
+        """
+        return self.server.state
+    
+    def start(self):
+        """
+        Startet den Server in einem Hintergrund-Thread
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """
+        Beendet den Server
+        """
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+class StubTwitterClient:
+    def __init__(self, base_url, session=None):
+        """
+        Twitter-Client gegen den Stub-Server (gleiche Schnittstelle wie TwitterClient)
+        
+        Args:
+            base_url (str): Basis-URL des Stub-Servers
+            session (requests.Session, optional): HTTP-Session
+        """
+        self.base_url = base_url
+        self.session = session or requests.Session()
+    
+    def search(self, query, count, since_id=None, max_id=None):
+        """
+        Sucht Tweets neuer als since_id, neueste zuerst
+        
+        Args:
+            query (str): Suchanfrage
+            count (int): Maximale Anzahl Tweets
+            since_id (int, optional): Nur Tweets mit größerer ID
+            max_id (int, optional): Nur Tweets mit kleinerer oder gleicher ID (ältere Seiten)
+        """
+        params = {'q': query, 'count': count, 'lang': 'en', 'result_type': 'recent'}
+        if since_id:
+            params['since_id'] = since_id
+        if max_id:
+            params['max_id'] = max_id
+        response = self.session.get(f"{self.base_url}/1.1/search/tweets.json", params=params, timeout=30)
+        if response.status_code == 429:
+            raise RateLimitExceeded(max(float(response.headers.get('x-rate-limit-reset', 0)) - time.time(), 1.0))
+        response.raise_for_status()
+        
+        return [
+            {
+                'id': tweet['id'],
+                'date': datetime.strptime(tweet['created_at'], '%a %b %d %H:%M:%S %z %Y'),
+                'text': tweet['text'],
+                'user': tweet['user']['screen_name'],
+                'retweets': tweet['retweet_count'],
+                'favorites': tweet['favorite_count']
+            }
+            for tweet in response.json()['statuses']
+        ]
+
+class StubRedditClient:
+    def __init__(self, base_url, session=None):
+        """
+        Reddit-Client gegen den Stub-Server (gleiche Schnittstelle wie RedditClient)
+        
+        Args:
+            base_url (str): Basis-URL des Stub-Servers
+            session (requests.Session, optional): HTTP-Session
+        """
+        self.base_url = base_url
+        self.session = session or requests.Session()
+    
+    def search(self, subreddit, query, limit, since_id=None):
+        """
+        Sucht die neuesten Posts eines Subreddits, nur neuer als since_id
+        
+        Args:
+            subreddit (str): Subreddit
+            query (str): Suchbegriff
+            limit (int): Maximale Anzahl Posts
+            since_id (str, optional): Fullname (t3_...) des letzten bekannten Posts
+        """
+        params = {'q': query, 'sort': 'new', 'limit': limit, 'restrict_sr': 'on'}
+        if since_id:
+            params['before'] = since_id
+        response = self.session.get(f"{self.base_url}/r/{subreddit}/search.json", params=params, timeout=30)
+        if response.status_code == 429:
+            raise RateLimitExceeded(float(response.headers.get('Retry-After', 1)))
+        response.raise_for_status()
+        
+        return [
+            {
+                'id': child['data']['name'],
+                'date': datetime.fromtimestamp(child['data']['created_utc']),
+                'title': child['data']['title'],
+                'text': child['data']['selftext'],
+                'score': child['data']['score']
+            }
+            for child in response.json()['data']['children']
+        ]
+    
+    def exists(self, fullname):
+        """
+        Prüft, ob ein Post noch existiert (nicht gelöscht oder entfernt)
+        
+        Args:
+            fullname (str): Fullname (t3_...) des Posts
+        """
+        response = self.session.get(f"{self.base_url}/api/info.json", params={'id': fullname}, timeout=30)
+        if response.status_code == 429:
+            raise RateLimitExceeded(float(response.headers.get('Retry-After', 1)))
+        response.raise_for_status()
+        return bool(response.json()['data']['children'])
+
+def main():
+    parser = argparse.ArgumentParser(description='Lokaler Stub-Server für Twitter- und Reddit-Suche')
+    parser.add_argument('--port', type=int, default=8765, help='Port')
+    parser.add_argument('--interval', type=float, default=5.0, help='Sekunden zwischen zwei Posts je Feed')
+    parser.add_argument('--latency', type=float, default=0.2, help='Künstliche Antwortzeit in Sekunden')
+    
+    args = parser.parse_args()
+    
+    try:
+        server = SocialMediaStubServer(port=args.port, interval=args.interval, latency=args.latency)
+        rprint(f"[green]Stub-Server läuft auf {server.url} (Strg+C beendet)[/green]")
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
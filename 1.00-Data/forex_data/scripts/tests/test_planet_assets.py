@@ -0,0 +1,100 @@
+import sys
+import time
+from pathlib import Path
+import pytest
+from rich.console import Console
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import common.planet_assets as planet_assets
+from common.planet_assets import PlanetAssetManager, point_aoi, SEARCH_TTL
+from common.planet_stub_server import PlanetStubServer, SCENE_SIZE
+
+AOI = point_aoi(34.05, -118.24, 250)
+
+@pytest.fixture
+def server():
+    with PlanetStubServer(activation_delay=0.3, page_size=4) as stub:
+        yield stub
+
+@pytest.fixture
+def manager(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(planet_assets, 'POLL_INTERVAL', 0.05)
+    return PlanetAssetManager(tmp_path, base_url=server.url, console=Console(quiet=True))
+
+def test_search_pages_and_caches_closed_window(server, manager):
+    items = manager.search(AOI, '2023-01-01', '2023-01-14', cloud_cover=1.0)
+    requests = server.state.request_count['search']
+    
+    # Enddatum 00:00 UTC: Szenen des letzten Tages (02:00) liegen außerhalb
+    assert len(items) == 13
+    assert len({item['id'] for item in items}) == 13
+    assert requests == 4
+    
+    assert manager.search(AOI, '2023-01-01', '2023-01-14', cloud_cover=1.0) == items
+    assert server.state.request_count['search'] == requests
+    
+    # Index wird wiederverwendet
+    reloaded = PlanetAssetManager(manager.base_path, base_url=server.url, console=Console(quiet=True))
+    assert reloaded.search(AOI, '2023-01-01', '2023-01-14', cloud_cover=1.0) == items
+    assert server.state.request_count['search'] == requests
+
+def test_search_open_window_uses_ttl(server, manager):
+    items = manager.search(AOI, days=3, cloud_cover=1.0)
+    requests = server.state.request_count['search']
+    
+    assert manager.search(AOI, days=3, cloud_cover=1.0) == items
+    assert server.state.request_count['search'] == requests
+    assert len(manager.index['searches']) == 1
+    
+    entry = next(iter(manager.index['searches'].values()))
+    entry['fetched'] = time.time() - SEARCH_TTL - 1
+    manager.search(AOI, days=3, cloud_cover=1.0)
+    assert server.state.request_count['search'] > requests
+    assert len(manager.index['searches']) == 1
+
+def test_fetch_polls_activation_and_downloads(server, manager):
+    rasterio = pytest.importorskip('rasterio')
+    items = manager.search(AOI, '2023-01-01', '2023-01-03', cloud_cover=1.0)
+    
+    scenes = manager.fetch(items)
+    
+    assert [scene['id'] for scene in scenes] == [item['id'] for item in items]
+    assert server.state.request_count['activate'] == len(items)
+    # Erster Poll aktiviert, weitere bis das Asset aktiv ist
+    assert server.state.request_count['assets'] > len(items)
+    for scene in scenes:
+        with rasterio.open(scene['path']) as src:
+            assert src.shape == (SCENE_SIZE, SCENE_SIZE)
+    
+    # Zweiter Aufruf aus dem Cache
+    assets = server.state.request_count['assets']
+    assert manager.fetch(items) == scenes
+    assert server.state.request_count['assets'] == assets
+    assert server.state.request_count['download'] == len(items)
+
+def test_fetch_clips_to_aoi(server, manager):
+    rasterio = pytest.importorskip('rasterio')
+    items = manager.search(AOI, '2023-01-01', '2023-01-02', cloud_cover=1.0)
+    
+    scenes = manager.fetch(items, clip=AOI)
+    
+    (lon_min, lat_min), (lon_max, lat_max) = AOI['coordinates'][0][0], AOI['coordinates'][0][2]
+    with rasterio.open(scenes[0]['path']) as src:
+        assert 0 < src.width < SCENE_SIZE and 0 < src.height < SCENE_SIZE
+        assert src.bounds.left <= lon_min and src.bounds.right >= lon_max
+        assert src.bounds.bottom <= lat_min and src.bounds.top >= lat_max
+    assert not list(Path(scenes[0]['path']).parent.glob('*.raw.tif'))
+
+def test_fetch_evicts_least_recently_used(server, manager):
+    pytest.importorskip('rasterio')
+    first = manager.fetch(manager.search(AOI, '2023-01-01', '2023-01-03', cloud_cover=1.0), clip=AOI)
+    second = manager.fetch(manager.search(AOI, '2023-01-03', '2023-01-05', cloud_cover=1.0), clip=AOI)
+    
+    size = Path(first[0]['path']).stat().st_size
+    manager.cache_limit = 3 * size
+    manager.fetch(second[:1], clip=AOI)
+    third = manager.fetch(manager.search(AOI, '2023-01-05', '2023-01-06', cloud_cover=1.0), clip=AOI)
+    
+    remaining = {path.name for path in manager.scene_path.rglob('*.tif')}
+    assert remaining == {Path(scene['path']).name for scene in second + third}
+    assert len(manager.index['scenes']) == 3
\ No newline at end of file
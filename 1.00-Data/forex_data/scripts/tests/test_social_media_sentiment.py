@@ -0,0 +1,67 @@
+import sys
+import time
+from pathlib import Path
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "sentiment_data_fetcher" / "social_media"))
+from social_media_sentiment_fetcher import SocialMediaSentimentFetcher
+from social_media_stub_server import SocialMediaStubServer, _tweet
+
+SYMBOL = 'EURUSD'
+
+def make_fetcher(server, path):
+    return SocialMediaSentimentFetcher(stub_url=server.url, max_workers=2, base_path=path)
+
+def test_twitter_pages_back_to_cursor(tmp_path):
+    with SocialMediaStubServer(interval=0.05, backlog=50, enforce_limits=False) as server:
+        fetcher = make_fetcher(server, tmp_path)
+        first = fetcher.collect([SYMBOL], sources=['twitter'], twitter_count=10)[('twitter', SYMBOL)]
+        assert len(first) == 10
+        since_id = fetcher.cursors[f"twitter/{SYMBOL}"]['since_id']
+        assert since_id == first['id'].max()
+        
+        # Deutlich mehr neue Tweets als eine Seite
+        time.sleep(1.5)
+        requests = server.state.request_count['twitter']
+        second = fetcher.collect([SYMBOL], sources=['twitter'], twitter_count=10)[('twitter', SYMBOL)]
+        
+        query = f"#{SYMBOL} OR {SYMBOL}"
+        newest = second['id'].max()
+        expected = {tweet['id'] for tweet in (_tweet(post, query) for post in server.state.posts('twitter', query, SYMBOL)) if since_id < tweet['id'] <= newest}
+        assert len(second) > 20
+        assert set(second['id']) == expected
+        assert second['id'].is_unique
+        assert server.state.request_count['twitter'] - requests >= 3
+        assert fetcher.cursors[f"twitter/{SYMBOL}"]['since_id'] == newest
+
+def test_reddit_keeps_cursor_without_fallback(tmp_path):
+    with SocialMediaStubServer(interval=3600, backlog=50, enforce_limits=False) as server:
+        fetcher = make_fetcher(server, tmp_path)
+        first = fetcher.collect([SYMBOL], sources=['reddit'], reddit_limit=5, subreddits=['forex'])[('reddit', SYMBOL)]
+        assert len(first) == 5
+        cursor = fetcher.cursors[f"reddit/forex/{SYMBOL}"]
+        
+        requests = server.state.request_count['reddit']
+        results = fetcher.collect([SYMBOL], sources=['reddit'], reddit_limit=5, subreddits=['forex'])
+        
+        # Suche mit Cursor und Existenzprüfung, keine Suche ohne Cursor
+        assert ('reddit', SYMBOL) not in results
+        assert server.state.request_count['reddit'] - requests == 2
+        assert fetcher.cursors[f"reddit/forex/{SYMBOL}"] == cursor
+
+def test_reddit_falls_back_when_cursor_removed(tmp_path):
+    with SocialMediaStubServer(interval=0.2, backlog=50, enforce_limits=False) as server:
+        fetcher = make_fetcher(server, tmp_path)
+        first = fetcher.collect([SYMBOL], sources=['reddit'], reddit_limit=5, subreddits=['forex'])[('reddit', SYMBOL)]
+        cursor = fetcher.cursors[f"reddit/forex/{SYMBOL}"]
+        server.state.remove(cursor['since_id'])
+        time.sleep(0.7)
+        
+        requests = server.state.request_count['reddit']
+        second = fetcher.collect([SYMBOL], sources=['reddit'], reddit_limit=5, subreddits=['forex'])[('reddit', SYMBOL)]
+        
+        assert server.state.request_count['reddit'] - requests == 3
+        assert len(second) > 0
+        assert not set(second['id']) & set(first['id'])
+        assert (second['date'] > pd.Timestamp(cursor['date'])).all()
+        assert fetcher.cursors[f"reddit/forex/{SYMBOL}"]['since_id'] == second['id'].iloc[0]
\ No newline at end of file
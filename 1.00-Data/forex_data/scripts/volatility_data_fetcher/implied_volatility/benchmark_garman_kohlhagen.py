@@ -0,0 +1,119 @@
+import numpy as np
+from scipy.optimize import brentq
+import time
+from pathlib import Path
+import argparse
+import sys
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from garman_kohlhagen_solver import gk_price, implied_volatility, MAX_VOL
+
+def random_chain(size, seed=42):
+    """
+    Erzeugt eine zufällige FX-Optionskette mit bekannten Volatilitäten
+    
+    Args:
+        size (int): Anzahl Optionen
+        seed (int): Zufalls-Seed
+    """
+    rng = np.random.default_rng(seed)
+    spot = 1.10
+    chain = {
+        'spot': np.full(size, spot),
+        'strike': spot * np.exp(rng.normal(0, 0.15, size)),
+        't': rng.uniform(7 / 365, 2, size),
+        'r_d': rng.uniform(0.0, 0.05, size),
+        'r_f': rng.uniform(0.0, 0.05, size),
+        'sigma': rng.uniform(0.03, 0.6, size),
+        'is_call': rng.random(size) < 0.5
+    }
+    chain['price'] = gk_price(chain['spot'], chain['strike'], chain['t'], chain['r_d'], chain['r_f'], chain['sigma'], chain['is_call'])
+    return chain
+
+def scalar_implied_volatility(chain, count):
+    """
+    Referenz: Brent-Verfahren Option für Option
+    
+    Args:
+        chain (dict): Ergebnis von random_chain
+        count (int): Anzahl zu lösender Optionen
+    """
+    results = np.full(count, np.nan)
+    for i in range(count):
+        args = (chain['spot'][i], chain['strike'][i], chain['t'][i], chain['r_d'][i], chain['r_f'][i])
+        objective = lambda sigma: gk_price(*args, sigma, chain['is_call'][i]) - chain['price'][i]
+        try:
+            results[i] = brentq(objective, 1e-6, MAX_VOL, xtol=1e-12)
+        except ValueError:
+            pass
+    return results
+
+def run_benchmark(sizes=None, scalar_count=2000):
+    """
+    Misst den Durchsatz des vektorisierten Solvers in Optionen pro Sekunde
+    
+    Args:
+        sizes (list, optional): Kettengrößen
+        scalar_count (int): Anzahl Optionen für die skalare Referenz
+    """
+    console = Console()
+    sizes = sizes or [1_000, 10_000, 50_000, 200_000]
+    
+    table = Table(title="Garman-Kohlhagen IV-Solver")
+    table.add_column("Optionen", style="cyan")
+    table.add_column("Laufzeit", style="green")
+    table.add_column("Optionen/s", style="green")
+    table.add_column("Iterationen (Ø/max)", style="green")
+    table.add_column("Gelöst", style="green")
+    table.add_column("Max. Fehler", style="green")
+    
+    for size in sizes:
+        chain = random_chain(size)
+        args = (chain['price'], chain['spot'], chain['strike'], chain['t'], chain['r_d'], chain['r_f'], chain['is_call'])
+        
+        start = time.perf_counter()
+        sigma, iterations = implied_volatility(*args, return_iterations=True)
+        elapsed = time.perf_counter() - start
+        
+        # Fehler nur dort messen, wo der Zeitwert die Volatilität überhaupt bestimmt
+        intrinsic = np.maximum(
+            np.where(chain['is_call'], 1, -1) * (chain['spot'] * np.exp(-chain['r_f'] * chain['t']) - chain['strike'] * np.exp(-chain['r_d'] * chain['t'])),
+            0
+        )
+        identifiable = chain['price'] - intrinsic > 1e-10
+        error = np.nanmax(np.abs(sigma - chain['sigma'])[identifiable], initial=0.0)
+        
+        table.add_row(
+            f"{size:,}",
+            f"{elapsed * 1000:.1f} ms",
+            f"{size / elapsed:,.0f}",
+            f"{iterations.mean():.1f} / {iterations.max()}",
+            f"{np.isfinite(sigma).mean():.2%}",
+            f"{error:.1e}"
+        )
+    
+    chain = random_chain(scalar_count)
+    start = time.perf_counter()
+    scalar_implied_volatility(chain, scalar_count)
+    elapsed = time.perf_counter() - start
+    table.add_row(f"{scalar_count:,} (brentq je Option)", f"{elapsed * 1000:.1f} ms", f"{scalar_count / elapsed:,.0f}", "-", "-", "-")
+    
+    console.print(table)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des Garman-Kohlhagen IV-Solvers')
+    parser.add_argument('--sizes', type=int, nargs='+', help='Kettengrößen (Anzahl Optionen)')
+    parser.add_argument('--scalar-count', type=int, default=2000, help='Anzahl Optionen für die skalare Referenz')
+    
+    args = parser.parse_args()
+    
+    try:
+        run_benchmark(args.sizes, args.scalar_count)
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,327 @@
+import pandas as pd
+import numpy as np
+from scipy.special import ndtr
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parent))
+from common.market_data_loader import MarketDataLoader
+from implied_volatility_fetcher import ImpliedVolatilityFetcher
+
+# FRED-Serien für kurzfristige Zinsen je Währung (Tagesgeld USD, sonst 3M Interbank der OECD)
+RATE_SERIES = {
+    'USD': 'DFF',
+    'EUR': 'IR3TIB01EZM156N',
+    'GBP': 'IR3TIB01GBM156N',
+    'JPY': 'IR3TIB01JPM156N',
+    'AUD': 'IR3TIB01AUM156N',
+    'CAD': 'IR3TIB01CAM156N',
+    'CHF': 'IR3TIB01CHM156N',
+    'NZD': 'IR3TIB01NZM156N'
+}
+
+MAX_VOL = 10.0
+# Relative Rundungsgenauigkeit des (undiskontierten) Preises
+PRICE_EPSILON = 4 * np.finfo(float).eps
+# Größte Volatilitätsunschärfe, bei der sigma noch als identifiziert gilt
+MAX_VOL_UNCERTAINTY = 1e-6
+INV_SQRT_2PI = 1 / np.sqrt(2 * np.pi)
+
+def gk_price(spot, strike, t, r_d, r_f, sigma, is_call):
+    """
+    Garman-Kohlhagen Optionspreis (in Einheiten der Domestic-Währung)
+    
+    Args:
+        spot (array): Kassakurs
+        strike (array): Ausübungspreis
+        t (array): Laufzeit in Jahren
+        r_d (array): Domestic-Zins (stetig)
+        r_f (array): Foreign-Zins (stetig)
+        sigma (array): Volatilität
+        is_call (array): True für Calls, False für Puts
+    """
+    sign = np.where(is_call, 1.0, -1.0)
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strike) + (r_d - r_f + 0.5 * sigma ** 2) * t) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    return sign * (spot * np.exp(-r_f * t) * ndtr(sign * d1) - strike * np.exp(-r_d * t) * ndtr(sign * d2))
+
+def implied_volatility(price, spot, strike, t, r_d, r_f, is_call, tol=1e-10, max_iter=100, return_iterations=False):
+    """
+    Garman-Kohlhagen implizite Volatilität für ganze Optionsketten
+    
+    Alle Optionen werden gemeinsam mit Halley-Schritten iteriert. Jedes Element
+    hält ein Intervall [lo, hi], das die Lösung einschließt; verlässt ein
+    Schritt das Intervall (z.B. bei verschwindendem Vega), wird stattdessen
+    halbiert. Konvergierte Elemente scheiden aus, so dass jede Iteration nur
+    noch die offenen Optionen rechnet. Ein Element gilt als konvergiert, wenn
+    die Preisabweichung geteilt durch Vega (also der Volatilitätsfehler) oder
+    der letzte Schritt unter tol liegt.
+    
+    Preise außerhalb der Arbitragegrenzen, abgelaufene Optionen und nicht
+    konvergierte Elemente ergeben NaN. Ebenso Optionen, deren Zeitwert sigma
+    nicht bestimmt: Ist Vega so klein, dass die Rundungsungenauigkeit des
+    Preises mehr als MAX_VOL_UNCERTAINTY Volatilität ausmacht (tief im/aus dem
+    Geld, kurz vor Verfall), liefert der Preis keine verlässliche Volatilität.
+    
+    Args:
+        price (array): Optionspreis (Domestic-Währung)
+        spot (array): Kassakurs
+        strike (array): Ausübungspreis
+        t (array): Laufzeit in Jahren
+        r_d (array): Domestic-Zins (stetig)
+        r_f (array): Foreign-Zins (stetig)
+        is_call (array): True für Calls, False für Puts
+        tol (float): Toleranz für die Volatilitätsänderung
+        max_iter (int): Maximale Anzahl Iterationen
+        return_iterations (bool): Zusätzlich die Iterationen je Element zurückgeben
+    """
+    arrays = np.broadcast_arrays(price, spot, strike, t, r_d, r_f, is_call)
+    shape = arrays[0].shape
+    price, spot, strike, t, r_d, r_f, is_call = (
+        np.array(array, dtype=dtype).ravel() for array, dtype in zip(arrays, [float] * 6 + [bool])
+    )
+    
+    sigma = np.full(price.shape, np.nan)
+    iterations = np.zeros(price.shape, dtype=int)
+    
+    # Auf Forward-Basis rechnen: undiskontierter Preis, Forward und Strike
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discount = np.exp(-r_d * t)
+        forward = spot * np.exp((r_d - r_f) * t)
+        target = price / discount
+        sign = np.where(is_call, 1.0, -1.0)
+        intrinsic = np.maximum(sign * (forward - strike), 0.0)
+        upper = np.where(is_call, forward, strike)
+        
+        valid = (
+            np.isfinite(target) & np.isfinite(forward) & np.isfinite(strike)
+            & (t > 0) & (strike > 0) & (forward > 0)
+            & (target < upper)
+            # Ein Zeitwert unterhalb der Preisgenauigkeit bestimmt sigma nicht
+            & (target - intrinsic > PRICE_EPSILON * np.maximum(forward, strike))
+        )
+    
+    active = np.flatnonzero(valid)
+    if active.size == 0:
+        result = sigma.reshape(shape)
+        return (result, iterations.reshape(shape)) if return_iterations else result
+    
+    forward, strike, t, target, sign = forward[active], strike[active], t[active], target[active], sign[active]
+    sqrt_t = np.sqrt(t)
+    log_moneyness = np.log(forward / strike)
+    
+    # Startwert: Brenner-Subrahmanyam am Geld, Manaster-Koehler weit aus dem Geld
+    guess = np.maximum(
+        np.sqrt(2 * np.pi / t) * (target - intrinsic[active]) / forward,
+        np.sqrt(2 * np.abs(log_moneyness) / t)
+    )
+    s = np.clip(guess, 1e-4, MAX_VOL / 2)
+    lo = np.zeros_like(s)
+    hi = np.full_like(s, MAX_VOL)
+    
+    for iteration in range(1, max_iter + 1):
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            vol_sqrt_t = s * sqrt_t
+            d1 = log_moneyness / vol_sqrt_t + 0.5 * vol_sqrt_t
+            d2 = d1 - vol_sqrt_t
+            diff = sign * (forward * ndtr(sign * d1) - strike * ndtr(sign * d2)) - target
+            vega = forward * INV_SQRT_2PI * np.exp(-0.5 * d1 * d1) * sqrt_t
+            
+            # Der Preis steigt monoton in sigma: das Vorzeichen der Abweichung verengt das Intervall
+            hi = np.where(diff > 0, s, hi)
+            lo = np.where(diff <= 0, s, lo)
+            
+            newton = diff / vega
+            halley = newton / (1 - 0.5 * newton * d1 * d2 / s)
+            step = s - halley
+            outside = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+            step = np.where(outside, 0.5 * (lo + hi), step)
+            
+            # Vega-relativer Abbruch: die Preisabweichung entspricht einem Volatilitätsfehler von diff / vega
+            priced = np.abs(diff) <= tol * vega
+            # Volatilitätsunschärfe durch die Rundung des Preises
+            identified = PRICE_EPSILON * np.maximum(forward, strike) <= MAX_VOL_UNCERTAINTY * vega
+        
+        converged = priced | (np.abs(step - s) <= tol * np.maximum(s, 1.0))
+        s = np.where(priced, s, step)
+        
+        finished = converged & identified & (s > 0) & (s < MAX_VOL)
+        sigma[active[finished]] = s[finished]
+        iterations[active[converged]] = iteration
+        
+        keep = ~converged
+        if not keep.any():
+            break
+        
+        active = active[keep]
+        forward, strike, t, target, sign = forward[keep], strike[keep], t[keep], target[keep], sign[keep]
+        sqrt_t, log_moneyness = sqrt_t[keep], log_moneyness[keep]
+        s, lo, hi = s[keep], lo[keep], hi[keep]
+    else:
+        iterations[active] = max_iter
+    
+    result = sigma.reshape(shape)
+    return (result, iterations.reshape(shape)) if return_iterations else result
+
+class GarmanKohlhagenSolver:
+    def __init__(self):
+        """
+        Initialisiert den Garman-Kohlhagen IV-Solver
+        """
+        self.console = Console()
+        self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/implied_vol")
+        self.rates_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/economic_data/interest_rates")
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.loader = MarketDataLoader(console=self.console)
+        self.fetcher = ImpliedVolatilityFetcher()
+    
+    def pair_currencies(self, symbol):
+        """
+        Liefert Foreign- (Basis) und Domestic-Währung (Notierung) eines Paares
+        
+        Args:
+            symbol (str): Forex-Paar Symbol (z.B. EURUSD=X)
+        """
+        pair = symbol.replace('=X', '').upper()
+        return pair[:3], pair[3:6]
+    
+    def load_rates(self, currency, dates):
+        """
+        Liefert den zum jeweiligen Datum zuletzt bekannten Zins als stetigen Satz
+        
+        Die Zinsreihen kommen vom InterestRatesFetcher (fred_{series_id}.csv).
+        
+        Args:
+            currency (str): Währung (z.B. EUR)
+            dates (pd.Series): Datumswerte
+        """
+        series_id = RATE_SERIES.get(currency)
+        rate_file = self.rates_path / f"fred_{series_id}.csv"
+        
+        if series_id is None or not rate_file.exists():
+            self.console.print(
+                f"[yellow]Warnung: Keine Zinsdaten für {currency} ({rate_file.name if series_id else 'keine Serie'}), verwende 0%[/yellow]"
+            )
+            return np.zeros(len(dates))
+        
+        rates = pd.read_csv(rate_file, usecols=['date', 'value'], parse_dates=['date']).dropna().sort_values('date')
+        positions = np.searchsorted(rates['date'].to_numpy(), pd.to_datetime(dates).to_numpy(), side='right') - 1
+        values = np.where(positions >= 0, rates['value'].to_numpy()[np.maximum(positions, 0)], np.nan)
+        return np.log1p(values / 100)
+    
+    def load_spots(self, symbol, dates):
+        """
+        Liefert den zum jeweiligen Datum letzten Schlusskurs
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            dates (pd.Series): Datumswerte
+        """
+        dates = pd.to_datetime(dates)
+        start = dates.min().normalize() - timedelta(days=10)
+        end = dates.max().normalize() + timedelta(days=1)
+        closes = self.loader.get_history([symbol], start, end)[symbol]['Close'].dropna()
+        
+        positions = np.searchsorted(closes.index.to_numpy(), dates.dt.normalize().to_numpy(), side='right') - 1
+        return np.where(positions >= 0, closes.to_numpy()[np.maximum(positions, 0)], np.nan)
+    
+    def solve_chain(self, chain, symbol, spot=None):
+        """
+        Berechnet Garman-Kohlhagen IVs für eine komplette Optionskette in einem Aufruf
+        
+        Als Preis dient der Mittelkurs aus Bid/Ask, sonst der letzte Preis.
+        
+        Args:
+            chain (pd.DataFrame): Optionsdaten im Format des IV-Stores
+            symbol (str): Forex-Paar Symbol
+            spot (float, optional): Kassakurs (Standard: Schlusskurs am Snapshot-Tag)
+        """
+        chain = chain.copy()
+        dates = pd.to_datetime(chain['date'])
+        foreign, domestic = self.pair_currencies(symbol)
+        
+        quoted = (chain['bid'] > 0) & (chain['ask'] > 0)
+        chain['option_price'] = np.where(quoted, (chain['bid'] + chain['ask']) / 2, chain['last_price'])
+        chain['spot'] = spot if spot is not None else self.load_spots(symbol, dates)
+        chain['time_to_expiry'] = (pd.to_datetime(chain['expiry']) - dates.dt.normalize()).dt.days / 365
+        chain['r_domestic'] = self.load_rates(domestic, dates)
+        chain['r_foreign'] = self.load_rates(foreign, dates)
+        
+        chain['gk_implied_volatility'] = implied_volatility(
+            chain['option_price'].to_numpy(),
+            chain['spot'].to_numpy(),
+            chain['strike'].to_numpy(),
+            chain['time_to_expiry'].to_numpy(),
+            chain['r_domestic'].to_numpy(),
+            chain['r_foreign'].to_numpy(),
+            (chain['type'] == 'CALL').to_numpy()
+        )
+        return chain
+    
+    def process_symbol(self, symbol, start_date=None, end_date=None, spot=None):
+        """
+        Löst alle Snapshots eines Symbols aus dem IV-Store und speichert das Ergebnis
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            start_date (str, optional): Erster Snapshot-Tag (YYYY-MM-DD)
+            end_date (str, optional): Letzter Snapshot-Tag (YYYY-MM-DD)
+            spot (float, optional): Kassakurs für alle Snapshots
+        """
+        try:
+            history = self.fetcher.load_history(symbol, start_date, end_date)
+            
+            if history.empty:
+                self.console.print(f"[yellow]Keine Optionsdaten im IV-Store für {symbol}[/yellow]")
+                return None
+            
+            with self.console.status(f"[bold blue]Berechne Garman-Kohlhagen IVs für {symbol}..."):
+                solved = self.solve_chain(history, symbol, spot)
+            
+            output_file = self.base_path / f"gk_implied_vol_{symbol}.csv"
+            solved.to_csv(output_file, index=False)
+            
+            # Erstelle eine schöne Zusammenfassung
+            table = Table(title=f"Garman-Kohlhagen IV für {symbol}")
+            table.add_column("Metrik", style="cyan")
+            table.add_column("Wert", style="green")
+            
+            gk_iv = solved['gk_implied_volatility']
+            table.add_row("Anzahl Optionen", str(len(solved)))
+            table.add_row("Gelöst", f"{gk_iv.notna().sum()} ({gk_iv.notna().mean():.1%})")
+            table.add_row("Durchschnittliche GK IV", f"{gk_iv.mean():.2%}")
+            table.add_row("Durchschnittliche Yahoo IV", f"{solved['implied_volatility'].mean():.2%}")
+            table.add_row("Speicherort", str(output_file))
+            
+            self.console.print(table)
+            return solved
+        
+        except Exception as e:
+            self.console.print(f"[red]Fehler beim Berechnen der IVs für {symbol}: {str(e)}[/red]")
+            return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Garman-Kohlhagen IV-Solver für Optionsketten')
+    parser.add_argument('--symbols', nargs='+', help='Liste von Forex-Paaren')
+    parser.add_argument('--start-date', help='Erster Snapshot-Tag (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Letzter Snapshot-Tag (YYYY-MM-DD)')
+    parser.add_argument('--spot', type=float, help='Kassakurs (Standard: Schlusskurs am Snapshot-Tag)')
+    
+    args = parser.parse_args()
+    
+    try:
+        solver = GarmanKohlhagenSolver()
+        for symbol in args.symbols or ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'AUDUSD=X', 'USDCAD=X']:
+            solver.process_symbol(symbol, args.start_date, args.end_date, args.spot)
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
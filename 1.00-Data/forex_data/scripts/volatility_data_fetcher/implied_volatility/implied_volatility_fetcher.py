@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 from pathlib import Path
 import argparse
@@ -11,15 +12,125 @@ from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
 
+# Yahoo-Spalten der Optionskette und ihre Namen im IV-Store
+OPTION_COLUMNS = {
+    'strike': 'strike',
+    'impliedVolatility': 'implied_volatility',
+    'volume': 'volume',
+    'openInterest': 'open_interest',
+    'lastPrice': 'last_price',
+    'bid': 'bid',
+    'ask': 'ask'
+}
+CHAIN_COLUMNS = ['date', 'expiry', 'symbol', 'type'] + list(OPTION_COLUMNS.values())
+
 class ImpliedVolatilityFetcher:
-    def __init__(self):
+    def __init__(self, max_workers=8):
         """
         Initialisiert den Implied Volatility Fetcher
+        
+        Args:
+            max_workers (int, optional): Anzahl paralleler Requests für Verfallsdaten
         """
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/implied_vol")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.history_path = self.base_path / "history"
+        self.max_workers = max_workers
+    
+    def _chain_frame(self, opt_chain, expiry, symbol, snapshot_time):
+        """
+        Wandelt eine Yahoo Optionskette in ein DataFrame im Store-Format um
+        
+        Args:
+            opt_chain: Ergebnis von yf.Ticker.option_chain
+            expiry (str): Verfallsdatum
+            symbol (str): Forex-Paar Symbol
+            snapshot_time (datetime): Zeitpunkt des Abrufs
+        """
+        sides = {
+            'CALL': opt_chain.calls.reindex(columns=list(OPTION_COLUMNS)),
+            'PUT': opt_chain.puts.reindex(columns=list(OPTION_COLUMNS))
+        }
+        chain = pd.concat(sides, names=['type', None]).rename(columns=OPTION_COLUMNS)
+        chain = chain.reset_index(level='type').reset_index(drop=True)
+        
+        chain['date'] = snapshot_time
+        chain['expiry'] = expiry
+        chain['symbol'] = symbol
+        return chain[CHAIN_COLUMNS]
+    
+    def _fetch_expiries(self, ticker, symbol, expiries, snapshot_time):
+        """
+        Holt die Optionsketten aller Verfallsdaten parallel
+        
+        Args:
+            ticker (yf.Ticker): Yahoo Finance Ticker
+            symbol (str): Forex-Paar Symbol
+            expiries (list): Liste von Verfallsdaten
+            snapshot_time (datetime): Zeitpunkt des Abrufs
+        """
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(ticker.option_chain, expiry): expiry for expiry in expiries}
+            
+            for future in as_completed(futures):
+                expiry = futures[future]
+                try:
+                    frames[expiry] = self._chain_frame(future.result(), expiry, symbol, snapshot_time)
+                except Exception as e:
+                    self.console.print(f"[red]Fehler beim Abrufen der Optionskette {symbol} {expiry}: {str(e)}[/red]")
+        
+        # Reihenfolge der Verfallsdaten beibehalten
+        return [frames[expiry] for expiry in expiries if expiry in frames]
+    
+    def save_snapshot(self, df, symbol):
+        """
+        Speichert einen Tages-Snapshot im partitionierten IV-Store
         
+        Pro Symbol und Tag gibt es eine Partition. Ein erneuter Abruf am selben
+        Tag wird mit der Partition zusammengeführt: Kontrakte (expiry, strike, type)
+        aus dem neuen Abruf ersetzen die alten, alle übrigen bleiben erhalten. So
+        überschreibt ein Lauf mit einzelnem Verfallsdatum nicht die ganze Kette.
+        
+        Args:
+            df (pd.DataFrame): Optionsdaten im Store-Format
+            symbol (str): Forex-Paar Symbol
+        """
+        partition = self.history_path / symbol / f"{pd.Timestamp(df['date'].iloc[0]).strftime('%Y-%m-%d')}.csv"
+        partition.parent.mkdir(parents=True, exist_ok=True)
+        
+        if partition.exists():
+            existing = pd.read_csv(partition, parse_dates=['date'])
+            df = pd.concat([existing, df], ignore_index=True)
+            df = df.drop_duplicates(subset=['expiry', 'strike', 'type'], keep='last')
+            df = df.sort_values(['expiry', 'type', 'strike'], kind='stable')
+        
+        df.to_csv(partition, index=False)
+        return partition
+    
+    def load_history(self, symbol, start_date=None, end_date=None):
+        """
+        Lädt die IV-Historie eines Symbols aus dem partitionierten Store
+        
+        Es werden nur die Partitionen im angefragten Zeitraum gelesen.
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            start_date (str, optional): Erster Snapshot-Tag (YYYY-MM-DD)
+            end_date (str, optional): Letzter Snapshot-Tag (YYYY-MM-DD)
+        """
+        partitions = sorted((self.history_path / symbol).glob("*.csv"))
+        partitions = [
+            partition for partition in partitions
+            if (not start_date or partition.stem >= start_date) and (not end_date or partition.stem <= end_date)
+        ]
+        
+        if not partitions:
+            return pd.DataFrame(columns=CHAIN_COLUMNS)
+        
+        return pd.concat((pd.read_csv(partition, parse_dates=['date']) for partition in partitions), ignore_index=True)
+    
     def fetch_option_chain(self, symbol, expiry_date=None):
         """
         Holt Optionsdaten von Yahoo Finance
@@ -43,46 +154,16 @@ class ImpliedVolatilityFetcher:
                     self.console.print(f"[yellow]Keine Optionsdaten verfügbar für {symbol}[/yellow]")
                     return
                 
-                data = []
-                for date in options:
-                    opt_chain = ticker.option_chain(date)
-                    
-                    # Verarbeite Calls
-                    for _, row in opt_chain.calls.iterrows():
-                        data.append({
-                            'date': datetime.now(),
-                            'expiry': date,
-                            'symbol': symbol,
-                            'type': 'CALL',
-                            'strike': row['strike'],
-                            'implied_volatility': row['impliedVolatility'],
-                            'volume': row['volume'],
-                            'open_interest': row['openInterest'],
-                            'last_price': row['lastPrice'],
-                            'bid': row['bid'],
-                            'ask': row['ask']
-                        })
-                    
-                    # Verarbeite Puts
-                    for _, row in opt_chain.puts.iterrows():
-                        data.append({
-                            'date': datetime.now(),
-                            'expiry': date,
-                            'symbol': symbol,
-                            'type': 'PUT',
-                            'strike': row['strike'],
-                            'implied_volatility': row['impliedVolatility'],
-                            'volume': row['volume'],
-                            'open_interest': row['openInterest'],
-                            'last_price': row['lastPrice'],
-                            'bid': row['bid'],
-                            'ask': row['ask']
-                        })
+                data = self._fetch_expiries(ticker, symbol, list(options), datetime.now())
                 
                 if data:
-                    df = pd.DataFrame(data)
+                    df = pd.concat(data, ignore_index=True)
+                    
+                    # Aktueller Snapshot plus Tages-Partition im IV-Store
                     output_file = self.base_path / f"implied_vol_{symbol}.csv"
                     df.to_csv(output_file, index=False)
+                    partition = self.save_snapshot(df, symbol)
+                    snapshots = len(list(partition.parent.glob("*.csv")))
                     
                     # Erstelle eine schöne Zusammenfassung
                     table = Table(title=f"Implizite Volatilität für {symbol}")
@@ -97,6 +178,7 @@ class ImpliedVolatilityFetcher:
                     table.add_row("Gesamt-Volumen", str(df['volume'].sum()))
                     table.add_row("Gesamt-Open Interest", str(df['open_interest'].sum()))
                     table.add_row("Speicherort", str(output_file))
+                    table.add_row("IV-Historie", f"{snapshots} Tages-Snapshots in {partition.parent}")
                     
                     self.console.print(table)
                 else:
@@ -129,11 +211,12 @@ def main():
     parser = argparse.ArgumentParser(description='Implied Volatility Fetcher')
     parser.add_argument('--symbols', nargs='+', help='Liste von Forex-Paaren')
     parser.add_argument('--expiry-date', help='Verfallsdatum (YYYY-MM-DD)')
+    parser.add_argument('--max-workers', type=int, default=8, help='Anzahl paralleler Requests für Verfallsdaten')
     
     args = parser.parse_args()
     
     try:
-        fetcher = ImpliedVolatilityFetcher()
+        fetcher = ImpliedVolatilityFetcher(max_workers=args.max_workers)
         fetcher.fetch_implied_volatility(
             symbols=args.symbols,
             expiry_date=args.expiry_date
@@ -0,0 +1,324 @@
+import pandas as pd
+import numpy as np
+import os
+from pathlib import Path
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from rich.console import Console
+from rich.progress import Progress
+from rich.table import Table
+from rich import print as rprint
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.rolling_stats import RollingStats
+
+PAIRS = ["EURUSD", "GBPUSD", "AUDUSD", "NZDUSD", "USDCAD", "USDCHF", "USDJPY"]
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'ticks']
+TRADING_DAYS = 252
+
+def ticks_to_bars(tick_file, bar_minutes=5, chunksize=1_000_000):
+    """
+    Aggregiert eine Tick-Datei chunkweise zu Mid-Preis Bars
+    
+    Jeder Chunk wird einzeln zu Bars verdichtet, die Teilbars werden danach
+    zusammengeführt (Bars an Chunkgrenzen kommen in zwei Chunks vor). Es liegt
+    daher nie mehr als ein Chunk Ticks im Speicher.
+    
+    Args:
+        tick_file (Path): CSV mit timestamp, bid, ask (zeitlich sortiert)
+        bar_minutes (int): Bar-Länge in Minuten
+        chunksize (int): Anzahl Ticks pro Chunk
+    """
+    parts = []
+    for chunk in pd.read_csv(tick_file, usecols=['timestamp', 'bid', 'ask'], chunksize=chunksize):
+        timestamps = pd.to_datetime(chunk['timestamp'], format='ISO8601')
+        mid = (chunk['bid'].to_numpy() + chunk['ask'].to_numpy()) / 2
+        frame = pd.DataFrame({'bar': timestamps.dt.floor(f'{bar_minutes}min'), 'mid': mid})
+        parts.append(frame.groupby('bar', sort=True)['mid'].agg(['first', 'max', 'min', 'last', 'count']))
+    
+    if not parts:
+        return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([], name='timestamp'))
+    
+    bars = pd.concat(parts).groupby(level=0, sort=True).agg(
+        {'first': 'first', 'max': 'max', 'min': 'min', 'last': 'last', 'count': 'sum'}
+    )
+    bars.columns = BAR_COLUMNS
+    bars.index.name = 'timestamp'
+    return bars
+
+def daily_estimators(bars, min_bars=48):
+    """
+    Berechnet die täglichen Varianzschätzer aus Intraday-Bars
+    
+    Renditen werden nur innerhalb eines Tages (UTC) gebildet, die Lücke zum
+    Vortag geht über die Overnight-Rendite in Yang-Zhang ein.
+    
+    Args:
+        bars (pd.DataFrame): Bars mit open, high, low, close, ticks
+        min_bars (int): Mindestanzahl Bars pro Tag (dünne Wochenend-Sessions entfallen)
+    
+    Returns:
+        pd.DataFrame: Tages-OHLC und Tagesvarianzen (nicht annualisiert)
+    """
+    day = bars.index.normalize()
+    
+    returns = np.log(bars['close']).diff()
+    returns[day != np.roll(day, 1)] = np.nan
+    abs_returns = returns.abs()
+    
+    grouped = bars.groupby(day)
+    daily = pd.DataFrame({
+        'open': grouped['open'].first(),
+        'high': grouped['high'].max(),
+        'low': grouped['low'].min(),
+        'close': grouped['close'].last(),
+        'ticks': grouped['ticks'].sum(),
+        'bars': grouped['close'].count(),
+        'rv': (returns ** 2).groupby(day).sum(),
+        'bv': (np.pi / 2) * (abs_returns * abs_returns.shift(1)).groupby(day).sum()
+    })
+    daily.index.name = 'date'
+    
+    log_hl = np.log(daily['high'] / daily['low'])
+    log_co = np.log(daily['close'] / daily['open'])
+    daily['parkinson'] = log_hl ** 2 / (4 * np.log(2))
+    daily['garman_klass'] = 0.5 * log_hl ** 2 - (2 * np.log(2) - 1) * log_co ** 2
+    
+    return daily[daily['bars'] >= min_bars]
+
+def process_pair_year(pair, year, tick_path, bar_path, bar_minutes=5, chunksize=1_000_000, min_bars=48, rebuild_bars=False):
+    """
+    Verarbeitet eine Jahresdatei eines Paares (läuft in einem eigenen Prozess)
+    
+    Vorhandene Bars werden wiederverwendet, solange sie neuer als die Tick-Datei sind.
+    
+    Args:
+        pair (str): Forex-Paar (z.B. EURUSD)
+        year (int): Jahr
+        tick_path (Path): Basisordner der Tick-Daten
+        bar_path (Path): Basisordner der Bars
+        bar_minutes (int): Bar-Länge in Minuten
+        chunksize (int): Anzahl Ticks pro Chunk
+        min_bars (int): Mindestanzahl Bars pro Tag
+        rebuild_bars (bool): Bars immer neu aus den Ticks berechnen
+    
+    Returns:
+        pd.DataFrame: Tägliche Schätzer oder None, wenn keine Daten vorliegen
+    """
+    tick_file = Path(tick_path) / f"{pair}_tick" / f"{pair}_{year}.csv"
+    bar_file = Path(bar_path) / f"{pair}_{bar_minutes}m" / f"{pair}_{year}.csv"
+    
+    bars_current = bar_file.exists() and (not tick_file.exists() or bar_file.stat().st_mtime >= tick_file.stat().st_mtime)
+    
+    if bars_current and not rebuild_bars:
+        bars = pd.read_csv(bar_file, index_col='timestamp', parse_dates=['timestamp'])
+    elif tick_file.exists():
+        bars = ticks_to_bars(tick_file, bar_minutes, chunksize)
+        bar_file.parent.mkdir(parents=True, exist_ok=True)
+        bars.to_csv(bar_file)
+    else:
+        return None
+    
+    if bars.empty:
+        return None
+    
+    return daily_estimators(bars, min_bars)
+
+class HighFrequencyVolatility:
+    def __init__(self, max_workers=None):
+        """
+        Initialisiert die Hochfrequenz-Volatilitätsberechnung
+        
+        Args:
+            max_workers (int, optional): Anzahl paralleler Prozesse (Standard: alle Kerne)
+        """
+        self.console = Console()
+        self.tick_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/price_data/tick")
+        self.bar_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/price_data/minute")
+        self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/realized_volatility")
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or os.cpu_count()
+    
+    def available_years(self, pair):
+        """
+        Liefert alle Jahre, für die Tick-Daten oder Bars eines Paares vorliegen
+        
+        Args:
+            pair (str): Forex-Paar
+        """
+        years = set()
+        for folder in (self.tick_path / f"{pair}_tick", *self.bar_path.glob(f"{pair}_*m")):
+            for file in folder.glob(f"{pair}_*.csv"):
+                suffix = file.stem.split('_')[-1]
+                if suffix.isdigit():
+                    years.add(int(suffix))
+        return sorted(years)
+    
+    def yang_zhang(self, daily, window=20):
+        """
+        Berechnet die Yang-Zhang Varianz über ein rollierendes Fenster
+        
+        Args:
+            daily (pd.DataFrame): Tägliche OHLC-Daten
+            window (int): Fenstergröße in Tagen
+        """
+        components = pd.DataFrame({
+            'overnight': np.log(daily['open'] / daily['close'].shift(1)),
+            'open_close': np.log(daily['close'] / daily['open']),
+            'rogers_satchell': (
+                np.log(daily['high'] / daily['close']) * np.log(daily['high'] / daily['open'])
+                + np.log(daily['low'] / daily['close']) * np.log(daily['low'] / daily['open'])
+            )
+        })
+        
+        stats = RollingStats(components, [window])
+        std = stats.std()[window]
+        mean = stats.mean()[window]
+        
+        k = 0.34 / (1.34 + (window + 1) / (window - 1))
+        return std['overnight'] ** 2 + k * std['open_close'] ** 2 + (1 - k) * mean['rogers_satchell']
+    
+    def build_panel(self, daily, yz_window=20):
+        """
+        Annualisiert die Tagesvarianzen zu Volatilitäten
+        
+        Args:
+            daily (pd.DataFrame): Tägliche Schätzer eines Paares
+            yz_window (int): Fenstergröße für Yang-Zhang
+        """
+        panel = daily[['open', 'high', 'low', 'close', 'ticks', 'bars']].copy()
+        for column in ['rv', 'bv', 'parkinson', 'garman_klass']:
+            panel[f'vol_{column}'] = np.sqrt(daily[column].clip(lower=0) * TRADING_DAYS)
+        panel[f'vol_yang_zhang_{yz_window}d'] = np.sqrt(self.yang_zhang(daily, yz_window).clip(lower=0) * TRADING_DAYS)
+        return panel
+    
+    def process_pairs(self, pairs=None, start_year=None, end_year=None, bar_minutes=5, yz_window=20, chunksize=1_000_000, min_bars=48, rebuild_bars=False):
+        """
+        Berechnet die täglichen Volatilitäts-Panels für alle Paare und Jahre
+        
+        Jede Jahresdatei wird in einem eigenen Prozess gestreamt, Yang-Zhang
+        wird danach über die zusammengesetzte Tagesreihe je Paar berechnet.
+        
+        Args:
+            pairs (list, optional): Liste von Forex-Paaren
+            start_year (int, optional): Erstes Jahr
+            end_year (int, optional): Letztes Jahr
+            bar_minutes (int): Bar-Länge in Minuten
+            yz_window (int): Fenstergröße für Yang-Zhang
+            chunksize (int): Anzahl Ticks pro Chunk
+            min_bars (int): Mindestanzahl Bars pro Tag
+            rebuild_bars (bool): Bars immer neu aus den Ticks berechnen
+        """
+        pairs = [pair.upper() for pair in (pairs or PAIRS)]
+        
+        jobs = []
+        for pair in pairs:
+            for year in self.available_years(pair):
+                if (start_year and year < start_year) or (end_year and year > end_year):
+                    continue
+                jobs.append((pair, year))
+        
+        if not jobs:
+            self.console.print("[yellow]Keine Tick-Daten oder Bars gefunden[/yellow]")
+            return None
+        
+        results = {pair: [] for pair in pairs}
+        
+        with Progress() as progress:
+            task = progress.add_task("[cyan]Berechne Hochfrequenz-Volatilität...", total=len(jobs))
+            
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        process_pair_year, pair, year, self.tick_path, self.bar_path,
+                        bar_minutes, chunksize, min_bars, rebuild_bars
+                    ): (pair, year)
+                    for pair, year in jobs
+                }
+                
+                for future in as_completed(futures):
+                    pair, year = futures[future]
+                    try:
+                        daily = future.result()
+                        if daily is not None:
+                            results[pair].append(daily)
+                    except Exception as e:
+                        self.console.print(f"[red]Fehler bei {pair} {year}: {str(e)}[/red]")
+                    progress.update(task, advance=1)
+        
+        panels = {}
+        for pair, frames in results.items():
+            if not frames:
+                continue
+            daily = pd.concat(frames).sort_index()
+            daily = daily[~daily.index.duplicated(keep='last')]
+            panels[pair] = self.build_panel(daily, yz_window)
+            panels[pair].to_csv(self.base_path / f"hf_vol_{pair}.csv")
+        
+        if not panels:
+            self.console.print("[yellow]Keine Volatilitätsdaten berechnet[/yellow]")
+            return None
+        
+        panel = pd.concat(panels, names=['pair', 'date'])
+        output_file = self.base_path / "hf_vol_panel.csv"
+        panel.to_csv(output_file)
+        
+        # Erstelle eine schöne Zusammenfassung
+        table = Table(title="Hochfrequenz-Volatilität (annualisiert, letzter Tag)")
+        table.add_column("Paar", style="cyan")
+        table.add_column("Zeitraum", style="green")
+        table.add_column("RV", style="green")
+        table.add_column("BV", style="green")
+        table.add_column("Parkinson", style="green")
+        table.add_column("Garman-Klass", style="green")
+        table.add_column(f"Yang-Zhang ({yz_window}T)", style="green")
+        
+        for pair, pair_panel in panels.items():
+            last = pair_panel.iloc[-1]
+            table.add_row(
+                pair,
+                f"{pair_panel.index.min().strftime('%Y-%m-%d')} bis {pair_panel.index.max().strftime('%Y-%m-%d')}",
+                f"{last['vol_rv']:.2%}",
+                f"{last['vol_bv']:.2%}",
+                f"{last['vol_parkinson']:.2%}",
+                f"{last['vol_garman_klass']:.2%}",
+                f"{last[f'vol_yang_zhang_{yz_window}d']:.2%}"
+            )
+        
+        self.console.print(table)
+        self.console.print(f"[green]Panel gespeichert: {output_file}[/green]")
+        
+        return panel
+
+def main():
+    parser = argparse.ArgumentParser(description='Hochfrequenz-Volatilität aus Tick-Daten')
+    parser.add_argument('--pairs', nargs='+', help='Liste von Forex-Paaren (z.B. EURUSD USDJPY)')
+    parser.add_argument('--start-year', type=int, help='Erstes Jahr')
+    parser.add_argument('--end-year', type=int, help='Letztes Jahr')
+    parser.add_argument('--bar-minutes', type=int, default=5, help='Bar-Länge in Minuten für RV und BV')
+    parser.add_argument('--yz-window', type=int, default=20, help='Fenstergröße für Yang-Zhang in Tagen')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Anzahl Ticks pro Chunk')
+    parser.add_argument('--min-bars', type=int, default=48, help='Mindestanzahl Bars pro Tag')
+    parser.add_argument('--max-workers', type=int, help='Anzahl paralleler Prozesse')
+    parser.add_argument('--rebuild-bars', action='store_true', help='Bars neu aus den Tick-Daten berechnen')
+    
+    args = parser.parse_args()
+    
+    try:
+        calculator = HighFrequencyVolatility(max_workers=args.max_workers)
+        calculator.process_pairs(
+            pairs=args.pairs,
+            start_year=args.start_year,
+            end_year=args.end_year,
+            bar_minutes=args.bar_minutes,
+            yz_window=args.yz_window,
+            chunksize=args.chunksize,
+            min_bars=args.min_bars,
+            rebuild_bars=args.rebuild_bars
+        )
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
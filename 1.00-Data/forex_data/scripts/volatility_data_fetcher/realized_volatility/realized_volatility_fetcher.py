@@ -10,6 +10,11 @@ from rich.progress import Progress
 from rich.table import Table
 from rich import print as rprint
 from dotenv import load_dotenv
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from common.market_data_loader import MarketDataLoader
+from common.rolling_stats import RollingStats, log_returns
 
 class RealizedVolatilityFetcher:
     def __init__(self):
@@ -19,6 +24,7 @@ class RealizedVolatilityFetcher:
         self.console = Console()
         self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/realized_vol")
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.loader = MarketDataLoader(console=self.console)
         
     def calculate_realized_volatility(self, prices, window=20):
         """
@@ -31,8 +37,21 @@ class RealizedVolatilityFetcher:
         Returns:
             pd.Series: Realisierte Volatilität
         """
-        returns = np.log(prices / prices.shift(1))
-        return returns.rolling(window=window).std() * np.sqrt(252)
+        return self.calculate_realized_volatilities(prices, [window])[window]
+    
+    def calculate_realized_volatilities(self, prices, windows):
+        """
+        Berechnet die realisierte Volatilität für mehrere Fenster in einem Durchlauf
+        
+        Args:
+            prices (pd.Series): Preisdaten
+            windows (list): Liste von Fenstergrößen
+            
+        Returns:
+            dict: Fenstergröße -> Realisierte Volatilität (pd.Series)
+        """
+        stds = RollingStats(log_returns(prices), windows).std()
+        return {window: std * np.sqrt(252) for window, std in stds.items()}
     
     def fetch_historical_data(self, symbol, start_date=None, end_date=None, windows=None):
         """
@@ -46,9 +65,6 @@ class RealizedVolatilityFetcher:
         """
         try:
             with self.console.status(f"[bold blue]Lade historische Daten für {symbol}..."):
-                # Yahoo Finance Ticker
-                ticker = yf.Ticker(symbol)
-                
                 # Setze Standardwerte
                 if not end_date:
                     end_date = datetime.now()
@@ -57,8 +73,8 @@ class RealizedVolatilityFetcher:
                 if not windows:
                     windows = [20, 60, 120]  # 20 Tage, 60 Tage, 120 Tage
                 
-                # Hole historische Daten
-                hist = ticker.history(start=start_date, end=end_date, interval='1d')
+                # Hole historische Daten aus dem gemeinsamen Cache
+                hist = self.loader.get_history([symbol], start_date, end_date)[symbol]
                 
                 if hist.empty:
                     self.console.print(f"[yellow]Keine historischen Daten verfügbar für {symbol}[/yellow]")
@@ -67,10 +83,11 @@ class RealizedVolatilityFetcher:
                 # Berechne verschiedene Volatilitätsmaße
                 data = pd.DataFrame()
                 data['date'] = hist.index
-                data['close'] = hist['Close']
+                data['close'] = hist['Close'].to_numpy()
                 
+                volatilities = self.calculate_realized_volatilities(hist['Close'], windows)
                 for window in windows:
-                    data[f'vol_{window}d'] = self.calculate_realized_volatility(hist['Close'], window=window)
+                    data[f'vol_{window}d'] = volatilities[window].to_numpy()
                 
                 # Speichere die Daten
                 output_file = self.base_path / f"realized_vol_{symbol}.csv"
@@ -109,6 +126,14 @@ class RealizedVolatilityFetcher:
         # Standardwerte
         if not symbols:
             symbols = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'AUDUSD=X', 'USDCAD=X']
+        if not end_date:
+            end_date = datetime.now()
+        if not start_date:
+            start_date = end_date - timedelta(days=365)
+        
+        # Lade alle Symbole gebündelt in einem Request, danach bedient der Cache jedes Symbol
+        with self.console.status("[bold blue]Aktualisiere Marktdaten-Cache..."):
+            self.loader.refresh(symbols, start_date, end_date)
         
         with Progress() as progress:
             task = progress.add_task("[cyan]Lade realisierte Volatilitätsdaten...", total=len(symbols))
@@ -0,0 +1,393 @@
+import pandas as pd
+import numpy as np
+from scipy.optimize import least_squares
+from scipy.special import ndtri
+from pathlib import Path
+import argparse
+from rich.console import Console
+from rich.table import Table
+from rich import print as rprint
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "implied_volatility"))
+from garman_kohlhagen_solver import GarmanKohlhagenSolver
+
+SVI_PARAMS = ['a', 'b', 'rho', 'm', 'sigma']
+MIN_POINTS = 5
+
+# Standardraster: 1 Woche bis 2 Jahre (log-verteilt) × Forward-Call-Delta 5% bis 95%
+GRID_TENORS = np.geomspace(7 / 365, 2.0, 60)
+GRID_DELTAS = np.round(np.linspace(0.05, 0.95, 91), 4)
+
+def svi_total_variance(k, a, b, rho, m, sigma):
+    """
+    Raw SVI: totale implizite Varianz w(k) = a + b (rho (k - m) + sqrt((k - m)^2 + sigma^2))
+    
+    Args:
+        k (array): Log-Moneyness ln(K/F)
+        a, b, rho, m, sigma (array): SVI-Parameter (broadcastbar)
+    """
+    centered = k - m
+    return a + b * (rho * centered + np.sqrt(centered * centered + sigma * sigma))
+
+def fit_svi_slice(k, w, m_grid=None, sigma_grid=None):
+    """
+    Fittet einen SVI-Slice an die totalen Varianzen einer Laufzeit
+    
+    Für feste (m, sigma) ist SVI linear in (a, b*rho, b). Alle Kandidaten eines
+    (m, sigma)-Rasters werden gleichzeitig als 3x3 Normalgleichungen gelöst; der
+    beste zulässige Kandidat ist der Startwert für einen Least-Squares-Fit aller
+    fünf Parameter.
+    
+    Args:
+        k (np.ndarray): Log-Moneyness
+        w (np.ndarray): Totale implizite Varianz (IV^2 * T)
+        m_grid (np.ndarray, optional): Kandidaten für m
+        sigma_grid (np.ndarray, optional): Kandidaten für sigma
+    
+    Returns:
+        tuple: Parameter (a, b, rho, m, sigma) und RMSE der totalen Varianz
+    """
+    span = max(np.ptp(k), 1e-3)
+    m_grid = np.linspace(k.min(), k.max(), 25) if m_grid is None else m_grid
+    sigma_grid = np.geomspace(span / 100, span * 2, 25) if sigma_grid is None else sigma_grid
+    
+    m, s = np.meshgrid(m_grid, sigma_grid, indexing='ij')
+    m, s = m.ravel()[:, None], s.ravel()[:, None]
+    
+    centered = k[None, :] - m
+    root = np.sqrt(centered * centered + s * s)
+    design = np.stack([np.ones_like(root), centered, root], axis=2)
+    
+    normal = np.einsum('cpi,cpj->cij', design, design) + 1e-12 * np.eye(3)
+    rhs = np.einsum('cpi,p->ci', design, w)
+    coefficients = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    
+    a, d, c = coefficients.T
+    feasible = (c > 0) & (np.abs(d) < c)
+    sse = ((np.einsum('cpi,ci->cp', design, coefficients) - w[None, :]) ** 2).sum(axis=1)
+    sse = np.where(feasible, sse, np.inf)
+    
+    best = int(np.argmin(sse))
+    if np.isfinite(sse[best]):
+        start = [a[best], c[best], d[best] / c[best], m[best, 0], s[best, 0]]
+    else:
+        start = [max(w.min(), 1e-6), 0.1, 0.0, 0.0, 0.1]
+    
+    result = least_squares(
+        lambda p: svi_total_variance(k, *p) - w,
+        start,
+        bounds=([-np.inf, 0.0, -0.999, k.min() - span, 1e-6], [np.inf, np.inf, 0.999, k.max() + span, 10 * span]),
+        method='trf'
+    )
+    rmse = float(np.sqrt(np.mean(result.fun ** 2)))
+    return result.x, rmse
+
+class SVISurface:
+    def __init__(self, params, spot, r_d, r_f):
+        """
+        Gefittete Volatilitätsoberfläche (SVI je Laufzeit, linear in der totalen Varianz über die Laufzeit)
+        
+        Args:
+            params (pd.DataFrame): Spalten t, a, b, rho, m, sigma (eine Zeile je Laufzeit)
+            spot (float): Kassakurs am Snapshot-Tag
+            r_d (float): Domestic-Zins (stetig)
+            r_f (float): Foreign-Zins (stetig)
+        """
+        params = params.sort_values('t')
+        self.params = params.reset_index(drop=True)
+        self.tenors = params['t'].to_numpy(dtype=float)
+        self._coefficients = params[SVI_PARAMS].to_numpy(dtype=float).T
+        self.spot = float(spot)
+        self.r_d = float(r_d)
+        self.r_f = float(r_f)
+    
+    def forward(self, t):
+        """
+        Forward-Kurs nach Zinsparität
+        
+        Args:
+            t (array): Laufzeit in Jahren
+        """
+        return self.spot * np.exp((self.r_d - self.r_f) * np.asarray(t, dtype=float))
+    
+    def total_variance(self, k, t):
+        """
+        Totale implizite Varianz an beliebigen Punkten (k, t)
+        
+        Zwischen zwei Laufzeiten wird bei gleicher Log-Moneyness linear in der
+        totalen Varianz interpoliert, vor der ersten und nach der letzten
+        Laufzeit mit konstanter impliziter Volatilität extrapoliert.
+        
+        Args:
+            k (array): Log-Moneyness ln(K/F)
+            t (array): Laufzeit in Jahren
+        """
+        k, t = np.broadcast_arrays(np.asarray(k, dtype=float), np.asarray(t, dtype=float))
+        n = len(self.tenors)
+        
+        upper = np.clip(np.searchsorted(self.tenors, t), 1, max(n - 1, 1))
+        lower = upper - 1 if n > 1 else np.zeros_like(upper)
+        upper = np.minimum(upper, n - 1)
+        
+        w_lower = np.maximum(svi_total_variance(k, *self._coefficients[:, lower]), 0.0)
+        w_upper = np.maximum(svi_total_variance(k, *self._coefficients[:, upper]), 0.0)
+        t_lower, t_upper = self.tenors[lower], self.tenors[upper]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(t_upper > t_lower, (t - t_lower) / (t_upper - t_lower), 0.0)
+            inside = w_lower + np.clip(weight, 0.0, 1.0) * (w_upper - w_lower)
+        
+        before = t < self.tenors[0]
+        after = t > self.tenors[-1]
+        result = np.where(before, w_lower * t / self.tenors[0], inside)
+        result = np.where(after, w_upper * t / self.tenors[-1], result)
+        return result
+    
+    def implied_vol(self, strike, t):
+        """
+        Implizite Volatilität für Strike und Laufzeit (vektorisiert)
+        
+        Args:
+            strike (array): Ausübungspreis
+            t (array): Laufzeit in Jahren
+        """
+        t = np.asarray(t, dtype=float)
+        k = np.log(np.asarray(strike, dtype=float) / self.forward(t))
+        return np.sqrt(self.total_variance(k, t) / t)
+    
+    def delta_grid(self, deltas=None, tenors=None, iterations=30):
+        """
+        Wertet die Oberfläche auf einem Delta × Laufzeit Raster aus
+        
+        Zu jedem Forward-Call-Delta wird die Log-Moneyness per Fixpunkt-Iteration
+        k = sigma^2 t / 2 - N^-1(delta) sigma sqrt(t) bestimmt (sigma hängt von k ab),
+        für das ganze Raster gleichzeitig.
+        
+        Args:
+            deltas (np.ndarray, optional): Forward-Call-Deltas
+            tenors (np.ndarray, optional): Laufzeiten in Jahren
+            iterations (int): Anzahl Fixpunkt-Iterationen
+        
+        Returns:
+            dict: tenors, deltas, vols, strikes (Raster Laufzeit × Delta)
+        """
+        deltas = GRID_DELTAS if deltas is None else np.asarray(deltas, dtype=float)
+        tenors = GRID_TENORS if tenors is None else np.asarray(tenors, dtype=float)
+        
+        t = tenors[:, None]
+        d1 = ndtri(deltas)[None, :]
+        sqrt_t = np.sqrt(t)
+        
+        vol = np.sqrt(self.total_variance(np.zeros_like(t), t) / t) * np.ones_like(d1)
+        for _ in range(iterations):
+            k = 0.5 * vol * vol * t - d1 * vol * sqrt_t
+            vol = np.sqrt(self.total_variance(k, t) / t)
+        
+        k = 0.5 * vol * vol * t - d1 * vol * sqrt_t
+        return {
+            'tenors': tenors,
+            'deltas': deltas,
+            'vols': vol,
+            'strikes': self.forward(t) * np.exp(k)
+        }
+
+class ImpliedVolSurfaceEngine:
+    def __init__(self):
+        """
+        Initialisiert die Engine für gefittete Volatilitätsoberflächen
+        """
+        self.console = Console()
+        self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/vol_surface/svi")
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.solver = GarmanKohlhagenSolver()
+        self._surfaces = {}
+    
+    def _cache_files(self, symbol, snapshot):
+        """
+        Liefert die Cache-Dateien (Parameter und Raster) eines Snapshots
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            snapshot (str): Snapshot-Tag (YYYY-MM-DD)
+        """
+        folder = self.base_path / symbol
+        return folder / f"{snapshot}_params.csv", folder / f"{snapshot}_grid.npz"
+    
+    def latest_snapshot(self, symbol):
+        """
+        Liefert den letzten Snapshot-Tag im IV-Store
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+        """
+        partitions = sorted((self.solver.fetcher.history_path / symbol).glob("*.csv"))
+        return partitions[-1].stem if partitions else None
+    
+    def fit(self, symbol, snapshot, spot=None):
+        """
+        Fittet alle Laufzeiten eines Snapshots
+        
+        Verwendet werden OTM-Optionen (Puts unter, Calls über dem Forward) mit
+        Garman-Kohlhagen IV, ersatzweise die IV von Yahoo.
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            snapshot (str): Snapshot-Tag (YYYY-MM-DD)
+            spot (float, optional): Kassakurs (Standard: Schlusskurs am Snapshot-Tag)
+        
+        Returns:
+            SVISurface: Gefittete Oberfläche oder None
+        """
+        chain = self.solver.fetcher.load_history(symbol, snapshot, snapshot)
+        if chain.empty:
+            self.console.print(f"[yellow]Keine Optionsdaten für {symbol} am {snapshot}[/yellow]")
+            return None
+        
+        chain = self.solver.solve_chain(chain, symbol, spot)
+        chain['iv'] = chain['gk_implied_volatility'].fillna(chain['implied_volatility'])
+        chain['forward'] = chain['spot'] * np.exp((chain['r_domestic'] - chain['r_foreign']) * chain['time_to_expiry'])
+        chain['k'] = np.log(chain['strike'] / chain['forward'])
+        
+        otm = np.where(chain['type'] == 'CALL', chain['k'] >= 0, chain['k'] < 0)
+        chain = chain[otm & (chain['iv'] > 0) & (chain['time_to_expiry'] > 0) & np.isfinite(chain['k'])]
+        
+        rows = []
+        for expiry, group in chain.groupby('expiry'):
+            if len(group) < MIN_POINTS:
+                continue
+            t = group['time_to_expiry'].iloc[0]
+            params, rmse = fit_svi_slice(group['k'].to_numpy(), (group['iv'] ** 2 * t).to_numpy())
+            rows.append({'expiry': expiry, 't': t, **dict(zip(SVI_PARAMS, params)), 'rmse': rmse, 'points': len(group)})
+        
+        if not rows:
+            self.console.print(f"[yellow]Zu wenige Optionen für einen SVI-Fit ({symbol} {snapshot})[/yellow]")
+            return None
+        
+        params = pd.DataFrame(rows)
+        params['spot'] = chain['spot'].median()
+        params['r_domestic'] = chain['r_domestic'].median()
+        params['r_foreign'] = chain['r_foreign'].median()
+        return SVISurface(params, params['spot'].iloc[0], params['r_domestic'].iloc[0], params['r_foreign'].iloc[0])
+    
+    def get_surface(self, symbol, snapshot=None, refit=False, spot=None):
+        """
+        Liefert die Oberfläche eines Snapshots aus Speicher, Cache oder per Fit
+        
+        Der Cache gilt, solange er neuer als die Partition des Snapshots im IV-Store ist.
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            snapshot (str, optional): Snapshot-Tag (Standard: letzter)
+            refit (bool): Cache ignorieren und neu fitten
+            spot (float, optional): Kassakurs für einen Neufit (Standard: Schlusskurs am Snapshot-Tag)
+        """
+        snapshot = snapshot or self.latest_snapshot(symbol)
+        if snapshot is None:
+            self.console.print(f"[yellow]Keine Snapshots im IV-Store für {symbol}[/yellow]")
+            return None
+        
+        key = (symbol, snapshot)
+        if key in self._surfaces and not refit:
+            return self._surfaces[key]
+        
+        params_file, grid_file = self._cache_files(symbol, snapshot)
+        partition = self.solver.fetcher.history_path / symbol / f"{snapshot}.csv"
+        cache_valid = params_file.exists() and (not partition.exists() or params_file.stat().st_mtime >= partition.stat().st_mtime)
+        
+        if cache_valid and not refit:
+            params = pd.read_csv(params_file)
+            surface = SVISurface(params, params['spot'].iloc[0], params['r_domestic'].iloc[0], params['r_foreign'].iloc[0])
+        else:
+            surface = self.fit(symbol, snapshot, spot)
+            if surface is None:
+                return None
+            params_file.parent.mkdir(parents=True, exist_ok=True)
+            surface.params.to_csv(params_file, index=False)
+            np.savez(grid_file, **surface.delta_grid())
+        
+        self._surfaces[key] = surface
+        return surface
+    
+    def get_grid(self, symbol, snapshot=None, refit=False):
+        """
+        Liefert das gecachte Delta × Laufzeit Raster eines Snapshots
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            snapshot (str, optional): Snapshot-Tag (Standard: letzter)
+            refit (bool): Cache ignorieren und neu fitten
+        """
+        snapshot = snapshot or self.latest_snapshot(symbol)
+        if self.get_surface(symbol, snapshot, refit) is None:
+            return None
+        
+        _, grid_file = self._cache_files(symbol, snapshot)
+        if not grid_file.exists():
+            np.savez(grid_file, **self._surfaces[(symbol, snapshot)].delta_grid())
+        
+        with np.load(grid_file) as grid:
+            return {name: grid[name] for name in grid.files}
+    
+    def summarize(self, symbol, snapshot=None, refit=False):
+        """
+        Fittet bzw. lädt die Oberfläche und zeigt ATM, Risk Reversal und Butterfly je Laufzeit
+        
+        Args:
+            symbol (str): Forex-Paar Symbol
+            snapshot (str, optional): Snapshot-Tag (Standard: letzter)
+            refit (bool): Cache ignorieren und neu fitten
+        """
+        try:
+            with self.console.status(f"[bold blue]Lade Volatilitätsoberfläche für {symbol}..."):
+                surface = self.get_surface(symbol, snapshot, refit)
+            
+            if surface is None:
+                return None
+            
+            tenors = surface.tenors
+            grid = surface.delta_grid(deltas=[0.25, 0.5, 0.75], tenors=tenors)
+            call_25, atm, put_25 = grid['vols'].T
+            
+            table = Table(title=f"SVI-Oberfläche für {symbol}")
+            table.add_column("Verfall", style="cyan")
+            table.add_column("Laufzeit (J)", style="green")
+            table.add_column("ATM", style="green")
+            table.add_column("25D RR", style="green")
+            table.add_column("25D BF", style="green")
+            table.add_column("RMSE (w)", style="green")
+            
+            for i, row in surface.params.iterrows():
+                table.add_row(
+                    str(row['expiry']),
+                    f"{row['t']:.3f}",
+                    f"{atm[i]:.2%}",
+                    f"{call_25[i] - put_25[i]:.2%}",
+                    f"{0.5 * (call_25[i] + put_25[i]) - atm[i]:.2%}",
+                    f"{row['rmse']:.2e}"
+                )
+            
+            self.console.print(table)
+            return surface
+        
+        except Exception as e:
+            self.console.print(f"[red]Fehler bei der Volatilitätsoberfläche für {symbol}: {str(e)}[/red]")
+            return None
+
+def main():
+    parser = argparse.ArgumentParser(description='SVI Volatilitätsoberfläche aus dem IV-Store')
+    parser.add_argument('--symbols', nargs='+', help='Liste von Forex-Paaren')
+    parser.add_argument('--snapshot', help='Snapshot-Tag (YYYY-MM-DD, Standard: letzter)')
+    parser.add_argument('--refit', action='store_true', help='Cache ignorieren und neu fitten')
+    
+    args = parser.parse_args()
+    
+    try:
+        engine = ImpliedVolSurfaceEngine()
+        for symbol in args.symbols or ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'AUDUSD=X', 'USDCAD=X']:
+            engine.summarize(symbol, args.snapshot, args.refit)
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,66 +1,470 @@
-# Simulierte Daten 
-import os
-import numpy as np
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-
-# === Einstellungen ===
-output_data_folder = "/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/vol_surface"
-output_image_folder = "/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/vol_surface/vol_surface_visual"
-file_name = "eurusd_volume_surface.csv"
-image_name = "eurusd_volume_surface.png"
-
-num_price_levels = 50
-num_time_steps = 100
-
-# === Simuliere Daten ===
-prices = np.linspace(1.0500, 1.0600, num=num_price_levels)
-times = pd.date_range("2024-01-01", periods=num_time_steps, freq="H")
-volumes = np.random.poisson(lam=10, size=(num_time_steps, num_price_levels))
+import os
+import json
+from pathlib import Path
+import argparse
+from rich.console import Console
+from rich.progress import Progress
+from rich.table import Table
+from rich import print as rprint
 
-# === DataFrame erstellen ===
-records = []
-for i, time in enumerate(times):
-    for j, price in enumerate(prices):
-        records.append({
-            "timestamp": time,
-            "price": round(price, 5),
-            "volume": volumes[i, j]
-        })
+PAIRS = ["EURUSD", "GBPUSD", "AUDUSD", "NZDUSD", "USDCAD", "USDCHF", "USDJPY"]
+CHANNELS = ['ticks', 'volume']
+DTYPE = 'float32'
+COPY_ROWS = 4096
 
-df = pd.DataFrame(records)
+def pip_size(pair):
+    """
+    Liefert die Pip-Größe eines Paares
+    
+    Args:
+        pair (str): Forex-Paar (z.B. EURUSD)
+    """
+    return 0.01 if "JPY" in pair.upper() else 0.0001
 
-# === Ordner erstellen, falls nötig ===
-os.makedirs(output_data_folder, exist_ok=True)
-os.makedirs(output_image_folder, exist_ok=True)
+def surface_file(folder, pair, channel):
+    """
+    Liefert den Pfad der dichten Array-Datei eines Kanals
+    
+    Args:
+        folder (Path): Basisordner der Volume Surfaces
+        pair (str): Forex-Paar
+        channel (str): 'ticks' oder 'volume'
+    """
+    return Path(folder) / pair / f"{pair}_{channel}.dat"
 
-# === CSV speichern ===
-csv_path = os.path.join(output_data_folder, file_name)
-df.to_csv(csv_path, index=False)
-print(f"[✓] Volume Surface gespeichert unter: {csv_path}")
+def load_surface_meta(folder, pair):
+    """
+    Lädt die Metadaten (Achsen, Auflösung, Cursor) einer Volume Surface
+    
+    Args:
+        folder (Path): Basisordner der Volume Surfaces
+        pair (str): Forex-Paar
+    """
+    meta_file = Path(folder) / pair / f"{pair}_meta.json"
+    if not meta_file.exists():
+        return None
+    with open(meta_file) as f:
+        return json.load(f)
 
-# === Daten für Plot vorbereiten ===
-df['timestamp'] = pd.to_datetime(df['timestamp'])
-df['time_num'] = (df['timestamp'] - df['timestamp'].min()).dt.total_seconds() / 3600  # Stunden
+def open_surface(folder, pair, channel='volume', mode='r'):
+    """
+    Öffnet eine Volume Surface als Memory-Map (Zeit-Bucket × Preisstufe)
+    
+    Args:
+        folder (Path): Basisordner der Volume Surfaces
+        pair (str): Forex-Paar
+        channel (str): 'ticks' oder 'volume'
+        mode (str): Memmap-Modus ('r' oder 'r+')
+    
+    Returns:
+        tuple: (np.memmap, Metadaten) oder (None, None), wenn keine Surface existiert
+    """
+    meta = load_surface_meta(folder, pair)
+    if meta is None:
+        return None, None
+    
+    shape = (meta['rows'], meta['levels'])
+    if meta['rows'] == 0 or meta['levels'] == 0:
+        return np.zeros(shape, dtype=meta['dtype']), meta
+    return np.memmap(surface_file(folder, pair, channel), dtype=meta['dtype'], mode=mode, shape=shape), meta
 
-pivot = df.pivot_table(index="time_num", columns="price", values="volume", fill_value=0)
-X, Y = np.meshgrid(pivot.columns.values, pivot.index.values)
-Z = pivot.values
+def surface_axes(meta):
+    """
+    Liefert Zeitachse (Bucket-Beginn) und Preisachse einer Volume Surface
+    
+    Args:
+        meta (dict): Metadaten der Surface
+    """
+    times = pd.Timestamp(meta['start']) + pd.to_timedelta(np.arange(meta['rows']) * meta['bucket_minutes'], unit='min')
+    prices = (meta['level_origin'] + np.arange(meta['levels'])) * meta['level_size']
+    return pd.DatetimeIndex(times), prices
 
-# === 3D Plot erzeugen ===
-fig = plt.figure(figsize=(12, 8))
-ax = fig.add_subplot(111, projection='3d')
-surf = ax.plot_surface(X, Y, Z, cmap='viridis')
+def bin_ticks(timestamps, mid, volume, start, bucket_minutes, level_size):
+    """
+    Zählt Ticks und Volumen je (Zeit-Bucket, Preisstufe) in einem Durchlauf
+    
+    Zeilen und Preisstufen werden zu einem flachen Index kombiniert und mit
+    np.bincount aufsummiert. Das Ergebnis deckt nur den Bereich der übergebenen
+    Ticks ab.
+    
+    Args:
+        timestamps (pd.Series): Tick-Zeitstempel (zeitlich sortiert)
+        mid (np.ndarray): Mid-Preise
+        volume (np.ndarray): Tick-Volumen
+        start (pd.Timestamp): Beginn von Zeile 0 der Surface
+        bucket_minutes (int): Bucket-Länge in Minuten
+        level_size (float): Preisstufe in Preiseinheiten
+    
+    Returns:
+        tuple: Erste Zeile, erste Preisstufe, {'ticks': Block, 'volume': Block}
+    """
+    bucket = np.int64(bucket_minutes) * 60 * 10**9
+    offsets = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64) - pd.Timestamp(start).value
+    rows = offsets // bucket
+    levels = np.rint(mid / level_size).astype(np.int64)
+    
+    first_row, level_lo = rows.min(), levels.min()
+    n_rows, n_levels = int(rows.max() - first_row + 1), int(levels.max() - level_lo + 1)
+    flat = (rows - first_row) * n_levels + (levels - level_lo)
+    
+    blocks = {
+        'ticks': np.bincount(flat, minlength=n_rows * n_levels).reshape(n_rows, n_levels),
+        'volume': np.bincount(flat, weights=volume, minlength=n_rows * n_levels).reshape(n_rows, n_levels)
+    }
+    return int(first_row), int(level_lo), blocks
 
-ax.set_xlabel("Price")
-ax.set_ylabel("Time [h]")
-ax.set_zlabel("Volume")
-plt.title("EUR/USD Volume Surface")
+class VolumeSurfaceBuilder:
+    def __init__(self, bucket_minutes=60, level_pips=1.0, chunksize=1_000_000):
+        """
+        Initialisiert den Builder für Volume-at-Price Surfaces aus Tick-Daten
+        
+        Args:
+            bucket_minutes (int): Länge eines Zeit-Buckets in Minuten
+            level_pips (float): Breite einer Preisstufe in Pips
+            chunksize (int): Anzahl Ticks pro Chunk
+        """
+        self.console = Console()
+        self.tick_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/price_data/tick")
+        self.base_path = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/vol_surface")
+        self.image_path = self.base_path / "vol_surface_visual"
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.bucket_minutes = bucket_minutes
+        self.level_pips = level_pips
+        self.chunksize = chunksize
+    
+    def _save_meta(self, pair, meta):
+        """
+        Speichert die Metadaten einer Surface
+        
+        Args:
+            pair (str): Forex-Paar
+            meta (dict): Metadaten
+        """
+        with open(self.base_path / pair / f"{pair}_meta.json", 'w') as f:
+            json.dump(meta, f, indent=2)
+    
+    def _new_meta(self, pair, start):
+        """
+        Legt eine leere Surface an
+        
+        Args:
+            pair (str): Forex-Paar
+            start (pd.Timestamp): Beginn von Zeile 0
+        """
+        (self.base_path / pair).mkdir(parents=True, exist_ok=True)
+        for channel in CHANNELS:
+            surface_file(self.base_path, pair, channel).write_bytes(b'')
+        
+        meta = {
+            'pair': pair,
+            'bucket_minutes': self.bucket_minutes,
+            'level_size': pip_size(pair) * self.level_pips,
+            'level_origin': 0,
+            'levels': 0,
+            'start': pd.Timestamp(start).isoformat(),
+            'rows': 0,
+            'dtype': DTYPE,
+            'last_timestamp': None
+        }
+        self._save_meta(pair, meta)
+        return meta
+    
+    def _grow_levels(self, pair, meta, level_lo, level_hi):
+        """
+        Erweitert die Preisachse, damit [level_lo, level_hi] abgedeckt ist
+        
+        Die Achse wird mit Reserve erweitert, damit neue Hochs und Tiefs nur
+        selten ein Umkopieren der Dateien auslösen.
+        
+        Args:
+            pair (str): Forex-Paar
+            meta (dict): Metadaten (werden angepasst)
+            level_lo (int): Niedrigste benötigte Preisstufe
+            level_hi (int): Höchste benötigte Preisstufe
+        """
+        old_lo, old_n = meta['level_origin'], meta['levels']
+        old_hi = old_lo + old_n - 1
+        if old_n and level_lo >= old_lo and level_hi <= old_hi:
+            return
+        
+        if not old_n:
+            old_lo, old_hi = level_lo, level_hi
+        padding = max(64, (max(level_hi, old_hi) - min(level_lo, old_lo) + 1) // 4)
+        new_lo = level_lo - padding if not old_n or level_lo < old_lo else old_lo
+        new_hi = level_hi + padding if not old_n or level_hi > old_hi else old_hi
+        new_n = new_hi - new_lo + 1
+        
+        if meta['rows'] and old_n:
+            shift = old_lo - new_lo
+            for channel in CHANNELS:
+                path = surface_file(self.base_path, pair, channel)
+                tmp = path.with_suffix('.tmp')
+                old = np.memmap(path, dtype=meta['dtype'], mode='r', shape=(meta['rows'], old_n))
+                new = np.memmap(tmp, dtype=meta['dtype'], mode='w+', shape=(meta['rows'], new_n))
+                for row in range(0, meta['rows'], COPY_ROWS):
+                    new[row:row + COPY_ROWS, shift:shift + old_n] = old[row:row + COPY_ROWS]
+                new.flush()
+                del old, new
+                os.replace(tmp, path)
+        else:
+            for channel in CHANNELS:
+                with open(surface_file(self.base_path, pair, channel), 'r+b') as f:
+                    f.truncate(meta['rows'] * new_n * np.dtype(meta['dtype']).itemsize)
+        
+        meta['level_origin'], meta['levels'] = int(new_lo), int(new_n)
+    
+    def _add_block(self, pair, meta, first_row, level_lo, blocks, fresh_row):
+        """
+        Schreibt gebinnte Blöcke in die Surface
+        
+        Die Datei wird bei Bedarf mit Nullen verlängert. Zeilen ab fresh_row
+        wurden im laufenden Update noch nicht geschrieben und werden überschrieben,
+        so dass ein nach einem Abbruch wiederholter Block nicht doppelt zählt.
+        Davor liegende Zeilen (Chunkgrenze innerhalb eines Buckets) werden addiert.
+        
+        Args:
+            pair (str): Forex-Paar
+            meta (dict): Metadaten (werden angepasst)
+            first_row (int): Erste Zeile der Blöcke
+            level_lo (int): Erste Preisstufe der Blöcke
+            blocks (dict): Blöcke je Kanal
+            fresh_row (int): Erste Zeile, die in diesem Update noch nicht geschrieben wurde
+        """
+        n_rows, width = blocks['ticks'].shape
+        self._grow_levels(pair, meta, level_lo, level_lo + width - 1)
+        
+        itemsize = np.dtype(meta['dtype']).itemsize
+        rows = max(meta['rows'], first_row + n_rows)
+        column = level_lo - meta['level_origin']
+        split = min(max(fresh_row - first_row, 0), n_rows)
+        
+        for channel in CHANNELS:
+            path = surface_file(self.base_path, pair, channel)
+            with open(path, 'r+b') as f:
+                f.truncate(rows * meta['levels'] * itemsize)
+            target = np.memmap(
+                path, dtype=meta['dtype'], mode='r+',
+                offset=first_row * meta['levels'] * itemsize, shape=(n_rows, meta['levels'])
+            )
+            block = blocks[channel].astype(meta['dtype'])
+            target[:split, column:column + width] += block[:split]
+            target[split:] = 0
+            target[split:, column:column + width] = block[split:]
+            target.flush()
+            del target
+        
+        meta['rows'] = int(rows)
+    
+    def tick_files(self, pair):
+        """
+        Liefert die Tick-Dateien eines Paares nach Jahr sortiert
+        
+        Args:
+            pair (str): Forex-Paar
+        """
+        files = {}
+        for file in (self.tick_path / f"{pair}_tick").glob(f"{pair}_*.csv"):
+            suffix = file.stem.split('_')[-1]
+            if suffix.isdigit():
+                files[int(suffix)] = file
+        return [files[year] for year in sorted(files)]
+    
+    def update_pair(self, pair, rebuild=False, progress=None):
+        """
+        Ergänzt die Surface eines Paares um alle noch nicht verarbeiteten Ticks
+        
+        Das Update setzt am Beginn des letzten gespeicherten Buckets wieder an:
+        dessen Ticks werden erneut gelesen und der Bucket überschrieben, so dass
+        weder Ticks mit gleichem Zeitstempel verloren gehen noch ein nach einem
+        Abbruch wiederholter Block doppelt zählt. Ältere Buckets bleiben
+        unverändert, Jahresdateien vor dem Wiederaufsetzpunkt werden nicht gelesen.
+        
+        Args:
+            pair (str): Forex-Paar
+            rebuild (bool): Surface verwerfen und komplett neu aufbauen
+            progress (Progress, optional): Rich Progress für die Dateien
+        
+        Returns:
+            dict: Anzahl neuer Ticks und Tage oder None bei Fehlern
+        """
+        try:
+            meta = None if rebuild else load_surface_meta(self.base_path, pair)
+            
+            if meta and (meta['bucket_minutes'] != self.bucket_minutes or not np.isclose(meta['level_size'], pip_size(pair) * self.level_pips)):
+                self.console.print(
+                    f"[yellow]Warnung: {pair} existiert mit {meta['bucket_minutes']} Min / {meta['level_size']} Preisstufe, "
+                    f"verwende diese Auflösung (--rebuild für eine neue)[/yellow]"
+                )
+            
+            # Wiederaufsetzen am Beginn des letzten (evtl. unvollständigen) Buckets
+            resume_row, resume, known_ticks = 0, None, 0
+            if meta and meta['rows']:
+                resume_row = meta['rows'] - 1
+                resume = pd.Timestamp(meta['start']) + pd.Timedelta(minutes=resume_row * meta['bucket_minutes'])
+                ticks, _ = open_surface(self.base_path, pair, 'ticks')
+                known_ticks = int(np.asarray(ticks[resume_row]).sum())
+                del ticks
+            
+            files = [file for file in self.tick_files(pair) if resume is None or int(file.stem.split('_')[-1]) >= resume.year]
+            
+            task = progress.add_task(f"[cyan]{pair}...", total=len(files)) if progress else None
+            fresh_row, new_ticks, new_days = resume_row, 0, set()
+            
+            for file in files:
+                for chunk in pd.read_csv(file, usecols=['timestamp', 'bid', 'ask', 'bid_volume', 'ask_volume'], chunksize=self.chunksize):
+                    timestamps = pd.to_datetime(chunk['timestamp'], format='ISO8601')
+                    if resume is not None:
+                        fresh = (timestamps >= resume).to_numpy()
+                        if not fresh.any():
+                            continue
+                        chunk, timestamps = chunk[fresh], timestamps[fresh]
+                    
+                    if meta is None:
+                        meta = self._new_meta(pair, timestamps.iloc[0].normalize())
+                    
+                    mid = (chunk['bid'].to_numpy() + chunk['ask'].to_numpy()) / 2
+                    volume = (chunk['bid_volume'] + chunk['ask_volume']).to_numpy()
+                    
+                    # Fehlerhafte Ticks würden die Preisachse unbrauchbar weit aufspannen
+                    valid = np.isfinite(mid) & (mid > 0)
+                    if not valid.any():
+                        continue
+                    first_row, level_lo, blocks = bin_ticks(
+                        timestamps[valid], mid[valid], volume[valid], meta['start'], meta['bucket_minutes'], meta['level_size']
+                    )
+                    self._add_block(pair, meta, first_row, level_lo, blocks, fresh_row)
+                    fresh_row = first_row + blocks['ticks'].shape[0]
+                    
+                    meta['last_timestamp'] = timestamps.max().isoformat()
+                    self._save_meta(pair, meta)
+                    
+                    new_ticks += int(valid.sum())
+                    new_days.update(timestamps.dt.normalize().unique())
+                
+                if task is not None:
+                    progress.update(task, advance=1)
+            
+            # Die Ticks des wieder gelesenen Buckets waren schon gezählt
+            return {'ticks': max(new_ticks - known_ticks, 0), 'days': len(new_days)}
+        
+        except Exception as e:
+            self.console.print(f"[red]Fehler beim Aufbau der Volume Surface für {pair}: {str(e)}[/red]")
+            return None
+    
+    def plot_recent(self, pair, days=5):
+        """
+        Speichert eine Heatmap der letzten Tage als PNG
+        
+        Args:
+            pair (str): Forex-Paar
+            days (int): Anzahl Tage
+        """
+        volume, meta = open_surface(self.base_path, pair)
+        if volume is None or meta['rows'] == 0:
+            return None
+        
+        rows = min(meta['rows'], days * 24 * 60 // meta['bucket_minutes'])
+        recent = np.asarray(volume[-rows:])
+        occupied = np.flatnonzero(recent.any(axis=0))
+        if occupied.size == 0:
+            self.console.print(f"[yellow]Warnung: Kein Volumen für {pair} in den letzten {days} Tagen, keine Grafik erstellt[/yellow]")
+            return None
+        recent = recent[:, occupied.min():occupied.max() + 1]
+        
+        times, prices = surface_axes(meta)
+        prices = prices[occupied.min():occupied.max() + 1]
+        
+        fig, ax = plt.subplots(figsize=(12, 8))
+        image = ax.imshow(
+            recent.T, origin='lower', aspect='auto', cmap='viridis',
+            extent=[0, rows * meta['bucket_minutes'] / 60, prices[0], prices[-1]]
+        )
+        ax.set_xlabel(f"Zeit [h] ab {times[-rows].strftime('%Y-%m-%d %H:%M')}")
+        ax.set_ylabel("Preis")
+        ax.set_title(f"{pair} Volume Surface")
+        fig.colorbar(image, ax=ax, label="Volumen")
+        
+        self.image_path.mkdir(parents=True, exist_ok=True)
+        image_file = self.image_path / f"{pair.lower()}_volume_surface.png"
+        fig.savefig(image_file, dpi=150)
+        plt.close(fig)
+        return image_file
+    
+    def update(self, pairs=None, rebuild=False, plot=False, plot_days=5):
+        """
+        Aktualisiert die Volume Surfaces mehrerer Paare
+        
+        Args:
+            pairs (list, optional): Liste von Forex-Paaren
+            rebuild (bool): Surfaces komplett neu aufbauen
+            plot (bool): Heatmap der letzten Tage speichern
+            plot_days (int): Anzahl Tage für die Heatmap
+        """
+        pairs = [pair.upper() for pair in (pairs or PAIRS)]
+        
+        results = {}
+        with Progress() as progress:
+            for pair in pairs:
+                results[pair] = self.update_pair(pair, rebuild, progress)
+        
+        table = Table(title="Volume Surfaces")
+        table.add_column("Paar", style="cyan")
+        table.add_column("Zeitraum", style="green")
+        table.add_column("Buckets × Stufen", style="green")
+        table.add_column("Neue Ticks", style="green")
+        table.add_column("Neue Tage", style="green")
+        table.add_column("POC (letzter Tag)", style="green")
+        
+        for pair, result in results.items():
+            volume, meta = open_surface(self.base_path, pair)
+            if result is None or volume is None or meta['rows'] == 0:
+                table.add_row(pair, "-", "-", "-", "-", "-")
+                continue
+            
+            times, prices = surface_axes(meta)
+            last_day = np.asarray(volume[-(24 * 60 // meta['bucket_minutes']):]).sum(axis=0)
+            
+            table.add_row(
+                pair,
+                f"{times[0].strftime('%Y-%m-%d')} bis {pd.Timestamp(meta['last_timestamp']).strftime('%Y-%m-%d')}",
+                f"{meta['rows']:,} × {meta['levels']:,}",
+                f"{result['ticks']:,}",
+                str(result['days']),
+                f"{prices[np.argmax(last_day)]:.5g}" if last_day.any() else "-"
+            )
+            
+            if plot:
+                image_file = self.plot_recent(pair, plot_days)
+                if image_file:
+                    self.console.print(f"[green]Grafik gespeichert: {image_file}[/green]")
+        
+        self.console.print(table)
+        return results
 
-# === Grafik als PNG speichern ===
-image_path = os.path.join(output_image_folder, image_name)
-plt.savefig(image_path, dpi=300)
-plt.close()
+def main():
+    parser = argparse.ArgumentParser(description='Volume-at-Price Surface aus Tick-Daten')
+    parser.add_argument('--pairs', nargs='+', help='Liste von Forex-Paaren (z.B. EURUSD USDJPY)')
+    parser.add_argument('--bucket-minutes', type=int, default=60, help='Länge eines Zeit-Buckets in Minuten')
+    parser.add_argument('--level-pips', type=float, default=1.0, help='Breite einer Preisstufe in Pips')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Anzahl Ticks pro Chunk')
+    parser.add_argument('--rebuild', action='store_true', help='Surfaces komplett neu aufbauen')
+    parser.add_argument('--plot', action='store_true', help='Heatmap der letzten Tage als PNG speichern')
+    parser.add_argument('--plot-days', type=int, default=5, help='Anzahl Tage für die Heatmap')
+    
+    args = parser.parse_args()
+    
+    try:
+        builder = VolumeSurfaceBuilder(
+            bucket_minutes=args.bucket_minutes,
+            level_pips=args.level_pips,
+            chunksize=args.chunksize
+        )
+        builder.update(pairs=args.pairs, rebuild=args.rebuild, plot=args.plot, plot_days=args.plot_days)
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
 
-print(f"[✓] Grafik gespeichert unter: {image_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,65 +1,308 @@
-# volume_surface_visualizer.py
-
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
-from matplotlib.widgets import Slider, Button
+import matplotlib.pyplot as plt
+from matplotlib.widgets import Slider, Button, RangeSlider
+import json
+import time
 from pathlib import Path
+import argparse
+from rich.console import Console
+from rich import print as rprint
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from volatility_surface_fetcher import open_surface, surface_axes, COPY_ROWS
+
+MIN_PYRAMID_SIZE = 64
+PIXELS_PER_CELL = 8
+MAX_MESH = 150
+
+def block_reduce(array, row_factor, col_factor):
+    """
+    Mittelt ein 2D-Array über Blöcke von row_factor × col_factor Zellen
+    
+    Unvollständige Randblöcke werden mit Nullen aufgefüllt.
+    
+    Args:
+        array (np.ndarray): 2D-Array
+        row_factor (int): Blockhöhe
+        col_factor (int): Blockbreite
+    """
+    if row_factor == 1 and col_factor == 1:
+        return np.asarray(array, dtype=np.float32)
+    
+    rows, cols = array.shape
+    padded = np.zeros((-(-rows // row_factor) * row_factor, -(-cols // col_factor) * col_factor), dtype=np.float32)
+    padded[:rows, :cols] = array
+    return padded.reshape(padded.shape[0] // row_factor, row_factor, padded.shape[1] // col_factor, col_factor).mean(axis=(1, 3))
+
+class SurfacePyramid:
+    def __init__(self, folder, pair, channel='volume', console=None):
+        """
+        Lädt eine Volume Surface als Memory-Map samt Auflösungspyramide
+        
+        Stufe 0 ist die Surface selbst, jede weitere Stufe mittelt 2×2 Zellen
+        der vorherigen. Die Stufen werden als .npy neben der Surface gespeichert
+        und nur neu berechnet, wenn sich die Surface geändert hat.
+        
+        Args:
+            folder (Path): Basisordner der Volume Surfaces
+            pair (str): Forex-Paar
+            channel (str): 'ticks' oder 'volume'
+            console (Console, optional): Rich Console für Statusmeldungen
+        """
+        self.console = console or Console()
+        surface, self.meta = open_surface(folder, pair, channel)
+        if surface is None or self.meta['rows'] == 0:
+            raise FileNotFoundError(f"Keine Volume Surface für {pair} in {folder}")
+        
+        self.times, self.prices = surface_axes(self.meta)
+        self.hours = (self.times - self.times[0]).total_seconds().to_numpy() / 3600
+        self.pyramid_path = Path(folder) / pair / "pyramid"
+        self.prefix = f"{pair}_{channel}"
+        self.levels = [surface] + self._load_or_build(surface)
+        
+        # Die Preisachse ist mit Reserve angelegt, angezeigt wird nur der belegte Bereich
+        level = min(2, len(self.levels) - 1)
+        factor = 2 ** level
+        occupied = np.flatnonzero(np.asarray(self.levels[level]).any(axis=0))
+        if occupied.size == 0:
+            self.console.print(f"[yellow]Warnung: Volume Surface für {pair} ({channel}) enthält nur Nullen[/yellow]")
+            self.col_range = (0, self.meta['levels'])
+        else:
+            self.col_range = (int(occupied.min()) * factor, min(int(occupied.max() + 1) * factor, self.meta['levels']))
+    
+    def _key(self):
+        """
+        Kennung des Surface-Stands, für den die Pyramide gilt
+        """
+        return {name: self.meta[name] for name in ('rows', 'levels', 'level_origin', 'last_timestamp')}
+    
+    def _load_or_build(self, surface):
+        """
+        Lädt die gespeicherten Pyramidenstufen oder berechnet sie neu
+        
+        Args:
+            surface (np.memmap): Stufe 0
+        """
+        key_file = self.pyramid_path / f"{self.prefix}_pyramid.json"
+        if key_file.exists():
+            with open(key_file) as f:
+                stored = json.load(f)
+            files = [self.pyramid_path / f"{self.prefix}_{level}.npy" for level in range(1, stored['count'] + 1)]
+            if stored['key'] == self._key() and all(file.exists() for file in files):
+                return [np.load(file, mmap_mode='r') for file in files]
+        
+        start = time.perf_counter()
+        self.pyramid_path.mkdir(parents=True, exist_ok=True)
+        
+        levels = []
+        if max(surface.shape) > MIN_PYRAMID_SIZE:
+            # Stufe 1 blockweise aus der Memory-Map, damit die Surface nie ganz im Speicher liegt
+            levels.append(np.concatenate([
+                block_reduce(surface[row:row + COPY_ROWS], 2, 2) for row in range(0, surface.shape[0], COPY_ROWS)
+            ]))
+        while levels and max(levels[-1].shape) > MIN_PYRAMID_SIZE:
+            levels.append(block_reduce(levels[-1], 2, 2))
+        
+        for level, array in enumerate(levels, start=1):
+            np.save(self.pyramid_path / f"{self.prefix}_{level}.npy", array)
+        with open(key_file, 'w') as f:
+            json.dump({'key': self._key(), 'count': len(levels)}, f, indent=2)
+        
+        self.console.print(f"[green]Pyramide mit {len(levels)} Stufen in {time.perf_counter() - start:.2f}s berechnet[/green]")
+        return levels
+    
+    def window(self, row_range, col_range, target_rows, target_cols):
+        """
+        Liefert einen Ausschnitt mit höchstens target_rows × target_cols Zellen
+        
+        Gewählt wird die gröbste Pyramidenstufe, die noch mindestens die
+        Zielauflösung hat; der Rest wird im Ausschnitt gemittelt.
+        
+        Args:
+            row_range (tuple): Zeilen (Zeit-Buckets) [von, bis) auf Stufe 0
+            col_range (tuple): Spalten (Preisstufen) [von, bis) auf Stufe 0
+            target_rows (int): Maximale Anzahl Zeilen im Mesh
+            target_cols (int): Maximale Anzahl Spalten im Mesh
+        
+        Returns:
+            tuple: Stunden (Zeilenmitten), Preise (Spaltenmitten), Werte, (Zeilen, Spalten) je Mesh-Zelle
+        """
+        r0, r1 = row_range
+        c0, c1 = col_range
+        need = min((r1 - r0) / target_rows, (c1 - c0) / target_cols)
+        level = int(np.clip(np.floor(np.log2(max(need, 1))), 0, len(self.levels) - 1))
+        factor = 2 ** level
+        
+        lr0, lr1 = r0 // factor, -(-r1 // factor)
+        lc0, lc1 = c0 // factor, -(-c1 // factor)
+        data = self.levels[level][lr0:lr1, lc0:lc1]
+        
+        row_factor = max(1, -(-data.shape[0] // target_rows))
+        col_factor = max(1, -(-data.shape[1] // target_cols))
+        values = block_reduce(data, row_factor, col_factor)
+        
+        row_step, col_step = factor * row_factor, factor * col_factor
+        row_centers = lr0 * factor + (np.arange(values.shape[0]) + 0.5) * row_step - 0.5
+        col_centers = lc0 * factor + (np.arange(values.shape[1]) + 0.5) * col_step - 0.5
+        
+        hours = row_centers * self.meta['bucket_minutes'] / 60
+        prices = (self.meta['level_origin'] + col_centers) * self.meta['level_size']
+        return hours, prices, values, (row_step, col_step)
+
+class VolumeSurfaceViewer:
+    def __init__(self, pyramid, pair, max_mesh=MAX_MESH):
+        """
+        Interaktiver 3D-Plot einer Volume Surface mit Level-of-Detail
+        
+        Gerendert wird immer nur ein auf den Viewport zugeschnittenes Mesh des
+        sichtbaren Ausschnitts. Zoom (Mausrad oder Bereichs-Slider) lädt den
+        Ausschnitt in feinerer Auflösung nach.
+        
+        Args:
+            pyramid (SurfacePyramid): Surface mit Pyramide
+            pair (str): Forex-Paar
+            max_mesh (int): Maximale Mesh-Größe je Achse
+        """
+        self.pyramid = pyramid
+        self.pair = pair
+        self.max_mesh = max_mesh
+        self.surface = None
+        self.colorbar = None
+        self._updating = False
+        
+        self.fig = plt.figure(figsize=(12, 10))
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        self.fig.subplots_adjust(bottom=0.27)
+        
+        hours, prices = pyramid.hours, pyramid.prices
+        c0, c1 = pyramid.col_range
+        self.full_time = (hours[0], hours[-1])
+        self.full_price = (prices[c0], prices[c1 - 1])
+        
+        self.time_slider = RangeSlider(self.fig.add_axes([0.25, 0.19, 0.65, 0.03]), 'Zeit [h]', *self.full_time, valinit=self.full_time)
+        self.price_slider = RangeSlider(self.fig.add_axes([0.25, 0.15, 0.65, 0.03]), 'Preis', *self.full_price, valinit=self.full_price)
+        self.elev_slider = Slider(self.fig.add_axes([0.25, 0.1, 0.65, 0.03]), 'Elevation', 0, 180, valinit=30)
+        self.azim_slider = Slider(self.fig.add_axes([0.25, 0.05, 0.65, 0.03]), 'Azimuth', 0, 360, valinit=45)
+        self.reset_button = Button(self.fig.add_axes([0.8, 0.005, 0.1, 0.04]), 'Reset', color='lightgoldenrodyellow', hovercolor='0.975')
+        
+        self.time_slider.on_changed(lambda val: self.render())
+        self.price_slider.on_changed(lambda val: self.render())
+        self.elev_slider.on_changed(self.rotate)
+        self.azim_slider.on_changed(self.rotate)
+        self.reset_button.on_clicked(self.reset)
+        self.fig.canvas.mpl_connect('scroll_event', self.zoom)
+        
+        self.ax.view_init(self.elev_slider.val, self.azim_slider.val)
+        self.render()
+    
+    def _target_mesh(self):
+        """
+        Mesh-Größe aus der Pixelbreite der Achse
+        """
+        width = self.ax.get_window_extent().width
+        cells = int(np.clip(width // PIXELS_PER_CELL, 16, self.max_mesh))
+        return cells, cells
+    
+    def render(self):
+        """
+        Rendert den sichtbaren Ausschnitt in Viewport-Auflösung
+        """
+        if self._updating:
+            return
 
-# === Einstellungen ===
-input_folder = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/vol_surface")
-file_name = "eurusd_volume_surface.csv"
+        hours, prices = self.pyramid.hours, self.pyramid.prices
+        t0, t1 = self.time_slider.val
+        p0, p1 = self.price_slider.val
+        r0, r1 = np.searchsorted(hours, t0, side='left'), np.searchsorted(hours, t1, side='right')
+        c0, c1 = np.searchsorted(prices, p0 - 1e-12, side='left'), np.searchsorted(prices, p1 + 1e-12, side='right')
+        r1, c1 = max(r1, r0 + 2), max(c1, c0 + 2)
 
-# === Daten laden ===
-csv_path = input_folder / file_name
-print(f"Versuche zu laden: {csv_path}")
-df = pd.read_csv(csv_path)
-df['timestamp'] = pd.to_datetime(df['timestamp'])
+        target_rows, target_cols = self._target_mesh()
+        mesh_hours, mesh_prices, values, (row_step, col_step) = self.pyramid.window((r0, r1), (c0, c1), target_rows, target_cols)
+        X, Y = np.meshgrid(mesh_prices, mesh_hours)
 
-# === Zeit in Zahlen umwandeln für 3D-Plots ===
-df["time_num"] = (df["timestamp"] - df["timestamp"].min()).dt.total_seconds() / 3600  # in Stunden
+        if self.surface is not None:
+            self.surface.remove()
+        self.surface = self.ax.plot_surface(X, Y, values, cmap='viridis', rstride=1, cstride=1, linewidth=0, antialiased=False)
 
-# === Gitter für 3D-Plot ===
-pivot_table = df.pivot_table(index="time_num", columns="price", values="volume", fill_value=0)
-X, Y = np.meshgrid(pivot_table.columns.values, pivot_table.index.values)
-Z = pivot_table.values
+        if self.colorbar is None:
+            self.colorbar = self.fig.colorbar(self.surface, ax=self.ax, shrink=0.5, aspect=10)
+        else:
+            self.colorbar.update_normal(self.surface)
 
-# === 3D Plot erstellen ===
-fig = plt.figure(figsize=(12, 10)) # Größe angepasst für Slider
-ax = fig.add_subplot(111, projection='3d')
-surf = ax.plot_surface(X, Y, Z, cmap="viridis")
+        self.ax.set_xlim(mesh_prices[0], mesh_prices[-1])
+        self.ax.set_ylim(mesh_hours[0], mesh_hours[-1])
+        self.ax.set_zlim(0, max(float(values.max()), 1e-9))
+        self.ax.set_xlabel("Price")
+        self.ax.set_ylabel(f"Time [h] ab {self.pyramid.times[0].strftime('%Y-%m-%d %H:%M')}")
+        self.ax.set_zlabel("Volume")
+        self.ax.set_title(
+            f"Volume Surface - {self.pair}  ({values.shape[0]}×{values.shape[1]} Mesh, "
+            f"{row_step} Buckets × {col_step} Stufen je Zelle)"
+        )
+        self.fig.canvas.draw_idle()
 
-ax.set_xlabel("Price")
-ax.set_ylabel("Time [hours]")
-ax.set_zlabel("Volume")
-plt.title("Volume Surface - EUR/USD")
-plt.colorbar(surf, shrink=0.5, aspect=10)
+    def rotate(self, val):
+        """
+        Aktualisiert den Blickwinkel aus den Slidern
+        """
+        self.ax.view_init(self.elev_slider.val, self.azim_slider.val)
+        self.fig.canvas.draw_idle()
 
-# Füge Slider für die Rotation hinzu
-ax_elev = plt.axes([0.25, 0.1, 0.65, 0.03])
-ax_azim = plt.axes([0.25, 0.05, 0.65, 0.03])
+    def zoom(self, event):
+        """
+        Zoomt Zeit- und Preisbereich um ihre Mitte (Mausrad)
+        """
+        scale = 0.8 if event.button == 'up' else 1.25
+        self._updating = True
+        for slider, (low, high) in ((self.time_slider, self.full_time), (self.price_slider, self.full_price)):
+            v0, v1 = slider.val
+            center, half = (v0 + v1) / 2, (v1 - v0) / 2 * scale
+            slider.set_val((max(low, center - half), min(high, center + half)))
+        self._updating = False
+        self.render()
 
-elev_slider = Slider(ax_elev, 'Elevation', 0, 180, valinit=30)
-azim_slider = Slider(ax_azim, 'Azimuth', 0, 360, valinit=45)
+    def reset(self, event):
+        """
+        Setzt Ausschnitt und Blickwinkel zurück
+        """
+        self._updating = True
+        self.time_slider.set_val(self.full_time)
+        self.price_slider.set_val(self.full_price)
+        self.elev_slider.reset()
+        self.azim_slider.reset()
+        self._updating = False
+        self.render()
 
-def update(val):
-    ax.view_init(elev_slider.val, azim_slider.val)
-    fig.canvas.draw_idle()
+def main():
+    parser = argparse.ArgumentParser(description='3D-Visualisierung einer Volume Surface mit Level-of-Detail')
+    parser.add_argument('--pair', default='EURUSD', help='Forex-Paar (z.B. EURUSD)')
+    parser.add_argument('--channel', default='volume', choices=['volume', 'ticks'], help='Dargestellter Kanal')
+    parser.add_argument('--max-mesh', type=int, default=MAX_MESH, help='Maximale Mesh-Größe je Achse')
+    parser.add_argument('--output', help='Grafik als PNG speichern statt interaktiv anzuzeigen')
 
-elev_slider.on_changed(update)
-azim_slider.on_changed(update)
+    args = parser.parse_args()
 
-# Füge Reset-Button hinzu
-reset_ax = plt.axes([0.8, 0.025, 0.1, 0.04])
-button = Button(reset_ax, 'Reset', color='lightgoldenrodyellow', hovercolor='0.975')
+    try:
+        console = Console()
+        folder = Path("/Users/josua/Documents/Coding/JosiTosi-quant-code/1.00-Data/forex_data/volatility_data/vol_surface")
 
-def reset(event):
-    elev_slider.reset()
-    azim_slider.reset()
+        start = time.perf_counter()
+        pyramid = SurfacePyramid(folder, args.pair.upper(), args.channel, console)
+        viewer = VolumeSurfaceViewer(pyramid, args.pair.upper(), args.max_mesh)
+        console.print(
+            f"[green]{pyramid.meta['rows']:,} × {pyramid.meta['levels']:,} Surface geladen "
+            f"({len(pyramid.levels)} Stufen) in {time.perf_counter() - start:.2f}s[/green]"
+        )
 
-button.on_clicked(reset)
+        if args.output:
+            viewer.fig.savefig(args.output, dpi=150)
+            console.print(f"[green]Grafik gespeichert: {args.output}[/green]")
+        else:
+            plt.show()
+    except Exception as e:
+        rprint(f"[red]Fehler: {str(e)}[/red]")
 
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file